@@ -8,7 +8,7 @@ Touches:
   PgUp/PgDn      : Page précédente/suivante
   Home/End       : Début/fin de la liste
   ENTER          : Voir les détails d'un paquet
-  /              : Rechercher
+  /              : Rechercher (index plein texte : mots préfixes, sans casse ni accents)
   f              : Filtrer par type
   e              : Filtrer chiffrement
   s              : Inverser l'ordre de tri
@@ -33,6 +33,12 @@ import json
 import re
 import csv
 import os
+import logging
+
+try:
+    from traffic_persistence import TrafficPersistence
+except ImportError:
+    TrafficPersistence = None  # Recherche par LIKE uniquement
 
 
 class TrafficDBBrowser:
@@ -54,18 +60,58 @@ class TrafficDBBrowser:
         self.detail_mode = False
         self.detail_scroll = 0
         self._node_name_cache = {}  # Cache for node name lookups
+        self.persistence = None  # Lecture seule, pour la recherche plein texte
 
     def connect_db(self):
         """Connexion à la base de données"""
         try:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row
-            return True
         except Exception as e:
             return False
 
+        if TrafficPersistence is not None:
+            # Pas de journal sur le terminal curses
+            logging.getLogger('traffic_persistence').addHandler(logging.NullHandler())
+            try:
+                self.persistence = TrafficPersistence(self.db_path, read_only=True)
+            except Exception:
+                self.persistence = None
+        return True
+
+    def search_items(self, table, keep=None):
+        """
+        Recherche '/' via TrafficPersistence.search_messages (index FTS5).
+
+        Args:
+            table: Table interrogée (packets, public_messages, meshcore_packets)
+            keep: Filtre supplémentaire sur chaque ligne (type, chiffrement, nœud)
+        """
+        rows = self.persistence.search_messages(self.search_term, limit=1000, tables=[table])
+        if keep:
+            rows = [row for row in rows if keep(row)]
+        if self.sort_order == 'asc':
+            rows.reverse()
+        self.items = rows
+
+    def matches_packet_filters(self, row):
+        """Filtres type / chiffrement / nœud appliqués aux résultats d'une recherche"""
+        if self.filter_type and row.get('packet_type') != self.filter_type:
+            return False
+        if self.filter_encrypted == 'only' and not row.get('is_encrypted'):
+            return False
+        if self.filter_encrypted == 'exclude' and row.get('is_encrypted'):
+            return False
+        if self.filter_node and str(row.get('from_id')) != str(self.filter_node):
+            return False
+        return True
+
     def load_packets(self):
         """Charge les paquets depuis la DB"""
+        if self.search_term and self.persistence:
+            self.search_items('packets', self.matches_packet_filters)
+            return
+
         cursor = self.conn.cursor()
 
         query = 'SELECT * FROM packets'
@@ -106,6 +152,10 @@ class TrafficDBBrowser:
 
     def load_messages(self):
         """Charge les messages publics depuis la DB (Meshtastic uniquement)"""
+        if self.search_term and self.persistence:
+            self.search_items('public_messages', lambda row: row.get('source') != 'meshcore')
+            return
+
         cursor = self.conn.cursor()
 
         query = 'SELECT * FROM public_messages'
@@ -177,6 +227,10 @@ class TrafficDBBrowser:
 
     def load_meshcore_packets(self):
         """Charge les paquets MeshCore depuis la DB"""
+        if self.search_term and self.persistence:
+            self.search_items('meshcore_packets', self.matches_packet_filters)
+            return
+
         cursor = self.conn.cursor()
         
         try:
@@ -221,6 +275,10 @@ class TrafficDBBrowser:
 
     def load_meshcore_messages(self):
         """Charge les messages MeshCore depuis la DB (TEXT_MESSAGE_APP uniquement)"""
+        if self.search_term and self.persistence:
+            self.search_items('meshcore_packets')
+            return
+
         cursor = self.conn.cursor()
         
         try:
@@ -790,7 +848,7 @@ class TrafficDBBrowser:
             "",
             "Actions:",
             "  ENTER           - View full details of selected item",
-            "  /               - Search text in messages (type text + ENTER)",
+            "  /               - Search words in messages (full-text index, word prefixes)",
             "                    Press ESC to cancel search input",
             "  f               - Filter by packet type (packets view only)",
             "  e               - Filter encryption (all/only/exclude encrypted)",
@@ -1513,6 +1571,8 @@ def main():
     finally:
         if browser.conn:
             browser.conn.close()
+        if browser.persistence:
+            browser.persistence.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exécution des commandes mesh sur un pool de threads borné.
+
+Une commande /bot attend llama.cpp jusqu'à MESH_AI_CONFIG['timeout'], /weather
+appelle curl, send_chunks dort entre les morceaux : exécutée sur le thread de
+réception, elle bloquait tous les paquets suivants. Les commandes sont donc
+confiées à un pool de workers :
+
+- FIFO par émetteur : une seule commande à la fois par émetteur, dans l'ordre ;
+- plafond de concurrence par classe de commande (LLM, réseau, rapports base
+  de données, commandes légères) : un afflux de /bot n'occupe pas tout le pool ;
+- délai maximal par classe : au-delà, la commande est abandonnée par le pool
+  (l'émetteur est débloqué, un worker de remplacement est créé) ;
+- mesures par commande : attente en file et durée d'exécution.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional
+from utils import debug_print, info_print, error_print
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Classe de chaque commande (premier mot, en minuscules) ; les autres sont 'cheap'
+COMMAND_CLASSES = {
+    '/bot': 'llm', '/ia': 'llm',
+    '/weather': 'network', '/rain': 'network', '/vigi': 'network', '/power': 'network',
+    '/trace': 'network', '/info': 'network', '/keys': 'network', '/nodes': 'network',
+    '/nodemt': 'network', '/meshcore': 'network', '/rebootnode': 'network',
+    '/stats': 'db', '/db': 'db', '/top': 'db', '/histo': 'db', '/trafic': 'db',
+    '/trafficmt': 'db', '/trafficmc': 'db', '/packets': 'db', '/graphs': 'db',
+    '/propag': 'db', '/neighbors': 'db', '/nodesmc': 'db',
+}
+
+DEFAULT_CLASS_LIMITS = {'llm': 1, 'network': 2, 'db': 2, 'cheap': 4}
+DEFAULT_TIMEOUTS = {'llm': 180, 'network': 60, 'db': 60, 'cheap': 30}
+
+
+def command_name(message: str) -> str:
+    """
+    Commande d'un message ('/bot', '/stats'...), '' si ce n'est pas une commande.
+
+    Les messages de canal MeshCore sont préfixés par l'émetteur ("Tigro: /echo test").
+    """
+    text = message.strip()
+    if not text.startswith('/') and ': /' in text:
+        text = text.split(': ', 1)[1]
+    if not text.startswith('/'):
+        return ''
+    return text.split()[0].lower()
+
+
+def command_class(message: str) -> str:
+    """Classe de concurrence d'un message ('llm', 'network', 'db' ou 'cheap')."""
+    return COMMAND_CLASSES.get(command_name(message), 'cheap')
+
+
+class _Job:
+    __slots__ = ('seq', 'sender', 'command', 'cls', 'func', 'args', 'enqueued_at', 'started_at', 'timed_out')
+
+    def __init__(self, seq, sender, command, cls, func, args):
+        self.seq = seq
+        self.sender = sender
+        self.command = command
+        self.cls = cls
+        self.func = func
+        self.args = args
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+        self.timed_out = False
+
+
+class CommandExecutor:
+    """
+    Pool de workers pour les commandes, avec ordre par émetteur et plafonds par classe.
+
+    Tant que start() n'a pas été appelé, `running` est False : l'appelant exécute
+    alors la commande en ligne (tests, CLI).
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        class_limits: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_pending: int = 100,
+        max_pending_per_sender: int = 5
+    ):
+        """
+        Args:
+            workers: Nombre de threads du pool
+            class_limits: Commandes simultanées max par classe (défaut DEFAULT_CLASS_LIMITS)
+            timeouts: Délai max d'exécution par classe en secondes (défaut DEFAULT_TIMEOUTS)
+            max_pending: Commandes en attente max (au-delà: refus)
+            max_pending_per_sender: Commandes en attente max par émetteur (au-delà: refus)
+        """
+        self.workers = max(1, workers)
+        self.class_limits = dict(DEFAULT_CLASS_LIMITS, **(class_limits or {}))
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.max_pending = max_pending
+        self.max_pending_per_sender = max_pending_per_sender
+        self.running = False
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._sender_queues: Dict[Hashable, deque] = {}  # émetteur -> commandes en attente
+        self._busy_senders = set()                      # émetteurs dont une commande s'exécute
+        self._ready = deque()                            # têtes de file des émetteurs libres
+        self._running_jobs: Dict[int, _Job] = {}
+        self._class_running = defaultdict(int)
+        self._pending = 0
+        self._threads = []
+        self._target_workers = 0
+        self._watchdog = None
+
+        # Compteurs pour statistiques
+        self.rejected = 0
+        self.timeouts_count = 0
+        self._metrics: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'count': 0, 'errors': 0, 'timeouts': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0,
+                     'exec_ms': 0.0, 'max_exec_ms': 0.0})
+
+    def start(self):
+        """Démarre les workers et le chien de garde des délais."""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._target_workers = self.workers
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._watchdog = threading.Thread(target=self._watchdog_loop, name="CommandWatchdog", daemon=True)
+        self._watchdog.start()
+        debug_print(f"⚙️ Exécuteur de commandes démarré: {self.workers} workers, plafonds {self.class_limits}")
+
+    def _spawn_worker(self):
+        thread = threading.Thread(target=self._worker_loop, name=f"CommandWorker-{len(self._threads)}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def submit(self, sender: Hashable, message: str, func: Callable[..., Any], *args) -> bool:
+        """
+        Met une commande en file derrière les commandes en attente du même émetteur.
+
+        Args:
+            sender: Identifiant de l'émetteur (ordre FIFO par émetteur)
+            message: Texte du message (classe et nom de la commande pour les mesures)
+            func: Fonction à exécuter avec *args
+
+        Returns:
+            bool: False si la commande est refusée (file pleine)
+        """
+        job = _Job(next(self._seq), sender, command_name(message) or '(texte)', command_class(message), func, args)
+        with self._cond:
+            queue = self._sender_queues.get(sender)
+            if self._pending >= self.max_pending or (queue and len(queue) >= self.max_pending_per_sender):
+                self.rejected += 1
+                error_print(f"⚠️ Commande {job.command} refusée: file pleine ({self._pending} en attente)")
+                return False
+            if queue is None:
+                queue = self._sender_queues[sender] = deque()
+            queue.append(job)
+            self._pending += 1
+            # Émetteur libre : sa commande est prête immédiatement
+            if sender not in self._busy_senders and len(queue) == 1:
+                self._ready.append(job)
+                self._cond.notify_all()
+        return True
+
+    def _next_job(self) -> Optional[_Job]:
+        """Première commande prête dont la classe a une place libre (sous verrou)."""
+        for job in self._ready:
+            if self._class_running[job.cls] < self.class_limits.get(job.cls, 1):
+                self._ready.remove(job)
+                return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = None
+                while self.running and len(self._threads) <= self._target_workers + self._extra_allowed():
+                    job = self._next_job()
+                    if job:
+                        break
+                    self._cond.wait(timeout=1.0)
+                if job is None:
+                    self._threads.remove(threading.current_thread())
+                    return
+                self._sender_queues[job.sender].popleft()
+                self._pending -= 1
+                self._busy_senders.add(job.sender)
+                self._class_running[job.cls] += 1
+                job.started_at = time.perf_counter()
+                self._running_jobs[job.seq] = job
+            self._execute(job)
+
+    def _extra_allowed(self) -> int:
+        """Workers bloqués par une commande expirée : remplacés, donc tolérés en plus du pool."""
+        return sum(1 for job in self._running_jobs.values() if job.timed_out)
+
+    def _execute(self, job: _Job):
+        failed = False
+        try:
+            job.func(*job.args)
+        except Exception as e:
+            failed = True
+            error_print(f"❌ Commande {job.command}: {e}")
+            logger.debug("Erreur commande", exc_info=True)
+        finished = time.perf_counter()
+        with self._cond:
+            self._running_jobs.pop(job.seq, None)
+            self._class_running[job.cls] -= 1
+            if not job.timed_out:
+                self._release_sender(job.sender)
+            metrics = self._metrics[job.command]
+            wait_ms = (job.started_at - job.enqueued_at) * 1000
+            exec_ms = (finished - job.started_at) * 1000
+            metrics['count'] += 1
+            metrics['errors'] += failed
+            metrics['wait_ms'] += wait_ms
+            metrics['exec_ms'] += exec_ms
+            metrics['max_wait_ms'] = max(metrics['max_wait_ms'], wait_ms)
+            metrics['max_exec_ms'] = max(metrics['max_exec_ms'], exec_ms)
+            self._cond.notify_all()
+
+    def _release_sender(self, sender: Hashable):
+        """Fin de la commande d'un émetteur : sa commande suivante devient prête (sous verrou)."""
+        self._busy_senders.discard(sender)
+        queue = self._sender_queues.get(sender)
+        if queue:
+            self._ready.append(queue[0])
+        else:
+            self._sender_queues.pop(sender, None)
+
+    def _watchdog_loop(self):
+        """Abandonne les commandes qui dépassent le délai de leur classe."""
+        while self.running:
+            time.sleep(1.0)
+            now = time.perf_counter()
+            with self._cond:
+                for job in list(self._running_jobs.values()):
+                    limit = self.timeouts.get(job.cls)
+                    if job.timed_out or not limit or now - job.started_at < limit:
+                        continue
+                    # Le thread ne peut pas être interrompu : on cesse de l'attendre.
+                    # La place de la classe reste prise jusqu'au retour réel de l'appel.
+                    job.timed_out = True
+                    self.timeouts_count += 1
+                    self._metrics[job.command]['timeouts'] += 1
+                    self._release_sender(job.sender)
+                    error_print(f"⏱️ Commande {job.command} de {job.sender} abandonnée après {limit}s")
+                    self._spawn_worker()
+                    self._cond.notify_all()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Arrête le pool. Les commandes en cours se terminent, celles en attente sont abandonnées.
+
+        Args:
+            timeout: Temps maximum d'attente des workers (secondes)
+        """
+        with self._cond:
+            self.running = False
+            dropped = self._pending
+            self._sender_queues.clear()
+            self._ready.clear()
+            self._pending = 0
+            self._cond.notify_all()
+            threads = list(self._threads)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        if dropped:
+            info_print(f"⚙️ Exécuteur de commandes arrêté: {dropped} commandes en attente abandonnées")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état du pool et les mesures par commande.
+
+        Returns:
+            dict: pending, running (par classe), rejected, timeouts, et 'commands'
+                  {commande: count, errors, timeouts, avg/max attente (ms), avg/max exécution (ms)}
+        """
+        with self._cond:
+            commands = {}
+            for name, m in self._metrics.items():
+                count = m['count'] or 1
+                commands[name] = {
+                    'count': m['count'],
+                    'errors': m['errors'],
+                    'timeouts': m['timeouts'],
+                    'avg_wait_ms': round(m['wait_ms'] / count, 2),
+                    'max_wait_ms': round(m['max_wait_ms'], 2),
+                    'avg_exec_ms': round(m['exec_ms'] / count, 2),
+                    'max_exec_ms': round(m['max_exec_ms'], 2),
+                }
+            return {
+                'pending': self._pending,
+                'running': {cls: n for cls, n in self._class_running.items() if n},
+                'rejected': self.rejected,
+                'timeouts': self.timeouts_count,
+                'commands': commands,
+            }
+
+    def format_stats(self) -> Optional[str]:
+        """Résumé d'une ligne par commande pour les logs, None si aucune commande exécutée."""
+        stats = self.get_stats()
+        if not stats['commands']:
+            return None
+        lines = [f"en attente {stats['pending']}, refusées {stats['rejected']}, expirées {stats['timeouts']}"]
+        for name, c in sorted(stats['commands'].items(), key=lambda item: -item[1]['count']):
+            lines.append(f"{name}: {c['count']}× | attente {c['avg_wait_ms']}ms (max {c['max_wait_ms']}) "
+                         f"| exécution {c['avg_exec_ms']}ms (max {c['max_exec_ms']})")
+        return "\n".join(lines)
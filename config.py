@@ -279,6 +279,110 @@ NEIGHBOR_RETENTION_HOURS = 720  # 30 jours de rétention
 # Les statistiques de nœuds inactifs depuis plus de 7 jours seront supprimées
 NODE_STATS_RETENTION_HOURS = 168  # 7 jours de rétention
 
+# Rétention des agrégats horaires de paquets (packet_rollups_hourly)
+# Utilisés par /stats, /top, /histo : conservés plus longtemps que les paquets bruts
+# pour que les fenêtres jusqu'à 7 jours restent exactes
+PACKET_ROLLUP_RETENTION_HOURS = 168  # 7 jours
+
+# Nettoyage périodique de la base SQLite (cleanup_old_data)
+# Suppressions par lots courts (l'insertion des paquets continue pendant le nettoyage)
+# puis vacuum incrémental au lieu d'un VACUUM complet qui réécrit tout le fichier
+TRAFFIC_DB_RETENTION_BATCH = 2000   # Plage de rowid supprimée par transaction
+TRAFFIC_DB_VACUUM_PAGES = 1024      # Pages libres rendues au système par cycle (4 Mo en pages de 4 Ko)
+# Base existante sans auto_vacuum=INCREMENTAL : la conversion demande un VACUUM complet
+# (fichier entier réécrit, bot bloqué pendant ce temps). False = en attente jusqu'à /db vacuum
+TRAFFIC_DB_VACUUM_CONVERT = False   # True = conversion au prochain démarrage
+# Rétention par table (heures, None = jamais nettoyée), prioritaire sur les valeurs ci-dessus
+# Tables : packets, meshcore_packets, public_messages, neighbors, node_stats, packet_rollups_hourly,
+# telemetry_5min (défaut 168 h), telemetry_hourly (défaut 8760 h = 1 an)
+TRAFFIC_DB_RETENTION_HOURS = {}     # ex: {'meshcore_packets': 168}
+
+# Écriture différée (write-behind) des paquets dans SQLite
+# Si activé, les paquets sont mis en file et écrits par lots par un thread dédié
+# (un commit par lot au lieu d'un fsync par paquet - réduit l'usure de la carte SD)
+TRAFFIC_DB_WRITE_BEHIND = False   # Activer l'écriture différée
+TRAFFIC_DB_WRITE_BATCH_SIZE = 100  # Écrire dès que N paquets sont en attente
+TRAFFIC_DB_WRITE_FLUSH_MS = 500    # ...ou au plus tard après M millisecondes
+TRAFFIC_DB_WRITE_QUEUE_MAX = 5000  # Taille max de la file (au-delà: abandon des plus anciens)
+
+# Journal WAL et connexions de lecture par thread
+# En WAL, les lectures longues (/stats, /propag) ne bloquent plus l'insertion des paquets
+TRAFFIC_DB_WAL = True              # Activer le journal WAL (synchronous=NORMAL)
+# Un lecteur par thread : 2 workers stats + enrich + commands, 4 workers de commandes,
+# thread périodique, pool asyncio.to_thread (8 sur un Raspberry Pi 4 cœurs), CLI
+# Au-delà, chaque lecture ouvre une connexion temporaire (compteur 'hors pool' de /db)
+TRAFFIC_DB_READ_POOL_SIZE = 20     # Connexions lecture seule max (une par thread, 0 = désactivé)
+
+# Vérification d'intégrité de la base SQLite
+# Au démarrage : 'header' (en-tête seulement, instantané), 'quick' (quick_check) ou 'full' (integrity_check)
+# La vérification complète est faite en arrière-plan, au plus une fois par intervalle
+TRAFFIC_DB_STARTUP_CHECK = 'header'
+TRAFFIC_DB_INTEGRITY_INTERVAL_HOURS = 24
+
+# Télémétrie (batterie, tension, channel_util, air_util) et position (lat, lon, alt)
+# des paquets : toujours stockées en colonnes typées, le JSON complet est optionnel
+TRAFFIC_DB_JSON_BLOBS = True   # False = ne plus écrire les colonnes JSON telemetry/position
+
+# Partitions d'archive des paquets (optionnel)
+# Les paquets plus anciens que TRAFFIC_DB_HOT_HOURS sont déplacés dans un fichier SQLite
+# par jour ou par mois, attaché à la demande par les requêtes longues (/propag, carte).
+# La rétention des paquets supprime alors des fichiers entiers (sans DELETE ni VACUUM) :
+# une partition est supprimée quand toute sa période dépasse la rétention des paquets.
+TRAFFIC_DB_PARTITION_PERIOD = None   # None (désactivé), 'day' ou 'month'
+TRAFFIC_DB_HOT_HOURS = 48            # Paquets conservés dans la base principale
+TRAFFIC_DB_ARCHIVE_DIR = None        # Défaut : traffic_archives/ à côté de la base
+
+# Base de trafic en RAM (tmpfs) avec sauvegarde périodique sur la carte SD (optionnel)
+# Les commits des paquets n'écrivent plus sur la carte SD : la base est copiée sur la carte
+# (API de sauvegarde SQLite, par étapes) toutes les TRAFFIC_DB_CHECKPOINT_INTERVAL secondes
+# et restaurée depuis cette copie au démarrage. Une coupure de courant perd au plus un intervalle.
+TRAFFIC_DB_RAM_DIR = None                # ex: '/dev/shm/meshbot' (None = base sur la carte SD)
+TRAFFIC_DB_CHECKPOINT_INTERVAL = 900     # Secondes entre deux sauvegardes
+TRAFFIC_DB_CHECKPOINT_PAGES = 256        # Pages copiées par étape (1 Mo en pages de 4 Ko)
+
+# Pipeline d'ingestion des paquets
+# on_message (thread de la radio) ne fait que mettre les paquets en file ; des threads dédiés
+# mettent à jour la base de nœuds, puis en parallèle les statistiques/SQLite et les commandes.
+# L'ordre des paquets d'un même émetteur est préservé dans chaque étage.
+INGEST_PIPELINE_ENABLED = True    # False = tout le traitement sur le thread de la radio
+INGEST_QUEUE_SIZE = 1000          # Entrées en attente max par file
+INGEST_STATS_WORKERS = 2          # Threads de l'étage statistiques/SQLite (compteurs partagés sous verrou)
+INGEST_OVERFLOW = 'drop_oldest'   # File pleine : 'drop_oldest', 'drop_newest' ou 'block' (1 s max)
+
+# Identité des paquets partagée entre serial, TCP, MeshCore et le collecteur MQTT
+# Fenêtre de déduplication par transport (secondes) ; les doublons par couple de
+# transports (ex: serial→mqtt) sont affichés par /sys
+PACKET_DEDUP_WINDOWS = {'serial': 5, 'tcp': 5, 'meshcore': 5, 'mqtt': 20}
+
+# Exécution des commandes mesh sur un pool de threads
+# Une commande longue (/bot et llama.cpp, /weather et curl, envoi en plusieurs morceaux)
+# ne bloque plus le traitement des paquets. Une seule commande à la fois par émetteur, dans l'ordre.
+COMMAND_EXECUTOR_ENABLED = True   # False = commandes exécutées sur le thread de réception
+COMMAND_WORKERS = 4               # Threads du pool
+COMMAND_QUEUE_MAX = 100           # Commandes en attente max (au-delà: refusées)
+# Commandes simultanées max par classe : llm (/bot, /ia), network (/weather, /trace, /info...),
+# db (/stats, /top, /histo, /propag...), cheap (toutes les autres)
+COMMAND_CLASS_LIMITS = {'llm': 1, 'network': 2, 'db': 2, 'cheap': 4}
+# Délai max d'exécution par classe (secondes) : au-delà, l'émetteur est débloqué
+# (llm : MESH_AI_CONFIG['timeout'] + le temps d'envoi de la réponse)
+COMMAND_TIMEOUTS = {'llm': 180, 'network': 60, 'db': 60, 'cheap': 30}
+
+# Ordonnanceur des messages sortants
+# Les réponses, morceaux et broadcasts partent d'une file unique : alertes, puis DM, puis
+# broadcasts ; destinataires servis à tour de rôle. L'écart entre deux émissions dépend du
+# temps d'antenne estimé (preset de modem), au lieu des 2 s fixes entre deux morceaux.
+OUTBOUND_SCHEDULER_ENABLED = True  # False = envoi immédiat (2 s fixes entre deux morceaux)
+# Preset du nœud : SHORT_TURBO, SHORT_FAST, SHORT_SLOW, MEDIUM_FAST, MEDIUM_SLOW, LONG_FAST,
+# LONG_MODERATE, LONG_SLOW, VERY_LONG_SLOW, ou dict {'sf': 11, 'bw_khz': 250, 'cr': 5, 'preamble': 16}
+# Sert aussi au temps d'antenne des paquets reçus (/stats top air) : un changement
+# recalcule l'historique de la base au démarrage
+LORA_MODEM_PRESET = 'LONG_FAST'
+OUTBOUND_DUTY_CYCLE = 0.05         # Part du temps d'antenne du bot sur 1 h (EU868 : 10 % pour tout le nœud)
+OUTBOUND_AIRTIME_SPACING = 1.5     # Écart après une émission = 1.5 × son temps d'antenne
+OUTBOUND_MIN_GAP = 1.0             # Écart minimal entre deux émissions (secondes)
+OUTBOUND_BUSY_CHANNEL_UTIL = 25.0  # Canal plus chargé (%) : écart allongé (×util/seuil, max ×4, sauf alertes)
+OUTBOUND_QUEUE_MAX = 200           # Messages en attente max (au-delà: refusés)
+
 # Configuration affichage des métriques de signal
 SHOW_RSSI = False  # Afficher les valeurs RSSI (-85dB)
 SHOW_SNR = False   # Afficher les valeurs SNR (SNR:8.5)
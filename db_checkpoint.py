@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Base de trafic en RAM (tmpfs) avec sauvegarde périodique sur la carte SD.
+
+La base vivante est placée sur un tmpfs (ex: /dev/shm) : les commits des
+paquets n'écrivent plus sur la carte SD. Un thread copie périodiquement la
+base vers son emplacement sur la carte avec l'API de sauvegarde SQLite, sous
+le verrou d'écriture de la base (copie RAM → fichier, brève : les paquets
+attendent, ou s'accumulent dans la file write-behind).
+Au démarrage, la base RAM est restaurée depuis la dernière sauvegarde.
+
+En cas de coupure, les paquets reçus depuis la dernière sauvegarde sont perdus.
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from utils import debug_print, info_print, error_print
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def process_write_bytes() -> Optional[int]:
+    """
+    Octets écrits sur le stockage par le processus (write_bytes de /proc/self/io).
+
+    Les écritures sur tmpfs ne sont pas comptées (pas d'accès au périphérique bloc) :
+    la valeur mesure les écritures réelles sur la carte SD, quel que soit le mode.
+
+    Returns:
+        int ou None si indisponible (hors Linux)
+    """
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('write_bytes:'):
+                    return int(line.split(':', 1)[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class DatabaseCheckpointer:
+    """
+    Sauvegarde périodique d'une base SQLite en RAM vers la carte SD.
+
+    La copie est écrite dans un fichier temporaire puis renommée : le fichier
+    sur la carte est toujours une sauvegarde complète (jamais une copie partielle).
+    """
+
+    def __init__(
+        self,
+        ram_path: str,
+        disk_path: str,
+        interval_seconds: float = 900,
+        pages_per_step: int = 256,
+        step_sleep_ms: float = 10,
+        error_callback: Optional[Callable[[Exception, str], None]] = None,
+        write_lock=None
+    ):
+        """
+        Initialise la sauvegarde périodique.
+
+        Args:
+            ram_path: Base vivante (tmpfs)
+            disk_path: Emplacement de la sauvegarde sur la carte SD
+            interval_seconds: Intervalle entre deux sauvegardes
+            pages_per_step: Pages copiées par étape de l'API de sauvegarde
+            step_sleep_ms: Pause entre deux étapes (sans write_lock : laisse passer les écritures)
+            error_callback: Appelé en cas d'échec d'une sauvegarde
+            write_lock: Verrou d'écriture de la connexion source, tenu pendant la copie
+                        (aucune transaction ouverte sur la source pendant la sauvegarde)
+        """
+        self.ram_path = ram_path
+        self.disk_path = disk_path
+        self.interval = interval_seconds
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep_ms / 1000.0
+        self.error_callback = error_callback
+        self.write_lock = write_lock
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Compteurs pour statistiques
+        self.started = time.time()
+        self.checkpoint_count = 0
+        self.failed_count = 0
+        self.bytes_written = 0
+        self.last_checkpoint = None
+        self.last_duration = 0.0
+
+    def restore(self) -> str:
+        """
+        Prépare la base RAM avant son ouverture.
+
+        Une base RAM déjà présente et plus récente que la sauvegarde est conservée
+        (redémarrage du bot sans redémarrage du système). Sinon la dernière
+        sauvegarde est recopiée en RAM.
+
+        Returns:
+            'ram' (base RAM conservée), 'disk' (restaurée) ou 'new' (aucune sauvegarde)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.ram_path)), exist_ok=True)
+        disk_mtime = os.path.getmtime(self.disk_path) if os.path.exists(self.disk_path) else None
+
+        if os.path.exists(self.ram_path) and os.path.getsize(self.ram_path) > 0:
+            ram_mtime = max(os.path.getmtime(self.ram_path + suffix)
+                            for suffix in ('', '-wal') if os.path.exists(self.ram_path + suffix))
+            if disk_mtime is None or ram_mtime >= disk_mtime:
+                info_print(f"💾 Base RAM conservée : {self.ram_path}")
+                return 'ram'
+
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.ram_path + suffix):
+                os.remove(self.ram_path + suffix)
+        if disk_mtime is None:
+            return 'new'
+
+        start = time.perf_counter()
+        source = sqlite3.connect(self.disk_path)
+        target = sqlite3.connect(self.ram_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        info_print(f"💾 Base restaurée en RAM depuis {self.disk_path} "
+                   f"({os.path.getsize(self.ram_path) / 1024 / 1024:.1f} Mo, {time.perf_counter() - start:.1f}s)")
+        return 'disk'
+
+    def checkpoint(self, source: sqlite3.Connection) -> Dict[str, Any]:
+        """
+        Copie la base RAM vers la carte SD (fichier temporaire puis renommage atomique).
+
+        Args:
+            source: Connexion écrivain de la base RAM. La copie est faite sous write_lock :
+                    une transaction ouverte sur cette connexion ferait réessayer la copie
+                    indéfiniment. Une transaction restée ouverte (échec non annulé) est
+                    annulée et la sauvegarde refusée.
+
+        Returns:
+            Dict {'bytes', 'duration'}
+        """
+        with self._lock:
+            start = time.perf_counter()
+            tmp_path = self.disk_path + '.checkpoint'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            try:
+                with self.write_lock or contextlib.nullcontext():
+                    if source.in_transaction:
+                        source.rollback()
+                        raise RuntimeError("transaction ouverte sur la base RAM (annulée), sauvegarde refusée")
+                    target = sqlite3.connect(tmp_path)
+                    try:
+                        # Fichier temporaire : pas de journal, il n'est renommé qu'une fois complet
+                        target.execute("PRAGMA journal_mode = OFF")
+                        target.execute("PRAGMA synchronous = OFF")
+                        # Sous write_lock, une pause ne ferait que retarder les écritures
+                        sleep = 0 if self.write_lock is not None else self.step_sleep
+                        source.backup(target, pages=self.pages_per_step, sleep=sleep)
+                        # Sauvegarde en journal classique : lisible en lecture seule sans fichiers -wal/-shm
+                        target.execute("PRAGMA journal_mode = DELETE")
+                    finally:
+                        target.close()
+                with open(tmp_path, 'rb') as f:
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.disk_path)
+            except Exception as e:
+                self.failed_count += 1
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                error_print(f"❌ Sauvegarde de la base RAM échouée : {e}")
+                if self.error_callback:
+                    try:
+                        self.error_callback(e, 'checkpoint')
+                    except Exception as cb_error:
+                        logger.error(f"Erreur dans error_callback: {cb_error}")
+                raise
+
+            size = os.path.getsize(self.disk_path)
+            duration = time.perf_counter() - start
+            self.checkpoint_count += 1
+            self.bytes_written += size
+            self.last_checkpoint = time.time()
+            self.last_duration = duration
+            debug_print(f"💾 Sauvegarde base RAM → {self.disk_path} : {size / 1024 / 1024:.1f} Mo en {duration:.2f}s")
+            return {'bytes': size, 'duration': duration}
+
+    def start(self, source: sqlite3.Connection):
+        """Démarre le thread de sauvegarde périodique."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._checkpoint_loop,
+            args=(source,),
+            name="DatabaseCheckpointer",
+            daemon=True
+        )
+        self._thread.start()
+        debug_print(f"💾 Sauvegarde périodique de la base RAM : toutes les {self.interval:.0f}s")
+
+    def _checkpoint_loop(self, source: sqlite3.Connection):
+        """Boucle du thread de sauvegarde."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.checkpoint(source)
+            except Exception:
+                pass  # Déjà journalisé, nouvelle tentative à l'intervalle suivant
+
+    def stop(self, source: Optional[sqlite3.Connection] = None, timeout: float = 30.0):
+        """
+        Arrête le thread, puis fait une dernière sauvegarde si source est fournie.
+
+        Args:
+            source: Connexion de la base RAM (None = pas de sauvegarde finale)
+            timeout: Attente maximale de la sauvegarde en cours
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if source is not None:
+            try:
+                self.checkpoint(source)
+            except RuntimeError:
+                # Transaction ouverte annulée : dernière tentative sur la base cohérente
+                self.checkpoint(source)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de sauvegarde.
+
+        Returns:
+            Dict avec checkpoints, échecs, octets écrits (total et par heure),
+            date et durée de la dernière sauvegarde
+        """
+        hours = max(time.time() - self.started, 1.0) / 3600
+        return {
+            'checkpoints': self.checkpoint_count,
+            'failed': self.failed_count,
+            'bytes_written': self.bytes_written,
+            'bytes_per_hour': self.bytes_written / hours,
+            'last_checkpoint': self.last_checkpoint,
+            'last_duration': self.last_duration,
+            'interval': self.interval,
+        }
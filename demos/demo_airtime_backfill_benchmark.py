@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du rattrapage du temps d'antenne : calcul par ligne vs table par taille
+
+Crée une base temporaire de --packets paquets (mélange de types typique d'un
+réseau Meshtastic) sur --days jours, efface leur temps d'antenne, puis compare :
+1. Calcul par ligne : lecture de chaque paquet, formule Semtech en Python,
+   UPDATE par rowid (executemany), puis reconstruction des agrégats horaires
+   (rebuild_packet_rollups).
+2. TrafficPersistence.backfill_airtime : table des 240 tailles de payload en
+   table temporaire, une requête UPDATE pour tout l'historique, agrégats horaires
+   recalculés dans la même transaction.
+
+Usage:
+    python3 demos/demo_airtime_backfill_benchmark.py [--packets 200000] [--preset LONG_FAST]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from lora_airtime import packet_airtime, estimate_payload_bytes
+from traffic_persistence import TrafficPersistence
+
+logging.disable(logging.INFO)
+
+PACKET_MIX = (
+    ('TELEMETRY_APP', 30), ('POSITION_APP', 20), ('NODEINFO_APP', 15), ('ROUTING_APP', 15),
+    ('TEXT_MESSAGE_APP', 10), ('NEIGHBORINFO_APP', 5), ('ENCRYPTED', 5),
+)
+
+
+def build_database(path, args, rng):
+    persistence = TrafficPersistence(path, airtime_preset=args.preset, write_behind=True,
+                                     write_batch_size=5000, write_queue_max=args.packets)
+    types = [ptype for ptype, weight in PACKET_MIX for _ in range(weight)]
+    start = time.time() - args.days * 86400
+    for i in range(args.packets):
+        packet_type = rng.choice(types)
+        message = 'x' * rng.randint(5, 180) if packet_type == 'TEXT_MESSAGE_APP' else None
+        persistence.save_packet({'timestamp': start + i * args.days * 86400 / args.packets,
+                                 'from_id': rng.randrange(args.nodes), 'to_id': 0xFFFFFFFF, 'source': 'local',
+                                 'packet_type': packet_type, 'message': message, 'size': 100})
+    persistence.flush_pending_writes()
+    return persistence
+
+
+def reset_airtime(persistence):
+    persistence.conn.execute("UPDATE packets SET payload_bytes = NULL, airtime_ms = NULL")
+    persistence.conn.execute("UPDATE packet_rollups_hourly SET airtime_ms = 0")
+    persistence.conn.commit()
+
+
+def per_row(persistence, preset):
+    """Calcul ligne par ligne (paquets seulement, sans les agrégats)"""
+    rows = persistence.conn.execute("SELECT rowid, packet_type, message FROM packets").fetchall()
+    updates = []
+    for rowid, packet_type, message in rows:
+        payload_bytes = estimate_payload_bytes(packet_type, message)
+        updates.append((payload_bytes, packet_airtime(payload_bytes, preset) * 1000, rowid))
+    persistence.conn.executemany("UPDATE packets SET payload_bytes = ?, airtime_ms = ? WHERE rowid = ?", updates)
+    persistence.conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rattrapage du temps d'antenne")
+    parser.add_argument('--packets', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--nodes', type=int, default=150)
+    parser.add_argument('--preset', default='LONG_FAST')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK RATTRAPAGE DU TEMPS D'ANTENNE - PAR LIGNE vs TABLE PAR TAILLE")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print(f"\n🔨 Création de {args.packets} paquets sur {args.days} jours ({args.nodes} nœuds)...")
+        persistence = build_database(os.path.join(tmpdir, 'traffic.db'), args, random.Random(args.seed))
+
+        reset_airtime(persistence)
+        start = time.perf_counter()
+        per_row(persistence, args.preset)
+        row_time = time.perf_counter() - start
+        persistence.rebuild_packet_rollups()
+        rebuild_time = time.perf_counter() - start - row_time
+        expected = persistence.conn.execute("SELECT SUM(airtime_ms) FROM packets").fetchone()[0]
+
+        reset_airtime(persistence)
+        start = time.perf_counter()
+        updated = persistence.backfill_airtime()
+        table_time = time.perf_counter() - start
+        total = persistence.conn.execute("SELECT SUM(airtime_ms) FROM packets").fetchone()[0]
+        rollups = persistence.conn.execute("SELECT SUM(airtime_ms) FROM packet_rollups_hourly").fetchone()[0]
+
+        print(f"\n📊 Par ligne       : {row_time + rebuild_time:6.2f}s "
+              f"(paquets {row_time:.2f}s + reconstruction des agrégats {rebuild_time:.2f}s)")
+        print(f"📊 backfill_airtime : {table_time:6.2f}s ({args.packets / table_time:,.0f} paquets/s, "
+              f"{updated['packet_rollups_hourly']} agrégats horaires)")
+        print(f"   Gain : x{(row_time + rebuild_time) / table_time:.1f}")
+        print(f"\n⏱️ Temps d'antenne total ({args.preset}) : {total / 1000:,.0f}s "
+              f"(par ligne : {expected / 1000:,.0f}s, agrégats : {rollups / 1000:,.0f}s)")
+        print(f"   Occupation moyenne du canal : {total / 1000 / (args.days * 86400):.2%}")
+        persistence.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'exécuteur de commandes : exécution en ligne vs pool borné
+
+Simule --users utilisateurs envoyant chacun 5 commandes mêlant /bot (llama.cpp,
+--llm-ms), /weather (curl, --network-ms), /stats (rapport SQLite) et /help, une
+commande reçue toutes les --gap-ms ms. Durées réduites par rapport au terrain.
+
+Mesure le délai de réponse (réception → fin de la commande) par classe :
+1. En ligne : une commande à la fois sur le thread de réception.
+2. CommandExecutor (plafonds par classe, FIFO par émetteur).
+
+Usage:
+    python3 demos/demo_command_executor_benchmark.py [--users 6] [--llm-ms 1500] [--network-ms 300] [--gap-ms 100]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import statistics
+import time
+from collections import defaultdict
+
+from command_executor import CommandExecutor, command_class
+
+logging.disable(logging.INFO)
+
+
+def build_workload(args):
+    """Commandes entrelacées des utilisateurs : (émetteur, message, durée en secondes)."""
+    costs = {'/bot': args.llm_ms, '/weather': args.network_ms, '/stats': 80, '/help': 2}
+    pattern = ['/help', '/bot', '/weather', '/stats', '/help']
+    workload = []
+    for round_index in range(len(pattern)):
+        for user in range(args.users):
+            # Chaque utilisateur décale sa séquence pour mélanger les classes
+            message = pattern[(round_index + user) % len(pattern)]
+            workload.append((0x1000 + user, message, costs[message] / 1000))
+    return workload
+
+
+def run(workload, gap, executor=None):
+    delays = defaultdict(list)
+
+    def command(message, cost, received):
+        time.sleep(cost)
+        delays[command_class(message)].append((time.perf_counter() - received) * 1000)
+
+    start = time.perf_counter()
+    for index, (sender, message, cost) in enumerate(workload):
+        # Arrivée planifiée : en ligne, la commande attend que les précédentes soient finies
+        received = start + index * gap
+        now = time.perf_counter()
+        if now < received:
+            time.sleep(received - now)
+        if executor:
+            executor.submit(sender, message, command, message, cost, received)
+        else:
+            command(message, cost, received)
+    while sum(len(d) for d in delays.values()) < len(workload):
+        time.sleep(0.005)
+    return delays, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exécution des commandes en ligne vs pool")
+    parser.add_argument('--users', type=int, default=6)
+    parser.add_argument('--llm-ms', type=float, default=1500, help="Durée simulée d'un appel /bot (ms)")
+    parser.add_argument('--network-ms', type=float, default=300, help="Durée simulée d'un /weather (ms)")
+    parser.add_argument('--gap-ms', type=float, default=100, help="Intervalle entre deux commandes reçues (ms)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK COMMANDES - EXÉCUTION EN LIGNE vs POOL BORNÉ")
+    print("=" * 70)
+    workload = build_workload(args)
+    print(f"\n🔨 {len(workload)} commandes de {args.users} utilisateurs")
+
+    executor = CommandExecutor(workers=4)
+    executor.start()
+    try:
+        for label, pool in (("En ligne", None), ("Pool (4 workers)", executor)):
+            delays, total_ms = run(workload, args.gap_ms / 1000, pool)
+            print(f"\n📊 {label} : toutes les réponses en {total_ms:.0f}ms")
+            for cls in ('cheap', 'db', 'network', 'llm'):
+                values = delays.get(cls)
+                if values:
+                    print(f"   {cls:<8}: médiane {statistics.median(values):7.0f}ms  max {max(values):7.0f}ms")
+        print("\n⚙️ Mesures de l'exécuteur :")
+        print("   " + executor.format_stats().replace("\n", "\n   "))
+    finally:
+        executor.stop()
+
+
+if __name__ == '__main__':
+    main()
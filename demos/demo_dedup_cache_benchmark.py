@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de la déduplication des paquets : dictionnaire reconstruit vs TTLCache
+
+Simule le flux de TrafficMonitor.add_packet avec --window paquets distincts dans la
+fenêtre de déduplication (chaque paquet reçu deux fois, serial puis TCP) :
+
+1. Ancienne méthode : dictionnaire reconstruit par compréhension à chaque paquet,
+   clés f"{packet_id}_{from_id}_{to_id}".
+2. TTLCache : clés tuple, expiration par la tête (O(1) amorti).
+
+Usage:
+    python3 demos/demo_dedup_cache_benchmark.py [--packets 20000]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+from ttl_cache import TTLCache
+
+WINDOW_SECONDS = 5.0
+
+
+def stream(count, window):
+    """Paquets (horodatage, id, from, to) : `window` paquets distincts par fenêtre, chacun reçu deux fois."""
+    step = WINDOW_SECONDS / window
+    packets = []
+    for i in range(count // 2):
+        packet = (i * step, random.getrandbits(32), random.getrandbits(32), 0xFFFFFFFF)
+        packets.append(packet)
+        packets.append(packet)
+    return packets
+
+
+def legacy(packets):
+    recent = {}
+    duplicates = 0
+    for timestamp, packet_id, from_id, to_id in packets:
+        recent = {k: v for k, v in recent.items() if timestamp - v < WINDOW_SECONDS}
+        key = f"{packet_id}_{from_id}_{to_id}"
+        if key in recent:
+            duplicates += 1
+            continue
+        recent[key] = timestamp
+    return duplicates
+
+
+def ttl_cache(packets):
+    clock = [0.0]
+    cache = TTLCache(WINDOW_SECONDS, clock=lambda: clock[0])
+    duplicates = 0
+    for timestamp, packet_id, from_id, to_id in packets:
+        clock[0] = timestamp
+        if cache.check_and_add((packet_id, from_id, to_id)):
+            duplicates += 1
+    return duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark déduplication dict vs TTLCache")
+    parser.add_argument('--packets', type=int, default=20000)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MICRO-BENCHMARK DÉDUPLICATION - DICT RECONSTRUIT vs TTLCACHE")
+    print("=" * 70)
+    print(f"\n{'Entrées dans la fenêtre':<26} {'Dict':>14} {'TTLCache':>14}")
+    for window in (1000, 10000):
+        packets = stream(args.packets, window)
+        results = []
+        for func in (legacy, ttl_cache):
+            start = time.perf_counter()
+            duplicates = func(packets)
+            results.append(((time.perf_counter() - start) / len(packets) * 1e6, duplicates))
+        assert results[0][1] == results[1][1] == len(packets) // 2
+        print(f"{window:<26} {results[0][0]:10.2f}µs/p {results[1][0]:10.2f}µs/p")
+
+
+if __name__ == '__main__':
+    main()
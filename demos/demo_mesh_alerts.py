@@ -30,7 +30,7 @@ class DemoMessageSender:
     def __init__(self):
         self.sent_count = 0
         
-    def send_single(self, message, node_id, node_info):
+    def send_single(self, message, node_id, node_info, priority='dm'):
         """Simuler l'envoi d'un DM"""
         self.sent_count += 1
         print(f"\n  📨 DM → 0x{node_id:08x}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la recherche de messages : LIKE '%mot%' vs index plein texte (FTS5)
+
+Crée une base de --rows paquets étalés sur --days jours (un tiers de messages
+texte, insérés dans l'ordre chronologique), puis compare pour des mots fréquents,
+un mot rare et un mot absent (pire cas de LIKE : parcours de toute la table) :
+
+1. La recherche actuelle du navigateur : message LIKE '%mot%' sur toute la table.
+2. TrafficPersistence.search_messages (index FTS5 packets_fts).
+
+Usage:
+    python3 demos/demo_message_search_benchmark.py [--rows 500000] [--days 180]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+logging.disable(logging.INFO)
+
+WORDS = ('relais', 'antenne', 'bonjour', 'batterie', 'signal', 'portée', 'colline', 'test',
+         'merci', 'réseau', 'noeud', 'météo', 'vent', 'soleil', 'panne', 'retour')
+RARE_WORD = 'éboulement'   # Dans 0,1 % des messages
+
+
+def make_packet(timestamp):
+    node = random.randint(1, 300)
+    text = random.random() < 1 / 3
+    words = random.choices(WORDS, k=random.randint(3, 12))
+    if random.random() < 0.001:
+        words.append(RARE_WORD)
+    return {
+        'timestamp': timestamp, 'from_id': node, 'to_id': 0xFFFFFFFF, 'source': 'local',
+        'sender_name': f"Node-{node:08x}",
+        'packet_type': 'TEXT_MESSAGE_APP' if text else random.choice(['POSITION_APP', 'TELEMETRY_APP']),
+        'message': ' '.join(words) if text else None,
+        'size': 60
+    }
+
+
+def timed(func, repeat=5):
+    """Meilleur temps (ms) sur repeat exécutions."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recherche de messages LIKE vs FTS5")
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=180)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK RECHERCHE DE MESSAGES - LIKE vs FTS5")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_search_")
+    try:
+        persistence = TrafficPersistence(os.path.join(tmpdir, 'traffic.db'))
+        now = time.time()
+        print(f"\n🔨 {args.rows} paquets sur {args.days} jours...")
+        start = time.perf_counter()
+        step = args.days * 86400 / args.rows
+        first = now - args.days * 86400
+        for offset in range(0, args.rows, 5000):
+            batch = [('packets', make_packet(first + (offset + i) * step))
+                     for i in range(min(5000, args.rows - offset))]
+            persistence._flush_packet_batch(batch)
+        print(f"   Insertion (index compris) : {time.perf_counter() - start:.1f}s")
+
+        conn = persistence._read_conn()
+        print(f"\n🔍 50 résultats les plus récents (meilleur de 5) :")
+        print(f"   {'Recherche':<22} {'LIKE':>10} {'FTS5':>10}")
+        for query in ('panne', 'relais antenne', 'mété', RARE_WORD, 'introuvable'):
+            like_sql = ("SELECT * FROM packets WHERE packet_type = 'TEXT_MESSAGE_APP' AND "
+                        + ' AND '.join('message LIKE ?' for _ in query.split())
+                        + " ORDER BY timestamp DESC LIMIT 50")
+            like_params = [f'%{term}%' for term in query.split()]
+            like_ms, _ = timed(lambda: conn.execute(like_sql, like_params).fetchall())
+            fts_ms, _ = timed(lambda: persistence.search_messages(query, limit=50, tables=['packets']))
+            print(f"   {query!r:<22} {like_ms:8.1f}ms {fts_ms:8.1f}ms")
+
+        persistence.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des recherches par nœud : from_id TEXT vs from_num INTEGER + index composites
+
+1. Crée une base synthétique au format historique (from_id TEXT, décimal ou "!hex",
+   index simples) avec plusieurs millions de paquets.
+2. Mesure la recherche de position historique (jusqu'à 3 requêtes par nœud).
+3. Ouvre la base avec TrafficPersistence (migration en place : from_num/to_num +
+   index (from_num, timestamp) et (packet_type, timestamp)).
+4. Mesure la recherche en une requête via get_node_position_from_db.
+
+Usage:
+    python3 demos/demo_node_id_index_benchmark.py [--rows 2000000] [--nodes 500] [--lookups 400]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE packets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        from_id TEXT NOT NULL,
+        to_id TEXT,
+        source TEXT,
+        sender_name TEXT,
+        packet_type TEXT NOT NULL,
+        message TEXT,
+        rssi INTEGER,
+        snr REAL,
+        hops INTEGER,
+        size INTEGER,
+        is_broadcast INTEGER,
+        is_encrypted INTEGER DEFAULT 0,
+        telemetry TEXT,
+        position TEXT,
+        hop_limit INTEGER,
+        hop_start INTEGER,
+        channel INTEGER DEFAULT 0,
+        via_mqtt INTEGER DEFAULT 0,
+        want_ack INTEGER DEFAULT 0,
+        want_response INTEGER DEFAULT 0,
+        priority INTEGER DEFAULT 0,
+        family TEXT,
+        public_key TEXT
+    );
+    CREATE INDEX idx_packets_timestamp ON packets(timestamp);
+    CREATE INDEX idx_packets_from_id ON packets(from_id);
+    CREATE INDEX idx_packets_type ON packets(packet_type);
+'''
+
+PACKET_TYPES = ['TELEMETRY_APP', 'POSITION_APP', 'NODEINFO_APP', 'TEXT_MESSAGE_APP', 'ROUTING_APP']
+
+
+def create_legacy_db(db_path, rows, nodes):
+    """Crée une base au format historique avec `rows` paquets"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    node_ids = [0x10000000 + i * 7919 for i in range(nodes)]
+    now = time.time()
+    batch = []
+    for i in range(rows):
+        node = random.choice(node_ids)
+        # Historique mixte : identifiants décimaux et "!hex"
+        from_id = f"!{node:08x}" if i % 5 == 0 else str(node)
+        packet_type = random.choice(PACKET_TYPES)
+        position = None
+        if packet_type == 'POSITION_APP':
+            position = json.dumps({'latitude': 47.0 + random.random(), 'longitude': 6.0 + random.random(), 'altitude': 400})
+        batch.append((now - random.uniform(0, 30 * 86400), from_id, '4294967295', 'local', f"Node{node:x}",
+                      packet_type, random.uniform(-10, 10), random.randint(0, 5), random.randint(20, 200), position))
+        if len(batch) >= 50000:
+            conn.executemany('''
+                INSERT INTO packets (timestamp, from_id, to_id, source, sender_name, packet_type, snr, hops, size, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            batch.clear()
+    if batch:
+        conn.executemany('''
+            INSERT INTO packets (timestamp, from_id, to_id, source, sender_name, packet_type, snr, hops, size, position)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+    conn.commit()
+    conn.close()
+    return node_ids
+
+
+def legacy_position_lookup(conn, node_id, cutoff):
+    """Recherche historique : essaie les variantes décimal / int / !hex"""
+    for search_id in (str(node_id), node_id, f"!{node_id:08x}"):
+        row = conn.execute('''
+            SELECT position FROM packets
+            WHERE from_id = ? AND timestamp >= ? AND position IS NOT NULL AND position != ''
+            ORDER BY timestamp DESC LIMIT 1
+        ''', (search_id, cutoff)).fetchone()
+        if row and row[0]:
+            return json.loads(row[0])
+    return None
+
+
+def legacy_type_count(conn, packet_type, cutoff):
+    """Comptage historique par type sur une fenêtre"""
+    return conn.execute("SELECT COUNT(*) FROM packets WHERE packet_type = ? AND timestamp >= ?",
+                        (packet_type, cutoff)).fetchone()[0]
+
+
+def timed(label, func, iterations):
+    """Exécute func `iterations` fois et affiche la latence moyenne"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed * 1000 / iterations:8.3f} ms/requête ({iterations} requêtes)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark from_id TEXT vs from_num INTEGER")
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--nodes', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=400)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK RECHERCHES PAR NŒUD - packets")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_nodeid_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    try:
+        print(f"\n🔨 Création de la base synthétique ({args.rows:,} paquets, {args.nodes} nœuds)...")
+        start = time.perf_counter()
+        node_ids = create_legacy_db(db_path, args.rows, args.nodes)
+        print(f"   {time.perf_counter() - start:.1f}s, {os.path.getsize(db_path) / 1024 / 1024:.0f} MB")
+
+        cutoff = time.time() - 720 * 3600
+        day_cutoff = time.time() - 24 * 3600
+        lookup_nodes = [random.choice(node_ids) for _ in range(args.lookups)]
+
+        print("\n📼 Avant : from_id TEXT, index simples")
+        conn = sqlite3.connect(db_path)
+        before_pos = timed("position par nœud (3 variantes d'ID)",
+                           lambda i: legacy_position_lookup(conn, lookup_nodes[i], cutoff), args.lookups)
+        before_type = timed("comptage par type (24h)",
+                            lambda i: legacy_type_count(conn, PACKET_TYPES[i % len(PACKET_TYPES)], day_cutoff), 50)
+        conn.close()
+
+        print("\n🔄 Migration en place (TrafficPersistence)...")
+        start = time.perf_counter()
+        persistence = TrafficPersistence(db_path)
+        print(f"   {time.perf_counter() - start:.1f}s (ajout from_num/to_num, index, agrégats)")
+
+        print("\n🚀 Après : from_num INTEGER, index (from_num, timestamp) et (packet_type, timestamp)")
+        after_pos = timed("position par nœud (get_node_position_from_db)",
+                          lambda i: persistence.get_node_position_from_db(lookup_nodes[i], hours=720), args.lookups)
+        after_type = timed("comptage par type (24h)",
+                           lambda i: legacy_type_count(persistence.conn, PACKET_TYPES[i % len(PACKET_TYPES)], day_cutoff), 50)
+        persistence.close()
+
+        print(f"\n📊 Gain position : x{before_pos / after_pos:.1f} | Gain comptage par type : x{before_type / after_type:.1f}")
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
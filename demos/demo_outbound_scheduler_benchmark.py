@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'ordonnanceur d'envoi : 2 s fixes entre morceaux vs temps d'antenne
+
+Simulation (temps virtuel, pas de 50 ms) d'une heure de trafic sortant sur un
+nœud --preset. Les commandes arrivent au rythme de --commands-per-min, chaque
+réponse fait 1 à 4 morceaux de 160 caractères ; un broadcast météo (2 messages)
+part toutes les 5 min et 3 alertes vigilance visent 3 abonnés. Le canal est
+chargé par les autres nœuds à 15 %, puis à --busy-util % entre la 20e et la
+35e minute.
+
+Modèle de la radio (firmware Meshtastic) :
+- file d'émission de 16 paquets, au-delà le paquet est perdu ;
+- émission après écoute du canal : durée = temps d'antenne / (1 - utilisation) ;
+- limite de duty-cycle EU868 de 10 %/h pour tout le nœud, dont --relay % de
+  relais des paquets des autres : au-delà, le firmware refuse le paquet.
+
+Compare :
+1. Envoi immédiat, 2 s fixes entre les morceaux d'une réponse.
+2. OutboundScheduler (priorités, tour de rôle, budget --bot-duty, recul canal chargé).
+
+Usage:
+    python3 demos/demo_outbound_scheduler_benchmark.py [--minutes 60] [--commands-per-min 1.5] [--preset LONG_FAST]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import statistics
+from collections import deque, defaultdict
+
+from lora_airtime import text_airtime
+from outbound_scheduler import OutboundScheduler
+
+logging.disable(logging.INFO)
+
+TICK = 0.05
+RADIO_QUEUE = 16
+LEGAL_DUTY = 0.10
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SimulatedRadio:
+    """File d'émission du firmware, écoute du canal et limite de duty-cycle horaire."""
+
+    def __init__(self, args, clock):
+        self.args = args
+        self.clock = clock
+        self.queue = deque()
+        self.busy_until = 0.0
+        self.history = deque()   # (instant, temps d'antenne) des émissions du bot
+        self.own_airtime = 0.0
+        self.delivered = []      # (instant, priorité, attente)
+        self.dropped = defaultdict(int)
+
+    def channel_util(self):
+        minute = self.clock.now / 60
+        return self.args.busy_util if 20 <= minute < 35 else 15.0
+
+    def enqueue(self, message, priority, submitted):
+        if len(self.queue) >= RADIO_QUEUE:
+            self.dropped['file radio pleine'] += 1
+            return
+        self.queue.append((message, priority, submitted))
+
+    def tick(self):
+        now = self.clock.now
+        while self.history and self.history[0][0] <= now - 3600:
+            self.own_airtime -= self.history.popleft()[1]
+        if now < self.busy_until or not self.queue:
+            return
+        message, priority, submitted = self.queue.popleft()
+        airtime = text_airtime(message, self.args.preset)
+        relay = self.args.relay / 100 * min(now, 3600)
+        if self.own_airtime + relay + airtime > LEGAL_DUTY * 3600:
+            self.dropped['duty-cycle firmware'] += 1
+            return
+        self.history.append((now, airtime))
+        self.own_airtime += airtime
+        self.busy_until = now + airtime / (1 - self.channel_util() / 100)
+        self.delivered.append((now, priority, now - submitted))
+
+
+def build_workload(args, rng):
+    """Messages à envoyer : (instant, priorité, destinataire, [morceaux])."""
+    workload = []
+    duration = args.minutes * 60
+    t = rng.expovariate(args.commands_per_min / 60)
+    while t < duration:
+        user = rng.randrange(args.users)
+        chunks = rng.choice((1, 1, 2, 3, 4))
+        text = [f"({i}/{chunks}) " + "x" * 154 for i in range(1, chunks + 1)] if chunks > 1 else ["x" * 120]
+        workload.append((t, 'dm', 0x1000 + user, text))
+        t += rng.expovariate(args.commands_per_min / 60)
+    for t in range(150, duration, 300):
+        workload.append((float(t), 'broadcast', 0xFFFFFFFF, ["☀️ Météo " + "x" * 150, "🌧️ Pluie " + "x" * 150]))
+    for t in (600.0, 1560.0, 2700.0):
+        if t < duration:
+            for node in range(3):
+                workload.append((t, 'alert', 0x2000 + node, ["🟠 VIGILANCE ORANGE Vent violent " + "x" * 60]))
+    workload.sort(key=lambda entry: entry[0])
+    return workload
+
+
+def run(args, workload, scheduled):
+    clock = VirtualClock()
+    radio = SimulatedRadio(args, clock)
+    scheduler = None
+    if scheduled:
+        scheduler = OutboundScheduler(preset=args.preset, duty_cycle=args.bot_duty, clock=clock,
+                                      channel_util=radio.channel_util)
+
+    # Envoi immédiat : chaque morceau part 2 s après le précédent de la même réponse
+    pending = []
+    for t, priority, recipient, chunks in workload:
+        for index, chunk in enumerate(chunks):
+            pending.append((t if scheduled else t + 2 * index, t, priority, recipient, chunk))
+    pending.sort(key=lambda entry: entry[0])
+
+    position = 0
+    end = args.minutes * 60 + 1800
+    while clock.now < end:
+        while position < len(pending) and pending[position][0] <= clock.now:
+            _, submitted, priority, recipient, chunk = pending[position]
+            position += 1
+            if scheduler:
+                scheduler.submit(priority, recipient, chunk, radio.enqueue, chunk, priority, submitted)
+            else:
+                radio.enqueue(chunk, priority, submitted)
+        if scheduler:
+            while True:
+                item, _ = scheduler.poll()
+                if not item:
+                    break
+                scheduler.deliver(item)
+        radio.tick()
+        clock.now += TICK
+    return radio, scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark envoi immédiat vs ordonnanceur temps d'antenne")
+    parser.add_argument('--minutes', type=int, default=60)
+    parser.add_argument('--commands-per-min', type=float, default=1.5)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--preset', default='LONG_FAST')
+    parser.add_argument('--busy-util', type=float, default=45.0, help="Utilisation du canal (%%) en période chargée")
+    parser.add_argument('--relay', type=float, default=4.0, help="Temps d'antenne des relais (%% de l'heure)")
+    parser.add_argument('--bot-duty', type=float, default=None,
+                        help="Budget de l'ordonnanceur (part de l'heure, défaut: 10 %% moins les relais)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.bot_duty is None:
+        args.bot_duty = LEGAL_DUTY - args.relay / 100
+
+    print("=" * 70)
+    print("BENCHMARK ENVOI - 2 S FIXES vs ORDONNANCEUR TEMPS D'ANTENNE")
+    print("=" * 70)
+    workload = build_workload(args, random.Random(args.seed))
+    messages = sum(len(chunks) for _, _, _, chunks in workload)
+    airtime = sum(text_airtime(c, args.preset) for _, _, _, chunks in workload for c in chunks)
+    print(f"\n🔨 {messages} messages en {args.minutes} min ({args.preset}), "
+          f"{airtime:.0f}s d'antenne demandés ({airtime / (args.minutes * 60):.1%} du temps)")
+
+    for label, scheduled in (("2 s fixes", False), ("Ordonnanceur", True)):
+        radio, scheduler = run(args, workload, scheduled)
+        delivered = radio.delivered
+        in_hour = sum(1 for t, _, _ in delivered if t < args.minutes * 60)
+        print(f"\n📊 {label} : {len(delivered)}/{messages} émis, dont {in_hour} pendant la simulation "
+              f"({in_hour / args.minutes:.1f} msg/min)")
+        for reason, count in radio.dropped.items():
+            print(f"   Perdus ({reason}) : {count}")
+        if scheduler:
+            rejected = sum(p['rejected'] for p in scheduler.get_stats()['priorities'].values())
+            print(f"   Refusés (file de l'ordonnanceur pleine) : {rejected}")
+        for priority in ('alert', 'dm', 'broadcast'):
+            waits = sorted(wait for _, p, wait in delivered if p == priority)
+            if waits:
+                p95 = waits[int(len(waits) * 0.95) - 1] if len(waits) > 1 else waits[0]
+                print(f"   {priority:<9}: {len(waits):3d} émis, attente médiane {statistics.median(waits):6.1f}s "
+                      f"p95 {p95:6.1f}s max {waits[-1]:6.1f}s")
+
+if __name__ == '__main__':
+    main()
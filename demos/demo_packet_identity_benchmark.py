@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la déduplication MQTT : balayage complet vs identité partagée
+
+Simule --packets paquets reçus par la radio (serial, copie TCP pour une partie)
+puis relayés par --gateways gateways MQTT, sur une horloge simulée à --rate
+paquets/s, et compare :
+1. L'ancienne déduplication du collecteur MQTT : dict {(id, from): horodatage}
+   dont toutes les entrées sont parcourues à chaque message (fenêtre 20 s).
+2. PacketIdentityService : table unique expirée par la tête, fenêtre par
+   transport, partagée entre TrafficMonitor et le collecteur MQTT.
+
+Affiche ensuite les doublons par couple de transports.
+
+Usage:
+    python3 demos/demo_packet_identity_benchmark.py [--packets 20000] [--gateways 8]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+from packet_identity import PacketIdentityService, packet_key, RADIO_TRANSPORTS
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_events(args, rng):
+    """(instant, transport, id, from) : radio, copie TCP éventuelle, puis gateways MQTT"""
+    events = []
+    for i in range(args.packets):
+        start = i / args.rate
+        from_id = rng.randrange(args.nodes)
+        events.append((start, 'serial', i + 1, from_id))
+        if rng.random() < args.tcp_share:
+            events.append((start + 0.05, 'tcp', i + 1, from_id))
+        for _ in range(args.gateways):
+            events.append((start + rng.uniform(0.2, 8.0), 'mqtt', i + 1, from_id))
+    events.sort()
+    return events
+
+
+def full_scan(events, window=20):
+    """Ancien _is_duplicate_packet du collecteur MQTT (événements MQTT seulement)"""
+    seen = {}
+    duplicates = 0
+    for now, transport, packet_id, from_id in events:
+        if transport != 'mqtt':
+            continue
+        expired = [key for key, stamp in seen.items() if now - stamp > window]
+        for key in expired:
+            del seen[key]
+        key = (packet_id, from_id)
+        if key in seen:
+            duplicates += 1
+        else:
+            seen[key] = now
+    return duplicates
+
+
+def shared_identity(events, clock):
+    identity = PacketIdentityService(clock=clock)
+    mqtt_duplicates = 0
+    for now, transport, packet_id, from_id in events:
+        clock.now = now
+        key = packet_key(packet_id, from_id)
+        if transport == 'mqtt':
+            mqtt_duplicates += identity.is_duplicate(key, 'mqtt', scope=())
+        else:
+            identity.observe(key, transport, scope=RADIO_TRANSPORTS)
+    return identity, mqtt_duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark identité des paquets multi-transports")
+    parser.add_argument('--packets', type=int, default=20000)
+    parser.add_argument('--gateways', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=20.0, help="Paquets radio par seconde")
+    parser.add_argument('--nodes', type=int, default=150)
+    parser.add_argument('--tcp-share', type=float, default=0.3, help="Part des paquets reçus aussi via TCP")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DÉDUPLICATION - BALAYAGE COMPLET vs IDENTITÉ PARTAGÉE")
+    print("=" * 70)
+
+    events = build_events(args, random.Random(args.seed))
+    mqtt_events = sum(1 for event in events if event[1] == 'mqtt')
+    print(f"\n🔨 {len(events)} réceptions ({mqtt_events} MQTT, {args.gateways} gateways, "
+          f"{args.rate:.0f} paquets/s)")
+
+    start = time.perf_counter()
+    scan_duplicates = full_scan(events)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    identity, mqtt_duplicates = shared_identity(events, SimClock())
+    identity_time = time.perf_counter() - start
+
+    print(f"\n📊 Balayage complet     : {scan_time:6.2f}s ({mqtt_events / scan_time:,.0f} msg MQTT/s, "
+          f"{scan_duplicates} doublons)")
+    print(f"📊 PacketIdentityService : {identity_time:6.2f}s ({len(events) / identity_time:,.0f} réceptions/s, "
+          f"{mqtt_duplicates} doublons MQTT)")
+    print(f"   Gain : x{scan_time / identity_time:.1f}")
+
+    stats = identity.get_stats()
+    print(f"\n🔁 Paquets uniques par transport : {stats['unique']}")
+    print("🔁 Doublons par couple (premier → doublon) :")
+    for (first, transport), count in sorted(stats['duplicates'].items(), key=lambda item: -item[1]):
+        print(f"   {first:>8} → {transport:<8} {count:8d} ({count / len(events):.1%} des réceptions)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mémoire de TrafficMonitor.all_packets et public_messages : dicts vs enregistrements à __slots__
+
+Mesure avec tracemalloc une file de --packets paquets (mélange de types réaliste, télémétrie
+et position imbriquées, ~300 nœuds) et de --messages messages publics, construits comme dans
+add_packet / add_public_message, en dicts puis en PacketRecord / MessageRecord.
+
+Usage:
+    python3 demos/demo_packet_records_memory.py [--packets 5000] [--messages 2000]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections import deque
+
+from packet_records import PacketRecord, MessageRecord
+
+TYPES = ('TEXT_MESSAGE_APP', 'POSITION_APP', 'TELEMETRY_APP', 'NODEINFO_APP', 'NEIGHBORINFO_APP', 'ROUTING_APP')
+
+
+def make_packet(node, names):
+    packet_type = random.choice(TYPES)
+    # Chaînes recréées à chaque paquet, comme le décodage protobuf / get_node_name
+    entry = {
+        'timestamp': time.time(), 'from_id': 0x10000000 + node, 'to_id': 0xFFFFFFFF,
+        'source': ''.join(['t', 'cp']), 'sender_name': ''.join([names[node]]),
+        'packet_type': ''.join([packet_type]), 'message': 'bonjour le réseau' if packet_type == 'TEXT_MESSAGE_APP' else None,
+        'rssi': random.randint(-120, -60), 'snr': random.uniform(-15, 10), 'hops': random.randint(0, 3),
+        'hop_limit': 3, 'hop_start': 3, 'size': random.randint(40, 200), 'is_broadcast': True,
+        'is_encrypted': False, 'channel': 0, 'via_mqtt': False, 'want_ack': False, 'want_response': False,
+        'priority': 0, 'family': ''.join(['FLO', 'OD']), 'public_key': None,
+    }
+    if packet_type == 'TELEMETRY_APP':
+        entry['telemetry'] = {'battery': random.randint(0, 100), 'voltage': random.uniform(3.3, 4.2),
+                              'channel_util': random.uniform(0, 30), 'air_util': random.uniform(0, 5)}
+    elif packet_type == 'POSITION_APP':
+        entry['position'] = {'latitude': random.uniform(44, 46), 'longitude': random.uniform(5, 7),
+                             'altitude': random.randint(200, 2000)}
+    return entry
+
+
+def make_message(node, names):
+    text = 'message public numéro %d' % random.randint(0, 10 ** 6)
+    return {'timestamp': time.time(), 'from_id': 0x10000000 + node, 'sender_name': ''.join([names[node]]),
+            'message': text, 'rssi': -90, 'snr': 5.5, 'message_length': len(text), 'source': ''.join(['lo', 'cal'])}
+
+
+def measure(args, packet_factory, message_factory):
+    random.seed(42)
+    names = [f"Node-{node:04d}" for node in range(300)]
+    tracemalloc.start()
+    packets = deque(maxlen=args.packets)
+    messages = deque(maxlen=args.messages)
+    for _ in range(args.packets):
+        packets.append(packet_factory(make_packet(random.randrange(300), names)))
+    for _ in range(args.messages):
+        messages.append(message_factory(make_message(random.randrange(300), names)))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire all_packets/public_messages : dicts vs __slots__")
+    parser.add_argument('--packets', type=int, default=5000)
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MÉMOIRE DES FILES DE TRAFFICMONITOR - DICTS vs ENREGISTREMENTS __SLOTS__")
+    print("=" * 70)
+    before = measure(args, dict, dict)
+    after = measure(args, PacketRecord, MessageRecord)
+    print(f"\n{args.packets} paquets + {args.messages} messages :")
+    print(f"   Dicts             : {before / 1024:8.0f} Ko")
+    print(f"   PacketRecord      : {after / 1024:8.0f} Ko  (-{(1 - after / before) * 100:.0f} %)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark /propag : recherche de position par liaison vs table node_positions
+
+Génère un mois de trafic synthétique, puis compare :
+- l'ancien chemin : 2 recherches de position (scan de packets + JSON) par liaison
+- le nouveau chemin : get_propagation_report, positions jointes depuis node_positions
+
+Usage:
+    python3 demos/demo_propag_positions_benchmark.py [--days 30] [--per-day 20000] [--nodes 200]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import random
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+class BenchNodeManager:
+    """NodeManager minimal pour le rapport de propagation"""
+
+    def __init__(self, ref_pos):
+        self.ref_pos = ref_pos
+        self.interface = None
+
+    def get_reference_position(self):
+        return self.ref_pos
+
+    def get_node_data(self, node_id):
+        return None
+
+    def get_node_name(self, node_id, interface=None):
+        return f"Node-{node_id:08x}"
+
+    def format_distance(self, distance_km):
+        return f"{distance_km:.1f}km"
+
+    def haversine_distance(self, lat1, lon1, lat2, lon2):
+        r = 6371.0
+        dlat = math.radians(lat2 - lat1)
+        dlon = math.radians(lon2 - lon1)
+        a = (math.sin(dlat / 2) ** 2
+             + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2)
+        return 2 * r * math.asin(math.sqrt(a))
+
+
+def fill_database(persistence, days, per_day, nodes):
+    """Insère `days` jours de trafic avec positions et liaisons directes"""
+    node_ids = [0x20000000 + i * 104729 for i in range(nodes)]
+    positions = {n: (47.0 + random.random(), 6.0 + random.random()) for n in node_ids}
+    now = time.time()
+    batch = []
+    cursor = persistence.conn.cursor()
+    for i in range(days * per_day):
+        node = random.choice(node_ids)
+        packet = {
+            'timestamp': now - random.uniform(0, days * 86400),
+            'from_id': node,
+            'to_id': 0xFFFFFFFF,
+            'source': 'local',
+            'sender_name': f"Node{node:x}",
+            'packet_type': 'TELEMETRY_APP',
+            'snr': random.uniform(-15, 10),
+            'rssi': random.randint(-125, -60),
+            'hops': 0,
+            'size': 60,
+        }
+        roll = random.random()
+        if roll < 0.15:
+            lat, lon = positions[node]
+            packet['packet_type'] = 'POSITION_APP'
+            packet['position'] = {'latitude': lat, 'longitude': lon, 'altitude': 450}
+        elif roll < 0.35:
+            packet['packet_type'] = 'ROUTING_APP'
+            packet['to_id'] = random.choice(node_ids)
+        batch.append(packet)
+        if len(batch) >= 20000:
+            persistence._insert_packets(cursor, 'packets', batch)
+            batch.clear()
+    if batch:
+        persistence._insert_packets(cursor, 'packets', batch)
+    persistence.conn.commit()
+    return positions
+
+
+def legacy_position(conn, node_num, cutoff):
+    """Ancienne recherche : variantes d'ID sur from_id TEXT, dernière ligne avec position, JSON parsé"""
+    for search_id in (str(node_num), node_num, f"!{node_num:08x}"):
+        row = conn.execute('''
+            SELECT position FROM packets INDEXED BY idx_packets_from_id
+            WHERE from_id = ? AND timestamp >= ? AND position IS NOT NULL AND position != ''
+            ORDER BY timestamp DESC LIMIT 1
+        ''', (search_id, cutoff)).fetchone()
+        if row:
+            return json.loads(row[0])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /propag avec node_positions")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--per-day', type=int, default=20000)
+    parser.add_argument('--nodes', type=int, default=200)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK /propag - positions des nœuds")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_propag_")
+    old_cwd = os.getcwd()
+    os.chdir(tmpdir)  # TrafficMonitor ouvre traffic_history.db dans le répertoire courant
+    try:
+        from traffic_monitor import TrafficMonitor
+
+        monitor = TrafficMonitor(BenchNodeManager((47.5, 6.5)))
+        persistence = monitor.persistence
+
+        print(f"\n🔨 Insertion de {args.days * args.per_day:,} paquets ({args.days} jours, {args.nodes} nœuds)...")
+        start = time.perf_counter()
+        fill_database(persistence, args.days, args.per_day, args.nodes)
+        print(f"   {time.perf_counter() - start:.1f}s")
+
+        links = persistence.load_radio_links_with_positions(hours=24)
+        print(f"\n🔗 {len(links):,} liaisons sur 24h")
+
+        cutoff = time.time() - 720 * 3600
+        start = time.perf_counter()
+        for link in links:
+            legacy_position(persistence.conn, link['from_num'], cutoff)
+            legacy_position(persistence.conn, link['to_num'], cutoff)
+        legacy = time.perf_counter() - start
+        print(f"\n📼 Avant : {2 * len(links):,} recherches de position : {legacy:.2f}s")
+
+        start = time.perf_counter()
+        report = monitor.get_propagation_report(hours=24, compact=False)
+        current = time.perf_counter() - start
+        print(f"🚀 Après : get_propagation_report complet (jointure node_positions) : {current:.2f}s")
+
+        print("\n" + report.split("\n")[0])
+        persistence.close()
+    finally:
+        os.chdir(old_cwd)
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des écritures sur la carte SD : base sur carte SD vs base en RAM (tmpfs)
+
+Simule une heure de trafic (--packets-per-hour paquets, un commit par paquet)
+sur une base préremplie (--size-mb), puis mesure les octets réellement écrits
+sur le stockage (write_bytes de /proc/self/io, écritures tmpfs exclues) :
+
+1. Base sur le disque (mode actuel).
+2. Base en RAM, sauvegardée sur le disque toutes les --interval secondes
+   (nombre de sauvegardes dans l'heure = 3600 / interval).
+
+Usage:
+    python3 demos/demo_ram_checkpoint_benchmark.py [--size-mb 50] [--packets-per-hour 3600]
+        [--interval 900] [--disk-dir .] [--ram-dir /dev/shm]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+from db_checkpoint import process_write_bytes
+
+logging.disable(logging.INFO)
+
+
+def make_packet(timestamp):
+    node = random.randint(1, 300)
+    return {
+        'timestamp': timestamp, 'from_id': node, 'to_id': 0xFFFFFFFF, 'source': 'local',
+        'sender_name': f"Node-{node:08x}", 'packet_type': random.choice(['TEXT_MESSAGE_APP', 'POSITION_APP']),
+        'message': 'x' * random.randint(20, 150), 'rssi': random.randint(-120, -60),
+        'snr': random.uniform(-15, 10), 'hops': random.randint(0, 4), 'size': 100
+    }
+
+
+def prefill(db_path, size_mb):
+    """Crée une base de size_mb Mo (insertion par lots)."""
+    persistence = TrafficPersistence(db_path)
+    now = time.time()
+    while os.path.getsize(db_path) < size_mb * 1024 * 1024:
+        batch = [('packets', make_packet(now - random.uniform(3600, 47 * 3600))) for _ in range(5000)]
+        persistence._flush_packet_batch(batch)
+        persistence.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    persistence.close()
+
+
+def simulate_hour(persistence, packets, checkpoints):
+    """Insère les paquets d'une heure (un commit chacun) et fait les sauvegardes de l'heure."""
+    every = packets // checkpoints if checkpoints else None
+    now = time.time()
+    for i in range(packets):
+        persistence.save_packet(make_packet(now + i))
+        if every and (i + 1) % every == 0:
+            persistence.checkpointer.checkpoint(persistence.conn)
+
+
+def measure(label, func):
+    os.sync()
+    before = process_write_bytes()
+    start = time.perf_counter()
+    func()
+    os.sync()
+    written = process_write_bytes() - before
+    print(f"   {label:<36} {written / 1024 / 1024:9.1f} Mo/h   ({time.perf_counter() - start:.1f}s)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark écritures SD : disque vs RAM + sauvegarde")
+    parser.add_argument('--size-mb', type=int, default=50, help="Taille de la base préremplie")
+    parser.add_argument('--packets-per-hour', type=int, default=3600)
+    parser.add_argument('--interval', type=int, default=900, help="Intervalle de sauvegarde (s)")
+    parser.add_argument('--disk-dir', default='.', help="Répertoire sur la carte SD")
+    parser.add_argument('--ram-dir', default='/dev/shm', help="Répertoire tmpfs")
+    args = parser.parse_args()
+
+    if process_write_bytes() is None:
+        print("❌ /proc/self/io indisponible : mesure impossible sur ce système")
+        return
+
+    print("=" * 70)
+    print("BENCHMARK ÉCRITURES CARTE SD - base sur disque vs base en RAM")
+    print("=" * 70)
+
+    disk_dir = tempfile.mkdtemp(prefix="meshbot_sd_", dir=args.disk_dir)
+    ram_dir = tempfile.mkdtemp(prefix="meshbot_ram_", dir=args.ram_dir)
+    try:
+        reference = os.path.join(disk_dir, 'reference.db')
+        print(f"\n🔨 Base préremplie de {args.size_mb} Mo...")
+        prefill(reference, args.size_mb)
+
+        checkpoints = max(1, 3600 // args.interval)
+        print(f"\n💾 Octets écrits sur le disque pour 1 h de trafic "
+              f"({args.packets_per_hour} paquets, un commit par paquet) :")
+
+        disk_path = os.path.join(disk_dir, 'disk.db')
+        shutil.copy(reference, disk_path)
+        persistence = TrafficPersistence(disk_path)
+        disk_bytes = measure("Base sur disque (actuel)", lambda: simulate_hour(persistence, args.packets_per_hour, 0))
+        persistence.close()
+
+        ram_path = os.path.join(disk_dir, 'ram.db')
+        shutil.copy(reference, ram_path)
+        persistence = TrafficPersistence(ram_path, ram_dir=ram_dir, checkpoint_interval=10 ** 9)
+        ram_bytes = measure(f"Base en RAM, {checkpoints} sauvegarde(s)/h",
+                            lambda: simulate_hour(persistence, args.packets_per_hour, checkpoints))
+        persistence.close()
+
+        print(f"\n   Réduction : x{disk_bytes / max(ram_bytes, 1):.1f} "
+              f"(une sauvegarde ≈ taille de la base, {args.size_mb} Mo)")
+    finally:
+        shutil.rmtree(disk_dir, ignore_errors=True)
+        shutil.rmtree(ram_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
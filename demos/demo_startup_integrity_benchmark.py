@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du démarrage de TrafficPersistence selon la vérification d'intégrité
+
+1. Crée une base de la taille demandée (paquets synthétiques).
+2. Mesure l'ouverture avec startup_check='full' (ancien comportement : integrity_check),
+   'quick' (quick_check), 'header' (défaut) et en lecture seule (exporteurs de carte).
+3. Mesure la vérification complète différée (thread d'arrière-plan).
+
+Les mesures sont faites cache disque chaud ; sur carte SD à froid l'écart est plus grand.
+
+Usage:
+    python3 demos/demo_startup_integrity_benchmark.py [--size-mb 500]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+logging.disable(logging.INFO)
+
+
+def fill_database(db_path, size_mb):
+    """Insère des paquets jusqu'à atteindre size_mb sur disque."""
+    persistence = TrafficPersistence(db_path)
+    conn = persistence.conn
+    now = time.time()
+    batch = 20000
+    inserted = 0
+    while os.path.getsize(db_path) < size_mb * 1024 * 1024:
+        rows = []
+        for i in range(batch):
+            node = random.randint(1, 500)
+            rows.append((
+                now - random.uniform(0, 30 * 86400), str(node), str(0xFFFFFFFF), 'local',
+                f"Node-{node:08x}", random.choice(['TEXT_MESSAGE_APP', 'POSITION_APP', 'TELEMETRY_APP']),
+                'x' * random.randint(50, 200), random.randint(-120, -60), random.uniform(-15, 10),
+                random.randint(0, 5), random.randint(20, 240), 1, node, 0xFFFFFFFF
+            ))
+        conn.executemany('''
+            INSERT INTO packets (timestamp, from_id, to_id, source, sender_name, packet_type,
+                                 message, rssi, snr, hops, size, is_broadcast, from_num, to_num)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        inserted += batch
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    persistence.close()
+    return inserted
+
+
+def time_open(db_path, **kwargs):
+    start = time.perf_counter()
+    persistence = TrafficPersistence(db_path, **kwargs)
+    elapsed = time.perf_counter() - start
+    persistence.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark démarrage TrafficPersistence")
+    parser.add_argument('--size-mb', type=int, default=500)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DÉMARRAGE - vérification d'intégrité")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_startup_")
+    db_path = os.path.join(tmpdir, 'traffic_history.db')
+    try:
+        print(f"\n🔨 Création d'une base de {args.size_mb} Mo...")
+        start = time.perf_counter()
+        rows = fill_database(db_path, args.size_mb)
+        print(f"   {rows:,} paquets, {os.path.getsize(db_path) / 1024 / 1024:.0f} Mo "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        print("\n⏱️  Ouverture :")
+        for label, kwargs in (
+            ("full (integrity_check, ancien)", {'startup_check': 'full'}),
+            ("quick (quick_check)", {'startup_check': 'quick'}),
+            ("header (défaut)", {'startup_check': 'header'}),
+            ("lecture seule (exporteurs)", {'read_only': True}),
+        ):
+            print(f"   {label:<34} {time_open(db_path, **kwargs):7.2f}s")
+
+        persistence = TrafficPersistence(db_path)
+        start = time.perf_counter()
+        persistence.schedule_integrity_check(min_interval_hours=0)
+        persistence._integrity_thread.join()
+        print(f"\n🔍 Vérification complète différée (arrière-plan) : {time.perf_counter() - start:.2f}s "
+              f"→ {persistence.get_last_integrity_check()['result']}")
+        persistence.close()
+    finally:
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
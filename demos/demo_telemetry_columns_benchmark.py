@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'extraction de l'historique télémétrie 7 jours (export de carte)
+
+1. Crée une base avec des paquets TELEMETRY_APP synthétiques sur 7 jours
+   (et autant d'autres paquets pour le réalisme).
+2. Avant : lecture de la colonne JSON telemetry et json.loads par ligne
+   (ancien code de map/export_nodes_from_db.py).
+3. Après : lecture des colonnes typées, arrondis faits en SQL.
+
+Usage:
+    python3 demos/demo_telemetry_columns_benchmark.py [--rows 200000] [--nodes 300]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import random
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+logging.disable(logging.INFO)
+
+
+def fill_database(persistence, rows, nodes):
+    """Insère rows paquets TELEMETRY_APP et rows paquets texte sur 7 jours."""
+    now = time.time()
+    batch = []
+    for i in range(rows):
+        node = random.randint(1, nodes)
+        batch.append({
+            'timestamp': now - random.uniform(0, 7 * 86400), 'from_id': node, 'to_id': 0xFFFFFFFF,
+            'source': 'local', 'packet_type': 'TELEMETRY_APP', 'size': 40,
+            'telemetry': {'battery': random.randint(0, 101), 'voltage': random.uniform(3.3, 4.2),
+                          'channel_util': random.uniform(0, 40), 'air_util': random.uniform(0, 10)}
+        })
+        batch.append({
+            'timestamp': now - random.uniform(0, 7 * 86400), 'from_id': node, 'to_id': 0xFFFFFFFF,
+            'source': 'local', 'packet_type': 'TEXT_MESSAGE_APP', 'message': 'x' * 80, 'size': 80
+        })
+        if len(batch) >= 20000:
+            persistence._flush_packet_batch([('packets', packet) for packet in batch])
+            batch = []
+    if batch:
+        persistence._flush_packet_batch([('packets', packet) for packet in batch])
+
+
+def extract_json(cursor, cutoff):
+    """Ancienne extraction : JSON décodé en Python pour chaque ligne."""
+    cursor.execute("""
+        SELECT from_id, timestamp, telemetry FROM packets
+        WHERE packet_type = 'TELEMETRY_APP' AND timestamp > ? AND telemetry IS NOT NULL
+        ORDER BY from_id, timestamp ASC
+    """, (cutoff,))
+    history = {}
+    for from_id, timestamp, telemetry_json in cursor.fetchall():
+        telemetry = json.loads(telemetry_json) if telemetry_json else {}
+        battery = telemetry.get('battery')
+        voltage = telemetry.get('voltage')
+        if battery is None and voltage is None:
+            continue
+        point = {'t': int(timestamp)}
+        if battery is not None:
+            point['b'] = battery
+        if voltage is not None:
+            point['v'] = round(voltage, 2)
+        if telemetry.get('channel_util') is not None:
+            point['c'] = round(telemetry['channel_util'], 1)
+        if telemetry.get('air_util') is not None:
+            point['a'] = round(telemetry['air_util'], 1)
+        history.setdefault(str(from_id), []).append(point)
+    return history
+
+
+def extract_typed(cursor, cutoff):
+    """Nouvelle extraction : colonnes typées, arrondis en SQL."""
+    cursor.execute("""
+        SELECT from_id, CAST(timestamp AS INTEGER), battery, ROUND(voltage, 2),
+               ROUND(channel_util, 1), ROUND(air_util, 1)
+        FROM packets
+        WHERE packet_type = 'TELEMETRY_APP' AND timestamp > ?
+        AND (battery IS NOT NULL OR voltage IS NOT NULL)
+        ORDER BY from_id, timestamp ASC
+    """, (cutoff,))
+    history = {}
+    for from_id, timestamp, battery, voltage, channel_util, air_util in cursor.fetchall():
+        point = {'t': timestamp}
+        if battery is not None:
+            point['b'] = battery
+        if voltage is not None:
+            point['v'] = voltage
+        if channel_util is not None:
+            point['c'] = channel_util
+        if air_util is not None:
+            point['a'] = air_util
+        history.setdefault(str(from_id), []).append(point)
+    return history
+
+
+def best_of(func, cursor, cutoff, runs=3):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(cursor, cutoff)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction télémétrie 7 jours")
+    parser.add_argument('--rows', type=int, default=200000, help="Paquets TELEMETRY_APP")
+    parser.add_argument('--nodes', type=int, default=300)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK EXTRACTION TÉLÉMÉTRIE 7 JOURS - JSON vs colonnes typées")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_telemetry_")
+    db_path = os.path.join(tmpdir, 'traffic_history.db')
+    try:
+        persistence = TrafficPersistence(db_path)
+        print(f"\n🔨 Insertion de {args.rows:,} paquets télémétrie ({args.nodes} nœuds)...")
+        start = time.perf_counter()
+        fill_database(persistence, args.rows, args.nodes)
+        print(f"   {time.perf_counter() - start:.1f}s, {os.path.getsize(db_path) / 1024 / 1024:.0f} Mo")
+        persistence.close()
+
+        reader = TrafficPersistence(db_path, read_only=True)
+        cursor = reader.conn.cursor()
+        cutoff = time.time() - 7 * 86400
+
+        before, history_json = best_of(extract_json, cursor, cutoff)
+        after, history_typed = best_of(extract_typed, cursor, cutoff)
+        points = sum(len(points) for points in history_typed.values())
+
+        print(f"\n⏱️  Extraction ({points:,} points, {len(history_typed)} nœuds) :")
+        print(f"   Avant (JSON + json.loads)     {before:7.3f}s")
+        print(f"   Après (colonnes typées)       {after:7.3f}s   (x{before / after:.1f})")
+        print(f"   Résultats identiques : {'✅' if history_json == history_typed else '❌'}")
+        reader.close()
+    finally:
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des séries de télémétrie : paquets bruts vs tiers sous-échantillonnés
+
+Crée une base de --nodes nœuds envoyant leur télémétrie toutes les --interval secondes
+pendant --days jours, puis compare pour l'historique 7 jours de la carte :
+
+1. L'ancienne requête : tous les paquets TELEMETRY_APP des 7 derniers jours.
+2. TrafficPersistence.load_telemetry_series(hours=168) (tier 5 minutes).
+
+Usage:
+    python3 demos/demo_telemetry_tiers_benchmark.py [--nodes 50] [--interval 60] [--days 7]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+logging.disable(logging.INFO)
+
+
+def timed(func, repeat=3):
+    """Meilleur temps (ms) sur repeat exécutions."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark séries de télémétrie brutes vs tiers")
+    parser.add_argument('--nodes', type=int, default=50)
+    parser.add_argument('--interval', type=int, default=60, help="Secondes entre deux télémétries d'un nœud")
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK SÉRIES DE TÉLÉMÉTRIE - PAQUETS BRUTS vs TIERS")
+    print("=" * 70)
+
+    tmpdir = tempfile.mkdtemp(prefix="meshbot_telemetry_")
+    try:
+        persistence = TrafficPersistence(os.path.join(tmpdir, 'traffic.db'))
+        now = time.time()
+        first = now - args.days * 86400
+        timestamps = [first + i * args.interval for i in range(args.days * 86400 // args.interval)]
+        print(f"\n🔨 {len(timestamps) * args.nodes} paquets de télémétrie ({args.nodes} nœuds)...")
+        start = time.perf_counter()
+        for offset in range(0, len(timestamps), 500):
+            batch = [('packets', {
+                'timestamp': timestamp + node, 'from_id': 0x1000 + node, 'to_id': 0xFFFFFFFF,
+                'source': 'local', 'packet_type': 'TELEMETRY_APP', 'size': 40,
+                'telemetry': {'battery': random.randint(20, 100), 'voltage': random.uniform(3.3, 4.2),
+                              'channel_util': random.uniform(0, 30), 'air_util': random.uniform(0, 5)}
+            }) for timestamp in timestamps[offset:offset + 500] for node in range(args.nodes)]
+            persistence._flush_packet_batch(batch)
+        print(f"   Insertion (tiers compris) : {time.perf_counter() - start:.1f}s")
+
+        cutoff = now - 7 * 86400
+        raw_ms, raw_rows = timed(lambda: persistence.query_packets("""
+            SELECT from_id, CAST(timestamp AS INTEGER), battery, ROUND(voltage, 2),
+                   ROUND(channel_util, 1), ROUND(air_util, 1)
+            FROM {packets}
+            WHERE packet_type = 'TELEMETRY_APP' AND timestamp > ?
+            AND (battery IS NOT NULL OR voltage IS NOT NULL)
+            ORDER BY from_id, timestamp ASC
+        """, (cutoff,), since=cutoff))
+        tier_ms, series = timed(lambda: persistence.load_telemetry_series(hours=7 * 24))
+
+        print(f"\n📊 Historique 7 jours (meilleur de 3) :")
+        print(f"   Paquets bruts   : {raw_ms:8.1f}ms  {len(raw_rows):>8} lignes")
+        print(f"   Tier 5 minutes  : {tier_ms:8.1f}ms  {sum(len(p) for p in series.values()):>8} points")
+        persistence.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
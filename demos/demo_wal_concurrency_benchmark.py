@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de concurrence TrafficPersistence : journal classique vs WAL + pool de lecture
+
+Un thread écrivain insère des paquets (save_packet synchrone, un commit par
+paquet comme en production sans write-behind) pendant que plusieurs threads
+lecteurs exécutent les requêtes des commandes /stats et /propag.
+
+Usage:
+    python3 demos/demo_wal_concurrency_benchmark.py [--readers 4] [--seconds 5] [--seed-rows 20000]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+def make_packet(i, now=None):
+    """Construit un paquet réaliste pour le benchmark"""
+    return {
+        'timestamp': now or time.time(),
+        'from_id': 0x10000000 + (i % 200),
+        'to_id': 0xFFFFFFFF,
+        'source': 'local',
+        'sender_name': f"Node{i % 200}",
+        'packet_type': random.choice(['TEXT_MESSAGE_APP', 'POSITION_APP', 'TELEMETRY_APP', 'NODEINFO_APP']),
+        'message': f"message {i}",
+        'rssi': random.randint(-120, -60),
+        'snr': random.uniform(-10, 10),
+        'hops': random.randint(0, 5),
+        'size': random.randint(20, 200),
+        'is_broadcast': True,
+    }
+
+
+def seed_database(db_path, rows, **kwargs):
+    """Pré-remplit la base pour que les lectures aient un coût réaliste"""
+    persistence = TrafficPersistence(db_path, **kwargs)
+    now = time.time()
+    packets = [make_packet(i, now - random.uniform(0, 86400)) for i in range(rows)]
+    cursor = persistence.conn.cursor()
+    persistence._insert_packets(cursor, 'packets', packets)
+    persistence.conn.commit()
+    persistence.close()
+
+
+def run_scenario(label, db_path, readers, seconds, **kwargs):
+    """Lance un écrivain et N lecteurs pendant `seconds` secondes"""
+    persistence = TrafficPersistence(db_path, **kwargs)
+    stop = threading.Event()
+    writes = [0]
+    write_latencies = []
+    reads = [0] * readers
+    read_errors = [0] * readers
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            persistence.save_packet(make_packet(i))
+            write_latencies.append((time.perf_counter() - start) * 1000)
+            writes[0] += 1
+            i += 1
+
+    def reader(idx):
+        while not stop.is_set():
+            try:
+                persistence.load_packets(hours=24, limit=2000)
+                persistence.get_stats_summary()
+                reads[idx] += 1
+            except Exception:
+                read_errors[idx] += 1
+
+    threads = [threading.Thread(target=writer, name="bench-writer")]
+    threads += [threading.Thread(target=reader, args=(n,), name=f"bench-reader-{n}") for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    pool = persistence.get_read_pool_stats()
+    persistence.close()
+
+    write_latencies.sort()
+    p99 = write_latencies[int(len(write_latencies) * 0.99)] if write_latencies else 0.0
+    print(f"\n{label}")
+    print(f"  journal_mode      : {pool['journal_mode']}")
+    print(f"  connexions lecture: {pool['read_connections']}")
+    print(f"  écritures/s       : {writes[0] / seconds:,.0f}")
+    print(f"  latence écriture  : p99={p99:.2f}ms max={max(write_latencies or [0]):.2f}ms")
+    print(f"  lectures/s        : {sum(reads) / seconds:,.1f} ({readers} threads)")
+    print(f"  erreurs lecture   : {sum(read_errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WAL + pool de lecture")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--seed-rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK CONCURRENCE SQLITE - TrafficPersistence")
+    print("=" * 60)
+    print(f"Lecteurs: {args.readers} | Durée: {args.seconds}s | Lignes initiales: {args.seed_rows:,}")
+
+    scenarios = [
+        ("📼 Journal classique, connexion partagée", dict(wal=False, read_pool_size=0)),
+        ("🚀 WAL + pool de lecture par thread", dict(wal=True, read_pool_size=args.readers)),
+    ]
+
+    for label, kwargs in scenarios:
+        tmpdir = tempfile.mkdtemp(prefix="meshbot_wal_")
+        db_path = os.path.join(tmpdir, "bench.db")
+        try:
+            seed_database(db_path, args.seed_rows, **kwargs)
+            run_scenario(label, db_path, args.readers, args.seconds, **kwargs)
+        finally:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+            os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
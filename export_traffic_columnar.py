@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export colonnaire (Parquet ou Arrow IPC) de l'historique du trafic pour l'analyse hors ligne.
+
+Les tables packets (partitions d'archive comprises), meshcore_packets, neighbors et
+node_stats sont lues par lots (fetchmany) et écrites en fichiers compressés (zstd),
+un fichier par table et par export : la mémoire utilisée ne dépend que de --chunk-size.
+Les colonnes JSON (télémétrie, position, statistiques des nœuds) sont aplaties en
+colonnes typées ; les compteurs par type et par heure de node_stats deviennent des
+colonnes map<string, int64>.
+
+L'export est incrémental : export_state.json (répertoire de sortie) garde la dernière
+valeur exportée de chaque table (id, ou last_updated pour node_stats). Seules les
+lignes plus récentes sont exportées au passage suivant.
+
+Usage:
+    python3 export_traffic_columnar.py [--db traffic_history.db] [--output traffic_exports]
+        [--format parquet|arrow] [--tables packets,neighbors] [--chunk-size 50000] [--full]
+
+Lecture :
+    import pyarrow.dataset as ds
+    packets = ds.dataset('traffic_exports/packets', format='parquet').to_table()
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from traffic_persistence import TrafficPersistence
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarExporter:
+    """Export incrémental des tables de trafic en fichiers Parquet ou Arrow IPC."""
+
+    # Table -> colonne de filigrane (croissante à l'écriture)
+    WATERMARK_COLUMNS = {
+        'packets': 'id',
+        'meshcore_packets': 'id',
+        'neighbors': 'id',
+        'node_stats': 'last_updated',
+    }
+
+    # Colonnes JSON aplaties : {colonne JSON: [(clé JSON, colonne exportée, type SQLite)]}
+    # Pour les paquets, la colonne typée (v7) est lue en priorité, le JSON en repli
+    PACKET_FLATTENED = {
+        'telemetry': [(name, name, sql_type) for name, sql_type in TrafficPersistence.TELEMETRY_FIELDS],
+        'position': [(name, name, sql_type) for name, sql_type in TrafficPersistence.POSITION_FIELDS],
+    }
+    FLATTENED = {
+        'packets': PACKET_FLATTENED,
+        'meshcore_packets': PACKET_FLATTENED,
+        'node_stats': {
+            'message_stats': [('count', 'message_count', 'INTEGER'),
+                              ('total_chars', 'message_total_chars', 'INTEGER'),
+                              ('avg_length', 'message_avg_length', 'REAL')],
+            'telemetry_stats': [('count', 'telemetry_count', 'INTEGER'),
+                                ('last_battery', 'telemetry_last_battery', 'INTEGER'),
+                                ('last_voltage', 'telemetry_last_voltage', 'REAL'),
+                                ('last_channel_util', 'telemetry_last_channel_util', 'REAL'),
+                                ('last_air_util', 'telemetry_last_air_util', 'REAL')],
+            'position_stats': [('count', 'position_count', 'INTEGER'),
+                               ('last_lat', 'position_last_latitude', 'REAL'),
+                               ('last_lon', 'position_last_longitude', 'REAL'),
+                               ('last_alt', 'position_last_altitude', 'REAL')],
+            'routing_stats': [('count', 'routing_count', 'INTEGER'),
+                              ('packets_relayed', 'routing_packets_relayed', 'INTEGER'),
+                              ('packets_originated', 'routing_packets_originated', 'INTEGER')],
+        },
+    }
+
+    # Dictionnaires JSON {clé: compteur} exportés en map<string, int64>
+    MAP_COLUMNS = {'node_stats': ('packet_types', 'hourly_activity')}
+
+    COMPRESSION = 'zstd'
+    STATE_FILE = 'export_state.json'
+    EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+    def __init__(self, db_path: str, output_dir: str, file_format: str = 'parquet',
+                 chunk_size: int = 50000):
+        """
+        Args:
+            db_path: Base de trafic (ouverte en lecture seule)
+            output_dir: Répertoire des fichiers exportés et de export_state.json
+            file_format: 'parquet' ou 'arrow' (Arrow IPC)
+            chunk_size: Lignes lues et écrites par lot
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow requis pour l'export colonnaire (pip install pyarrow)")
+        if file_format not in self.EXTENSIONS:
+            raise ValueError(f"Format inconnu : {file_format} (parquet ou arrow)")
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.persistence = TrafficPersistence(db_path, read_only=True)
+        self.conn = self.persistence.conn
+        self.state_path = os.path.join(output_dir, self.STATE_FILE)
+        self.state = self._load_state()
+
+    def close(self):
+        self.persistence.close()
+
+    # ------------------------------------------------------------------
+    # Filigranes
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        """Écrit export_state.json (fichier temporaire puis renommage)."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Schéma
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _arrow_type(sql_type: str):
+        sql_type = (sql_type or '').upper()
+        if 'INT' in sql_type:
+            return pa.int64()
+        if 'REAL' in sql_type or 'FLOA' in sql_type or 'DOUB' in sql_type:
+            return pa.float64()
+        if 'BLOB' in sql_type:
+            return pa.binary()
+        return pa.string()
+
+    def _column_spec(self, table: str) -> List[Tuple[str, Any, Optional[Tuple[str, str, str]]]]:
+        """
+        Colonnes exportées d'une table, dans l'ordre.
+
+        Returns:
+            Liste de (nom, type Arrow, source JSON (colonne, clé, type SQLite) ou None)
+        """
+        declared = [(row[1], row[2]) for row in self.conn.execute(f"PRAGMA main.table_info({table})")]
+        flattened = self.FLATTENED.get(table, {})
+        targets = {name for fields in flattened.values() for _, name, _ in fields}
+        maps = self.MAP_COLUMNS.get(table, ())
+
+        spec = []
+        for name, sql_type in declared:
+            if name in flattened or name in targets:
+                continue
+            if name in maps:
+                spec.append((name, pa.map_(pa.string(), pa.int64()), None))
+            else:
+                spec.append((name, self._arrow_type(sql_type), None))
+        for json_column, fields in flattened.items():
+            for key, name, sql_type in fields:
+                spec.append((name, self._arrow_type(sql_type), (json_column, key, sql_type)))
+        return spec
+
+    @staticmethod
+    def _select_list(spec, present: set) -> str:
+        """Expressions SELECT de spec pour une source donnée (NULL si la colonne est absente)."""
+        expressions = []
+        for name, _, json_source in spec:
+            if json_source is None:
+                expressions.append(name if name in present else f"NULL AS {name}")
+                continue
+            json_column, key, sql_type = json_source
+            candidates = [name] if name in present else []
+            if json_column in present:
+                candidates.append(f"CAST(json_extract({json_column}, '$.{key}') AS {sql_type})")
+            if not candidates:
+                expressions.append(f"NULL AS {name}")
+            elif len(candidates) == 1:
+                expressions.append(f"{candidates[0]} AS {name}")
+            else:
+                expressions.append(f"COALESCE({', '.join(candidates)}) AS {name}")
+        return ', '.join(expressions)
+
+    # ------------------------------------------------------------------
+    # Conversion en lots Arrow
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _coerce(value, arrow_type):
+        """Conversion d'une valeur SQLite (typage dynamique) vers le type de la colonne, None si impossible."""
+        if value is None:
+            return None
+        try:
+            if pa.types.is_int64(arrow_type):
+                return int(value)
+            if pa.types.is_float64(arrow_type):
+                return float(value)
+            if pa.types.is_binary(arrow_type):
+                return value if isinstance(value, bytes) else str(value).encode()
+            return value.hex() if isinstance(value, bytes) else str(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def _column_array(self, values, arrow_type):
+        if pa.types.is_map(arrow_type):
+            items = []
+            for value in values:
+                try:
+                    counters = json.loads(value) if value else None
+                    items.append([(str(k), int(v)) for k, v in counters.items()] if counters else None)
+                except (TypeError, ValueError, AttributeError):
+                    items.append(None)
+            return pa.array(items, type=arrow_type)
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+            return pa.array([self._coerce(value, arrow_type) for value in values], type=arrow_type)
+
+    def _record_batch(self, rows: List[tuple], schema) -> 'pa.RecordBatch':
+        columns = list(zip(*rows))
+        arrays = [self._column_array(list(values), field.type) for values, field in zip(columns, schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def _sources(self, table: str) -> List[Tuple[str, Optional[str]]]:
+        """Fichiers lus pour une table : (chemin de partition, ou None pour la base principale)."""
+        sources = [None]
+        if table == 'packets' and self.persistence.partitions:
+            sources += [partition['path'] for partition in self.persistence.partitions.list()]
+        return sources
+
+    def export_table(self, table: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Exporte les lignes d'une table plus récentes que son filigrane.
+
+        La base principale est lue en premier. Les identifiants qui en sont exportés
+        (fenêtre chaude seulement) sont ignorés dans les partitions : un paquet archivé
+        pendant l'export n'est ni perdu ni exporté deux fois.
+
+        Args:
+            table: Table à exporter (clé de WATERMARK_COLUMNS)
+            full: Ignorer le filigrane (export complet)
+
+        Returns:
+            Dict {'table', 'rows', 'path', 'bytes', 'duration', 'watermark'}
+        """
+        start = time.perf_counter()
+        column = self.WATERMARK_COLUMNS[table]
+        watermark = None if full else self.state.get(table, {}).get('watermark')
+        spec = self._column_spec(table)
+        schema = pa.schema([pa.field(name, arrow_type) for name, arrow_type, _ in spec])
+        index = [name for name, _, _ in spec].index(column)
+
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        path = os.path.join(self.output_dir, table, f"{table}-{stamp}.{self.EXTENSIONS[self.file_format]}")
+        writer = _BatchWriter(path, schema, self.file_format, self.COMPRESSION)
+
+        sources = self._sources(table)
+        rows_written = 0
+        highest = watermark
+        main_ids = set()
+        try:
+            for source in sources:
+                conn = self.conn if source is None else sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+                try:
+                    present = {row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")}
+                    if column not in present:
+                        continue
+                    conditions, params = [f"{column} IS NOT NULL"], []
+                    if watermark is not None:
+                        conditions.append(f"{column} > ?")
+                        params.append(watermark)
+                    cursor = conn.execute(
+                        f"SELECT {self._select_list(spec, present)} FROM main.{table} "
+                        f"WHERE {' AND '.join(conditions)} ORDER BY {column}", params)
+                    while True:
+                        rows = cursor.fetchmany(self.chunk_size)
+                        if not rows:
+                            break
+                        if source is not None:
+                            rows = [row for row in rows if row[index] not in main_ids]
+                            if not rows:
+                                continue
+                        elif len(sources) > 1:
+                            main_ids.update(row[index] for row in rows)
+                        writer.write(self._record_batch(rows, schema))
+                        rows_written += len(rows)
+                        last = rows[-1][index]
+                        highest = last if highest is None else max(highest, last)
+                finally:
+                    if source is not None:
+                        conn.close()
+            size = writer.close()
+        except Exception:
+            writer.abort()
+            raise
+
+        if rows_written:
+            self.state[table] = {'column': column, 'watermark': highest, 'exported': time.time()}
+            self._save_state()
+        return {
+            'table': table,
+            'rows': rows_written,
+            'path': path if rows_written else None,
+            'bytes': size,
+            'duration': time.perf_counter() - start,
+            'watermark': highest,
+        }
+
+    def export(self, tables: Optional[List[str]] = None, full: bool = False) -> List[Dict[str, Any]]:
+        """Exporte les tables demandées (défaut: toutes celles de WATERMARK_COLUMNS)."""
+        results = []
+        for table in tables or list(self.WATERMARK_COLUMNS):
+            if table not in self.WATERMARK_COLUMNS:
+                raise ValueError(f"Table non exportable : {table}")
+            results.append(self.export_table(table, full=full))
+        return results
+
+
+class _BatchWriter:
+    """Écriture par lots d'un fichier Parquet / Arrow IPC, renommé une fois complet."""
+
+    def __init__(self, path: str, schema, file_format: str, compression: str):
+        self.path = path
+        self.tmp_path = path + '.part'
+        self.schema = schema
+        self.file_format = file_format
+        self.compression = compression
+        self._sink = None
+        self._writer = None
+
+    def write(self, batch):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.file_format == 'parquet':
+                self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression=self.compression)
+            else:
+                self._sink = pa.OSFile(self.tmp_path, 'wb')
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+        self._writer.write_batch(batch)
+
+    def close(self) -> int:
+        """Ferme le fichier et le renomme. Returns: taille en octets (0 si aucun lot)."""
+        if self._writer is None:
+            return 0
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+        return os.path.getsize(self.path)
+
+    def abort(self):
+        try:
+            if self._writer is not None:
+                self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+        except Exception:
+            pass
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Parquet / Arrow IPC incrémental de traffic_history.db")
+    parser.add_argument('--db', default='traffic_history.db', help="Base de trafic")
+    parser.add_argument('--output', default='traffic_exports', help="Répertoire de sortie")
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--tables', default=','.join(ColumnarExporter.WATERMARK_COLUMNS),
+                        help="Tables exportées, séparées par des virgules")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Lignes par lot")
+    parser.add_argument('--full', action='store_true', help="Ignorer le filigrane (export complet)")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("❌ pyarrow non installé : pip install pyarrow")
+        sys.exit(1)
+
+    exporter = ColumnarExporter(args.db, args.output, args.format, args.chunk_size)
+    try:
+        for result in exporter.export([t.strip() for t in args.tables.split(',') if t.strip()], full=args.full):
+            if result['rows']:
+                print(f"✅ {result['table']:<17} {result['rows']:>9} lignes  "
+                      f"{result['bytes'] / 1024 / 1024:7.2f} Mo  {result['duration']:6.1f}s  → {result['path']}")
+            else:
+                print(f"   {result['table']:<17} rien de nouveau")
+    finally:
+        exporter.close()
+
+
+if __name__ == '__main__':
+    main()
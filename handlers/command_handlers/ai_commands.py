@@ -6,6 +6,7 @@ Gestionnaire des commandes IA
 
 import time
 from utils import info_print, error_print, debug_print
+from outbound_scheduler import schedule_or_send
 import traceback
 
 class AICommands:
@@ -114,18 +115,23 @@ class AICommands:
             
             debug_print(f"📡 Broadcast {command} via interface partagée...")
             
+            # Broadcast espacé par l'ordonnanceur d'envoi (priorité la plus basse)
+            scheduler = getattr(self.sender, 'outbound_scheduler', None)
+
             # Detect interface type to handle MeshCore vs Meshtastic differences
             is_meshcore = hasattr(interface, '__class__') and 'MeshCore' in interface.__class__.__name__
             
             if is_meshcore:
                 # MeshCore: Send as broadcast (0xFFFFFFFF) on public channel (channelIndex=0)
                 debug_print("🔍 Interface MeshCore détectée - envoi broadcast sur canal public")
-                interface.sendText(message, destinationId=0xFFFFFFFF, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, destinationId=0xFFFFFFFF, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via MeshCore (canal public)")
             else:
                 # Meshtastic: Broadcast on public channel (channelIndex=0 is default)
                 debug_print("🔍 Interface Meshtastic détectée - envoi broadcast sur canal public")
-                interface.sendText(message, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via Meshtastic (canal public)")
             
         except Exception as e:
@@ -207,6 +207,20 @@ Raccourcis: s, i, v, nb, mt, mc, pw
                     f"• Durée: {span_hours:.1f} heures",
                 ]
 
+                # Écritures sur le stockage (mode RAM : sauvegardes périodiques)
+                io_stats = self.persistence.get_io_stats() if hasattr(self.persistence, 'get_io_stats') else None
+                if io_stats and io_stats['bytes_per_hour'] is not None:
+                    lines.extend([
+                        "",
+                        f"💾 Écritures disque: {io_stats['bytes_per_hour'] / 1024 / 1024:.1f} MB/h "
+                        f"({'base en RAM' if io_stats['mode'] == 'ram' else 'carte SD'})",
+                    ])
+                    checkpoint = io_stats.get('checkpoint')
+                    if checkpoint and checkpoint['last_checkpoint']:
+                        age_min = (time.time() - checkpoint['last_checkpoint']) / 60
+                        lines.append(f"• Dernière sauvegarde: il y a {age_min:.0f} min "
+                                     f"({checkpoint['checkpoints']} sauvegardes)")
+
             return "\n".join(lines)
 
         except Exception as e:
@@ -324,9 +338,8 @@ Raccourcis: s, i, v, nb, mt, mc, pw
             size_before = os.path.getsize(db_path) / (1024 * 1024)
 
             info_print("🔧 Optimisation DB (VACUUM)...")
-            cursor = self.persistence.conn.cursor()
-            cursor.execute("VACUUM")
-            self.persistence.conn.commit()
+            # Convertit aussi une base existante en auto_vacuum=INCREMENTAL
+            self.persistence.vacuum()
 
             # Taille après
             size_after = os.path.getsize(db_path) / (1024 * 1024)
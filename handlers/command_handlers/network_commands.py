@@ -10,6 +10,7 @@ import threading
 import meshtastic.tcp_interface
 from config import *
 from utils import *
+from outbound_scheduler import schedule_or_send, is_scheduled
 from .signal_utils import *
 
 class NetworkCommands:
@@ -132,7 +133,8 @@ class NetworkCommands:
                 debug_print(f"[NODESMC] Envoi message {i+1}/{len(messages)} ({len(msg)} chars)")
                 self.sender.send_single(msg, sender_id, sender_info)
                 # Petite pause entre les messages pour éviter la congestion
-                if i < len(messages) - 1:
+                # (l'ordonnanceur d'envoi s'en charge s'il tourne)
+                if i < len(messages) - 1 and not is_scheduled(self.sender):
                     import time
                     time.sleep(1)
             
@@ -554,18 +556,23 @@ class NetworkCommands:
             
             debug_print(f"📡 Broadcast {command} via interface partagée...")
             
+            # Broadcast espacé par l'ordonnanceur d'envoi (priorité la plus basse)
+            scheduler = getattr(self.sender, 'outbound_scheduler', None)
+
             # Detect interface type to handle MeshCore vs Meshtastic differences
             is_meshcore = hasattr(interface, '__class__') and 'MeshCore' in interface.__class__.__name__
             
             if is_meshcore:
                 # MeshCore: Send as broadcast (0xFFFFFFFF) on public channel (channelIndex=0)
                 debug_print("🔍 Interface MeshCore détectée - envoi broadcast sur canal public")
-                interface.sendText(message, destinationId=0xFFFFFFFF, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, destinationId=0xFFFFFFFF, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via MeshCore (canal public)")
             else:
                 # Meshtastic: Broadcast on public channel (channelIndex=0 is default)
                 debug_print("🔍 Interface Meshtastic détectée - envoi broadcast sur canal public")
-                interface.sendText(message, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via Meshtastic (canal public)")
             
         except Exception as e:
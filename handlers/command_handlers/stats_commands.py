@@ -46,33 +46,31 @@ class StatsCommands:
             lines.append(f"📡 STATISTIQUES D'UTILISATION DU CANAL ({hours}h)")
             lines.append("=" * 50)
 
-            # Charger les paquets directement depuis SQLite pour avoir les données les plus récentes
-            all_packets = tm.persistence.load_packets(hours=hours, limit=10000)
+            # Agrégats horaires de télémétrie depuis SQLite (exacts sur la fenêtre)
+            rollups = tm.persistence.load_packet_rollups(hours=hours, packet_types=['TELEMETRY_APP'])
 
             # Collecter les données de télémétrie par nœud
             node_channel_data = {}
 
-            for packet in all_packets:
-                if packet['packet_type'] == 'TELEMETRY_APP':
-                    from_id = packet['from_id']
-
-                    # Extraire les données de télémétrie directement du paquet
-                    if 'telemetry' in packet and packet['telemetry'] is not None:
-                        telemetry = packet['telemetry']
-                        ch_util = telemetry.get('channel_util')
-                        air_util = telemetry.get('air_util')
-
-                        if ch_util is not None:
-                            if from_id not in node_channel_data:
-                                node_channel_data[from_id] = {
-                                    'channel_utils': [],
-                                    'air_utils': [],
-                                    'name': self.node_manager.get_node_name(from_id, interface=self.interface)
-                                }
-
-                            node_channel_data[from_id]['channel_utils'].append(ch_util)
-                            if air_util is not None:
-                                node_channel_data[from_id]['air_utils'].append(air_util)
+            for rollup in rollups:
+                if not rollup['channel_util_count']:
+                    continue
+
+                from_id = rollup['from_id']
+                if from_id not in node_channel_data:
+                    node_channel_data[from_id] = {
+                        'channel_util_sum': 0.0,
+                        'channel_util_count': 0,
+                        'air_util_sum': 0.0,
+                        'air_util_count': 0,
+                        'name': self.node_manager.get_node_name(from_id, interface=self.interface)
+                    }
+
+                data = node_channel_data[from_id]
+                data['channel_util_sum'] += rollup['channel_util_sum']
+                data['channel_util_count'] += rollup['channel_util_count']
+                data['air_util_sum'] += rollup['air_util_sum']
+                data['air_util_count'] += rollup['air_util_count']
 
             if not node_channel_data:
                 return f"📭 Aucune donnée de télémétrie dans les {hours}h"
@@ -80,14 +78,14 @@ class StatsCommands:
             # Calculer les moyennes et trier par utilisation du canal
             node_averages = []
             for node_id, data in node_channel_data.items():
-                avg_channel = sum(data['channel_utils']) / len(data['channel_utils'])
-                avg_air = sum(data['air_utils']) / len(data['air_utils']) if data['air_utils'] else 0
+                avg_channel = data['channel_util_sum'] / data['channel_util_count']
+                avg_air = data['air_util_sum'] / data['air_util_count'] if data['air_util_count'] else 0
                 node_averages.append({
                     'id': node_id,
                     'name': data['name'],
                     'avg_channel': avg_channel,
                     'avg_air': avg_air,
-                    'samples': len(data['channel_utils'])
+                    'samples': data['channel_util_count']
                 })
 
             # Trier par utilisation du canal (décroissant)
@@ -157,7 +155,7 @@ class StatsCommands:
             error_print(traceback.format_exc())
             return f"❌ Erreur: {str(e)[:100]}"
 
-    def get_top_talkers(self, hours=24, top_n=10, include_packet_types=True):
+    def get_top_talkers(self, hours=24, top_n=10, include_packet_types=True, sort_by='packets'):
         """
         Générer le rapport des top talkers
 
@@ -165,6 +163,7 @@ class StatsCommands:
             hours: Période d'analyse en heures
             top_n: Nombre de top nodes à afficher
             include_packet_types: Inclure le détail par type de paquet
+            sort_by: 'packets' ou 'airtime' (temps d'antenne estimé)
 
         Returns:
             str: Rapport formaté des top talkers
@@ -174,7 +173,7 @@ class StatsCommands:
                 return "❌ Traffic monitor non disponible"
 
             return self.traffic_monitor.get_top_talkers_report(
-                hours, top_n, include_packet_types
+                hours, top_n, include_packet_types, sort_by=sort_by
             )
 
         except Exception as e:
@@ -14,11 +14,12 @@ from utils import *
 from reboot_semaphore import RebootSemaphore
 
 class SystemCommands:
-    def __init__(self, interface, node_manager, sender, bot_start_time=None):
+    def __init__(self, interface, node_manager, sender, bot_start_time=None, traffic_monitor=None):
         self.interface_provider = interface  # ✅ Peut être interface ou serial_manager
         self.node_manager = node_manager
         self.sender = sender
         self.bot_start_time = bot_start_time  # ✅ NOUVEAU: timestamp démarrage bot
+        self.traffic_monitor = traffic_monitor  # Débit des paquets (compteur glissant)
     
     def _get_interface(self):
         """Récupérer l'interface active"""
@@ -115,6 +116,28 @@ class SystemCommands:
                 except:
                     pass
                 
+                # Débit radio : paquets/min sur 1 et 15 minutes, type dominant
+                try:
+                    rates = self.traffic_monitor.packet_rates if self.traffic_monitor else None
+                    if rates and rates.total:
+                        line = f"📡 Rx: {rates.rate(60):.1f}/min (1m) {rates.rate(900):.1f}/min (15m)"
+                        by_type = rates.breakdown(900)
+                        if by_type:
+                            top_type = max(by_type.items(), key=lambda x: x[1])[0]
+                            line += f" top:{top_type.replace('_APP', '')}"
+                        system_info.append(line)
+                except:
+                    pass
+
+                # Doublons par couple de transports (premier → doublon)
+                try:
+                    identity = self.traffic_monitor.packet_identity if self.traffic_monitor else None
+                    duplicates = identity.format_stats() if identity else ''
+                    if duplicates:
+                        system_info.append(f"🔁 Doublons: {duplicates}")
+                except:
+                    pass
+                
                 response = "🖥️ Système RPI5:\n" + "\n".join(system_info) if system_info else "⚠️ Erreur système"
                 current_sender.send_chunks(response, sender_id, sender_info)
                 current_sender.log_conversation(sender_id, sender_info, "/sys", response)
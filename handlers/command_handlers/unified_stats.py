@@ -9,6 +9,9 @@ from collections import defaultdict
 from utils import error_print, debug_print
 import traceback
 
+# Mots-clés de /stats top pour classer par temps d'antenne au lieu du nombre de paquets
+AIRTIME_SORT_KEYWORDS = ('air', 'airtime', 'antenne')
+
 
 class UnifiedStatsCommands:
     """
@@ -74,6 +77,7 @@ class UnifiedStatsCommands:
             return (
                 "📊 /stats [cmd] [h]\n"
                 "g=global t=top p=pkt\n"
+                "t air=top temps d'antenne\n"
                 "ch=canal h=histo hop=hops\n"
                 "Types histo: pos,text,node,tele\n"
                 "Ex: /stats hop 48"
@@ -83,6 +87,7 @@ class UnifiedStatsCommands:
 
 **Sous-commandes:**
 • `top [h] [n]` - Top talkers avec Canal% et Air TX
+• `top air [h] [n]` - Top par temps d'antenne consommé
 • `histo [type] [h]` - Historique (sparkline)
 • `packets [h]` - Types de paquets
 • `global` - Vue d'ensemble
@@ -91,6 +96,7 @@ class UnifiedStatsCommands:
 
 **Exemples:**
 • `/stats top 24 10` - Top 10 dernières 24h avec stats canal
+• `/stats top air 24` - Nœuds qui occupent le plus le canal sur 24h
 • `/stats histo pos 6` - Histo positions 6h
 • `/stats hop 48` - Top 20 nœuds par portée sur 48h
 
@@ -184,12 +190,17 @@ class UnifiedStatsCommands:
         Top talkers avec tous les types de paquets
 
         Args:
-            params: [hours, nombre] optionnels
+            params: [hours, nombre] optionnels, 'air' pour classer par temps d'antenne
             channel: 'mesh' ou 'telegram'
         """
         if not self.traffic_monitor:
             return "❌ Traffic monitor non disponible"
 
+        sort_by = 'packets'
+        if any(p.lower() in AIRTIME_SORT_KEYWORDS for p in params):
+            sort_by = 'airtime'
+            params = [p for p in params if p.lower() not in AIRTIME_SORT_KEYWORDS]
+
         # Paramètres par défaut selon le canal
         if channel == 'mesh':
             default_hours = 3
@@ -219,7 +230,8 @@ class UnifiedStatsCommands:
         try:
             return self.traffic_monitor.get_top_talkers_report(
                 hours, top_n,
-                include_packet_types=(channel == 'telegram')  # Détails seulement sur Telegram
+                include_packet_types=(channel == 'telegram'),  # Détails seulement sur Telegram
+                sort_by=sort_by
             )
         except Exception as e:
             error_print(f"Erreur top_talkers: {e}")
@@ -308,45 +320,45 @@ class UnifiedStatsCommands:
                 # Pas d'entête pour mesh, juste le titre dans la première ligne de stats
                 pass
 
-            # Charger les paquets de télémétrie
-            all_packets = tm.persistence.load_packets(hours=hours, limit=10000)
+            # Charger les agrégats horaires de télémétrie (exacts sur la fenêtre)
+            rollups = tm.persistence.load_packet_rollups(hours=hours, packet_types=['TELEMETRY_APP'])
 
             # Collecter les données de télémétrie par nœud
             node_channel_data = {}
 
-            for packet in all_packets:
-                if packet['packet_type'] == 'TELEMETRY_APP':
-                    from_id = packet['from_id']
-
-                    # Convertir from_id en int si c'est une string
-                    if isinstance(from_id, str):
-                        try:
-                            # Si c'est un ID hex comme "!12345678"
-                            if from_id.startswith('!'):
-                                from_id = int(from_id[1:], 16)
-                            else:
-                                # ID décimal en string
-                                from_id = int(from_id)
-                        except (ValueError, AttributeError):
-                            debug_print(f"⚠️ ID invalide ignoré: {from_id}")
-                            continue
-
-                    if 'telemetry' in packet and packet['telemetry'] is not None:
-                        telemetry = packet['telemetry']
-                        ch_util = telemetry.get('channel_util')
-                        air_util = telemetry.get('air_util')
-
-                        if ch_util is not None:
-                            if from_id not in node_channel_data:
-                                node_channel_data[from_id] = {
-                                    'channel_utils': [],
-                                    'air_utils': [],
-                                    'name': self.node_manager.get_node_name(from_id, interface=self.interface)
-                                }
-
-                            node_channel_data[from_id]['channel_utils'].append(ch_util)
-                            if air_util is not None:
-                                node_channel_data[from_id]['air_utils'].append(air_util)
+            for rollup in rollups:
+                if not rollup['channel_util_count']:
+                    continue
+
+                from_id = rollup['from_id']
+
+                # Convertir from_id en int si c'est une string
+                if isinstance(from_id, str):
+                    try:
+                        # Si c'est un ID hex comme "!12345678"
+                        if from_id.startswith('!'):
+                            from_id = int(from_id[1:], 16)
+                        else:
+                            # ID décimal en string
+                            from_id = int(from_id)
+                    except (ValueError, AttributeError):
+                        debug_print(f"⚠️ ID invalide ignoré: {from_id}")
+                        continue
+
+                if from_id not in node_channel_data:
+                    node_channel_data[from_id] = {
+                        'channel_util_sum': 0.0,
+                        'channel_util_count': 0,
+                        'air_util_sum': 0.0,
+                        'air_util_count': 0,
+                        'name': self.node_manager.get_node_name(from_id, interface=self.interface)
+                    }
+
+                data = node_channel_data[from_id]
+                data['channel_util_sum'] += rollup['channel_util_sum']
+                data['channel_util_count'] += rollup['channel_util_count']
+                data['air_util_sum'] += rollup['air_util_sum']
+                data['air_util_count'] += rollup['air_util_count']
 
             if not node_channel_data:
                 return f"📭 Aucune télémétrie canal ({hours}h)"
@@ -354,14 +366,14 @@ class UnifiedStatsCommands:
             # Calculer moyennes et trier
             node_averages = []
             for node_id, data in node_channel_data.items():
-                avg_channel = sum(data['channel_utils']) / len(data['channel_utils'])
-                avg_air = sum(data['air_utils']) / len(data['air_utils']) if data['air_utils'] else 0
+                avg_channel = data['channel_util_sum'] / data['channel_util_count']
+                avg_air = data['air_util_sum'] / data['air_util_count'] if data['air_util_count'] else 0
                 node_averages.append({
                     'id': node_id,
                     'name': data['name'],
                     'avg_channel': avg_channel,
                     'avg_air': avg_air,
-                    'samples': len(data['channel_utils'])
+                    'samples': data['channel_util_count']
                 })
 
             node_averages.sort(key=lambda x: x['avg_channel'], reverse=True)
@@ -627,20 +639,21 @@ class UnifiedStatsCommands:
                 pass
 
         try:
-            # Charger les paquets depuis la base de données
-            all_packets = self.traffic_monitor.persistence.load_packets(hours=hours, limit=10000)
+            # Charger les agrégats horaires depuis la base de données
+            rollups = self.traffic_monitor.persistence.load_packet_rollups(hours=hours)
 
-            if not all_packets:
+            if not rollups:
                 return f"📭 Aucun paquet ({hours}h)"
 
             # Agréger les données par nœud
             node_hop_data = {}
             
-            for packet in all_packets:
-                from_id = packet.get('from_id')
-                hop_start = packet.get('hop_start')
+            for rollup in rollups:
+                from_id = rollup.get('from_id')
+                hop_start = rollup.get('hop_start_max')
+                count = rollup.get('hop_start_count', 0)
                 
-                # Ignorer les paquets sans from_id ou hop_start
+                # Ignorer les agrégats sans from_id ou hop_start
                 if not from_id or hop_start is None:
                     continue
                 
@@ -658,7 +671,7 @@ class UnifiedStatsCommands:
                 if from_id not in node_hop_data:
                     node_hop_data[from_id] = {
                         'max_hop_start': hop_start,
-                        'count': 1,
+                        'count': count,
                         'name': self.node_manager.get_node_name(from_id, interface=self.interface)
                     }
                 else:
@@ -667,7 +680,7 @@ class UnifiedStatsCommands:
                         node_hop_data[from_id]['max_hop_start'], 
                         hop_start
                     )
-                    node_hop_data[from_id]['count'] += 1
+                    node_hop_data[from_id]['count'] += count
 
             if not node_hop_data:
                 return f"📭 Aucun nœud avec hop_start ({hours}h)"
@@ -13,6 +13,7 @@ import json
 from utils_weather import get_weather_data, get_rain_graph, get_weather_astro
 from config import *
 from utils import *
+from outbound_scheduler import schedule_or_send, is_scheduled
 
 # Constantes pour les délais entre messages
 MESSAGE_DELAY_SECONDS = 0.5  # Délai entre les parties d'un message splitté
@@ -292,6 +293,9 @@ class UtilityCommands:
                 if hasattr(node, 'shortName'):
                     info_print(f"✅ Node connecté: {node.shortName}")
             
+            # Broadcast espacé par l'ordonnanceur d'envoi (priorité la plus basse)
+            scheduler = getattr(current_sender, 'outbound_scheduler', None)
+
             # Detect interface type to handle MeshCore vs Meshtastic differences
             # MeshCore requires destinationId parameter, Meshtastic broadcasts by default
             is_meshcore = hasattr(interface, '__class__') and 'MeshCore' in interface.__class__.__name__
@@ -299,12 +303,14 @@ class UtilityCommands:
             if is_meshcore:
                 # MeshCore: Send as broadcast (0xFFFFFFFF) on public channel (channelIndex=0)
                 info_print("🔍 Interface MeshCore détectée - envoi broadcast sur canal public")
-                interface.sendText(echo_response, destinationId=0xFFFFFFFF, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, echo_response,
+                                 interface.sendText, echo_response, destinationId=0xFFFFFFFF, channelIndex=0)
                 info_print("✅ Message envoyé via MeshCore (broadcast, canal public)")
             else:
                 # Meshtastic: Broadcast on public channel (channelIndex=0 is default)
                 info_print("🔍 Interface Meshtastic détectée - envoi broadcast sur canal public")
-                interface.sendText(echo_response, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, echo_response,
+                                 interface.sendText, echo_response, channelIndex=0)
                 info_print("✅ Message envoyé via Meshtastic (broadcast, canal public)")
             
             # Tracker le broadcast pour la déduplication
@@ -476,16 +482,18 @@ class UtilityCommands:
                 if is_broadcast:
                     # Broadcast public: envoyer le graphe complet (2 lignes + échelle)
                     self._send_broadcast_via_tigrog2(graph, sender_id, sender_info, cmd)
-                    # Puis le header
-                    time.sleep(MESSAGE_DELAY_SECONDS)
+                    # Puis le header (espacé par l'ordonnanceur d'envoi s'il tourne)
+                    if not is_scheduled(self.sender):
+                        time.sleep(MESSAGE_DELAY_SECONDS)
                     self._send_broadcast_via_tigrog2(header, sender_id, sender_info, cmd)
                 else:
                     # Réponse privée: envoyer les 2 parties séparément
                     # Partie 1: Graphe complet (2 lignes sparkline + échelle)
                     self.sender.send_single(graph, sender_id, sender_info)
                     
-                    # Petit délai entre les messages
-                    time.sleep(MESSAGE_DELAY_SECONDS)
+                    # Petit délai entre les messages (sauf si l'ordonnanceur d'envoi les espace)
+                    if not is_scheduled(self.sender):
+                        time.sleep(MESSAGE_DELAY_SECONDS)
                     
                     # Partie 2: Header local seulement
                     self.sender.send_single(header, sender_id, sender_info)
@@ -503,7 +511,7 @@ class UtilityCommands:
                         if not day_msg.strip():
                             continue
                         self.sender.send_single(day_msg, sender_id, sender_info)
-                        if i < len(day_messages) - 1:
+                        if i < len(day_messages) - 1 and not is_scheduled(self.sender):
                             time.sleep(1)
         elif subcommand == 'astro':
             # Informations astronomiques
@@ -1020,18 +1028,23 @@ class UtilityCommands:
             
             debug_print(f"📡 Broadcast {command} via interface partagée...")
             
+            # Broadcast espacé par l'ordonnanceur d'envoi (priorité la plus basse)
+            scheduler = getattr(self.sender, 'outbound_scheduler', None)
+
             # Detect interface type to handle MeshCore vs Meshtastic differences
             is_meshcore = hasattr(interface, '__class__') and 'MeshCore' in interface.__class__.__name__
             
             if is_meshcore:
                 # MeshCore: Send as broadcast (0xFFFFFFFF) on public channel (channelIndex=0)
                 debug_print("🔍 Interface MeshCore détectée - envoi broadcast sur canal public")
-                interface.sendText(message, destinationId=0xFFFFFFFF, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, destinationId=0xFFFFFFFF, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via MeshCore (canal public)")
             else:
                 # Meshtastic: Broadcast on public channel (channelIndex=0 is default)
                 debug_print("🔍 Interface Meshtastic détectée - envoi broadcast sur canal public")
-                interface.sendText(message, channelIndex=0)
+                schedule_or_send(scheduler, 'broadcast', 0xFFFFFFFF, message,
+                                 interface.sendText, message, channelIndex=0)
                 info_print(f"✅ Broadcast {command} diffusé via Meshtastic (canal public)")
             
         except Exception as e:
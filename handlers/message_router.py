@@ -53,7 +53,7 @@ class MessageRouter:
         # Gestionnaires de commandes par domaine
         self.ai_handler = AICommands(llama_client, self.sender, broadcast_tracker=broadcast_tracker)
         self.network_handler = NetworkCommands(remote_nodes_client, self.sender, node_manager, traffic_monitor=traffic_monitor, interface=interface, broadcast_tracker=broadcast_tracker)
-        self.system_handler = SystemCommands(interface, node_manager, self.sender, bot_start_time)
+        self.system_handler = SystemCommands(interface, node_manager, self.sender, bot_start_time, traffic_monitor=traffic_monitor)
         self.utility_handler = UtilityCommands(esphome_client, traffic_monitor, self.sender, node_manager, blitz_monitor, vigilance_monitor, broadcast_tracker=broadcast_tracker)
 
         # Gestionnaire unifié des statistiques (nouveau système)
@@ -7,6 +7,7 @@ Gestion de l'envoi de messages et throttling
 import time
 from config import *
 from utils import *
+from outbound_scheduler import schedule_or_send, is_scheduled
 
 class MessageSender:
     def __init__(self, interface, node_manager, dual_interface_manager=None):
@@ -28,6 +29,9 @@ class MessageSender:
         # This allows replies to go back to the correct network
         self._sender_network_map = {}
 
+        # Ordonnanceur des envois (None ou arrêté = envoi immédiat)
+        self.outbound_scheduler = None
+
     def _get_interface(self):
         """
         Récupérer l'interface active
@@ -119,8 +123,13 @@ class MessageSender:
         if users_to_remove and DEBUG_MODE:
             debug_print(f"Nettoyage throttling: {len(users_to_remove)} utilisateurs supprimés")
     
-    def send_single(self, message, sender_id, sender_info):
-        """Envoyer un message simple"""
+    def send_single(self, message, sender_id, sender_info, priority='dm'):
+        """
+        Envoyer un message simple
+
+        Passe par l'ordonnanceur d'envoi s'il est démarré (priority: 'alert' ou 'dm'),
+        sinon envoie immédiatement.
+        """
         debug_print(f"[SEND_SINGLE] Tentative envoi vers {sender_info} (ID: {sender_id})")
         
         # Vérifier que le destinataire n'est pas l'adresse broadcast
@@ -130,7 +139,12 @@ class MessageSender:
             error_print(f"   → Expéditeur inconnu (pubkey non résolu dans la base de données)")
             error_print(f"   → Le message ne peut pas être envoyé sans ID de contact valide")
             return
-        
+
+        schedule_or_send(self.outbound_scheduler, priority, sender_id, message,
+                         self._transmit, message, sender_id, sender_info)
+
+    def _transmit(self, message, sender_id, sender_info):
+        """Émettre un DM sur l'interface (routage dual, contrôle du socket, repli hex)"""
         try:
             # ========================================
             # DUAL MODE: Route to correct network
@@ -229,7 +243,8 @@ class MessageSender:
                         formatted_chunk = chunk
                     
                     self.send_single(formatted_chunk, sender_id, sender_info)
-                    if i < len(chunks):
+                    # Avec l'ordonnanceur, l'écart dépend du temps d'antenne du morceau
+                    if i < len(chunks) and not is_scheduled(self):
                         time.sleep(2)
                         
         except Exception as e:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline d'ingestion des paquets par étages, derrière MeshBot.on_message.
+
+on_message s'exécute sur le thread de lecture de la bibliothèque radio
+(pubsub Meshtastic, interface MeshCore). Il ne fait plus que compter le
+paquet et le déposer dans la file du premier étage ; des threads dédiés
+font l'enrichissement (NodeManager), les statistiques et la persistance
+(TrafficMonitor) et le traitement des commandes.
+
+Chaque étage a ses files bornées, sa politique de débordement et ses
+mesures de latence (attente en file, durée de traitement). Un étage à
+plusieurs workers répartit les paquets par clé (l'émetteur) : tous les
+paquets d'un même émetteur passent par la même file, dans l'ordre.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from utils import debug_print, info_print, error_print
+import logging
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class PipelineStage:
+    """
+    Étage du pipeline : `workers` files bornées, un thread par file.
+
+    Le handler reçoit les arguments passés à submit(). Si une file est pleine :
+    - 'drop_oldest' : l'entrée la plus ancienne est abandonnée (comptée)
+    - 'drop_newest' : la nouvelle entrée est abandonnée (comptée)
+    - 'block' : submit() attend au plus block_timeout secondes, puis abandonne
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[..., Any],
+        workers: int = 1,
+        max_size: int = 1000,
+        overflow: str = 'drop_oldest',
+        block_timeout: float = 1.0
+    ):
+        """
+        Args:
+            name: Nom de l'étage (threads, logs, statistiques)
+            handler: Fonction appelée pour chaque entrée
+            workers: Nombre de files/threads (répartition par clé)
+            max_size: Entrées en attente max par file
+            overflow: Politique de débordement (cf. OVERFLOW_POLICIES)
+            block_timeout: Attente max de submit() en politique 'block' (secondes)
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue: {overflow}")
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._queues = [deque() for _ in range(self.workers)]
+        self._conds = [threading.Condition() for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._stopped = False  # après stop() : submit() refuse les entrées
+
+        # Compteurs pour statistiques
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.max_wait_ms = 0.0
+        self.max_service_ms = 0.0
+        self._total_wait_ms = 0.0
+        self._total_service_ms = 0.0
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        """Démarre un thread par file."""
+        if self._running:
+            return
+        self._running = True
+        self._stopped = False
+        self._threads = []
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(index,),
+                name=f"Ingest-{self.name}-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key: Hashable, *args) -> bool:
+        """
+        Dépose une entrée dans la file de sa clé (non bloquant sauf politique 'block').
+
+        Après stop(), l'entrée est refusée (comptée comme abandonnée) : aucun worker
+        ne la traiterait plus.
+
+        Returns:
+            bool: False si l'entrée a été abandonnée
+        """
+        index = hash(key) % self.workers
+        queue = self._queues[index]
+        cond = self._conds[index]
+        with cond:
+            if self._stopped:
+                with self._stats_lock:
+                    self.dropped += 1
+                return False
+            if len(queue) >= self.max_size:
+                if self.overflow == 'block':
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(queue) >= self.max_size and self._running:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        cond.wait(timeout=remaining)
+                if len(queue) >= self.max_size:
+                    if self.overflow == 'drop_oldest':
+                        queue.popleft()
+                    self._count_drop()
+                    if self.overflow != 'drop_oldest':
+                        return False
+            queue.append((time.perf_counter(), args))
+            depth = len(queue)
+            # Compteurs partagés par les files de l'étage : sous _stats_lock comme ceux des workers
+            with self._stats_lock:
+                self.enqueued += 1
+                if depth > self.max_depth:
+                    self.max_depth = depth
+            cond.notify_all()
+        return True
+
+    def _count_drop(self):
+        with self._stats_lock:
+            self.dropped += 1
+            dropped = self.dropped
+        if dropped % 100 == 1:
+            error_print(f"⚠️ Ingestion '{self.name}' saturée: {dropped} entrées abandonnées")
+
+    def _worker_loop(self, index: int):
+        """Boucle d'un worker : traite sa file dans l'ordre d'arrivée."""
+        queue = self._queues[index]
+        cond = self._conds[index]
+        while True:
+            with cond:
+                while self._running and not queue:
+                    cond.wait(timeout=1.0)
+                if not queue:
+                    break
+                enqueued_at, args = queue.popleft()
+                # Libère un submit() en attente (politique 'block')
+                cond.notify_all()
+            self._run(enqueued_at, args)
+
+    def _run(self, enqueued_at: float, args: tuple):
+        start = time.perf_counter()
+        try:
+            self.handler(*args)
+            failed = False
+        except Exception as e:
+            failed = True
+            error_print(f"❌ Ingestion '{self.name}': {e}")
+            logger.debug("Erreur handler d'ingestion", exc_info=True)
+        end = time.perf_counter()
+        wait_ms = (start - enqueued_at) * 1000
+        service_ms = (end - start) * 1000
+        with self._stats_lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.processed += 1
+            self._total_wait_ms += wait_ms
+            self._total_service_ms += service_ms
+            if wait_ms > self.max_wait_ms:
+                self.max_wait_ms = wait_ms
+            if service_ms > self.max_service_ms:
+                self.max_service_ms = service_ms
+
+    def stop(self, drain: bool = True, timeout: float = 5.0):
+        """
+        Arrête les workers.
+
+        Args:
+            drain: Traiter les entrées restantes avant de rendre la main
+            timeout: Temps maximum d'attente des threads (secondes, pour tout l'étage)
+        """
+        self._stopped = True
+        if not drain:
+            for queue, cond in zip(self._queues, self._conds):
+                with cond:
+                    queue.clear()
+        self._running = False
+        for cond in self._conds:
+            with cond:
+                cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def depth(self) -> int:
+        """Nombre d'entrées en attente (toutes files)."""
+        return sum(len(queue) for queue in self._queues)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs de l'étage.
+
+        Returns:
+            dict: depth, max_depth, enqueued, processed, dropped, failed,
+                  avg/max attente en file (ms), avg/max traitement (ms)
+        """
+        with self._stats_lock:
+            done = self.processed + self.failed
+            return {
+                'depth': self.depth(),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'avg_wait_ms': round(self._total_wait_ms / done, 2) if done else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2),
+                'avg_service_ms': round(self._total_service_ms / done, 2) if done else 0.0,
+                'max_service_ms': round(self.max_service_ms, 2)
+            }
+
+
+class IngestPipeline:
+    """
+    Ensemble d'étages nommés. Les handlers transmettent eux-mêmes leurs
+    résultats à l'étage suivant via submit().
+
+    Tant que le pipeline n'est pas démarré, `running` est False : l'appelant
+    traite alors le paquet en ligne (tests, démarrage, arrêt).
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, PipelineStage] = {}
+        self.running = False
+
+    def add_stage(self, name: str, handler: Callable[..., Any], **kwargs) -> PipelineStage:
+        """Ajoute un étage (arguments de PipelineStage)."""
+        stage = PipelineStage(name, handler, **kwargs)
+        self.stages[name] = stage
+        return stage
+
+    def submit(self, stage: str, key: Hashable, *args) -> bool:
+        """Dépose une entrée dans un étage (cf. PipelineStage.submit)."""
+        return self.stages[stage].submit(key, *args)
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+        self.running = True
+        debug_print("📥 Pipeline d'ingestion démarré: " + ", ".join(
+            f"{stage.name}×{stage.workers} ({stage.overflow}, max {stage.max_size})"
+            for stage in self.stages.values()))
+
+    def stop(self, drain: bool = True, timeout: float = 5.0):
+        """Arrête les étages dans l'ordre (chaque étage vide sa file vers le suivant)."""
+        self.running = False
+        deadline = time.monotonic() + timeout
+        for stage in self.stages.values():
+            stage.stop(drain=drain, timeout=max(0.0, deadline - time.monotonic()))
+        pending = sum(stage.depth() for stage in self.stages.values())
+        if pending:
+            info_print(f"📥 Pipeline d'ingestion arrêté: {pending} entrées non traitées")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistiques de chaque étage, par nom."""
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
+
+    def format_stats(self) -> Optional[str]:
+        """Résumé d'une ligne par étage pour les logs, None si rien n'a été traité."""
+        stats = self.get_stats()
+        if not any(stage['enqueued'] for stage in stats.values()):
+            return None
+        return "\n".join(
+            f"{name}: {s['processed']} traités, {s['dropped']} abandonnés, file {s['depth']}/{s['max_depth']} "
+            f"| attente {s['avg_wait_ms']}ms (max {s['max_wait_ms']}) "
+            f"| traitement {s['avg_service_ms']}ms (max {s['max_service_ms']})"
+            for name, s in stats.items()
+        )
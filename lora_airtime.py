@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estimation du temps d'émission LoRa (time-on-air)
+
+Formule du datasheet Semtech SX127x/SX126x appliquée aux presets de modem
+Meshtastic (SF, bande passante, coding rate, préambule). Un paquet Meshtastic
+ajoute un en-tête radio de 16 octets et l'enveloppe protobuf Data au contenu.
+"""
+
+import math
+from collections import namedtuple
+
+# sf: spreading factor, bw_khz: bande passante, cr: dénominateur du coding rate (4/5 → 5)
+ModemPreset = namedtuple('ModemPreset', ['sf', 'bw_khz', 'cr', 'preamble'])
+
+# Presets du firmware Meshtastic (préambule de 16 symboles)
+MODEM_PRESETS = {
+    'SHORT_TURBO': ModemPreset(7, 500, 5, 16),
+    'SHORT_FAST': ModemPreset(7, 250, 5, 16),
+    'SHORT_SLOW': ModemPreset(8, 250, 5, 16),
+    'MEDIUM_FAST': ModemPreset(9, 250, 5, 16),
+    'MEDIUM_SLOW': ModemPreset(10, 250, 5, 16),
+    'LONG_FAST': ModemPreset(11, 250, 5, 16),
+    'LONG_MODERATE': ModemPreset(11, 125, 8, 16),
+    'LONG_SLOW': ModemPreset(12, 125, 8, 16),
+    'VERY_LONG_SLOW': ModemPreset(12, 62.5, 8, 16),
+}
+
+# En-tête radio Meshtastic : to, from, id (4 octets chacun), flags, canal, next_hop, relay_node
+MESHTASTIC_HEADER_BYTES = 16
+# Enveloppe protobuf Data d'un message texte : portnum, tag + longueur du payload, bitfield
+TEXT_DATA_OVERHEAD_BYTES = 6
+
+
+def get_preset(preset):
+    """
+    Résoudre un preset de modem
+
+    Args:
+        preset: Nom ('LONG_FAST', insensible à la casse), ModemPreset,
+                ou réglage personnalisé : dict {'sf', 'bw_khz', 'cr', 'preamble'}
+                ou texte 'sf/bw_khz/cr/preamble' (ex: '11/500/5/16')
+
+    Returns:
+        ModemPreset
+
+    Raises:
+        ValueError: preset inconnu
+    """
+    if isinstance(preset, ModemPreset):
+        return preset
+    if isinstance(preset, dict):
+        return ModemPreset(int(preset['sf']), float(preset['bw_khz']),
+                           int(preset.get('cr', 5)), int(preset.get('preamble', 16)))
+    if isinstance(preset, str) and '/' in preset:
+        # Réglage personnalisé sous forme texte (cf. preset_key) : 'sf/bw_khz/cr/preamble'
+        try:
+            sf, bw_khz, cr, preamble = preset.split('/')
+            return ModemPreset(int(sf), float(bw_khz), int(cr), int(preamble))
+        except ValueError:
+            raise ValueError(f"Preset de modem invalide: {preset} (attendu: sf/bw_khz/cr/preamble)")
+    try:
+        return MODEM_PRESETS[str(preset).upper()]
+    except KeyError:
+        raise ValueError(f"Preset de modem inconnu: {preset} "
+                         f"(disponibles: {', '.join(MODEM_PRESETS)})")
+
+
+def time_on_air(payload_bytes, preset='LONG_FAST'):
+    """
+    Temps d'émission (secondes) d'une trame LoRa de payload_bytes octets
+
+    En-tête LoRa explicite et CRC actif, comme le firmware Meshtastic. L'optimisation
+    bas débit (LDRO) s'active quand un symbole dure plus de 16 ms.
+    """
+    sf, bw_khz, cr, preamble = get_preset(preset)
+    symbol_time = (2 ** sf) / (bw_khz * 1000.0)
+    low_data_rate = 1 if symbol_time > 0.016 else 0
+    numerator = 8 * payload_bytes - 4 * sf + 28 + 16
+    payload_symbols = 8 + max(math.ceil(numerator / (4.0 * (sf - 2 * low_data_rate))) * cr, 0)
+    return (preamble + 4.25 + payload_symbols) * symbol_time
+
+
+def packet_airtime(payload_bytes, preset='LONG_FAST'):
+    """Temps d'émission d'un paquet Meshtastic dont le payload chiffré fait payload_bytes octets"""
+    return time_on_air(MESHTASTIC_HEADER_BYTES + payload_bytes, preset)
+
+
+def text_airtime(message, preset='LONG_FAST'):
+    """Temps d'émission d'un message texte Meshtastic (longueur en octets UTF-8)"""
+    size = len(message.encode('utf-8')) if isinstance(message, str) else len(message)
+    return packet_airtime(size + TEXT_DATA_OVERHEAD_BYTES, preset)
+
+
+# Payload chiffré maximal : trame LoRa de 255 octets moins l'en-tête Meshtastic
+MAX_PAYLOAD_BYTES = 255 - MESHTASTIC_HEADER_BYTES
+
+# Taille typique du payload chiffré (enveloppe Data comprise) par type de paquet,
+# pour l'historique stocké sans taille réelle
+NOMINAL_PAYLOAD_BYTES = {
+    'TEXT_MESSAGE_APP': 40,
+    'POSITION_APP': 36,
+    'NODEINFO_APP': 80,
+    'TELEMETRY_APP': 32,
+    'ROUTING_APP': 8,
+    'TRACEROUTE_APP': 16,
+    'NEIGHBORINFO_APP': 60,
+    'ADMIN_APP': 24,
+    'STORE_FORWARD_APP': 24,
+    'RANGE_TEST_APP': 16,
+    'WAYPOINT_APP': 48,
+}
+DEFAULT_PAYLOAD_BYTES = 32
+
+
+def packet_payload_bytes(packet):
+    """
+    Taille réelle du payload chiffré d'un paquet reçu (dict de l'interface Meshtastic)
+
+    Paquet non déchiffré : longueur du champ encrypted (octets ou base64).
+    Paquet décodé : payload applicatif + enveloppe Data.
+
+    Returns:
+        int, ou None si le paquet ne porte pas l'information
+    """
+    encrypted = packet.get('encrypted')
+    if encrypted:
+        if isinstance(encrypted, (bytes, bytearray)):
+            return len(encrypted)
+        if isinstance(encrypted, str):
+            return len(encrypted) * 3 // 4 - encrypted[-2:].count('=')
+    decoded = packet.get('decoded')
+    if isinstance(decoded, dict):
+        payload = decoded.get('payload')
+        if isinstance(payload, (bytes, bytearray)):
+            return len(payload) + TEXT_DATA_OVERHEAD_BYTES
+    return None
+
+
+def estimate_payload_bytes(packet_type, message=None):
+    """Taille estimée du payload chiffré à partir du type de paquet (et du texte s'il est connu)"""
+    if packet_type == 'TEXT_MESSAGE_APP' and isinstance(message, str) and message:
+        return len(message.encode('utf-8')) + TEXT_DATA_OVERHEAD_BYTES
+    return NOMINAL_PAYLOAD_BYTES.get(packet_type, DEFAULT_PAYLOAD_BYTES)
+
+
+def airtime_table(preset='LONG_FAST'):
+    """
+    Temps d'émission (millisecondes) de chaque taille de payload, de 0 à MAX_PAYLOAD_BYTES
+
+    Le temps d'antenne ne dépend que de la taille : la table calcule la formule une fois
+    par taille, puis chaque paquet (ou chaque ligne d'historique) n'est qu'une indexation.
+    """
+    preset = get_preset(preset)
+    return [packet_airtime(size, preset) * 1000.0 for size in range(MAX_PAYLOAD_BYTES + 1)]
+
+
+def preset_key(preset):
+    """Identifiant texte stable d'un preset (nom, ou 'sf/bw/cr/préambule' pour un réglage personnalisé)"""
+    resolved = get_preset(preset)
+    for name, candidate in MODEM_PRESETS.items():
+        if candidate == resolved:
+            return name
+    return '/'.join(str(value) for value in resolved)
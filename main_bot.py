@@ -28,6 +28,9 @@ from esphome_client import ESPHomeClient
 from remote_nodes_client import RemoteNodesClient
 from message_handler import MessageHandler
 from traffic_monitor import TrafficMonitor
+from ttl_cache import TTLCache
+from rate_counter import SlidingWindowCounter
+from ingest_pipeline import IngestPipeline
 from system_monitor import SystemMonitor
 from safe_serial_connection import SafeSerialConnection
 from safe_tcp_connection import SafeTCPConnection
@@ -455,9 +458,9 @@ class MeshBot:
         self.platform_manager = None  # Gestionnaire multi-plateforme
 
         # Déduplication des broadcasts: éviter de traiter nos propres messages diffusés
-        # Format: {message_hash: timestamp}
-        self._recent_broadcasts = {}
+        # Hashs des messages, expirés par la tête (TTLCache partagé avec TrafficMonitor)
         self._broadcast_dedup_window = 60  # Fenêtre de 60 secondes
+        self._recent_broadcasts = TTLCache(self._broadcast_dedup_window)
         
         # Timer pour télémétrie ESPHome
         self._last_telemetry_broadcast = 0
@@ -469,16 +472,19 @@ class MeshBot:
         self._tcp_last_reconnection_attempt = 0  # Timestamp of last attempt
         
         # Détection silence TCP - si pas de paquet reçu depuis trop longtemps, forcer reconnexion
+        # (_last_packet_time = début de la période de grâce, réinitialisé à chaque reconnexion)
         self._last_packet_time = time.time()
         self._tcp_health_thread = None  # Thread de vérification santé TCP rapide
         
         # Packet reception tracking for diagnostics
-        from collections import deque
-        self._packet_timestamps = deque(maxlen=100)  # Keep last 100 packet times for rate analysis
+        # Débit de réception brut (avant déduplication) par source et type de paquet
+        self.reception_rates = SlidingWindowCounter()
         self._packets_this_session = 0  # Count packets per TCP session
         self._session_start_time = time.time()  # Session start for rate calculation
         self._last_packet_count = 0  # Track if packets are still arriving
-        self._last_packet_time = time.time()  # When last packet arrived
+
+        # Pipeline d'ingestion : on_message ne fait que mettre les paquets en file
+        self.ingest_pipeline = self._build_ingest_pipeline()
         
         # Throttle for Meshtastic channel/LoRa config dump in periodic warnings
         # so the same config block is not repeated every 10 minutes.
@@ -676,16 +682,9 @@ class MeshBot:
             import hashlib
             # Créer un hash du message pour identification
             msg_hash = hashlib.md5(message.encode('utf-8')).hexdigest()
-            current_time = time.time()
-            
-            # Nettoyer les anciens broadcasts (> window)
-            self._recent_broadcasts = {
-                h: t for h, t in self._recent_broadcasts.items()
-                if current_time - t < self._broadcast_dedup_window
-            }
             
-            # Enregistrer ce broadcast
-            self._recent_broadcasts[msg_hash] = current_time
+            # Enregistrer ce broadcast (les broadcasts > window sont expirés par le cache)
+            self._recent_broadcasts.add(msg_hash)
             debug_print(f"🔖 Broadcast tracké: {msg_hash[:8]}... | msg: '{message[:50]}' | actifs: {len(self._recent_broadcasts)}")
         except Exception as e:
             error_print(f"❌ Erreur dans _track_broadcast: {e}")
@@ -705,18 +704,12 @@ class MeshBot:
         import hashlib
         try:
             msg_hash = hashlib.md5(message.encode('utf-8')).hexdigest()
-            current_time = time.time()
             
-            # Vérifier si le hash existe et est récent
-            if msg_hash in self._recent_broadcasts:
-                age = current_time - self._recent_broadcasts[msg_hash]
-                if age < self._broadcast_dedup_window:
-                    debug_print(f"🔍 Broadcast reconnu ({age:.1f}s): {msg_hash[:8]}... | msg: '{message[:50]}'")
-                    return True
-                else:
-                    # Hash existe mais est expiré, le nettoyer
-                    debug_print(f"🧹 Broadcast expiré ({age:.1f}s): {msg_hash[:8]}...")
-                    del self._recent_broadcasts[msg_hash]
+            # Vérifier si le hash existe et est récent (None si absent ou expiré)
+            age = self._recent_broadcasts.age(msg_hash)
+            if age is not None:
+                debug_print(f"🔍 Broadcast reconnu ({age:.1f}s): {msg_hash[:8]}... | msg: '{message[:50]}'")
+                return True
             
             # Debug: afficher l'état des broadcasts trackés
             if DEBUG_MODE and len(self._recent_broadcasts) > 0:
@@ -753,14 +746,11 @@ class MeshBot:
         """
         # Removed noisy diagnostic logging per user request
         
-        # ✅ CRITICAL: Update packet timestamp FIRST, before any early returns
+        # ✅ CRITICAL: Record packet reception FIRST, before any early returns
         # This prevents false "silence" detections when packets arrive during reconnection
         # Even if we ignore the packet for processing, we need to record that we received it
-        current_time = time.time()
-        self._last_packet_time = current_time
-        
-        # Track packet reception for diagnostics
-        self._packet_timestamps.append(current_time)
+        self.reception_rates.add(self._reception_source(network_source),
+                                 (packet or {}).get('decoded', {}).get('portnum', 'UNKNOWN'))
         self._packets_this_session += 1
         
         # Protection contre les traitements pendant la reconnexion TCP
@@ -769,6 +759,28 @@ class MeshBot:
             debug_print("⏸️ Message ignoré: reconnexion TCP en cours")
             return
 
+        # Nœuds, statistiques, SQLite et commandes : étages du pipeline d'ingestion,
+        # hors du thread de lecture de la radio (en ligne tant qu'il n'est pas démarré)
+        if self.ingest_pipeline.running:
+            if packet and 'from' in packet:
+                self.ingest_pipeline.submit('enrich', packet.get('from', 0), packet, interface, network_source, True)
+            return
+        self._ingest_packet(packet, interface, network_source)
+
+    def _ingest_packet(self, packet, interface=None, network_source=None, pipelined=False):
+        """
+        Étage enrichissement : source du paquet, base de nœuds, historique RX.
+
+        Le paquet est ensuite transmis à l'étage statistiques (TrafficMonitor :
+        déchiffrement, stats, SQLite) et à l'étage commandes, qui ne l'attend pas.
+
+        Args:
+            packet: Packet Meshtastic ou MeshCore reçu
+            interface: Interface source
+            network_source: NetworkSource enum si en mode dual
+            pipelined: True depuis un worker du pipeline (étages suivants mis en file),
+                       False pour un traitement complet en ligne
+        """
         try:
             # Si pas d'interface fournie, utiliser l'interface principale
             if interface is None:
@@ -866,8 +878,32 @@ class MeshBot:
 
             # Enregistrer TOUS les paquets pour les statistiques
             if self.traffic_monitor:
-                self.traffic_monitor.add_packet(packet, source=source, my_node_id=my_id, interface=self.interface)
+                if pipelined:
+                    self.ingest_pipeline.submit('stats', from_id, packet, source, my_id, self.interface)
+                else:
+                    self._record_packet_stats(packet, source, my_id, self.interface)
 
+            if pipelined:
+                self.ingest_pipeline.submit('commands', from_id, packet, interface, network_source,
+                                            source, is_from_our_interface)
+            else:
+                self._dispatch_packet(packet, interface, network_source, source, is_from_our_interface)
+
+        except Exception as e:
+            error_print(f"Erreur on_message: {e}")
+            error_print(traceback.format_exc())
+
+    def _record_packet_stats(self, packet, source, my_id, interface):
+        """Étage statistiques : décodage, stats et persistance SQLite (TrafficMonitor)."""
+        self.traffic_monitor.add_packet(packet, source=source, my_node_id=my_id, interface=interface)
+
+    def _dispatch_packet(self, packet, interface, network_source, source, is_from_our_interface):
+        """
+        Étage commandes (voie rapide) : filtrage selon le mode, traceroutes, messages texte.
+
+        N'attend pas l'étage statistiques : une écriture SQLite lente ne retarde pas les réponses.
+        """
+        try:
             # ========================================
             # PHASE 2: FILTRAGE (SELON MODE)
             # ========================================
@@ -1435,7 +1471,6 @@ class MeshBot:
                         # Reset session statistics for new connection
                         self._packets_this_session = 0
                         self._session_start_time = time.time()
-                        self._packet_timestamps.clear()
                         self._last_forced_reconnect = time.time()  # Reset scheduled reconnection timer
                         debug_print("📊 Statistiques session réinitialisées")
                         
@@ -1512,6 +1547,18 @@ class MeshBot:
                 retention_hours = globals().get('NEIGHBOR_RETENTION_HOURS', 48)
                 self.traffic_monitor.cleanup_old_persisted_data(hours=retention_hours)
 
+                # Vérification d'intégrité complète différée (arrière-plan, limitée
+                # à une fois par TRAFFIC_DB_INTEGRITY_INTERVAL_HOURS)
+                self.traffic_monitor.persistence.schedule_integrity_check(
+                    globals().get('TRAFFIC_DB_INTEGRITY_INTERVAL_HOURS', 24)
+                )
+
+                # Écritures sur le stockage (comparaison base sur carte SD / base en RAM)
+                io_stats = self.traffic_monitor.persistence.get_io_stats()
+                if io_stats['bytes_per_hour'] is not None:
+                    info_print(f"💾 Écritures disque : {io_stats['bytes_per_hour'] / 1024 / 1024:.1f} Mo/h "
+                               f"(base {'en RAM' if io_stats['mode'] == 'ram' else 'sur carte SD'})")
+
                 # ========================================
                 # I/O HEALTH CHECK (Watchdog)
                 # ========================================
@@ -1590,39 +1637,88 @@ class MeshBot:
                         self.send_esphome_telemetry()
                         self._last_telemetry_broadcast = current_time
 
+                ingest_stats = self.ingest_pipeline.format_stats()
+                if ingest_stats:
+                    debug_print(f"📥 Pipeline d'ingestion:\n{ingest_stats}")
+                executor = self.message_handler.command_executor if self.message_handler else None
+                command_stats = executor.format_stats() if executor else None
+                if command_stats:
+                    debug_print(f"⚙️ Commandes:\n{command_stats}")
+                scheduler = self.message_handler.router.sender.outbound_scheduler if self.message_handler else None
+                outbound_stats = scheduler.format_stats() if scheduler else None
+                if outbound_stats:
+                    debug_print(f"📤 File d'envoi:\n{outbound_stats}")
+
                 debug_print("✅ Mise à jour périodique terminée")
                 
             except Exception as e:
                 error_print(f"Erreur thread mise à jour: {e}")
 
-    def _get_packet_reception_rate(self, window_seconds=60):
+    def _build_ingest_pipeline(self):
+        """
+        Étages du pipeline d'ingestion (démarré dans start() si INGEST_PIPELINE_ENABLED).
+
+        enrich → stats (TrafficMonitor, plusieurs workers) et enrich → commands (voie rapide).
+        Chaque étage répartit les paquets par émetteur : ordre préservé par émetteur.
+        """
+        queue_size = globals().get('INGEST_QUEUE_SIZE', 1000)
+        overflow = globals().get('INGEST_OVERFLOW', 'drop_oldest')
+        pipeline = IngestPipeline()
+        pipeline.add_stage('enrich', self._ingest_packet, max_size=queue_size, overflow=overflow)
+        pipeline.add_stage('stats', self._record_packet_stats, workers=globals().get('INGEST_STATS_WORKERS', 2),
+                           max_size=queue_size, overflow=overflow)
+        pipeline.add_stage('commands', self._dispatch_packet, max_size=queue_size, overflow=overflow)
+        return pipeline
+
+    def _reception_source(self, network_source=None):
+        """
+        Interface d'origine d'un paquet pour les compteurs de réception.
+
+        Les paquets MeshCore sont comptés à part : en mode dual, ils ne doivent pas
+        masquer un silence de l'interface Meshtastic (TCP).
+        """
+        if network_source:
+            return network_source
+        if globals().get('MESHCORE_ENABLED', False) and not self._dual_mode_active:
+            return NetworkSource.MESHCORE
+        return NetworkSource.MESHTASTIC
+
+    def _get_packet_reception_rate(self, window_seconds=60, source=None):
         """
         Calculate packet reception rate over specified time window.
         
         Args:
             window_seconds: Time window in seconds (default: 60)
+            source: Interface source (NetworkSource), None = all
             
         Returns:
             float: Packets per minute, or None if insufficient data
         """
-        if len(self._packet_timestamps) < 2:
+        if self.reception_rates.count(window_seconds, source=source) < 2:
             return None
-            
-        current_time = time.time()
-        cutoff_time = current_time - window_seconds
-        
-        # Count packets in window
-        recent_packets = [ts for ts in self._packet_timestamps if ts >= cutoff_time]
-        
-        if len(recent_packets) < 2:
+        return self.reception_rates.rate(window_seconds, source=source)
+
+    def _observed_channel_util(self):
+        """
+        Utilisation du canal (%) mesurée par le nœud local, None si inconnue.
+
+        Lue dans les deviceMetrics du nœud local (interface Meshtastic), sinon dans
+        sa dernière télémétrie reçue. Alimente le recul de l'ordonnanceur d'envoi.
+        """
+        interface = self.interface
+        local_node = getattr(interface, 'localNode', None)
+        my_id = getattr(local_node, 'nodeNum', None)
+        if my_id is None:
             return None
-            
-        # Calculate rate (packets per minute)
-        time_span = recent_packets[-1] - recent_packets[0]
-        if time_span > 0:
-            return (len(recent_packets) / time_span) * 60
+        nodes_by_num = getattr(interface, 'nodesByNum', None)
+        if isinstance(nodes_by_num, dict):
+            metrics = (nodes_by_num.get(my_id) or {}).get('deviceMetrics') or {}
+            if metrics.get('channelUtilization') is not None:
+                return metrics['channelUtilization']
+        if self.traffic_monitor and my_id in self.traffic_monitor.node_packet_stats:
+            return self.traffic_monitor.node_packet_stats[my_id]['telemetry_stats']['last_channel_util']
         return None
-    
+
     def _get_session_stats(self):
         """Get current TCP session statistics."""
         session_duration = time.time() - self._session_start_time
@@ -1695,8 +1791,10 @@ class MeshBot:
                         continue
                 
                 # === SILENCE DETECTION (existing logic) ===
-                # Vérifier le temps depuis le dernier paquet
-                silence_duration = time.time() - self._last_packet_time
+                # Vérifier le temps depuis le dernier paquet Meshtastic (les paquets
+                # MeshCore du mode dual ne prouvent pas que l'interface TCP est vivante)
+                last_rx = self.reception_rates.last_seen(NetworkSource.MESHTASTIC) or 0
+                silence_duration = time.time() - max(self._last_packet_time, last_rx)
                 
                 if silence_duration > self.TCP_SILENT_TIMEOUT:
                     # Aucun paquet reçu depuis trop longtemps!
@@ -1716,7 +1814,7 @@ class MeshBot:
                     self._last_packet_time = time.time()
                 else:
                     # Tout va bien - log rate for diagnostics
-                    rate_1min = self._get_packet_reception_rate(60)
+                    rate_1min = self._get_packet_reception_rate(60, NetworkSource.MESHTASTIC)
                     if rate_1min is not None:
                         debug_print(f"✅ Health TCP OK: dernier paquet il y a {silence_duration:.0f}s (débit: {rate_1min:.1f} pkt/min)")
                     else:
@@ -3121,6 +3219,9 @@ class MeshBot:
             
             self.running = True
 
+            if globals().get('INGEST_PIPELINE_ENABLED', True):
+                self.ingest_pipeline.start()
+
             # ========================================
             # CONFIGURATION TÉLÉMÉTRIE EMBARQUÉE
             # ========================================
@@ -3227,7 +3328,8 @@ class MeshBot:
                         mqtt_topic_root=mqtt_topic_root,
                         mqtt_topic_pattern=mqtt_topic_pattern,
                         persistence=self.traffic_monitor.persistence,
-                        node_manager=self.node_manager
+                        node_manager=self.node_manager,
+                        packet_identity=self.traffic_monitor.packet_identity
                     )
                     
                     if self.mqtt_neighbor_collector.enabled:
@@ -3270,6 +3372,30 @@ class MeshBot:
                 dual_interface_manager=self.dual_interface  # Pass dual interface for routing
             )
 
+            # Commandes exécutées sur un pool borné, hors du thread de réception
+            if globals().get('COMMAND_EXECUTOR_ENABLED', True):
+                self.message_handler.start_command_executor(
+                    workers=globals().get('COMMAND_WORKERS', 4),
+                    class_limits=globals().get('COMMAND_CLASS_LIMITS', None),
+                    timeouts=globals().get('COMMAND_TIMEOUTS', None),
+                    max_pending=globals().get('COMMAND_QUEUE_MAX', 100)
+                )
+
+            # Envois espacés selon le temps d'antenne (alertes > DM > broadcasts)
+            if globals().get('OUTBOUND_SCHEDULER_ENABLED', True):
+                try:
+                    self.message_handler.start_outbound_scheduler(
+                        preset=globals().get('LORA_MODEM_PRESET', 'LONG_FAST'),
+                        duty_cycle=globals().get('OUTBOUND_DUTY_CYCLE', 0.05),
+                        spacing=globals().get('OUTBOUND_AIRTIME_SPACING', 1.5),
+                        min_gap=globals().get('OUTBOUND_MIN_GAP', 1.0),
+                        channel_util=self._observed_channel_util,
+                        busy_threshold=globals().get('OUTBOUND_BUSY_CHANNEL_UTIL', 25.0),
+                        max_pending=globals().get('OUTBOUND_QUEUE_MAX', 200)
+                    )
+                except ValueError as e:
+                    error_print(f"⚠️ Ordonnanceur d'envoi désactivé: {e}")
+
             # Initialiser le gestionnaire de traceroute mesh (après message_handler)
             info_print("📦 Initialisation MeshTracerouteManager...")
             self.mesh_traceroute = MeshTracerouteManager(
@@ -3580,6 +3706,34 @@ class MeshBot:
             except Exception as e:
                 error_print(f"⚠️ Erreur fermeture safe_serial: {e}")
 
+            # 8a. Traiter les paquets encore dans le pipeline d'ingestion
+            try:
+                self.ingest_pipeline.stop(drain=True, timeout=2.0)
+            except Exception as e:
+                error_print(f"⚠️ Erreur arrêt pipeline d'ingestion: {e}")
+
+            # 8a'. Laisser les commandes en cours se terminer (les réponses ne partiront plus)
+            try:
+                if self.message_handler:
+                    self.message_handler.stop_command_executor(timeout=1.0)
+            except Exception as e:
+                error_print(f"⚠️ Erreur arrêt exécuteur de commandes: {e}")
+
+            # 8a''. Abandonner les messages encore en file d'envoi
+            try:
+                if self.message_handler:
+                    self.message_handler.stop_outbound_scheduler(timeout=1.0)
+            except Exception as e:
+                error_print(f"⚠️ Erreur arrêt ordonnanceur d'envoi: {e}")
+
+            # 8b. Écrire les paquets en attente (write-behind) puis fermer SQLite
+            try:
+                if self.traffic_monitor and self.traffic_monitor.persistence:
+                    self.traffic_monitor.persistence.close()
+                    debug_print("✅ Persistance SQLite fermée")
+            except Exception as e:
+                error_print(f"⚠️ Erreur fermeture persistance: {e}")
+
             # 9. Nettoyage final
             try:
                 gc.collect()
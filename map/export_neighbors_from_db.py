@@ -263,7 +263,8 @@ def export_from_database(db_path='../traffic_history.db', hours=48, tcp_host=Non
             log(f"❌ Base de données introuvable: {db_path}")
             return False
         
-        persistence = TrafficPersistence(db_path)
+        # Lecture seule (mode=ro) : ni migration du schéma, ni vérification complète
+        persistence = TrafficPersistence(db_path, read_only=True)
         
         # Export neighbor data from database
         log(f"⏳ Export des données de voisinage depuis DB ({hours}h)...")
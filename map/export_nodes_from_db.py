@@ -83,46 +83,49 @@ def export_nodes_from_files(node_names_file='../node_names.json', db_path='../tr
                 from traffic_persistence import TrafficPersistence
                 import time
                 
-                persistence = TrafficPersistence(db_path)
+                # Read-only open (mode=ro): no schema migration, no full integrity check
+                persistence = TrafficPersistence(db_path, read_only=True)
                 cursor = persistence.conn.cursor()
                 
+                # Packet queries go through query_packets: archived partitions are
+                # attached when the window reaches them (results merged per node below)
                 # Get latest SNR for each node (from direct reception - 0 hops)
                 cutoff = time.time() - (hours * 3600)
-                cursor.execute("""
+                snr_rows = persistence.query_packets("""
                     SELECT from_id, snr, timestamp
-                    FROM packets
+                    FROM {packets}
                     WHERE timestamp > ? AND snr IS NOT NULL AND hops = 0
                     ORDER BY timestamp DESC
-                """, (cutoff,))
+                """, (cutoff,), since=cutoff)
                 
-                for row in cursor.fetchall():
+                for row in snr_rows:
                     from_id_str = str(row[0])
                     if from_id_str not in snr_data or row[2] > snr_data[from_id_str][1]:
                         snr_data[from_id_str] = (row[1], row[2])  # (snr, timestamp)
                 
                 # Get last heard timestamp for each node
-                cursor.execute("""
+                last_heard_rows = persistence.query_packets("""
                     SELECT from_id, MAX(timestamp) as last_ts
-                    FROM packets
+                    FROM {packets}
                     WHERE timestamp > ?
                     GROUP BY from_id
-                """, (cutoff,))
+                """, (cutoff,), since=cutoff)
                 
-                for row in cursor.fetchall():
+                for row in last_heard_rows:
                     from_id_str = str(row[0])
-                    last_heard_data[from_id_str] = int(row[1])
+                    last_heard_data[from_id_str] = max(int(row[1]), last_heard_data.get(from_id_str, 0))
                 
                 # Get minimum hop count for each node (hopsAway)
-                cursor.execute("""
+                hops_rows = persistence.query_packets("""
                     SELECT from_id, MIN(hops) as min_hops
-                    FROM packets
+                    FROM {packets}
                     WHERE timestamp > ? AND hops IS NOT NULL
                     GROUP BY from_id
-                """, (cutoff,))
+                """, (cutoff,), since=cutoff)
                 
-                for row in cursor.fetchall():
+                for row in hops_rows:
                     from_id_str = str(row[0])
-                    hops_data[from_id_str] = row[1]
+                    hops_data[from_id_str] = min(row[1], hops_data.get(from_id_str, row[1]))
                 
                 # Get neighbor data from neighbors table
                 neighbors_raw = persistence.load_neighbors(hours=hours)
@@ -210,104 +213,59 @@ def export_nodes_from_files(node_names_file='../node_names.json', db_path='../tr
                 # This is critical for MQTT-only nodes that aren't in node_names.json
                 mqtt_node_data = {}  # {node_id_str: {name, lat, lon, alt}}
                 
-                for node_key in mqtt_active_nodes:
-                    # node_key is now always decimal string (e.g., '385503196')
-                    # derived by stripping ! prefix at lines 136-153
-                    # packets table also uses decimal string from_id (e.g., '385503196')
-                    node_id_str = node_key
-                    
-                    # Get latest position data from packets
-                    cursor.execute("""
-                        SELECT position, sender_name, timestamp
-                        FROM packets
-                        WHERE from_id = ? AND position IS NOT NULL
-                        ORDER BY timestamp DESC
-                        LIMIT 1
-                    """, (node_id_str,))
+                # Latest known positions in a single query (node_positions table),
+                # with the most recent sender_name read through the (from_num, timestamp) index
+                # node_key is always a decimal string (e.g., '385503196')
+                cursor.execute("""
+                    SELECT np.node_id, np.latitude, np.longitude, np.altitude,
+                           (SELECT sender_name FROM packets
+                            WHERE from_num = np.node_id AND sender_name IS NOT NULL
+                            ORDER BY timestamp DESC LIMIT 1) AS sender_name
+                    FROM node_positions np
+                """)
+                
+                for node_num, lat, lon, alt, sender_name in cursor.fetchall():
+                    node_key = str(node_num)
+                    if node_key not in mqtt_active_nodes:
+                        continue
                     
-                    row = cursor.fetchone()
-                    if row:
-                        position_json = row[0]
-                        sender_name = row[1]
-                        
-                        try:
-                            position_data = json.loads(position_json) if position_json else None
-                            if position_data:
-                                lat = position_data.get('latitude') or position_data.get('latitudeI', 0) / 1e7
-                                lon = position_data.get('longitude') or position_data.get('longitudeI', 0) / 1e7
-                                alt = position_data.get('altitude') or position_data.get('altitudeGeodesic')
-                                
-                                # Only store if position is valid
-                                if lat and lon and lat != 0 and lon != 0:
-                                    # Sanitize sender_name to prevent XSS
-                                    sanitized_name = clean_node_name(sender_name) if sender_name else f"Node-{node_key}"
-                                    mqtt_node_data[node_id_str] = {
-                                        'name': sanitized_name,
-                                        'lat': lat,
-                                        'lon': lon,
-                                        'alt': alt
-                                    }
-                        except Exception as e:
-                            log(f"⚠️  Erreur parsing position pour {node_key}: {e}")
+                    # Only store if position is valid
+                    if lat and lon and lat != 0 and lon != 0:
+                        # Sanitize sender_name to prevent XSS
+                        sanitized_name = clean_node_name(sender_name) if sender_name else f"Node-{node_key}"
+                        mqtt_node_data[node_key] = {
+                            'name': sanitized_name,
+                            'lat': lat,
+                            'lon': lon,
+                            'alt': alt
+                        }
                 
                 # Extract 7-day telemetry history for graphing (BEFORE closing database)
                 log(f"📊 Extraction de l'historique télémétrie (7 jours)...")
                 telemetry_history = {}
                 history_days = 7
-                history_cutoff = time.time() - (history_days * 24 * 3600)
                 
-                # Query all TELEMETRY_APP packets from last 7 days
-                cursor.execute("""
-                    SELECT from_id, timestamp, telemetry
-                    FROM packets
-                    WHERE packet_type = 'TELEMETRY_APP' 
-                    AND timestamp > ? 
-                    AND telemetry IS NOT NULL
-                    ORDER BY from_id, timestamp ASC
-                """, (history_cutoff,))
-                
-                telemetry_rows = cursor.fetchall()
-                log(f"   • {len(telemetry_rows)} entrées de télémétrie trouvées")
-                
-                # Group by node and extract metrics
-                for row in telemetry_rows:
-                    from_id_str = str(row[0])
-                    timestamp = row[1]
-                    telemetry_json = row[2]
-                    
-                    try:
-                        telemetry_obj = json.loads(telemetry_json) if telemetry_json else {}
-                        
-                        # Extract battery level and voltage
-                        battery = telemetry_obj.get('battery')
-                        voltage = telemetry_obj.get('voltage')
-                        channel_util = telemetry_obj.get('channel_util')
-                        air_util = telemetry_obj.get('air_util')
-                        
-                        # Skip if no useful data
-                        if battery is None and voltage is None:
+                # 7-day series from the 5-minute telemetry tier (bounded number of points
+                # per node, however often it sends telemetry)
+                telemetry_series = persistence.load_telemetry_series(hours=history_days * 24)
+                log(f"   • {sum(len(points) for points in telemetry_series.values())} points de télémétrie trouvés")
+                
+                # Group by node
+                for from_id, points in telemetry_series.items():
+                    for point in points:
+                        if point['battery'] is None and point['voltage'] is None:
                             continue
+                        data_point = {'t': int(point['timestamp'])}
+                        if point['battery'] is not None:
+                            data_point['b'] = round(point['battery'])  # battery level (%)
+                        if point['voltage'] is not None:
+                            data_point['v'] = round(point['voltage'], 2)  # voltage (V)
+                        if point['channel_util'] is not None:
+                            data_point['c'] = round(point['channel_util'], 1)  # channel utilization
+                        if point['air_util'] is not None:
+                            data_point['a'] = round(point['air_util'], 1)  # air utilization
                         
-                        # Initialize history array for this node
-                        if from_id_str not in telemetry_history:
-                            telemetry_history[from_id_str] = []
-                        
-                        # Add data point
-                        data_point = {'t': int(timestamp)}
-                        if battery is not None:
-                            data_point['b'] = battery  # battery level (%)
-                        if voltage is not None:
-                            data_point['v'] = round(voltage, 2)  # voltage (V)
-                        if channel_util is not None:
-                            data_point['c'] = round(channel_util, 1)  # channel utilization
-                        if air_util is not None:
-                            data_point['a'] = round(air_util, 1)  # air utilization
-                        
-                        telemetry_history[from_id_str].append(data_point)
-                        
-                    except Exception as e:
-                        # Silent fail - corrupt telemetry data
-                        pass
+                        telemetry_history.setdefault(from_id, []).append(data_point)
                 
                 # Downsample if too many points (keep max 100 points per node)
                 max_points = 100
@@ -86,9 +86,9 @@ class MeshAlertManager:
                 node_name = f"0x{node_id:08x}"
                 node_info = {"name": node_name}
                 
-                # Envoyer le DM via MessageSender
+                # Envoyer le DM via MessageSender (devant les réponses et broadcasts en file)
                 debug_print(f"   → {node_name}: Envoi DM...")
-                self.message_sender.send_single(message, node_id, node_info)
+                self.message_sender.send_single(message, node_id, node_info, priority='alert')
                 
                 # Enregistrer l'envoi pour throttling
                 self._record_alert_sent(node_id, alert_type, current_time)
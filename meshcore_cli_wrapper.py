@@ -766,6 +766,7 @@ class MeshCoreCLIWrapper:
                         'last_update': None,
                         'publicKey': public_key  # Store public key for future lookups
                     }
+                    self.node_manager.index_public_key(contact_id, public_key)
                     
                     # Data is automatically saved to SQLite via persistence
                     info_print_mc(f"💾 [MESHCORE-QUERY] Contact ajouté à la base SQLite: {name}")
@@ -773,6 +774,7 @@ class MeshCoreCLIWrapper:
                     # Update publicKey if not present
                     if public_key and not self.node_manager.node_names[contact_id].get('publicKey'):
                         self.node_manager.node_names[contact_id]['publicKey'] = public_key
+                        self.node_manager.index_public_key(contact_id, public_key)
                         # Data is automatically saved to SQLite via persistence
                         debug_print_mc(f"💾 [QUERY] PublicKey ajouté: {name}")
             
@@ -2269,6 +2271,7 @@ class MeshCoreCLIWrapper:
                         'shortName': adv_name,
                         'publicKey': public_key,
                     }
+                    self.node_manager.index_public_key(contact_id, public_key)
 
         except Exception as e:
             error_print(f"❌ [MESHCORE-ADVERT] Erreur traitement advertisement: {e}")
@@ -6,6 +6,8 @@ Utilise la nouvelle architecture modulaire en interne
 """
 
 from handlers import MessageRouter
+from command_executor import CommandExecutor, command_name
+from outbound_scheduler import OutboundScheduler
 
 class MessageHandler:
     """
@@ -46,9 +48,41 @@ class MessageHandler:
         self.traffic_monitor = traffic_monitor
         self.blitz_monitor = blitz_monitor
         self.mqtt_neighbor_collector = mqtt_neighbor_collector
+
+        # Pool d'exécution des commandes (None = exécution en ligne)
+        self.command_executor = None
     
+    def start_command_executor(self, **kwargs):
+        """Exécuter les commandes sur un pool de workers (arguments de CommandExecutor)"""
+        self.command_executor = CommandExecutor(**kwargs)
+        self.command_executor.start()
+        return self.command_executor
+
+    def stop_command_executor(self, timeout=5.0):
+        if self.command_executor:
+            self.command_executor.stop(timeout=timeout)
+
+    def start_outbound_scheduler(self, **kwargs):
+        """Espacer les envois selon le temps d'antenne (arguments de OutboundScheduler)"""
+        scheduler = OutboundScheduler(**kwargs)
+        scheduler.start()
+        self.router.sender.outbound_scheduler = scheduler
+        return scheduler
+
+    def stop_outbound_scheduler(self, timeout=2.0):
+        scheduler = self.router.sender.outbound_scheduler
+        if scheduler:
+            scheduler.stop(timeout=timeout)
+
     def process_text_message(self, packet, decoded, message):
-        """Déléguer au router"""
+        """
+        Déléguer au router : les /commandes sur le pool de commandes s'il est démarré,
+        les autres messages en ligne (sans occuper la file de l'émetteur)
+        """
+        if command_name(message) and self.command_executor and self.command_executor.running:
+            self.command_executor.submit(packet.get('from', 0), message,
+                                         self.router.process_text_message, packet, decoded, message)
+            return
         self.router.process_text_message(packet, decoded, message)
     
     def cleanup_throttling_data(self):
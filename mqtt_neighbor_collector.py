@@ -19,6 +19,7 @@ import threading
 from collections import deque
 from typing import Optional, Dict, List, Any
 from utils import info_print, error_print, debug_print
+from packet_identity import PacketIdentityService, packet_key
 
 # Import MTMQTT_DEBUG flag from config
 try:
@@ -69,7 +70,8 @@ class MQTTNeighborCollector:
                  mqtt_topic_root: str = "msh",
                  mqtt_topic_pattern: Optional[str] = None,
                  persistence = None,
-                 node_manager = None):
+                 node_manager = None,
+                 packet_identity: Optional[PacketIdentityService] = None):
         """
         Initialiser le collecteur MQTT
         
@@ -83,6 +85,8 @@ class MQTTNeighborCollector:
                                Ex: "msh/EU_868/2/e/MediumFast" ou "msh/+/+/2/e/+"
             persistence: Instance de TrafficPersistence pour sauvegarder les données
             node_manager: Instance de NodeManager pour calculer les distances (optionnel)
+            packet_identity: Service d'identité des paquets partagé avec TrafficMonitor
+                             (optionnel, sinon service propre au collecteur)
         """
         # Initialiser tous les attributs d'abord (pour éviter AttributeError si désactivé)
         self.mqtt_server = mqtt_server
@@ -99,10 +103,10 @@ class MQTTNeighborCollector:
         self.connected = False
         self.neighbor_updates = deque(maxlen=100)
         
-        # Déduplication: dictionnaire {(packet_id, from_id): timestamp}
-        # Les mêmes paquets sont répétés par plusieurs gateways
-        self._seen_packets = {}
-        self._dedup_window = 20  # secondes
+        # Déduplication: les mêmes paquets sont répétés par plusieurs gateways
+        # (fenêtre 'mqtt' du service, 20 s par défaut). Partagé avec TrafficMonitor,
+        # le service compte aussi les paquets déjà reçus par la radio (serial/TCP)
+        self.packet_identity = packet_identity or PacketIdentityService()
         
         self.stats = {
             'messages_received': 0,
@@ -238,7 +242,9 @@ class MQTTNeighborCollector:
         Vérifier si un paquet a déjà été vu récemment (déduplication)
         
         Les paquets MQTT sont répétés par plusieurs gateways sur le réseau,
-        il faut filtrer les duplicatas sur une fenêtre de 20 secondes.
+        il faut filtrer les duplicatas sur la fenêtre 'mqtt' (20 secondes par défaut).
+        Un paquet déjà reçu par la radio n'est pas filtré (seulement compté) :
+        le collecteur en tire les voisins et la gateway qui l'a relayé.
         
         Args:
             packet_id: ID du paquet
@@ -247,27 +253,7 @@ class MQTTNeighborCollector:
         Returns:
             True si duplicate, False sinon
         """
-        current_time = time.time()
-        
-        # Nettoyer les anciennes entrées (> 20 secondes)
-        expired_keys = []
-        for key, timestamp in self._seen_packets.items():
-            if current_time - timestamp > self._dedup_window:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self._seen_packets[key]
-        
-        # Vérifier si ce paquet a déjà été vu
-        dedup_key = (packet_id, from_id)
-        
-        if dedup_key in self._seen_packets:
-            # Duplicate trouvé
-            return True
-        
-        # Nouveau paquet, l'enregistrer
-        self._seen_packets[dedup_key] = current_time
-        return False
+        return self.packet_identity.is_duplicate(packet_key(packet_id, from_id), 'mqtt', scope=())
     
     def _process_nodeinfo(self, packet, decoded, from_id):
         """
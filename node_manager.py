@@ -7,6 +7,7 @@ VERSION AMÉLIORÉE avec stockage SQLite
 import time
 import threading
 import gc
+import bisect
 from config import *
 from utils import *
 from math import radians, cos, sin, asin, sqrt
@@ -31,6 +32,13 @@ class NodeManager:
         self._last_sync_time = 0
         self._last_synced_keys_hash = None
 
+        # Sorted (pubkey_hex, node_id) index for O(log n) pubkey prefix lookups
+        # (MeshCore DM sender resolution). Kept in sync via index_public_key().
+        self._pubkey_index = []
+        self._pubkey_hex_by_node = {}
+        self._pubkey_index_lock = threading.Lock()
+        self._pubkey_index_nodes_len = 0
+
         # numTotalNodes reported by the local Meshtastic radio firmware in its
         # own TELEMETRY_APP localStats broadcast.  This is the authoritative
         # hardware-level count of how many nodes the radio has heard via RF
@@ -109,6 +117,7 @@ class NodeManager:
             
             # Charger tous les nœuds depuis SQLite
             self.node_names = self.persistence.get_all_meshtastic_nodes()
+            self._rebuild_pubkey_index()
             debug_print(f"📚 {len(self.node_names)} nœuds chargés depuis SQLite")
             
         except Exception as e:
@@ -199,6 +208,78 @@ class NodeManager:
             'last_update': node_data.get('last_update')
         }
     
+    @staticmethod
+    def _public_key_to_hex(public_key):
+        """
+        Normalize a public key to a lowercase hex string
+        
+        Handles hex strings, base64-encoded strings and bytes.
+        
+        Returns:
+            str or None if the key is empty or cannot be decoded
+        """
+        if not public_key:
+            return None
+        if isinstance(public_key, str):
+            # Check if it's already hex (all chars are hex digits)
+            if all(c in '0123456789abcdefABCDEF' for c in public_key.replace(' ', '')):
+                return public_key.lower().replace(' ', '')
+            # Assume base64, try to decode
+            try:
+                import base64
+                return base64.b64decode(public_key).hex().lower()
+            except Exception:
+                return None
+        if isinstance(public_key, (bytes, bytearray)):
+            return public_key.hex().lower()
+        return None
+    
+    def index_public_key(self, node_id, public_key):
+        """
+        Add, replace or remove a node's public key in the prefix index
+        
+        Must be called whenever node_names[node_id]['publicKey'] changes
+        (NODEINFO packets, MeshCore contact updates).
+        
+        Args:
+            node_id: Node ID (int)
+            public_key: New public key (hex/base64 str or bytes), None to remove
+        """
+        public_key_hex = self._public_key_to_hex(public_key)
+        with self._pubkey_index_lock:
+            old_hex = self._pubkey_hex_by_node.get(node_id)
+            if old_hex == public_key_hex:
+                return
+            if old_hex is not None:
+                pos = bisect.bisect_left(self._pubkey_index, (old_hex, node_id))
+                if pos < len(self._pubkey_index) and self._pubkey_index[pos] == (old_hex, node_id):
+                    del self._pubkey_index[pos]
+                del self._pubkey_hex_by_node[node_id]
+            if public_key_hex:
+                bisect.insort(self._pubkey_index, (public_key_hex, node_id))
+                self._pubkey_hex_by_node[node_id] = public_key_hex
+    
+    def _rebuild_pubkey_index(self):
+        """Rebuild the pubkey prefix index from node_names"""
+        entries = {}
+        for node_id, node_data in self.node_names.items():
+            public_key_hex = self._public_key_to_hex(node_data.get('publicKey'))
+            if public_key_hex:
+                entries[node_id] = public_key_hex
+        with self._pubkey_index_lock:
+            self._pubkey_hex_by_node = entries
+            self._pubkey_index = sorted((key, node_id) for node_id, key in entries.items())
+            self._pubkey_index_nodes_len = len(self.node_names)
+    
+    def _lookup_pubkey_index(self, pubkey_prefix):
+        """Binary search in the prefix index: first key >= prefix, if it matches"""
+        with self._pubkey_index_lock:
+            pos = bisect.bisect_left(self._pubkey_index, (pubkey_prefix,))
+            match = self._pubkey_index[pos] if pos < len(self._pubkey_index) else None
+        if match and match[0].startswith(pubkey_prefix):
+            return match[1]
+        return None
+    
     def find_node_by_pubkey_prefix(self, pubkey_prefix):
         """
         Find a node ID by matching the public key prefix
@@ -209,7 +290,7 @@ class NodeManager:
         - Bytes
         
         Search order:
-        1. In-memory node_names (JSON cache)
+        1. In-memory sorted prefix index (binary search, O(log n))
         2. SQLite database (meshtastic_nodes and meshcore_contacts tables)
         
         Args:
@@ -224,36 +305,14 @@ class NodeManager:
         # Normalize the prefix (lowercase, no spaces)
         pubkey_prefix = str(pubkey_prefix).lower().strip()
         
-        # Search through in-memory nodes first (JSON cache)
-        for node_id, node_data in self.node_names.items():
-            if 'publicKey' in node_data:
-                public_key = node_data['publicKey']
-                public_key_hex = None
-                
-                # Handle different formats
-                if isinstance(public_key, str):
-                    # Check if it's already hex (all chars are hex digits)
-                    if all(c in '0123456789abcdefABCDEF' for c in public_key.replace(' ', '')):
-                        # Already hex format
-                        public_key_hex = public_key.lower().replace(' ', '')
-                    else:
-                        # Assume base64, try to decode
-                        try:
-                            import base64
-                            decoded_bytes = base64.b64decode(public_key)
-                            public_key_hex = decoded_bytes.hex().lower()
-                        except Exception as e:
-                            debug_print(f"⚠️ Failed to decode base64 publicKey for node 0x{node_id:08x}: {e}")
-                            continue
-                            
-                elif isinstance(public_key, bytes):
-                    # Bytes format: convert to hex
-                    public_key_hex = public_key.hex().lower()
-                
-                # Check if prefix matches
-                if public_key_hex and public_key_hex.startswith(pubkey_prefix):
-                    debug_print(f"🔍 Found node 0x{node_id:08x} with pubkey prefix {pubkey_prefix} (in-memory)")
-                    return node_id
+        node_id = self._lookup_pubkey_index(pubkey_prefix)
+        if node_id is None and len(self.node_names) != self._pubkey_index_nodes_len:
+            # Entries were added to node_names without index_public_key(): resync once
+            self._rebuild_pubkey_index()
+            node_id = self._lookup_pubkey_index(pubkey_prefix)
+        if node_id is not None:
+            debug_print(f"🔍 Found node 0x{node_id:08x} with pubkey prefix {pubkey_prefix} (in-memory)")
+            return node_id
         
         # Not found in memory, search in SQLite database
         if hasattr(self, 'persistence') and self.persistence:
@@ -448,6 +507,7 @@ class NodeManager:
                                 
                                 # Always update public key if available (even if name didn't change)
                                 if public_key:
+                                    self.index_public_key(node_id_int, public_key)
                                     old_key = self.node_names[node_id_int].get('publicKey')
                                     if old_key != public_key:
                                         self.node_names[node_id_int]['publicKey'] = public_key
@@ -613,6 +673,7 @@ class NodeManager:
                             }
                             info_func(f"📱 New node: {name} (0x{node_id:08x})")
                             if public_key:
+                                self.index_public_key(node_id, public_key)
                                 # Consolidated log: one line for new key
                                 #info_func(f"✅ Key extracted: {name} (len={len(public_key)})")
                                 
@@ -659,6 +720,7 @@ class NodeManager:
                             old_key = self.node_names[node_id].get('publicKey')
                             if public_key and public_key != old_key:
                                 self.node_names[node_id]['publicKey'] = public_key
+                                self.index_public_key(node_id, public_key)
                                 # Consolidated log: one line for key update
                                 #info_func(f"✅ Key updated: {name} (len={len(public_key)})")
                                 data_changed = True
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ordonnanceur des messages sortants selon le temps d'antenne LoRa.
+
+send_chunks dormait 2 s entre deux morceaux quel que soit le preset, et les
+broadcasts partaient à la suite sans vue d'ensemble du canal. Tous les envois
+passent désormais par une file unique :
+
+- classes de priorité : alertes, réponses en DM, broadcasts (priorité stricte) ;
+- à priorité égale, les destinataires sont servis à tour de rôle (FIFO par
+  destinataire : les morceaux d'une réponse restent dans l'ordre) ;
+- écart entre deux émissions proportionnel au temps d'antenne (time-on-air) du
+  message précédent, estimé d'après le preset de modem ;
+- budget de duty-cycle sur une fenêtre glissante (la part du bot dans la limite
+  réglementaire, le nœud relaie aussi les paquets des autres) ;
+- recul quand l'utilisation du canal observée dépasse un seuil.
+
+Les alertes ne subissent ni le recul ni le budget, seulement l'écart minimal.
+"""
+
+import threading
+import time
+from collections import deque, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from lora_airtime import get_preset, text_airtime
+from utils import debug_print, info_print, error_print
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ordre de service : une alerte passe devant les DM, un DM devant les broadcasts
+PRIORITIES = ('alert', 'dm', 'broadcast')
+
+# Relecture de l'utilisation du canal au plus toutes les N secondes
+CHANNEL_UTIL_REFRESH = 10.0
+
+
+class _Outbound:
+    __slots__ = ('priority', 'recipient', 'message', 'airtime', 'func', 'args', 'kwargs', 'enqueued_at')
+
+    def __init__(self, priority, recipient, message, airtime, func, args, kwargs, enqueued_at):
+        self.priority = priority
+        self.recipient = recipient
+        self.message = message
+        self.airtime = airtime
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = enqueued_at
+
+
+class OutboundScheduler:
+    """
+    File des messages sortants, espacés selon leur temps d'antenne.
+
+    Tant que start() n'a pas été appelé, `running` est False : l'appelant envoie
+    alors directement (voir schedule_or_send). poll() et deliver() permettent de
+    piloter la file sans thread (tests, simulation).
+    """
+
+    def __init__(
+        self,
+        preset='LONG_FAST',
+        duty_cycle: float = 0.05,
+        duty_window: float = 3600,
+        spacing: float = 1.5,
+        min_gap: float = 1.0,
+        channel_util: Optional[Callable[[], Optional[float]]] = None,
+        busy_threshold: float = 25.0,
+        max_backoff: float = 4.0,
+        max_pending: int = 200,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            preset: Preset de modem (nom Meshtastic ou dict sf/bw_khz/cr/preamble)
+            duty_cycle: Part du temps d'antenne accordée au bot sur duty_window (0.05 = 5 %)
+            duty_window: Fenêtre glissante du budget (secondes)
+            spacing: Écart minimal après une émission, en multiple de son temps d'antenne
+            min_gap: Écart minimal absolu entre deux émissions (secondes)
+            channel_util: Fonction retournant l'utilisation du canal observée (%), ou None
+            busy_threshold: Utilisation du canal (%) au-delà de laquelle l'écart est allongé
+            max_backoff: Facteur d'allongement maximal de l'écart
+            max_pending: Messages en attente max (au-delà: refus)
+            clock: Horloge monotone (secondes)
+        """
+        self.preset = get_preset(preset)
+        self.duty_cycle = duty_cycle
+        self.duty_window = duty_window
+        self.spacing = spacing
+        self.min_gap = min_gap
+        self.channel_util = channel_util
+        self.busy_threshold = busy_threshold
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending
+        self.running = False
+
+        self._clock = clock
+        self._cond = threading.Condition()
+        # priorité -> {destinataire: deque de messages}, destinataires dans l'ordre de service
+        self._queues: Dict[str, OrderedDict] = {priority: OrderedDict() for priority in PRIORITIES}
+        self._pending = 0
+        self._thread = None
+
+        # Dernière émission et temps d'antenne dépensé dans la fenêtre
+        self._last_tx = None
+        self._last_airtime = 0.0
+        self._history = deque()        # (instant, temps d'antenne)
+        self._window_airtime = 0.0
+
+        self._util_value = None
+        self._util_checked_at = None
+
+        self._metrics: Dict[str, Dict[str, float]] = {
+            priority: {'submitted': 0, 'sent': 0, 'failed': 0, 'rejected': 0,
+                       'wait_ms': 0.0, 'max_wait_ms': 0.0, 'airtime': 0.0}
+            for priority in PRIORITIES}
+
+    def start(self):
+        """Démarre le thread d'émission."""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._worker_loop, name="OutboundScheduler", daemon=True)
+        self._thread.start()
+        debug_print(f"📤 Ordonnanceur d'envoi démarré: preset {self.preset}, "
+                    f"duty-cycle {self.duty_cycle:.0%}/{self.duty_window:.0f}s")
+
+    def submit(self, priority: str, recipient: Hashable, message: str,
+               func: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Met un message en file derrière les messages en attente du même destinataire.
+
+        Args:
+            priority: 'alert', 'dm' ou 'broadcast'
+            recipient: Destinataire (ordre FIFO et tour de rôle par destinataire)
+            message: Texte émis (estimation du temps d'antenne)
+            func: Fonction d'envoi appelée avec *args, **kwargs
+
+        Returns:
+            bool: False si le message est refusé (file pleine)
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Priorité inconnue: {priority} (attendu: {', '.join(PRIORITIES)})")
+        item = _Outbound(priority, recipient, message, text_airtime(message, self.preset),
+                         func, args, kwargs, self._clock())
+        with self._cond:
+            metrics = self._metrics[priority]
+            if self._pending >= self.max_pending:
+                metrics['rejected'] += 1
+                error_print(f"⚠️ Message {priority} refusé: file d'envoi pleine ({self._pending} en attente)")
+                return False
+            queues = self._queues[priority]
+            queue = queues.get(recipient)
+            if queue is None:
+                queue = queues[recipient] = deque()
+            queue.append(item)
+            self._pending += 1
+            metrics['submitted'] += 1
+            self._cond.notify_all()
+        return True
+
+    def poll(self) -> Tuple[Optional[_Outbound], Optional[float]]:
+        """
+        Retire le prochain message si son émission est due.
+
+        Returns:
+            (message, 0.0) s'il peut partir maintenant (à transmettre avec deliver()),
+            (None, délai en secondes) s'il doit attendre, (None, None) si la file est vide
+        """
+        with self._cond:
+            return self._poll_locked(self._clock())
+
+    def _poll_locked(self, now: float):
+        for priority in PRIORITIES:
+            queues = self._queues[priority]
+            if queues:
+                break
+        else:
+            return None, None
+        recipient, queue = next(iter(queues.items()))
+        item = queue[0]
+        ready = self._ready_at(priority, item.airtime, now)
+        if ready > now:
+            return None, ready - now
+        queue.popleft()
+        # Tour de rôle : le destinataire servi passe en fin de file
+        if queue:
+            queues.move_to_end(recipient)
+        else:
+            del queues[recipient]
+        self._pending -= 1
+        self._last_tx = now
+        self._last_airtime = item.airtime
+        self._history.append((now, item.airtime))
+        self._window_airtime += item.airtime
+        metrics = self._metrics[priority]
+        wait_ms = (now - item.enqueued_at) * 1000
+        metrics['wait_ms'] += wait_ms
+        metrics['max_wait_ms'] = max(metrics['max_wait_ms'], wait_ms)
+        metrics['airtime'] += item.airtime
+        return item, 0.0
+
+    def _ready_at(self, priority: str, airtime: float, now: float) -> float:
+        """Instant le plus tôt où un message de ce temps d'antenne peut partir (sous verrou)."""
+        ready = now
+        if self._last_tx is not None:
+            gap = max(self.min_gap, self._last_airtime * self.spacing)
+            if priority != 'alert':
+                gap *= self._backoff(now)
+            ready = max(ready, self._last_tx + gap)
+
+        # Budget de duty-cycle : attendre que assez d'émissions sortent de la fenêtre.
+        # Les alertes le dépassent (marge entre la part du bot et la limite du nœud).
+        while self._history and self._history[0][0] <= now - self.duty_window:
+            self._window_airtime -= self._history.popleft()[1]
+        if priority == 'alert':
+            return ready
+        excess = self._window_airtime + airtime - self.duty_cycle * self.duty_window
+        if excess > 0 and self._history:
+            freed = 0.0
+            for stamp, spent in self._history:
+                freed += spent
+                if freed >= excess:
+                    break
+            ready = max(ready, stamp + self.duty_window)
+        return ready
+
+    def _backoff(self, now: float) -> float:
+        """Facteur d'allongement de l'écart selon l'utilisation du canal (1.0 = canal calme)."""
+        if self.channel_util is None:
+            return 1.0
+        if self._util_checked_at is None or now - self._util_checked_at >= CHANNEL_UTIL_REFRESH:
+            self._util_checked_at = now
+            try:
+                self._util_value = self.channel_util()
+            except Exception as e:
+                debug_print(f"Utilisation du canal indisponible: {e}")
+                self._util_value = None
+        util = self._util_value
+        if util is None or util <= self.busy_threshold or self.busy_threshold <= 0:
+            return 1.0
+        return min(self.max_backoff, util / self.busy_threshold)
+
+    def deliver(self, item: _Outbound) -> bool:
+        """Appelle la fonction d'envoi d'un message retiré par poll()."""
+        failed = False
+        try:
+            item.func(*item.args, **item.kwargs)
+        except Exception as e:
+            failed = True
+            error_print(f"❌ Envoi {item.priority} → {item.recipient}: {e}")
+            logger.debug("Erreur envoi", exc_info=True)
+        with self._cond:
+            self._metrics[item.priority]['failed' if failed else 'sent'] += 1
+        return not failed
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                item = None
+                while self.running:
+                    item, delay = self._poll_locked(self._clock())
+                    if item:
+                        break
+                    # Réveil anticipé par submit() : un message plus prioritaire peut être arrivé
+                    self._cond.wait(timeout=delay)
+                if item is None:
+                    return
+            self.deliver(item)
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Arrête le thread d'émission. Les messages encore en attente sont abandonnés.
+
+        Args:
+            timeout: Temps maximum d'attente du thread (secondes)
+        """
+        with self._cond:
+            self.running = False
+            dropped = self._pending
+            for queues in self._queues.values():
+                queues.clear()
+            self._pending = 0
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if dropped:
+            info_print(f"📤 Ordonnanceur d'envoi arrêté: {dropped} messages en attente abandonnés")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de la file et les mesures par priorité.
+
+        Returns:
+            dict: pending, duty_used (part du budget consommée sur la fenêtre), channel_util,
+                  backoff, et 'priorities' {priorité: submitted, sent, failed, rejected,
+                  avg/max attente (ms), airtime_s}
+        """
+        with self._cond:
+            now = self._clock()
+            budget = self.duty_cycle * self.duty_window
+            window_airtime = sum(spent for stamp, spent in self._history if stamp > now - self.duty_window)
+            priorities = {}
+            for priority, m in self._metrics.items():
+                dequeued = (m['sent'] + m['failed']) or 1
+                priorities[priority] = {
+                    'submitted': m['submitted'],
+                    'sent': m['sent'],
+                    'failed': m['failed'],
+                    'rejected': m['rejected'],
+                    'avg_wait_ms': round(m['wait_ms'] / dequeued, 1),
+                    'max_wait_ms': round(m['max_wait_ms'], 1),
+                    'airtime_s': round(m['airtime'], 2),
+                }
+            return {
+                'pending': self._pending,
+                'duty_used': round(window_airtime / budget, 3) if budget else 0.0,
+                'channel_util': self._util_value,
+                'backoff': round(self._backoff(now), 2),
+                'priorities': priorities,
+            }
+
+    def format_stats(self) -> Optional[str]:
+        """Résumé d'une ligne par priorité pour les logs, None si aucun message soumis."""
+        stats = self.get_stats()
+        if not any(p['submitted'] for p in stats['priorities'].values()):
+            return None
+        util = stats['channel_util']
+        lines = [f"en attente {stats['pending']}, budget utilisé {stats['duty_used']:.0%}, "
+                 f"canal {util if util is not None else '?'}%, recul ×{stats['backoff']}"]
+        for priority, p in stats['priorities'].items():
+            if p['submitted']:
+                lines.append(f"{priority}: {p['sent']}/{p['submitted']} envoyés, {p['rejected']} refusés "
+                             f"| attente {p['avg_wait_ms']}ms (max {p['max_wait_ms']}) | antenne {p['airtime_s']}s")
+        return "\n".join(lines)
+
+
+def schedule_or_send(scheduler, priority: str, recipient: Hashable, message: str,
+                     func: Callable[..., Any], *args, **kwargs) -> bool:
+    """
+    Confie l'envoi à l'ordonnanceur s'il tourne, sinon envoie immédiatement.
+
+    Returns:
+        bool: True si le message est parti ou en file
+    """
+    if isinstance(scheduler, OutboundScheduler) and scheduler.running:
+        return scheduler.submit(priority, recipient, message, func, *args, **kwargs)
+    func(*args, **kwargs)
+    return True
+
+
+def is_scheduled(sender) -> bool:
+    """True si les envois de ce MessageSender passent par un ordonnanceur démarré (espacement géré par lui)."""
+    scheduler = getattr(sender, 'outbound_scheduler', None)
+    return isinstance(scheduler, OutboundScheduler) and scheduler.running
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Identité des paquets commune à tous les transports (serial, TCP, MQTT, MeshCore).
+
+Un même paquet radio peut arriver plusieurs fois : par l'interface serial et par
+TCP, puis par chaque gateway MQTT qui le relaie. Chaque chemin d'ingestion avait
+sa propre déduplication ; ce service les regroupe :
+- une seule table (OrderedDict) clé → horodatages par transport, expirée par la
+  tête comme TTLCache : insertion, recherche et expiration en O(1) amorti ;
+- une fenêtre par transport (MQTT : les gateways relaient avec plusieurs
+  secondes d'écart, serial/TCP : quasi simultané) ;
+- une portée par appelant : TrafficMonitor écarte les doublons radio
+  (serial/TCP/MeshCore) mais pas un paquet déjà vu par MQTT, le collecteur MQTT
+  seulement les répétitions des gateways ;
+- des compteurs de doublons par couple (premier transport → transport du
+  doublon), qui mesurent le travail redondant de chaque chemin d'ingestion.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Collection, Dict, Hashable, Optional
+
+# Fenêtres de déduplication par défaut (secondes)
+DEFAULT_WINDOWS = {'serial': 5.0, 'tcp': 5.0, 'meshcore': 5.0, 'mqtt': 20.0}
+
+# Sources de TrafficMonitor.add_packet → transport
+SOURCE_TRANSPORTS = {'local': 'serial', 'tigrog2': 'tcp', 'meshtastic': 'serial'}
+
+# Transports de la radio locale (portée de déduplication de TrafficMonitor)
+RADIO_TRANSPORTS = frozenset({'serial', 'tcp', 'meshcore'})
+
+
+def transport_for_source(source: str) -> str:
+    """Transport correspondant à une source de paquet ('local' → 'serial', ...)."""
+    return SOURCE_TRANSPORTS.get(source, source)
+
+
+def packet_key(packet_id, from_id, to_id=None, timestamp=None):
+    """
+    Identité d'un paquet : (émetteur, ID) pour Meshtastic, identique quel que soit
+    le transport. Sans ID, repli sur émetteur/destinataire/seconde de réception.
+    """
+    if packet_id:
+        return (from_id, packet_id)
+    return (None, from_id, to_id, int(timestamp if timestamp is not None else time.time()))
+
+
+class PacketIdentityService:
+    """
+    Paquets récents vus par chaque transport, partagé entre les chemins d'ingestion.
+
+    Thread-safe : serial, TCP, MQTT et MeshCore appellent depuis leurs propres threads.
+    """
+
+    def __init__(self, windows: Optional[Dict[str, float]] = None, default_window: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            windows: Fenêtre de déduplication par transport (secondes), fusionnée avec DEFAULT_WINDOWS
+            default_window: Fenêtre des transports non listés
+            clock: Horloge (monotone par défaut : insensible aux changements d'heure système)
+        """
+        self.windows = dict(DEFAULT_WINDOWS)
+        self.windows.update(windows or {})
+        self.default_window = default_window
+        self._clock = clock
+        # clé → {transport: première observation dans sa fenêtre} ;
+        # ordonné par dernière observation pour l'expiration par la tête
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.unique = defaultdict(int)
+        self.duplicates = defaultdict(int)
+
+    @property
+    def max_window(self) -> float:
+        return max([self.default_window] + list(self.windows.values()))
+
+    def window(self, transport: str) -> float:
+        return self.windows.get(transport, self.default_window)
+
+    def _expire(self, now: float):
+        """Retire les entrées dont la dernière observation dépasse la plus grande fenêtre."""
+        entries = self._entries
+        ttl = self.max_window
+        while entries:
+            key, seen = next(iter(entries.items()))
+            if now - max(seen.values()) < ttl:
+                break
+            entries.popitem(last=False)
+
+    def observe(self, key: Hashable, transport: str,
+                scope: Optional[Collection[str]] = None) -> Optional[str]:
+        """
+        Enregistre un paquet reçu par `transport`.
+
+        Toute observation antérieure dans la fenêtre de `transport` est comptée comme
+        doublon (premier transport → `transport`), mais seules celles des transports
+        de `scope` (plus `transport` lui-même) en font un doublon pour l'appelant.
+
+        Args:
+            key: Identité du paquet (voir packet_key)
+            transport: Transport qui vient de recevoir le paquet
+            scope: Transports dont une observation rend le paquet doublon (None = tous)
+
+        Returns:
+            Le transport qui a vu le paquet en premier (dans la portée), None s'il est nouveau
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            window = self.window(transport)
+            seen = self._entries.get(key)
+            if seen is None:
+                seen = self._entries[key] = {}
+            prior = {t: stamp for t, stamp in seen.items() if now - stamp < window}
+            if prior:
+                self.duplicates[(min(prior, key=prior.get), transport)] += 1
+            else:
+                self.unique[transport] += 1
+            if transport not in prior:
+                seen[transport] = now
+                self._entries.move_to_end(key)
+            if scope is not None:
+                prior = {t: stamp for t, stamp in prior.items() if t == transport or t in scope}
+            return min(prior, key=prior.get) if prior else None
+
+    def is_duplicate(self, key: Hashable, transport: str, scope: Optional[Collection[str]] = None) -> bool:
+        """Enregistre le paquet ; True s'il a déjà été vu dans la portée."""
+        return self.observe(key, transport, scope) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        """Paquets uniques par transport et doublons par couple (premier, doublon)."""
+        with self._lock:
+            return {
+                'tracked': len(self._entries),
+                'unique': dict(self.unique),
+                'duplicates': dict(self.duplicates),
+            }
+
+    def format_stats(self) -> str:
+        """Résumé compact : 'serial→tcp:12 mqtt→mqtt:340', doublons les plus fréquents d'abord."""
+        stats = self.get_stats()
+        pairs = sorted(stats['duplicates'].items(), key=lambda item: item[1], reverse=True)
+        return " ".join(f"{first}→{transport}:{count}" for (first, transport), count in pairs)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Partitions d'archive des paquets (un fichier SQLite par jour ou par mois).
+
+Les paquets récents restent dans la base principale. Les paquets plus anciens
+que la fenêtre « chaude » sont déplacés dans un fichier par période
+(packets_AAAAMM.db ou packets_AAAAMMJJ.db), attaché (ATTACH) à la demande
+pour les requêtes longues. La rétention supprime alors des fichiers entiers
+au lieu de DELETE + VACUUM.
+
+Ce module ne gère que la correspondance période <-> fichier. Les déplacements
+et les requêtes sont faits par TrafficPersistence (connexions et verrou).
+"""
+
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PacketPartitions:
+    """
+    Fichiers d'archive des paquets, découpés par jour ou par mois (UTC).
+
+    Une partition couvre l'intervalle [start, end[ de sa période. Le nom du
+    fichier suffit à retrouver la période : aucun index n'est maintenu.
+    """
+
+    PERIOD_FORMATS = {'day': '%Y%m%d', 'month': '%Y%m'}
+    FILE_PREFIX = 'packets_'
+
+    def __init__(self, archive_dir: str, period: str = 'month'):
+        """
+        Args:
+            archive_dir: Répertoire des fichiers d'archive (créé si nécessaire)
+            period: 'day' ou 'month'
+        """
+        if period not in self.PERIOD_FORMATS:
+            raise ValueError(f"Période de partition inconnue : {period} (attendu : 'day' ou 'month')")
+        self.archive_dir = archive_dir
+        self.period = period
+        self._key_pattern = re.compile(
+            rf"^{self.FILE_PREFIX}(\d{{{8 if period == 'day' else 6}}})\.db$"
+        )
+
+    def key_for(self, timestamp: float) -> str:
+        """Clé de la période contenant timestamp (ex: '202410' ou '20241031')."""
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime(self.PERIOD_FORMATS[self.period])
+
+    def bounds(self, key: str) -> tuple:
+        """
+        Intervalle couvert par une période.
+
+        Returns:
+            tuple (start, end) en horodatages Unix, end exclu
+        """
+        start = datetime.strptime(key, self.PERIOD_FORMATS[self.period]).replace(tzinfo=timezone.utc)
+        if self.period == 'day':
+            end = datetime.fromtimestamp(start.timestamp() + 86400, timezone.utc)
+        elif start.month == 12:
+            end = start.replace(year=start.year + 1, month=1)
+        else:
+            end = start.replace(month=start.month + 1)
+        return start.timestamp(), end.timestamp()
+
+    def path_for(self, key: str) -> str:
+        """Chemin du fichier d'archive d'une période."""
+        return os.path.join(self.archive_dir, f"{self.FILE_PREFIX}{key}.db")
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Partitions présentes sur disque, de la plus ancienne à la plus récente.
+
+        Returns:
+            Liste de dicts {'key', 'path', 'start', 'end', 'size'}
+        """
+        if not os.path.isdir(self.archive_dir):
+            return []
+        partitions = []
+        for name in os.listdir(self.archive_dir):
+            match = self._key_pattern.match(name)
+            if not match:
+                continue
+            key = match.group(1)
+            path = os.path.join(self.archive_dir, name)
+            start, end = self.bounds(key)
+            partitions.append({'key': key, 'path': path, 'start': start, 'end': end,
+                               'size': os.path.getsize(path)})
+        partitions.sort(key=lambda partition: partition['start'])
+        return partitions
+
+    def covering(self, since: float, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Partitions ayant au moins une période commune avec [since, until[."""
+        return [p for p in self.list()
+                if p['end'] > since and (until is None or p['start'] < until)]
+
+    def drop_expired(self, cutoff: float) -> List[str]:
+        """
+        Supprime les partitions entièrement plus anciennes que cutoff.
+
+        Returns:
+            Clés des partitions supprimées
+        """
+        dropped = []
+        for partition in self.list():
+            if partition['end'] > cutoff:
+                continue
+            for suffix in ('', '-journal', '-wal', '-shm'):
+                if os.path.exists(partition['path'] + suffix):
+                    os.remove(partition['path'] + suffix)
+            dropped.append(partition['key'])
+            logger.info(f"Partition {partition['key']} supprimée ({partition['size'] / 1024 / 1024:.1f} Mo)")
+        return dropped
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enregistrements compacts des paquets et messages gardés en mémoire par TrafficMonitor.
+
+all_packets (5000 paquets) et public_messages (2000 messages) contenaient un dict
+par entrée (~25 clés, plus des dicts imbriqués pour la télémétrie et la position).
+Ces classes à __slots__ n'ont ni dict d'instance ni table de hachage : les champs
+sont des emplacements fixes. Les noms d'émetteurs, types de paquets et sources sont
+internés (une seule chaîne partagée par valeur), télémétrie et position sont
+stockées en tuples.
+
+L'accès reste celui d'un dict (record['from_id'], record.get('source'),
+'telemetry' in record, dict(record)) pour le code des rapports et la persistance.
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Tuple
+
+
+class _SlottedRecord(MutableMapping):
+    """
+    Base des enregistrements : champs connus en __slots__, interface de dict.
+
+    Comme pour un dict, un champ jamais affecté est absent (KeyError, get() -> défaut,
+    `in` -> False). Les clés hors FIELDS vont dans un dict annexe créé à la demande.
+    """
+
+    __slots__ = ('_extra',)
+
+    FIELDS: Tuple[str, ...] = ()
+    _field_set = frozenset()
+    # Champs texte très répétés : chaîne internée
+    INTERNED = frozenset()
+    # Dicts imbriqués à clés fixes, stockés en tuple
+    NESTED: Dict[str, Tuple[str, ...]] = {}
+
+    def __init__(self, data=None, **kwargs):
+        self._extra = None
+        if data:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            keys = self.NESTED.get(key)
+            if keys is not None and type(value) is tuple:
+                return dict(zip(keys, value))
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._field_set:
+            if key in self.INTERNED and type(value) is str:
+                value = sys.intern(value)
+            else:
+                keys = self.NESTED.get(key)
+                if keys is not None and isinstance(value, dict) and value.keys() <= set(keys):
+                    value = tuple(value.get(name) for name in keys)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        if key in self._field_set:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copie en dict (sérialisation JSON, modification sans effet sur l'enregistrement)."""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class PacketRecord(_SlottedRecord):
+    """Paquet de TrafficMonitor.all_packets (mêmes clés que le dict construit par add_packet)."""
+
+    FIELDS = (
+        'id', 'timestamp', 'from_id', 'to_id', 'source', 'sender_name', 'packet_type', 'message',
+        'rssi', 'snr', 'hops', 'hop_limit', 'hop_start', 'size', 'is_broadcast', 'is_encrypted',
+        'channel', 'via_mqtt', 'want_ack', 'want_response', 'priority', 'family', 'public_key',
+        'telemetry', 'position', 'payload_bytes', 'airtime_ms'
+    )
+    __slots__ = FIELDS
+    _field_set = frozenset(FIELDS)
+    INTERNED = frozenset(('source', 'sender_name', 'packet_type', 'family', 'public_key'))
+    NESTED = {
+        'telemetry': ('battery', 'voltage', 'channel_util', 'air_util'),
+        'position': ('latitude', 'longitude', 'altitude'),
+    }
+
+    def __init__(self, data=None, **kwargs):
+        if data:
+            # Paquets relus de SQLite : identifiants numériques redondants avec from_id/to_id
+            data = {key: value for key, value in data.items() if key not in ('from_num', 'to_num')}
+        super().__init__(data, **kwargs)
+
+
+class MessageRecord(_SlottedRecord):
+    """Message de TrafficMonitor.public_messages (mêmes clés que add_public_message)."""
+
+    FIELDS = ('id', 'timestamp', 'from_id', 'sender_name', 'message', 'rssi', 'snr',
+              'message_length', 'source')
+    __slots__ = FIELDS
+    _field_set = frozenset(FIELDS)
+    INTERNED = frozenset(('sender_name', 'source'))
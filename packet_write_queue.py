@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File d'écriture différée (write-behind) pour les paquets SQLite.
+
+Les paquets sont placés dans une file bornée en mémoire puis écrits par un
+thread dédié, par lots (executemany dans une seule transaction), tous les
+N paquets ou toutes les M millisecondes. Le thread de réception Meshtastic
+ne paie donc plus un commit (fsync sur la carte SD) par paquet.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils import debug_print, info_print, error_print
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PacketWriteQueue:
+    """
+    File bornée de paquets à persister, vidée par un thread écrivain.
+
+    Chaque entrée est un tuple (table, packet). Le callback de vidage reçoit
+    la liste des entrées accumulées et doit les écrire en une transaction ;
+    il peut renvoyer le nombre d'entrées rejetées (comptées en échec). S'il
+    lève une exception, tout le lot est compté en échec.
+    Si la file est pleine, l'entrée la plus ancienne est abandonnée (et
+    comptée) pour ne jamais bloquer le thread de réception.
+    """
+
+    def __init__(
+        self,
+        flush_callback: Callable[[List[Tuple[str, Dict[str, Any]]]], Optional[int]],
+        max_size: int = 5000,
+        batch_size: int = 100,
+        flush_interval_ms: int = 500
+    ):
+        """
+        Initialise la file d'écriture différée.
+
+        Args:
+            flush_callback: Fonction écrivant un lot d'entrées (table, packet),
+                            renvoie le nombre d'entrées rejetées (None = 0)
+            max_size: Nombre maximum d'entrées en attente (au-delà: abandon)
+            batch_size: Vider dès que ce nombre d'entrées est atteint
+            flush_interval_ms: Vider au plus tard après ce délai (millisecondes)
+        """
+        self.flush_callback = flush_callback
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        # Compteurs pour statistiques
+        self.enqueued_rows = 0
+        self.written_rows = 0
+        self.dropped_rows = 0
+        self.failed_rows = 0
+        self.flush_count = 0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        """Démarre le thread écrivain."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop,
+            name="PacketWriteQueue",
+            daemon=True
+        )
+        self._thread.start()
+        debug_print(f"💾 Write-behind démarré: lot={self.batch_size}, intervalle={self.flush_interval * 1000:.0f}ms, max={self.max_size}")
+
+    def put(self, table: str, packet: Dict[str, Any]):
+        """
+        Ajoute un paquet à la file (non bloquant).
+
+        Args:
+            table: Table de destination ('packets' ou 'meshcore_packets')
+            packet: Dictionnaire du paquet
+        """
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                self._queue.popleft()
+                self.dropped_rows += 1
+                if self.dropped_rows % 100 == 1:
+                    error_print(f"⚠️ Write-behind saturé: {self.dropped_rows} paquets abandonnés")
+            self._queue.append((table, packet))
+            self.enqueued_rows += 1
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if depth >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """
+        Vide immédiatement la file (appelable depuis n'importe quel thread).
+
+        Returns:
+            int: Nombre d'entrées écrites
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                rejected = self.flush_callback(batch) or 0
+                self.written_rows += len(batch) - rejected
+                self.failed_rows += rejected
+            except Exception as e:
+                self.failed_rows += len(batch)
+                error_print(f"❌ Write-behind: échec écriture de {len(batch)} paquets: {e}")
+                return 0
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.flush_count += 1
+                self.last_flush_ms = elapsed_ms
+                self._total_flush_ms += elapsed_ms
+                if elapsed_ms > self.max_flush_ms:
+                    self.max_flush_ms = elapsed_ms
+
+            return len(batch) - rejected
+
+    def stop(self, flush: bool = True, timeout: float = 5.0):
+        """
+        Arrête le thread écrivain.
+
+        Args:
+            flush: Écrire les entrées restantes avant de rendre la main
+            timeout: Temps maximum d'attente du thread (secondes)
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        if flush:
+            written = self.flush()
+            if written:
+                info_print(f"💾 Write-behind: {written} paquets écrits à l'arrêt")
+
+    def depth(self) -> int:
+        """Nombre d'entrées en attente."""
+        with self._cond:
+            return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs de la file.
+
+        Returns:
+            dict: depth, max_depth, enqueued, written, dropped, failed,
+                  flushes, last/avg/max flush latency (ms)
+        """
+        return {
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued_rows,
+            'written': self.written_rows,
+            'dropped': self.dropped_rows,
+            'failed': self.failed_rows,
+            'flushes': self.flush_count,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'avg_flush_ms': round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0,
+            'max_flush_ms': round(self.max_flush_ms, 2)
+        }
+
+    def _writer_loop(self):
+        """Boucle du thread écrivain: vide par taille de lot ou par délai."""
+        while True:
+            with self._cond:
+                if self._running and len(self._queue) < self.batch_size:
+                    self._cond.wait(timeout=self.flush_interval)
+                running = self._running
+            try:
+                self.flush()
+            except Exception as e:
+                error_print(f"❌ Write-behind: erreur thread écrivain: {e}")
+            if not running:
+                break
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compteur de débit à fenêtre glissante par paquets de temps (secondes, minutes, heures).
+
+Chaque événement incrémente un seau dans trois anneaux de taille fixe :
+60 secondes, 60 minutes et 24 heures. Un seau est réutilisé dès que son
+créneau est dépassé, sans purge ni liste d'horodatages. Une requête ("paquets
+par minute sur les N dernières minutes, par type") lit au plus 60 seaux de
+l'anneau le plus fin couvrant la fenêtre : coût constant, quel que soit le
+nombre de paquets reçus.
+
+Les comptes sont ventilés par (source, packet_type).
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class _Ring:
+    """Anneau de `size` seaux de `width` secondes."""
+
+    __slots__ = ('width', 'size', 'stamps', 'buckets')
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        # Numéro de créneau (now // width) de chaque seau, -1 = vide
+        self.stamps = [-1] * size
+        self.buckets = [None] * size
+
+    @property
+    def span(self) -> int:
+        return self.width * self.size
+
+    def add(self, now: float, key: Tuple[str, str], count: int):
+        slot_id = int(now // self.width)
+        slot = slot_id % self.size
+        if self.stamps[slot] != slot_id:
+            self.stamps[slot] = slot_id
+            self.buckets[slot] = {}
+        bucket = self.buckets[slot]
+        bucket[key] = bucket.get(key, 0) + count
+
+    def buckets_in_window(self, now: float, window: float):
+        """Seaux des `window` dernières secondes (le seau courant est partiel)."""
+        current = int(now // self.width)
+        for slot_id in range(current, current - min(self.size, math.ceil(window / self.width)), -1):
+            slot = slot_id % self.size
+            if self.stamps[slot] == slot_id:
+                yield self.buckets[slot]
+
+    def covered(self, now: float, window: float) -> float:
+        """Durée réellement couverte par buckets_in_window (en secondes)."""
+        count = min(self.size, math.ceil(window / self.width))
+        return (count - 1) * self.width + (now - int(now // self.width) * self.width)
+
+
+class SlidingWindowCounter:
+    """
+    Compteur de paquets sur fenêtres glissantes, ventilé par source et type.
+
+    Alimenté par MeshBot.on_message (réception brute, santé de l'interface) et
+    TrafficMonitor.add_packet (trafic dédupliqué). Thread-safe : les interfaces
+    appellent depuis leurs propres threads.
+    """
+
+    RINGS = ((1, 60), (60, 60), (3600, 24))
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            clock: Horloge (murale par défaut : les seaux minute/heure suivent l'heure réelle)
+        """
+        self._clock = clock
+        self._rings = [_Ring(width, size) for width, size in self.RINGS]
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.started_at = clock()
+        self.total = 0
+
+    @property
+    def max_window(self) -> int:
+        """Plus longue fenêtre interrogeable (secondes)."""
+        return self._rings[-1].span
+
+    def add(self, source: str = 'unknown', packet_type: str = 'UNKNOWN', count: int = 1):
+        """Enregistre `count` paquets reçus maintenant."""
+        with self._lock:
+            now = self._clock()
+            key = (source, packet_type)
+            for ring in self._rings:
+                ring.add(now, key, count)
+            self._last_seen[source] = now
+            self.total += count
+
+    def _ring_for(self, window: float) -> _Ring:
+        """Anneau le plus fin couvrant la fenêtre (le plus long au-delà de 24h)."""
+        for ring in self._rings:
+            if window <= ring.span:
+                return ring
+        return self._rings[-1]
+
+    def _elapsed(self, window_seconds: float) -> float:
+        now = self._clock()
+        # Borné au démarrage, mais jamais moins d'une minute (pas de débit absurde au lancement)
+        uptime = max(now - self.started_at, 60)
+        return min(self._ring_for(window_seconds).covered(now, window_seconds), uptime)
+
+    def breakdown(self, window_seconds: float, by: str = 'packet_type',
+                  source: Optional[str] = None, packet_type: Optional[str] = None) -> Dict[str, int]:
+        """
+        Paquets des `window_seconds` dernières secondes, groupés par 'packet_type' ou 'source'.
+
+        Args:
+            window_seconds: Fenêtre (arrondie au seau de l'anneau choisi, max 24h)
+            by: Clé de regroupement ('packet_type' ou 'source')
+            source: Ne compter que cette source
+            packet_type: Ne compter que ce type
+
+        Returns:
+            dict {valeur: nombre de paquets}
+        """
+        if by not in ('packet_type', 'source'):
+            raise ValueError(f"Regroupement inconnu: {by}")
+        group_index = 1 if by == 'packet_type' else 0
+        counts = defaultdict(int)
+        with self._lock:
+            now = self._clock()
+            for bucket in self._ring_for(window_seconds).buckets_in_window(now, window_seconds):
+                for key, count in bucket.items():
+                    if (source is None or key[0] == source) and (packet_type is None or key[1] == packet_type):
+                        counts[key[group_index]] += count
+        return dict(counts)
+
+    def count(self, window_seconds: float, source: Optional[str] = None,
+              packet_type: Optional[str] = None) -> int:
+        """Nombre de paquets des `window_seconds` dernières secondes."""
+        return sum(self.breakdown(window_seconds, source=source, packet_type=packet_type).values())
+
+    def rate(self, window_seconds: float, source: Optional[str] = None,
+             packet_type: Optional[str] = None) -> float:
+        """
+        Débit en paquets/minute sur la fenêtre.
+
+        Le diviseur est la durée couverte par les seaux lus, bornée au démarrage
+        du compteur (pas de débit sous-estimé dans les premières minutes).
+        """
+        count = self.count(window_seconds, source=source, packet_type=packet_type)
+        elapsed = self._elapsed(window_seconds)
+        return count * 60 / elapsed if elapsed > 0 else 0.0
+
+    def rates_by_type(self, window_seconds: float, source: Optional[str] = None) -> Dict[str, float]:
+        """Débit (paquets/minute) de chaque type de paquet sur la fenêtre."""
+        counts = self.breakdown(window_seconds, source=source)
+        elapsed = self._elapsed(window_seconds)
+        return {ptype: count * 60 / elapsed if elapsed > 0 else 0.0 for ptype, count in counts.items()}
+
+    def last_seen(self, source: Optional[str] = None) -> Optional[float]:
+        """Horodatage du dernier paquet (de cette source), None si aucun."""
+        with self._lock:
+            if source is not None:
+                return self._last_seen.get(source)
+            return max(self._last_seen.values(), default=None)
+
+    def clear(self):
+        with self._lock:
+            self._rings = [_Ring(width, size) for width, size in self.RINGS]
+            self._last_seen.clear()
+            self.started_at = self._clock()
+            self.total = 0
@@ -8,6 +8,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from telegram_bot.command_base import TelegramCommandBase
 from utils import info_print, error_print
+from handlers.command_handlers.unified_stats import AIRTIME_SORT_KEYWORDS
 import asyncio
 import time
 from datetime import datetime
@@ -128,15 +129,20 @@ class StatsCommands(TelegramCommandBase):
     async def top_command(self, update: Update,
                            context: ContextTypes.DEFAULT_TYPE):
         """
-        Commande /top [heures] [nombre]
+        Commande /top [air] [heures] [nombre]
         Version améliorée avec tous les types de paquets
+        ('air' : classement par temps d'antenne consommé)
         """
         user = update.effective_user
         # Parser les arguments
         hours = 24
         top_n = 10
+        sort_by = 'packets'
 
         args = context.args
+        if args and any(arg.lower() in AIRTIME_SORT_KEYWORDS for arg in args):
+            sort_by = 'airtime'
+            args = [arg for arg in args if arg.lower() not in AIRTIME_SORT_KEYWORDS]
         if args and len(args) > 0:
             try:
                 hours = int(args[0])
@@ -159,7 +165,8 @@ class StatsCommands(TelegramCommandBase):
         # Utiliser la logique métier partagée (business_stats, pas stats_commands)
         def get_detailed_stats():
             # Rapport détaillé avec types de paquets
-            report = self.telegram.business_stats.get_top_talkers(hours, top_n, include_packet_types=True)
+            report = self.telegram.business_stats.get_top_talkers(hours, top_n, include_packet_types=True,
+                                                                  sort_by=sort_by)
 
             # Ajouter le résumé des types de paquets
             packet_summary = self.telegram.business_stats.get_packet_type_summary(hours)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de l'export colonnaire incrémental (Parquet / Arrow IPC) de l'historique du trafic
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import json
+import time
+
+from traffic_persistence import TrafficPersistence
+from export_traffic_columnar import ColumnarExporter, PYARROW_AVAILABLE
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+
+DAY = 86400
+
+
+def _packet(timestamp, packet_type='TELEMETRY_APP', **extra):
+    packet = {'timestamp': timestamp, 'from_id': 0x1001, 'to_id': 0xFFFFFFFF, 'source': 'local',
+              'packet_type': packet_type, 'size': 20}
+    packet.update(extra)
+    return packet
+
+
+@unittest.skipIf(not PYARROW_AVAILABLE, "pyarrow not available")
+class TestColumnarExport(unittest.TestCase):
+    """Colonnes JSON aplaties, filigrane incrémental, partitions d'archive"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+        self.output = os.path.join(self.tmpdir, 'exports')
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _read(self, table, file_format='parquet'):
+        return ds.dataset(os.path.join(self.output, table), format=file_format).to_table()
+
+    def _export(self, tables, file_format='parquet', **kwargs):
+        exporter = ColumnarExporter(self.db_path, self.output, file_format, chunk_size=2)
+        try:
+            return {result['table']: result for result in exporter.export(tables, **kwargs)}
+        finally:
+            exporter.close()
+
+    def test_packets_flattened_and_incremental(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet(_packet(self.now - 120, telemetry={'battery': 87, 'voltage': 4.1}))
+            persistence.save_packet(_packet(self.now - 60, 'POSITION_APP',
+                                            position={'latitude': 45.5, 'longitude': 5.9}))
+            persistence.save_packet(_packet(self.now - 30, 'TEXT_MESSAGE_APP', message='salut'))
+
+            results = self._export(['packets'])
+            self.assertEqual(results['packets']['rows'], 3)
+            table = self._read('packets')
+            self.assertNotIn('telemetry', table.column_names)
+            self.assertEqual(table.schema.field('battery').type, pa.int64())
+            self.assertEqual(table.column('battery').to_pylist(), [87, None, None])
+            self.assertEqual(table.column('latitude').to_pylist(), [None, 45.5, None])
+
+            # Second passage : seules les nouvelles lignes
+            self.assertEqual(self._export(['packets'])['packets']['rows'], 0)
+            persistence.save_packet(_packet(self.now, telemetry={'battery': 80}))
+            self.assertEqual(self._export(['packets'])['packets']['rows'], 1)
+            self.assertEqual(self._read('packets').num_rows, 4)
+
+            with open(os.path.join(self.output, ColumnarExporter.STATE_FILE)) as f:
+                self.assertEqual(json.load(f)['packets']['watermark'], 4)
+            self.assertEqual(self._export(['packets'], full=True)['packets']['rows'], 4)
+        finally:
+            persistence.close()
+
+    def test_node_stats_maps_and_arrow_format(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_node_stats({'!00000001': {
+                'total_packets': 5, 'total_bytes': 200,
+                'by_type': {'TEXT_MESSAGE_APP': 3, 'POSITION_APP': 2},
+                'hourly_activity': {'14': 5},
+                'message_stats': {'count': 3, 'total_chars': 30, 'avg_length': 10.0},
+                'telemetry_stats': {'count': 0}, 'position_stats': {'count': 2, 'last_lat': 45.1},
+                'routing_stats': {'count': 0},
+            }})
+
+            results = self._export(['node_stats'], file_format='arrow')
+            self.assertTrue(results['node_stats']['path'].endswith('.arrow'))
+            row = self._read('node_stats', 'arrow').to_pylist()[0]
+            self.assertEqual(dict(row['packet_types']), {'TEXT_MESSAGE_APP': 3, 'POSITION_APP': 2})
+            self.assertEqual(row['message_count'], 3)
+            self.assertEqual(row['position_last_latitude'], 45.1)
+        finally:
+            persistence.close()
+
+    def test_archived_packets_exported_once(self):
+        """Partitions comprises, sans doublon ni perte, quel que soit l'ordre des identifiants"""
+        persistence = TrafficPersistence(self.db_path, partition_period='day', hot_hours=24,
+                                         archive_dir=os.path.join(self.tmpdir, 'archives'))
+        try:
+            # Plus récent inséré en premier : la base principale garde les petits identifiants
+            persistence.save_packet(_packet(self.now - 60))
+            persistence.save_packet(_packet(self.now - 2 * DAY))
+            persistence.save_packet(_packet(self.now - 3 * DAY))
+            persistence.roll_partitions()
+            self.assertEqual(persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0], 1)
+
+            self.assertEqual(self._export(['packets'])['packets']['rows'], 3)
+            self.assertEqual(sorted(self._read('packets').column('id').to_pylist()), [1, 2, 3])
+
+            persistence.save_packet(_packet(self.now))
+            self.assertEqual(self._export(['packets'])['packets']['rows'], 1)
+            self.assertEqual(self._read('packets').num_rows, 4)
+        finally:
+            persistence.close()
+
+    def test_unknown_table_rejected(self):
+        TrafficPersistence(self.db_path).close()
+        with self.assertRaises(ValueError):
+            self._export(['public_messages'])
+        with self.assertRaises(ValueError):
+            ColumnarExporter(self.db_path, self.output, 'csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
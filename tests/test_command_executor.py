@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de l'exécuteur de commandes (FIFO par émetteur, plafonds par classe, délais)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from command_executor import CommandExecutor, command_class, command_name
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestCommandExecutor(unittest.TestCase):
+    """Ordre par émetteur, concurrence par classe, expiration, mesures"""
+
+    def setUp(self):
+        self.executor = None
+
+    def tearDown(self):
+        if self.executor:
+            self.executor.stop(timeout=2)
+
+    def test_classification(self):
+        self.assertEqual(command_name('/BOT bonjour'), '/bot')
+        self.assertEqual(command_name('Tigro: /echo test'), '/echo')
+        self.assertEqual(command_name('salut'), '')
+        self.assertEqual(command_class('/ia question'), 'llm')
+        self.assertEqual(command_class('/weather paris'), 'network')
+        self.assertEqual(command_class('/stats top'), 'db')
+        self.assertEqual(command_class('/help'), 'cheap')
+        self.assertEqual(command_class('bonjour'), 'cheap')
+
+    def test_per_sender_fifo_and_parallel_senders(self):
+        self.executor = CommandExecutor(workers=4)
+        self.executor.start()
+        done = []
+        lock = threading.Lock()
+
+        def command(sender, seq):
+            time.sleep(0.01 if seq == 0 else 0.001)
+            with lock:
+                done.append((sender, seq))
+
+        start = time.time()
+        for seq in range(5):
+            for sender in (1, 2, 3):
+                self.assertTrue(self.executor.submit(sender, '/help', command, sender, seq))
+        self.assertTrue(wait_for(lambda: len(done) == 15))
+        for sender in (1, 2, 3):
+            self.assertEqual([seq for s, seq in done if s == sender], list(range(5)))
+        # Trois émetteurs en parallèle : bien moins que 3 × la somme des durées
+        self.assertLess(time.time() - start, 0.3)
+        stats = self.executor.get_stats()['commands']['/help']
+        self.assertEqual(stats['count'], 15)
+        self.assertGreaterEqual(stats['max_exec_ms'], 10)
+
+    def test_class_limit_keeps_cheap_commands_flowing(self):
+        self.executor = CommandExecutor(workers=3, class_limits={'llm': 1})
+        self.executor.start()
+        release = threading.Event()
+        active = []
+        peak = []
+        answered = []
+
+        def llm(sender):
+            active.append(sender)
+            peak.append(len(active))
+            release.wait(5)
+            active.remove(sender)
+
+        for sender in (1, 2, 3):
+            self.executor.submit(sender, '/bot question', llm, sender)
+        self.executor.submit(4, '/help', answered.append, 4)
+
+        # Un seul appel LLM à la fois, /help servi pendant ce temps
+        self.assertTrue(wait_for(lambda: answered == [4]))
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(self.executor.get_stats()['running'], {'llm': 1})
+        release.set()
+        self.assertTrue(wait_for(lambda: len(peak) == 3))
+        self.assertEqual(max(peak), 1)
+
+    def test_timeout_unblocks_sender_and_rejects_when_full(self):
+        self.executor = CommandExecutor(workers=1, timeouts={'network': 1}, max_pending_per_sender=2)
+        self.executor.start()
+        release = threading.Event()
+        answered = []
+
+        self.executor.submit(1, '/weather', release.wait, 10)
+        self.assertTrue(wait_for(lambda: self.executor.get_stats()['running'] == {'network': 1}))
+        self.assertTrue(self.executor.submit(1, '/help', answered.append, 'a'))
+        self.assertTrue(self.executor.submit(1, '/help', answered.append, 'b'))
+        self.assertFalse(self.executor.submit(1, '/help', answered.append, 'c'))
+
+        # Après le délai : émetteur débloqué et worker remplacé
+        self.assertTrue(wait_for(lambda: answered == ['a', 'b'], timeout=4))
+        stats = self.executor.get_stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['rejected'], 1)
+        release.set()
+        self.assertTrue(wait_for(lambda: self.executor.get_stats()['running'] == {}))
+        self.assertEqual(self.executor.get_stats()['commands']['/weather']['timeouts'], 1)
+        self.assertIsNotNone(self.executor.format_stats())
+
+
+class TestMessageHandlerRouting(unittest.TestCase):
+    """Seules les /commandes passent par l'exécuteur : le reste du chat est traité en ligne"""
+
+    def test_chat_bypasses_executor(self):
+        # Le package handlers (MessageRouter) dépend de meshtastic : remplacé par un Mock
+        with patch.dict(sys.modules, {'handlers': Mock()}):
+            sys.modules.pop('message_handler', None)
+            from message_handler import MessageHandler
+            handler = MessageHandler(*[None] * 6)
+        sys.modules.pop('message_handler', None)
+        release = threading.Event()
+        routed = []
+        handler.router.process_text_message.side_effect = \
+            lambda packet, decoded, message: release.wait(5) if message == '/bot long' else routed.append(message)
+        executor = handler.start_command_executor(workers=1, max_pending_per_sender=1)
+        try:
+            handler.process_text_message({'from': 1}, {}, '/bot long')
+            self.assertTrue(wait_for(lambda: executor.get_stats()['running'] == {'llm': 1}))
+            for i in range(5):
+                handler.process_text_message({'from': 1}, {}, f"salut {i}")
+            self.assertEqual(routed, [f"salut {i}" for i in range(5)])
+            self.assertEqual(executor.get_stats()['rejected'], 0)
+        finally:
+            release.set()
+            handler.stop_command_executor(timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du pipeline d'ingestion par étages (ordre par émetteur, débordement, arrêt)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import threading
+import time
+import tempfile
+import shutil
+from unittest.mock import Mock, patch
+
+from ingest_pipeline import IngestPipeline, PipelineStage
+from traffic_persistence import TrafficPersistence
+from traffic_monitor import TrafficMonitor
+
+
+class TestIngestPipeline(unittest.TestCase):
+    """Étages chaînés, ordre préservé, files bornées, mesures"""
+
+    def test_per_sender_order_across_stages(self):
+        pipeline = IngestPipeline()
+        seen = {'stats': [], 'commands': []}
+        lock = threading.Lock()
+
+        def enrich(sender, seq):
+            pipeline.submit('stats', sender, sender, seq)
+            pipeline.submit('commands', sender, sender, seq)
+
+        def record(stage):
+            def handler(sender, seq):
+                # Traitements de durées variables entre workers
+                time.sleep(0.0005 * (sender % 3))
+                with lock:
+                    seen[stage].append((sender, seq))
+            return handler
+
+        pipeline.add_stage('enrich', enrich)
+        pipeline.add_stage('stats', record('stats'), workers=3)
+        pipeline.add_stage('commands', record('commands'), workers=2)
+        pipeline.start()
+        for seq in range(50):
+            for sender in range(6):
+                pipeline.submit('enrich', sender, sender, seq)
+        pipeline.stop(drain=True, timeout=10)
+
+        for stage, entries in seen.items():
+            self.assertEqual(len(entries), 300, stage)
+            for sender in range(6):
+                self.assertEqual([seq for s, seq in entries if s == sender], list(range(50)))
+        stats = pipeline.get_stats()
+        self.assertEqual(stats['stats']['processed'], 300)
+        self.assertEqual(stats['enrich']['dropped'], 0)
+        self.assertIn('avg_wait_ms', stats['commands'])
+        self.assertIsNotNone(pipeline.format_stats())
+
+    def test_overflow_policies(self):
+        release = threading.Event()
+        handled = []
+
+        def slow(value):
+            release.wait(5)
+            handled.append(value)
+
+        for policy, expected in (('drop_oldest', [0, 3, 4]), ('drop_newest', [0, 1, 2])):
+            release.clear()
+            handled.clear()
+            stage = PipelineStage('test', slow, max_size=2, overflow=policy)
+            stage.start()
+            stage.submit('k', 0)
+            # Attendre que le worker ait pris la première entrée
+            deadline = time.time() + 2
+            while stage.depth() and time.time() < deadline:
+                time.sleep(0.001)
+            results = [stage.submit('k', value) for value in (1, 2, 3, 4)]
+            release.set()
+            stage.stop(drain=True)
+            self.assertEqual(handled, expected, policy)
+            self.assertEqual(stage.dropped, 2)
+            self.assertEqual(results, [True] * 4 if policy == 'drop_oldest' else [True, True, False, False])
+
+        with self.assertRaises(ValueError):
+            PipelineStage('test', slow, overflow='spill')
+
+    def test_block_policy_and_handler_errors(self):
+        def handler(value):
+            if value == 'boom':
+                raise RuntimeError("boom")
+            time.sleep(0.01)
+
+        stage = PipelineStage('test', handler, max_size=1, overflow='block', block_timeout=2.0)
+        stage.start()
+        for value in ('a', 'boom', 'b', 'c'):
+            self.assertTrue(stage.submit('k', value))
+        stage.stop(drain=True)
+        stats = stage.get_stats()
+        self.assertEqual((stats['processed'], stats['failed'], stats['dropped']), (3, 1, 0))
+        self.assertGreater(stats['max_service_ms'], 5)
+
+        # Sans worker démarré : la file est pleine, submit() abandonne après le délai
+        idle = PipelineStage('idle', handler, max_size=1, overflow='block', block_timeout=0.05)
+        self.assertTrue(idle.submit('k', 'a'))
+        self.assertFalse(idle.submit('k', 'b'))
+        self.assertEqual(idle.dropped, 1)
+
+    def test_submit_counters_and_stop(self):
+        """Compteurs exacts avec des files remplies en parallèle ; submit() refusé après stop()"""
+        stage = PipelineStage('counters', lambda value: None, workers=4, max_size=100000)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            producers = [threading.Thread(target=lambda key=key: [stage.submit(key, i) for i in range(5000)])
+                         for key in range(4)]
+            for thread in producers:
+                thread.start()
+            for thread in producers:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(stage.get_stats()['enqueued'], 20000)
+
+        stage.start()
+        stage.stop(drain=True)
+        self.assertEqual(stage.get_stats()['processed'], 20000)
+        self.assertFalse(stage.submit(0, 'après arrêt'))
+        self.assertEqual((stage.depth(), stage.get_stats()['dropped']), (0, 1))
+
+
+class TestParallelStatsWorkers(unittest.TestCase):
+    """Deux workers 'stats' appellent TrafficMonitor.add_packet en parallèle"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, 'traffic.db')
+        node_manager = Mock()
+        node_manager.get_node_name.side_effect = lambda node_id: f"Node-{node_id:08x}"
+        with patch('traffic_monitor.TrafficPersistence',
+                   side_effect=lambda **kwargs: TrafficPersistence(db_path, **kwargs)):
+            self.monitor = TrafficMonitor(node_manager)
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+        self.monitor.persistence.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_global_totals(self):
+        pipeline = IngestPipeline()
+        pipeline.add_stage('stats', self.monitor.add_packet, workers=2, max_size=5000)
+        pipeline.start()
+        per_sender = 1000
+        for i in range(per_sender):
+            for sender, size in ((0xA, 8), (0xB, 20)):
+                packet = {'id': sender << 16 | i, 'from': sender, 'to': 0xFFFFFFFF,
+                          'snr': 5.0 if sender == 0xA else -5.0, 'encrypted': b'\x01' * size}
+                pipeline.submit('stats', sender, packet, 'local')
+        pipeline.stop(drain=True, timeout=30)
+
+        stats = self.monitor.global_packet_stats
+        self.assertEqual(pipeline.get_stats()['stats']['processed'], 2 * per_sender)
+        self.assertEqual(stats['total_packets'], 2 * per_sender)
+        self.assertEqual(sum(stats['by_type'].values()), 2 * per_sender)
+        self.assertEqual(stats['total_bytes'],
+                         sum(self.monitor.node_packet_stats[node]['total_bytes'] for node in (0xA, 0xB)))
+        self.assertAlmostEqual(self.monitor.network_stats['avg_snr'], 0.0, places=6)
+        self.assertEqual(self.monitor._dirty_node_stats, {0xA, 0xB})
+
+
+if __name__ == '__main__':
+    unittest.main()
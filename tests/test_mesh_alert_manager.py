@@ -30,12 +30,13 @@ class MockMessageSender:
     def __init__(self):
         self.sent_messages = []  # Liste des messages envoyés
         
-    def send_single(self, message, node_id, node_info):
+    def send_single(self, message, node_id, node_info, priority='dm'):
         """Simuler l'envoi d'un message"""
         self.sent_messages.append({
             'message': message,
             'node_id': node_id,
             'node_info': node_info,
+            'priority': priority,
             'timestamp': time.time()
         })
         print(f"✅ Mock envoi à 0x{node_id:08x}: {message[:50]}...")
@@ -86,6 +87,8 @@ def test_send_alert_basic():
     sent_ids = [msg['node_id'] for msg in sender.sent_messages]
     assert 0x16fad3dc in sent_ids
     assert 0x12345678 in sent_ids
+    # Les alertes passent devant les réponses en file d'envoi
+    assert all(msg['priority'] == 'alert' for msg in sender.sent_messages)
     
     print(f"✅ Alerte envoyée à {sent_count} nœuds")
 
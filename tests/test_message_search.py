@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la recherche plein texte des messages (index FTS5 tenu à jour par triggers)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+DAY = 86400
+
+
+def _packet(timestamp, message, packet_type='TEXT_MESSAGE_APP'):
+    return {'timestamp': timestamp, 'from_id': 0x1001, 'to_id': 0xFFFFFFFF, 'source': 'local',
+            'packet_type': packet_type, 'message': message, 'size': 10}
+
+
+class TestMessageSearch(unittest.TestCase):
+    """search_messages : index à l'insertion, à la rétention et dans les partitions"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _fts_integrity(self, persistence, table):
+        persistence.conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('integrity-check')")
+
+    def test_search_text_packets_and_public_messages(self):
+        """Mots préfixes, sans casse ni accents ; seuls les paquets texte sont indexés"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet(_packet(self.now - 60, "Le relais de l'Église est HS"))
+            persistence.save_packet(_packet(self.now - 30, "relais", packet_type='POSITION_APP'))
+            persistence.save_public_message({'timestamp': self.now, 'from_id': '4097', 'sender_name': 'Alice',
+                                             'message': 'Relais réparé !', 'source': 'local'})
+
+            results = persistence.search_messages('relai')
+            self.assertEqual([row['source_table'] for row in results], ['public_messages', 'packets'])
+            self.assertEqual(len(persistence.search_messages('eglise hs')), 1)
+            self.assertEqual(persistence.search_messages('relais', tables=['public_messages'])[0]['sender_name'],
+                             'Alice')
+            self.assertEqual(persistence.search_messages('"HS" OR (:'), [])
+            self.assertEqual(len(persistence.search_messages('relais', hours=1, limit=1)), 1)
+            with self.assertRaises(ValueError):
+                persistence.search_messages('relais', tables=['neighbors'])
+        finally:
+            persistence.close()
+
+    def test_retention_removes_from_index(self):
+        """Les lignes supprimées par le nettoyage sortent de l'index"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet(_packet(self.now - 3 * DAY, 'ancien message'))
+            persistence.save_packet(_packet(self.now - 60, 'message récent'))
+            persistence.cleanup_old_data(hours=48)
+
+            self.assertEqual([row['message'] for row in persistence.search_messages('message')], ['message récent'])
+            self._fts_integrity(persistence, 'packets')
+        finally:
+            persistence.close()
+
+    def test_existing_rows_indexed_by_migration(self):
+        """Une base en version 7 voit ses messages indexés au démarrage"""
+        TrafficPersistence(self.db_path).close()
+        conn = sqlite3.connect(self.db_path)
+        for table in TrafficPersistence.FTS_TABLES:
+            for suffix in ('insert', 'delete', 'update'):
+                conn.execute(f"DROP TRIGGER {table}_fts_{suffix}")
+            conn.execute(f"DROP TABLE {table}_fts")
+        conn.execute("INSERT INTO packets (timestamp, from_id, packet_type, message) VALUES (?, '1', 'TEXT_MESSAGE_APP', 'antenne')",
+                     (self.now,))
+        conn.execute("PRAGMA user_version = 7")
+        conn.commit()
+        conn.close()
+
+        # Lecture seule sur la base non migrée : repli sur LIKE
+        reader = TrafficPersistence(self.db_path, read_only=True)
+        try:
+            self.assertEqual(len(reader.search_messages('antenne')), 1)
+        finally:
+            reader.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(len(persistence.search_messages('ANTEN')), 1)
+            self._fts_integrity(persistence, 'packets')
+        finally:
+            persistence.close()
+
+    def test_archived_messages_searchable(self):
+        """Les messages déplacés dans une partition d'archive restent cherchables"""
+        persistence = TrafficPersistence(self.db_path, partition_period='day', hot_hours=24,
+                                         archive_dir=os.path.join(self.tmpdir, 'archives'))
+        try:
+            persistence.save_packet(_packet(self.now - 3 * DAY, 'balise du col'))
+            persistence.save_packet(_packet(self.now - 60, 'balise du lac'))
+            persistence.roll_partitions()
+
+            self.assertEqual(persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0], 1)
+            self.assertEqual([row['message'] for row in persistence.search_messages('balise')],
+                             ['balise du lac', 'balise du col'])
+            self.assertEqual(len(persistence.search_messages('balise', hours=24)), 1)
+            self._fts_integrity(persistence, 'packets')
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
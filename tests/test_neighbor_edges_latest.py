@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la table neighbor_edges_latest (dernière mesure de chaque liaison de voisinage)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+class TestNeighborEdgesLatest(unittest.TestCase):
+    """save_neighbor_info met à jour la dernière liaison, load_neighbors la lit par index"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.remove(self.db_path)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_latest_edge_upserted_history_kept(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_neighbor_info('!00000001', [{'node_id': 0x2, 'snr': 1.5}, {'node_id': '!00000003', 'snr': 4.0}])
+            persistence.save_neighbor_info('!00000001', [{'node_id': 0x2, 'snr': -3.0}], source='mqtt')
+
+            history = persistence.conn.execute("SELECT COUNT(*) FROM neighbors").fetchone()[0]
+            self.assertEqual(history, 3)
+
+            neighbors = persistence.load_neighbors(hours=1)
+            edges = {edge['node_id']: edge for edge in neighbors['!00000001']}
+            self.assertEqual(len(edges), 2)
+            self.assertEqual(edges['!00000002']['snr'], -3.0)
+            self.assertEqual(edges['!00000002']['source'], 'mqtt')
+            self.assertEqual(edges['!00000003']['snr'], 4.0)
+        finally:
+            persistence.close()
+
+    def test_load_neighbors_uses_timestamp_index(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            plan = ' '.join(row[-1] for row in persistence.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM neighbor_edges_latest WHERE timestamp >= ?", (0,)
+            ))
+            self.assertIn('idx_neighbor_edges_latest_timestamp', plan)
+        finally:
+            persistence.close()
+
+    def test_existing_history_backfilled(self):
+        """Une base en version 8 voit ses liaisons reconstruites depuis l'historique"""
+        TrafficPersistence(self.db_path).close()
+        now = time.time()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE neighbor_edges_latest")
+        conn.executemany('''
+            INSERT INTO neighbors (timestamp, node_id, neighbor_id, snr, source) VALUES (?, ?, ?, ?, ?)
+        ''', [(now - 600, '!00000001', '!00000002', 2.0, 'radio'),
+              (now - 60, '!00000001', '!00000002', 7.5, 'mqtt'),
+              (now - 300, '!00000004', '!00000001', -1.0, 'radio')])
+        conn.execute("PRAGMA user_version = 8")
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            neighbors = persistence.load_neighbors(hours=1)
+            self.assertEqual(neighbors['!00000001'][0]['snr'], 7.5)
+            self.assertEqual(neighbors['!00000001'][0]['source'], 'mqtt')
+            self.assertEqual(len(neighbors['!00000004']), 1)
+        finally:
+            persistence.close()
+
+    def test_retention_follows_neighbors(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_neighbor_info('!00000001', [{'node_id': 0x2, 'snr': 1.0}])
+            old = time.time() - 72 * 3600
+            persistence.conn.execute("UPDATE neighbors SET timestamp = ?", (old,))
+            persistence.conn.execute("UPDATE neighbor_edges_latest SET timestamp = ?", (old,))
+            persistence.conn.commit()
+
+            report = persistence.cleanup_old_data(hours=48)
+            self.assertEqual(report['deleted']['neighbor_edges_latest'], 1)
+            self.assertEqual(persistence.load_neighbors(hours=720), {})
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des identifiants de nœuds numériques (from_num / to_num) et de leur migration
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import json
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+class TestNodeNumMigration(unittest.TestCase):
+    """Tests de la colonne from_num et de la recherche de position"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_node_num_parsing(self):
+        """Les formats int, décimal, !hex et 0xhex sont normalisés"""
+        self.assertEqual(TrafficPersistence._node_num(305419896), 305419896)
+        self.assertEqual(TrafficPersistence._node_num('305419896'), 305419896)
+        self.assertEqual(TrafficPersistence._node_num('!12345678'), 0x12345678)
+        self.assertEqual(TrafficPersistence._node_num('0x12345678'), 0x12345678)
+        self.assertIsNone(TrafficPersistence._node_num('Unknown'))
+        self.assertIsNone(TrafficPersistence._node_num(None))
+
+    def test_in_place_migration_of_legacy_db(self):
+        """Une base historique (from_id TEXT mixte) est migrée en place"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE packets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                from_id TEXT NOT NULL,
+                to_id TEXT,
+                source TEXT,
+                sender_name TEXT,
+                packet_type TEXT NOT NULL,
+                message TEXT,
+                rssi INTEGER,
+                snr REAL,
+                hops INTEGER,
+                size INTEGER,
+                is_broadcast INTEGER,
+                telemetry TEXT,
+                position TEXT
+            )
+        ''')
+        position = json.dumps({'latitude': 47.1, 'longitude': 6.2, 'altitude': 500})
+        conn.executemany(
+            "INSERT INTO packets (timestamp, from_id, to_id, packet_type, position) VALUES (?, ?, ?, ?, ?)",
+            [
+                (time.time() - 60, '!12345678', '4294967295', 'POSITION_APP', position),
+                (time.time() - 30, '305419896', '!87654321', 'TEXT_MESSAGE_APP', None),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            rows = persistence.conn.execute("SELECT from_num, to_num FROM packets ORDER BY id").fetchall()
+            self.assertEqual([tuple(r) for r in rows], [(0x12345678, 0xFFFFFFFF), (0x12345678, 0x87654321)])
+
+            indexes = {row[0] for row in persistence.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='packets'")}
+            self.assertIn('idx_packets_from_num_ts', indexes)
+            self.assertIn('idx_packets_type_ts', indexes)
+
+            # Tous les formats d'ID trouvent la même position
+            for node_id in (0x12345678, '305419896', '!12345678'):
+                pos = persistence.get_node_position_from_db(node_id)
+                self.assertEqual(pos['latitude'], 47.1)
+        finally:
+            persistence.close()
+
+    def test_new_packets_get_node_num(self):
+        """Les nouveaux paquets reçoivent from_num/to_num à l'insertion"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet({
+                'timestamp': time.time(), 'from_id': 0xABCDEF01, 'to_id': 0x11111111,
+                'source': 'local', 'packet_type': 'TEXT_MESSAGE_APP', 'snr': 3.0
+            })
+            links = persistence.load_radio_links_with_positions(hours=1)
+            self.assertEqual(len(links), 1)
+            self.assertEqual((links[0]['from_num'], links[0]['to_num']), (0xABCDEF01, 0x11111111))
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
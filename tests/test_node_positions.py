@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la table node_positions (dernière position connue des nœuds)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+def _position_packet(from_id, lat, lon, timestamp):
+    return {
+        'timestamp': timestamp,
+        'from_id': from_id,
+        'to_id': 0xFFFFFFFF,
+        'source': 'local',
+        'packet_type': 'POSITION_APP',
+        'position': {'latitude': lat, 'longitude': lon, 'altitude': 420},
+    }
+
+
+class TestNodePositions(unittest.TestCase):
+    """Tests de maintenance et de lecture de node_positions"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_latest_position_wins(self):
+        """Une position plus ancienne (insérée en retard) n'écrase pas la plus récente"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_position_packet(0x100, 47.0, 6.0, now - 10))
+            persistence.save_packet(_position_packet(0x100, 46.0, 5.0, now - 100))
+            persistence.save_packet(_position_packet(0x100, 0, 0, now))  # position invalide ignorée
+
+            pos = persistence.get_node_position_from_db('!00000100')
+            self.assertEqual((pos['latitude'], pos['longitude'], pos['altitude']), (47.0, 6.0, 420))
+            self.assertEqual(set(persistence.load_node_positions()), {0x100})
+        finally:
+            persistence.close()
+
+    def test_backfill_from_existing_packets(self):
+        """La table est reconstruite depuis packets quand elle n'existe pas encore"""
+        persistence = TrafficPersistence(self.db_path)
+        now = time.time()
+        persistence.save_packet(_position_packet(0x200, 45.0, 4.0, now - 50))
+        persistence.save_packet(_position_packet(0x200, 45.5, 4.5, now - 5))
+        # Base antérieure à la migration v4 (node_positions)
+        persistence.conn.execute("DROP TABLE node_positions")
+        persistence.conn.execute("PRAGMA user_version = 3")
+        persistence.conn.commit()
+        persistence.close()
+
+        reopened = TrafficPersistence(self.db_path)
+        try:
+            pos = reopened.get_node_position_from_db(0x200)
+            self.assertEqual((pos['latitude'], pos['longitude']), (45.5, 4.5))
+        finally:
+            reopened.close()
+
+    def test_radio_links_join_positions(self):
+        """Les liaisons radio portent la position des deux extrémités"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_position_packet(0x1, 47.0, 6.0, now - 60))
+            persistence.save_packet(_position_packet(0x2, 47.1, 6.1, now - 60))
+            for offset in (30, 20):
+                persistence.save_packet({
+                    'timestamp': now - offset, 'from_id': 0x1, 'to_id': 0x2,
+                    'source': 'local', 'packet_type': 'ROUTING_APP', 'snr': 5.0
+                })
+            persistence.save_packet({
+                'timestamp': now - 10, 'from_id': 0x3, 'to_id': 0x1,
+                'source': 'local', 'packet_type': 'ROUTING_APP', 'snr': 1.0
+            })
+
+            links = persistence.load_radio_links_with_positions(hours=1)
+            self.assertEqual(len(links), 3)
+            by_pair = {(l['from_num'], l['to_num']): l for l in links}
+            self.assertEqual(by_pair[(0x1, 0x2)]['to_position']['latitude'], 47.1)
+            self.assertIsNone(by_pair[(0x3, 0x1)]['from_position'])
+
+            pairs = persistence.load_radio_links_with_positions(hours=1, distinct_pairs=True)
+            self.assertEqual(len(pairs), 2)
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
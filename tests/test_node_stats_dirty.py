@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la sauvegarde incrémentale de node_stats (seuls les nœuds modifiés sont écrits)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import time
+
+from traffic_persistence import TrafficPersistence
+from traffic_monitor import TrafficMonitor
+from node_manager import NodeManager
+
+
+def _entry(from_id, packet_type='TEXT_MESSAGE_APP'):
+    return {'packet_type': packet_type, 'timestamp': time.time(), 'size': 40,
+            'message': 'hello', 'hops': 0, 'from_id': from_id}
+
+
+class TestNodeStatsDirtyTracking(unittest.TestCase):
+    """save_statistics n'écrit que les nœuds modifiés, en un seul executemany"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir)  # Base par défaut de TrafficMonitor créée dans le répertoire temporaire
+        self.monitor = TrafficMonitor(NodeManager())
+        self.monitor.persistence.close()
+        self.persistence = TrafficPersistence(os.path.join(self.tmpdir, 'traffic.db'))
+        self.monitor.persistence = self.persistence
+
+    def tearDown(self):
+        self.persistence.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def _last_updated(self):
+        rows = self.persistence.conn.execute("SELECT node_id, last_updated FROM node_stats").fetchall()
+        return {row['node_id']: row['last_updated'] for row in rows}
+
+    def test_only_changed_nodes_are_written(self):
+        for node_id in ('!00000001', '!00000002', '!00000003'):
+            self.monitor._update_packet_statistics(node_id, 'n', _entry(node_id), {})
+        self.monitor.save_statistics()
+        self.assertEqual(self.persistence.get_node_stats_write_stats()['last_rows'], 3)
+        before = self._last_updated()
+
+        # Cycle sans trafic : aucune ligne réécrite
+        self.monitor.save_statistics()
+        self.assertEqual(self.persistence.get_node_stats_write_stats()['last_rows'], 0)
+
+        time.sleep(0.01)
+        self.monitor._update_packet_statistics('!00000002', 'n', _entry('!00000002'), {})
+        self.monitor.save_statistics()
+        after = self._last_updated()
+
+        stats = self.persistence.get_node_stats_write_stats()
+        self.assertEqual(stats['last_rows'], 1)
+        self.assertEqual(stats['cycles'], 3)
+        self.assertEqual(stats['total_rows'], 4)
+        self.assertEqual(after['!00000001'], before['!00000001'])
+        self.assertGreater(after['!00000002'], before['!00000002'])
+        self.assertEqual(self.persistence.load_node_stats()['!00000002']['total_packets'], 2)
+
+    def test_failed_save_keeps_nodes_dirty(self):
+        self.monitor._update_packet_statistics('!00000001', 'n', _entry('!00000001'), {})
+        self.persistence.conn.execute("DROP TABLE node_stats")
+        self.monitor.save_statistics()
+        self.assertIn('!00000001', self.monitor._dirty_node_stats)
+
+    def test_reset_clears_dirty_nodes(self):
+        self.monitor._update_packet_statistics('!00000001', 'n', _entry('!00000001'), {})
+        self.monitor.reset_statistics()
+        self.monitor.save_statistics()
+        self.assertEqual(self.persistence.get_node_stats_write_stats()['last_rows'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de l'ordonnanceur d'envoi (temps d'antenne, priorités, tour de rôle, duty-cycle)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importlib.util
+import unittest
+import time
+from unittest.mock import Mock, patch
+
+from lora_airtime import get_preset, text_airtime, time_on_air, ModemPreset
+from outbound_scheduler import OutboundScheduler, schedule_or_send
+
+# Charger message_sender seul (le paquet handlers importe meshtastic)
+_spec = importlib.util.spec_from_file_location(
+    'message_sender', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'handlers', 'message_sender.py'))
+_message_sender = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_message_sender)
+MessageSender = _message_sender.MessageSender
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLoraAirtime(unittest.TestCase):
+    """Formule Semtech et presets Meshtastic"""
+
+    def test_time_on_air(self):
+        # LONG_FAST (SF11, 250 kHz, 4/5) : 50 octets → 58 symboles de payload + 20.25 de préambule
+        self.assertAlmostEqual(time_on_air(50, 'LONG_FAST'), 78.25 * 2048 / 250000, places=6)
+        self.assertEqual(get_preset('long_fast'), ModemPreset(11, 250, 5, 16))
+        self.assertEqual(get_preset({'sf': 9, 'bw_khz': 125}), ModemPreset(9, 125.0, 5, 16))
+        with self.assertRaises(ValueError):
+            get_preset('TURBO_MAX')
+
+        short, long_text = 'ok', 'x' * 170
+        self.assertLess(text_airtime(short), text_airtime(long_text))
+        self.assertLess(text_airtime(long_text, 'SHORT_FAST'), text_airtime(long_text, 'LONG_FAST'))
+        self.assertLess(text_airtime(long_text, 'LONG_FAST'), text_airtime(long_text, 'LONG_SLOW'))
+        # Accents : longueur en octets UTF-8
+        self.assertEqual(text_airtime('é' * 40), text_airtime('e' * 80))
+
+
+class TestOutboundScheduler(unittest.TestCase):
+    """Ordre de service, espacement et budget, pilotés par poll() sur une horloge simulée"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sent = []
+
+    def drain(self, scheduler):
+        """Émet toute la file en avançant l'horloge simulée ; retourne les délais attendus."""
+        delays = []
+        while True:
+            item, delay = scheduler.poll()
+            if item:
+                scheduler.deliver(item)
+            elif delay is None:
+                return delays
+            else:
+                delays.append(delay)
+                self.clock.now += delay
+
+    def test_priorities_and_round_robin(self):
+        scheduler = OutboundScheduler(clock=self.clock)
+        for chunk in ('a1', 'a2', 'a3'):
+            scheduler.submit('dm', 0xA, chunk, self.sent.append, chunk)
+        scheduler.submit('broadcast', 0xFFFFFFFF, 'meteo', self.sent.append, 'meteo')
+        scheduler.submit('dm', 0xB, 'b1', self.sent.append, 'b1')
+        scheduler.submit('alert', 0xC, 'orage', self.sent.append, 'orage')
+        with self.assertRaises(ValueError):
+            scheduler.submit('urgent', 0xC, 'x', self.sent.append, 'x')
+
+        self.drain(scheduler)
+        # Alerte d'abord, DM entrelacés par destinataire, broadcast en dernier
+        self.assertEqual(self.sent, ['orage', 'a1', 'b1', 'a2', 'a3', 'meteo'])
+        stats = scheduler.get_stats()
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['priorities']['dm']['sent'], 4)
+        self.assertGreater(stats['priorities']['broadcast']['avg_wait_ms'],
+                           stats['priorities']['alert']['avg_wait_ms'])
+        self.assertIsNotNone(scheduler.format_stats())
+
+    def test_spacing_follows_airtime_and_duty_budget(self):
+        long_text = 'x' * 170
+        airtime = text_airtime(long_text)
+        scheduler = OutboundScheduler(spacing=2.0, min_gap=0.5, clock=self.clock)
+        scheduler.submit('dm', 1, long_text, self.sent.append, 1)
+        scheduler.submit('dm', 1, 'ok', self.sent.append, 2)
+        delays = self.drain(scheduler)
+        self.assertAlmostEqual(delays[0], 2.0 * airtime, places=6)
+
+        # Budget d'une seule émission longue par fenêtre de 60 s
+        scheduler = OutboundScheduler(duty_cycle=airtime * 1.01 / 60, duty_window=60, clock=self.clock)
+        start = self.clock.now
+        for seq in range(3):
+            scheduler.submit('broadcast', 0xFFFFFFFF, long_text, self.sent.append, seq)
+        self.drain(scheduler)
+        self.assertGreaterEqual(self.clock.now - start, 120)
+        self.assertLessEqual(scheduler.get_stats()['duty_used'], 1.0)
+
+    def test_busy_channel_backoff_spares_alerts(self):
+        util = {'value': 50.0}
+        scheduler = OutboundScheduler(min_gap=1.0, spacing=0.0, busy_threshold=25.0,
+                                      channel_util=lambda: util['value'], clock=self.clock)
+        scheduler.submit('dm', 1, 'a', self.sent.append, 'a')
+        scheduler.submit('dm', 1, 'b', self.sent.append, 'b')
+        self.assertEqual(self.drain(scheduler), [2.0])
+        self.assertEqual(scheduler.get_stats()['backoff'], 2.0)
+
+        scheduler.submit('alert', 2, 'c', self.sent.append, 'c')
+        self.assertEqual(self.drain(scheduler), [1.0])
+
+        # Canal saturé : recul plafonné
+        util['value'] = 100.0
+        self.clock.now += 60
+        self.assertEqual(scheduler.get_stats()['backoff'], 4.0)
+
+    def test_rejects_when_full_and_inline_without_worker(self):
+        scheduler = OutboundScheduler(max_pending=2, clock=self.clock)
+        self.assertTrue(scheduler.submit('dm', 1, 'a', self.sent.append, 'a'))
+        self.assertTrue(scheduler.submit('dm', 2, 'b', self.sent.append, 'b'))
+        self.assertFalse(scheduler.submit('dm', 3, 'c', self.sent.append, 'c'))
+        self.assertEqual(scheduler.get_stats()['priorities']['dm']['rejected'], 1)
+
+        # Ordonnanceur non démarré : envoi immédiat
+        self.assertTrue(schedule_or_send(scheduler, 'dm', 4, 'd', self.sent.append, 'd'))
+        self.assertTrue(schedule_or_send(None, 'dm', 4, 'e', self.sent.append, 'e'))
+        self.assertEqual(self.sent, ['d', 'e'])
+
+
+class TestMessageSenderScheduling(unittest.TestCase):
+    """send_chunks passe par l'ordonnanceur au lieu de dormir 2 s entre les morceaux"""
+
+    def setUp(self):
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler:
+            self.scheduler.stop(timeout=2)
+
+    # MAX_MESSAGE_SIZE vient de `from config import *` : fixé ici pour ne pas
+    # dépendre du config (réel ou simulé) présent dans sys.modules au chargement
+    @patch.object(_message_sender, 'MAX_MESSAGE_SIZE', 180, create=True)
+    def test_send_chunks_without_fixed_sleep(self):
+        interface = Mock(spec=['sendText'])
+        sender = MessageSender(interface, Mock())
+        self.scheduler = OutboundScheduler(preset='SHORT_TURBO', min_gap=0.01, spacing=1.0)
+        sender.outbound_scheduler = self.scheduler
+        self.scheduler.start()
+
+        start = time.time()
+        sender.send_chunks('mot ' * 120, 0x1234, 'Tigro')
+        self.assertLess(time.time() - start, 0.5)
+
+        deadline = time.time() + 5
+        while interface.sendText.call_count < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        chunks = [call.args[0] for call in interface.sendText.call_args_list]
+        self.assertEqual([chunk[:5] for chunk in chunks], ['(1/3)', '(2/3)', '(3/3)'])
+        self.assertTrue(all(call.kwargs['destinationId'] == 0x1234
+                            for call in interface.sendText.call_args_list))
+        self.assertEqual(self.scheduler.get_stats()['priorities']['dm']['sent'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
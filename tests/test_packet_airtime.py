@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du temps d'antenne des paquets reçus (calcul, agrégats, rattrapage, /stats top air)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import time
+from unittest.mock import Mock, patch
+
+from lora_airtime import (packet_airtime, packet_payload_bytes, estimate_payload_bytes, airtime_table,
+                          get_preset, preset_key, NOMINAL_PAYLOAD_BYTES)
+from traffic_persistence import TrafficPersistence
+from traffic_monitor import TrafficMonitor
+
+
+HOUR = 3600
+
+
+def _packet(timestamp, from_id, packet_type, **fields):
+    return dict({'timestamp': timestamp, 'from_id': from_id, 'to_id': 0xFFFFFFFF, 'source': 'local',
+                 'packet_type': packet_type, 'size': 100}, **fields)
+
+
+class TestPayloadSize(unittest.TestCase):
+    """Taille réelle du paquet reçu, estimation pour l'historique, table par taille"""
+
+    def test_payload_bytes(self):
+        self.assertEqual(packet_payload_bytes({'encrypted': b'\x00' * 37}), 37)
+        self.assertEqual(packet_payload_bytes({'encrypted': 'AAECAwQ='}), 5)
+        self.assertEqual(packet_payload_bytes({'decoded': {'portnum': 'TEXT_MESSAGE_APP', 'payload': b'salut'}}), 11)
+        self.assertIsNone(packet_payload_bytes({'decoded': {'portnum': 'POSITION_APP'}}))
+
+        self.assertEqual(estimate_payload_bytes('TEXT_MESSAGE_APP', 'é' * 10), 26)
+        self.assertEqual(estimate_payload_bytes('POSITION_APP'), NOMINAL_PAYLOAD_BYTES['POSITION_APP'])
+
+        table = airtime_table('MEDIUM_FAST')
+        self.assertAlmostEqual(table[50], packet_airtime(50, 'MEDIUM_FAST') * 1000)
+        self.assertEqual(preset_key('long_fast'), 'LONG_FAST')
+        self.assertEqual(get_preset(preset_key({'sf': 10, 'bw_khz': 500})), get_preset({'sf': 10, 'bw_khz': 500}))
+
+
+class TestAirtimePersistence(unittest.TestCase):
+    """Temps d'antenne enregistré par paquet, cumulé par heure, rattrapé sur l'historique"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+        self.hour = int(time.time() // HOUR) * HOUR - 2 * HOUR
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_airtime_at_ingest(self):
+        persistence = TrafficPersistence(self.db_path, airtime_preset='LONG_FAST')
+        try:
+            table = airtime_table('LONG_FAST')
+            persistence.save_packet(_packet(self.hour, 0x1001, 'TEXT_MESSAGE_APP', message='x' * 94))
+            persistence.save_packet(_packet(self.hour + 60, 0x1001, 'POSITION_APP', payload_bytes=20, airtime_ms=500.0))
+
+            rows = persistence.conn.execute("SELECT payload_bytes, airtime_ms FROM packets ORDER BY timestamp").fetchall()
+            self.assertEqual([tuple(row) for row in rows], [(100, table[100]), (20, 500.0)])
+            rollups = {row['packet_type']: row['airtime_ms'] for row in persistence.load_packet_rollups(hours=3)}
+            self.assertEqual(rollups, {'TEXT_MESSAGE_APP': table[100], 'POSITION_APP': 500.0})
+        finally:
+            persistence.close()
+
+    def test_history_backfilled_and_recomputed(self):
+        """Base v10 : temps d'antenne calculé à la migration, recalculé si le preset change"""
+        persistence = TrafficPersistence(self.db_path)
+        for i in range(5):
+            persistence.save_packet(_packet(self.hour + i, 0x1001, 'TEXT_MESSAGE_APP', message='bonjour'))
+        persistence.save_packet(_packet(self.hour - 10 * HOUR, 0x1002, 'TELEMETRY_APP'))
+        persistence.close()
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE packets SET payload_bytes = NULL, airtime_ms = NULL")
+        conn.execute("UPDATE packet_rollups_hourly SET airtime_ms = 0")
+        # Paquets de la télémétrie purgés : l'agrégat horaire reste seul
+        conn.execute("DELETE FROM packets WHERE packet_type = 'TELEMETRY_APP'")
+        conn.execute("DELETE FROM db_maintenance WHERE key = 'airtime_preset'")
+        conn.execute("PRAGMA user_version = 10")
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path, airtime_preset='MEDIUM_FAST')
+        try:
+            table = airtime_table('MEDIUM_FAST')
+            text_ms = table[estimate_payload_bytes('TEXT_MESSAGE_APP', 'bonjour')]
+            values = {row[0] for row in persistence.conn.execute("SELECT airtime_ms FROM packets")}
+            self.assertEqual(values, {text_ms})
+            rollups = dict(persistence.conn.execute(
+                "SELECT packet_type, airtime_ms FROM packet_rollups_hourly").fetchall())
+            self.assertAlmostEqual(rollups['TEXT_MESSAGE_APP'], 5 * text_ms)
+            self.assertAlmostEqual(rollups['TELEMETRY_APP'], table[NOMINAL_PAYLOAD_BYTES['TELEMETRY_APP']])
+        finally:
+            persistence.close()
+
+        # Sans preset explicite : celui enregistré dans la base, sans recalcul
+        persistence = TrafficPersistence(self.db_path)
+        self.assertEqual(persistence.airtime_preset, 'MEDIUM_FAST')
+        persistence.close()
+
+        persistence = TrafficPersistence(self.db_path, airtime_preset='LONG_SLOW')
+        try:
+            slow_ms = airtime_table('LONG_SLOW')[estimate_payload_bytes('TEXT_MESSAGE_APP', 'bonjour')]
+            values = {row[0] for row in persistence.conn.execute("SELECT airtime_ms FROM packets")}
+            self.assertEqual(values, {slow_ms})
+            self.assertGreater(slow_ms, text_ms)
+        finally:
+            persistence.close()
+
+    def test_failed_backfill_not_retried(self):
+        """Échec du calcul de l'historique : enregistré, pas de nouvel essai au démarrage suivant"""
+        TrafficPersistence(self.db_path, airtime_preset='LONG_FAST').close()
+
+        error = sqlite3.OperationalError('near "FROM": syntax error')
+        with patch.object(TrafficPersistence, 'backfill_airtime', side_effect=error) as backfill:
+            persistence = TrafficPersistence(self.db_path, airtime_preset='MEDIUM_FAST')
+            row = persistence.conn.execute(
+                "SELECT value FROM db_maintenance WHERE key = 'airtime_backfill_error'").fetchone()
+            self.assertIn('syntax error', row[0])
+            persistence.close()
+
+            persistence = TrafficPersistence(self.db_path, airtime_preset='MEDIUM_FAST')
+            persistence.close()
+        self.assertEqual(backfill.call_count, 1)
+
+
+class TestTopByAirtime(unittest.TestCase):
+    """TrafficMonitor : taille réelle des paquets reçus et classement par temps d'antenne"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, 'traffic.db')
+        node_manager = Mock()
+        node_manager.get_node_name.side_effect = lambda node_id: f"Node-{node_id:08x}"
+        with patch('traffic_monitor.TrafficPersistence',
+                   side_effect=lambda **kwargs: TrafficPersistence(db_path, **kwargs)):
+            self.monitor = TrafficMonitor(node_manager)
+
+    def tearDown(self):
+        self.monitor.persistence.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_rank_by_airtime(self):
+        # Nœud A : beaucoup de petits paquets ; nœud B : peu de paquets pleine taille
+        for i in range(6):
+            self.monitor.add_packet({'id': 100 + i, 'from': 0xA, 'to': 0xFFFFFFFF, 'encrypted': b'\x01' * 8})
+        for i in range(3):
+            self.monitor.add_packet({'id': 200 + i, 'from': 0xB, 'to': 0xFFFFFFFF, 'encrypted': b'\x02' * 200})
+        self.monitor.persistence.flush_pending_writes()
+
+        table = self.monitor._airtime_ms
+        self.assertEqual(self.monitor.all_packets[-1]['payload_bytes'], 200)
+        self.assertAlmostEqual(self.monitor.node_packet_stats[0xB]['total_airtime_ms'], 3 * table[200])
+
+        by_packets = self.monitor.get_top_talkers_report(hours=1, top_n=2, include_packet_types=False)
+        by_airtime = self.monitor.get_top_talkers_report(hours=1, top_n=2, include_packet_types=False,
+                                                         sort_by='airtime')
+        self.assertLess(by_packets.index('Node-0000000a'), by_packets.index('Node-0000000b'))
+        self.assertLess(by_airtime.index('Node-0000000b'), by_airtime.index('Node-0000000a'))
+        self.assertIn("TEMPS D'ANTENNE", by_airtime)
+        self.assertIn("d'antenne", by_airtime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du service d'identité des paquets partagé entre transports (serial, TCP, MQTT, MeshCore)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+from unittest.mock import Mock, patch
+
+from traffic_persistence import TrafficPersistence
+from traffic_monitor import TrafficMonitor
+from packet_identity import PacketIdentityService, packet_key, transport_for_source, RADIO_TRANSPORTS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPacketIdentity(unittest.TestCase):
+    """Fenêtre par transport, portée par appelant, compteurs par couple de transports"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.identity = PacketIdentityService(clock=self.clock)
+
+    def test_window_per_transport(self):
+        key = packet_key(42, 0x1001)
+        self.assertEqual(key, packet_key(42, 0x1001, 0xFFFFFFFF))
+        self.assertIsNone(self.identity.observe(key, 'serial'))
+        self.clock.now += 4
+        self.assertEqual(self.identity.observe(key, 'tcp'), 'serial')
+        # Hors fenêtre serial (5 s) : nouveau paquet ; MQTT (20 s) le voit en doublon
+        self.clock.now += 10
+        self.assertIsNone(self.identity.observe(key, 'serial'))
+        self.clock.now += 5
+        self.assertEqual(self.identity.observe(key, 'mqtt'), 'tcp')
+
+        stats = self.identity.get_stats()
+        self.assertEqual(stats['unique'], {'serial': 2})
+        self.assertEqual(stats['duplicates'], {('serial', 'tcp'): 1, ('tcp', 'mqtt'): 1})
+        self.assertEqual(self.identity.format_stats().count('→'), 2)
+
+    def test_scope(self):
+        """Un paquet vu par MQTT reste du trafic radio ; MQTT ne filtre que ses gateways"""
+        key = packet_key(7, 0x2002)
+        self.assertFalse(self.identity.is_duplicate(key, 'mqtt', scope=()))
+        self.clock.now += 1
+        self.assertFalse(self.identity.is_duplicate(key, 'serial', scope=RADIO_TRANSPORTS))
+        self.assertTrue(self.identity.is_duplicate(key, transport_for_source('tigrog2'), scope=RADIO_TRANSPORTS))
+        self.clock.now += 10
+        # Deuxième gateway MQTT : doublon MQTT, même si serial l'a vu entre-temps
+        self.assertTrue(self.identity.is_duplicate(key, 'mqtt', scope=()))
+        self.assertEqual(self.identity.get_stats()['duplicates'],
+                         {('mqtt', 'serial'): 1, ('mqtt', 'tcp'): 1, ('mqtt', 'mqtt'): 1})
+
+    def test_expiry_from_head(self):
+        for i in range(100):
+            self.identity.observe(packet_key(i, 0x3003), 'mqtt' if i % 2 else 'serial')
+            self.clock.now += 0.1
+        self.assertEqual(len(self.identity), 100)
+        # Au-delà de la plus grande fenêtre (MQTT, 20 s) : tout est expiré
+        self.clock.now += 20
+        self.assertEqual(len(self.identity), 0)
+        self.assertIsNone(self.identity.observe(packet_key(1, 0x3003), 'mqtt'))
+
+    def test_configured_windows(self):
+        identity = PacketIdentityService(windows={'mqtt': 60}, clock=self.clock)
+        identity.observe(packet_key(9, 0x4004), 'mqtt')
+        self.clock.now += 30
+        self.assertTrue(identity.is_duplicate(packet_key(9, 0x4004), 'mqtt'))
+        self.assertEqual(identity.window('serial'), 5.0)
+
+
+class TestTrafficMonitorDedup(unittest.TestCase):
+    """TrafficMonitor.add_packet : doublons serial/TCP écartés, paquet déjà vu par MQTT conservé"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, 'traffic.db')
+        node_manager = Mock()
+        node_manager.get_node_name.side_effect = lambda node_id: f"Node-{node_id:08x}"
+        with patch('traffic_monitor.TrafficPersistence',
+                   side_effect=lambda **kwargs: TrafficPersistence(db_path, **kwargs)):
+            self.monitor = TrafficMonitor(node_manager)
+
+    def tearDown(self):
+        self.monitor.persistence.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_shared_identity(self):
+        identity = self.monitor.packet_identity
+        packet = {'id': 501, 'from': 0xA, 'to': 0xFFFFFFFF, 'encrypted': b'\x01' * 8}
+        self.monitor.add_packet(dict(packet), source='local')
+        self.monitor.add_packet(dict(packet), source='tcp')
+        # Reçu d'abord par une gateway MQTT (collecteur), puis par la radio
+        self.assertFalse(identity.is_duplicate(packet_key(502, 0xB), 'mqtt', scope=()))
+        self.monitor.add_packet(dict(packet, id=502, **{'from': 0xB}), source='local')
+
+        self.assertEqual([p['from_id'] for p in self.monitor.all_packets], [0xA, 0xB])
+        self.assertEqual(identity.get_stats()['duplicates'], {('serial', 'tcp'): 1, ('mqtt', 'serial'): 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
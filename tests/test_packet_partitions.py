@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des partitions d'archive des paquets
+(déplacement hors de la fenêtre chaude, requêtes transparentes, rétention par fichier)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import time
+from unittest.mock import patch
+
+from traffic_persistence import TrafficPersistence
+from packet_partitions import PacketPartitions
+
+
+DAY = 86400
+
+
+def _packet(timestamp, from_id=0x1001, to_id=0x2002):
+    return {'timestamp': timestamp, 'from_id': from_id, 'to_id': to_id, 'source': 'local',
+            'packet_type': 'TEXT_MESSAGE_APP', 'message': 'x', 'snr': 4.0, 'rssi': -90, 'size': 10}
+
+
+class TestPacketPartitions(unittest.TestCase):
+    """Partitions par jour : un fichier par période, attaché à la demande"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+        self.archive_dir = os.path.join(self.tmpdir, 'archives')
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _persistence(self, **kwargs):
+        return TrafficPersistence(self.db_path, partition_period='day', hot_hours=24,
+                                  archive_dir=self.archive_dir, **kwargs)
+
+    def _fill(self, persistence, days=5):
+        for day in range(days):
+            for i in range(10):
+                persistence.save_packet(_packet(self.now - day * DAY - 3600 - i * 60))
+
+    def test_period_bounds(self):
+        """Bornes UTC des périodes jour et mois"""
+        months = PacketPartitions(self.archive_dir, 'month')
+        start, end = months.bounds('202412')
+        self.assertEqual(months.key_for(start), '202412')
+        self.assertEqual(months.key_for(end), '202501')
+        self.assertEqual(months.key_for(end - 1), '202412')
+        with self.assertRaises(ValueError):
+            PacketPartitions(self.archive_dir, 'week')
+
+    def test_roll_and_transparent_queries(self):
+        """Les paquets anciens quittent la base principale mais restent lisibles"""
+        persistence = self._persistence()
+        try:
+            self._fill(persistence)
+            moved = persistence.roll_partitions()
+            self.assertEqual(sum(moved.values()), 40)
+            hot = persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+            self.assertEqual(hot, 10)
+            self.assertGreaterEqual(len(persistence.partitions.list()), 4)
+
+            packets = persistence.load_packets(hours=24 * 6, limit=1000)
+            self.assertEqual(len(packets), 50)
+            timestamps = [p['timestamp'] for p in packets]
+            self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+            self.assertEqual(len(persistence.load_packets(hours=24 * 6, limit=15)), 15)
+            self.assertEqual(len(persistence.load_packets(hours=12)), 10)
+
+            links = persistence.load_radio_links_with_positions(hours=24 * 6, distinct_pairs=True)
+            self.assertEqual(len(links), 1)
+            self.assertEqual(persistence.get_stats_summary()['total_packets'], 50)
+
+            # Déplacement idempotent : rien de plus à archiver
+            self.assertEqual(persistence.roll_partitions(), {})
+        finally:
+            persistence.close()
+
+    def test_rollups_partial_hour_in_archive(self):
+        """Heure partielle au-delà de la fenêtre chaude : agrégée depuis les partitions"""
+        persistence = self._persistence()
+        try:
+            persistence.save_packet(_packet(self.now - 30 * 3600 + 60))
+            persistence.save_packet(_packet(self.now - 600))
+            self.assertEqual(sum(persistence.roll_partitions().values()), 1)
+
+            rollups = persistence.load_packet_rollups(hours=30)
+            self.assertEqual(sum(rollup['packet_count'] for rollup in rollups), 2)
+            self.assertEqual(sum(rollup['packet_count'] for rollup in persistence.load_packet_rollups(hours=29)), 1)
+        finally:
+            persistence.close()
+
+    def test_more_partitions_than_attach_limit(self):
+        """Au-delà de la limite d'ATTACH, la requête est faite par groupes puis fusionnée"""
+        persistence = self._persistence()
+        try:
+            self._fill(persistence, days=6)
+            persistence.roll_partitions()
+            with patch.object(TrafficPersistence, 'MAX_ATTACHED_PARTITIONS', 2):
+                packets = persistence.load_packets(hours=24 * 7, limit=25)
+                self.assertEqual(len(packets), 25)
+                self.assertEqual(packets[0]['timestamp'], max(p['timestamp'] for p in packets))
+                links = persistence.load_radio_links_with_positions(hours=24 * 7, distinct_pairs=True)
+                self.assertEqual(len(links), 1)
+        finally:
+            persistence.close()
+
+    def test_retention_drops_whole_files(self):
+        """Le nettoyage archive puis supprime les partitions entièrement expirées"""
+        persistence = self._persistence()
+        try:
+            self._fill(persistence)
+            report = persistence.cleanup_old_data(hours=24 * 3)
+            self.assertEqual(sum(report['partitions_moved'].values()), 40)
+            self.assertTrue(report['partitions_dropped'])
+            remaining = persistence.partitions.list()
+            cutoff = self.now - 3 * DAY
+            self.assertTrue(all(p['end'] > cutoff for p in remaining))
+            self.assertEqual(report['deleted']['packets'], 0)
+        finally:
+            persistence.close()
+
+    def test_read_only_reopen_uses_saved_settings(self):
+        """Un exporteur en lecture seule lit les partitions enregistrées dans la base"""
+        persistence = self._persistence()
+        try:
+            self._fill(persistence, days=3)
+            persistence.roll_partitions()
+        finally:
+            persistence.close()
+
+        reader = TrafficPersistence(self.db_path, read_only=True)
+        try:
+            self.assertEqual(reader.partitions.period, 'day')
+            self.assertEqual(len(reader.load_packets(hours=24 * 4, limit=1000)), 30)
+            self.assertEqual(reader.roll_partitions(), {})
+        finally:
+            reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des enregistrements compacts PacketRecord / MessageRecord (accès de type dict)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import json
+
+from packet_records import PacketRecord, MessageRecord
+from traffic_persistence import TrafficPersistence
+
+
+class TestPacketRecords(unittest.TestCase):
+    """Mêmes lectures qu'un dict, champs texte internés, télémétrie en tuple"""
+
+    def test_dict_semantics(self):
+        record = PacketRecord({'timestamp': 10.0, 'from_id': 0x1001, 'packet_type': 'TEXT_MESSAGE_APP'})
+        self.assertEqual(record['from_id'], 0x1001)
+        self.assertEqual(record.get('source', 'unknown'), 'unknown')
+        self.assertNotIn('telemetry', record)
+        with self.assertRaises(KeyError):
+            record['hops']
+
+        record['custom'] = 1  # Clé hors champs connus
+        self.assertEqual(record.to_dict(), {'timestamp': 10.0, 'from_id': 0x1001,
+                                            'packet_type': 'TEXT_MESSAGE_APP', 'custom': 1})
+        self.assertEqual(len(record), 4)
+        self.assertFalse(hasattr(record, '__dict__'))
+        json.dumps(record.to_dict())
+
+    def test_interned_and_nested_fields(self):
+        first = PacketRecord(sender_name=''.join(['Relais', '-Col']), packet_type='TELEMETRY_APP',
+                             telemetry={'battery': 90, 'voltage': 4.1, 'channel_util': None, 'air_util': 2.0})
+        second = PacketRecord(sender_name=''.join(['Relais-', 'Col']))
+        self.assertIs(first['sender_name'], second['sender_name'])
+        self.assertEqual(first['telemetry']['battery'], 90)
+        self.assertIsInstance(first.telemetry, tuple)
+
+        # Dict imbriqué à clés inattendues : conservé tel quel
+        first['position'] = {'latitude': 45.0, 'longitude': 6.0, 'precision': 32}
+        self.assertEqual(first['position']['precision'], 32)
+
+        message = MessageRecord(timestamp=1.0, from_id=1, message='salut', source='local')
+        self.assertEqual(dict(message), {'timestamp': 1.0, 'from_id': 1, 'message': 'salut', 'source': 'local'})
+
+    def test_roundtrip_through_persistence(self):
+        """Un PacketRecord se sauvegarde et un paquet relu de SQLite redevient un PacketRecord"""
+        tmpdir = tempfile.mkdtemp()
+        persistence = TrafficPersistence(os.path.join(tmpdir, 'traffic.db'))
+        try:
+            persistence.save_packet(PacketRecord(
+                timestamp=1e9 * 1.8, from_id=0x1001, to_id=0xFFFFFFFF, source='local', packet_type='POSITION_APP',
+                size=30, is_broadcast=True, position={'latitude': 45.2, 'longitude': 5.7, 'altitude': 300}))
+            persistence.save_public_message(MessageRecord(timestamp=1e9 * 1.8, from_id=1, sender_name='A',
+                                                          message='x', message_length=1, source='local'))
+
+            record = PacketRecord(persistence.load_packets(hours=10 ** 6)[0])
+            self.assertNotIn('from_num', record)
+            self.assertEqual(record['position']['latitude'], 45.2)
+            self.assertIs(record['is_broadcast'], True)
+            self.assertEqual(persistence.load_public_messages(hours=10 ** 6)[0]['message'], 'x')
+        finally:
+            persistence.close()
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des agrégats horaires de paquets (packet_rollups_hourly)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import time
+from unittest.mock import patch
+
+from traffic_persistence import TrafficPersistence
+
+
+def _make_packet(from_id, packet_type, timestamp, **extra):
+    packet = {
+        'timestamp': timestamp,
+        'from_id': from_id,
+        'to_id': 0xFFFFFFFF,
+        'source': 'local',
+        'sender_name': f"Node{from_id}",
+        'packet_type': packet_type,
+        'snr': 4.0,
+        'hops': 1,
+        'size': 50,
+        'is_broadcast': True,
+    }
+    packet.update(extra)
+    return packet
+
+
+class TestPacketRollups(unittest.TestCase):
+    """Tests de maintenance et de lecture des agrégats horaires"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def _totals(self, rollups):
+        totals = {}
+        for rollup in rollups:
+            key = (rollup['from_id'], rollup['packet_type'])
+            totals[key] = totals.get(key, 0) + rollup['packet_count']
+        return totals
+
+    def test_rollups_match_raw_packets(self):
+        """Les agrégats donnent les mêmes comptes que les paquets bruts, au-delà de 10k paquets"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            packets = [
+                _make_packet(100 + (i % 3), 'POSITION_APP', now - (i % 160) * 3600 - 60)
+                for i in range(12000)
+            ]
+            cursor = persistence.conn.cursor()
+            persistence._insert_packets(cursor, 'packets', packets)
+            persistence.conn.commit()
+
+            rollups = persistence.load_packet_rollups(hours=168)
+            self.assertEqual(sum(r['packet_count'] for r in rollups), 12000)
+            self.assertEqual(sum(r['bytes_total'] for r in rollups), 12000 * 50)
+        finally:
+            persistence.close()
+
+    def test_partial_hour_is_exact(self):
+        """L'heure partielle en début de fenêtre est bornée exactement"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_make_packet(1, 'TEXT_MESSAGE_APP', now - 1800))
+            persistence.save_packet(_make_packet(1, 'TEXT_MESSAGE_APP', now - 5400))
+
+            self.assertEqual(self._totals(persistence.load_packet_rollups(hours=1)), {('1', 'TEXT_MESSAGE_APP'): 1})
+            self.assertEqual(self._totals(persistence.load_packet_rollups(hours=2)), {('1', 'TEXT_MESSAGE_APP'): 2})
+        finally:
+            persistence.close()
+
+    def test_failed_save_rolls_back(self):
+        """Un échec après l'INSERT du paquet annule tout : ni paquet sans agrégat, ni transaction ouverte"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            with patch.object(persistence, '_update_node_positions', side_effect=RuntimeError('disque plein')):
+                persistence.save_packet(_make_packet(1, 'POSITION_APP', now - 60))
+            self.assertFalse(persistence.conn.in_transaction)
+            persistence.conn.commit()
+            self.assertEqual(persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0], 0)
+            self.assertEqual(persistence.load_packet_rollups(hours=1), [])
+        finally:
+            persistence.close()
+
+    def test_telemetry_and_hop_aggregates(self):
+        """Les sommes channel_util/air_util, hops et hop_start sont cumulées"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_make_packet(7, 'TELEMETRY_APP', now - 10, hops=0, hop_start=3,
+                                                 telemetry={'channel_util': 10.0, 'air_util': 1.0}))
+            persistence.save_packet(_make_packet(7, 'TELEMETRY_APP', now - 5, hops=2, hop_start=7,
+                                                 telemetry={'channel_util': 20.0}))
+
+            rollups = persistence.load_packet_rollups(hours=1, packet_types=['TELEMETRY_APP'])
+            self.assertEqual(len(rollups), 1)
+            rollup = rollups[0]
+            self.assertEqual(rollup['packet_count'], 2)
+            self.assertEqual((rollup['hops_min'], rollup['hops_max']), (0, 2))
+            self.assertEqual((rollup['hop_start_max'], rollup['hop_start_count']), (7, 2))
+            self.assertEqual((rollup['channel_util_sum'], rollup['channel_util_count']), (30.0, 2))
+            self.assertEqual((rollup['air_util_sum'], rollup['air_util_count']), (1.0, 1))
+            self.assertEqual(rollup['snr_count'], 2)
+        finally:
+            persistence.close()
+
+    def test_backfill_matches_incremental(self):
+        """La reconstruction depuis packets donne le même résultat que la mise à jour incrémentale"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            for i in range(50):
+                persistence.save_packet(_make_packet(i % 4, 'TELEMETRY_APP', now - i * 600, hop_start=i % 5,
+                                                     telemetry={'channel_util': float(i)}))
+
+            cursor = persistence.conn.cursor()
+            query = "SELECT * FROM packet_rollups_hourly ORDER BY hour_bucket, from_id, packet_type, source"
+            incremental = [tuple(row) for row in cursor.execute(query).fetchall()]
+            persistence.rebuild_packet_rollups()
+            rebuilt = [tuple(row) for row in cursor.execute(query).fetchall()]
+            self.assertEqual(incremental, rebuilt)
+        finally:
+            persistence.close()
+
+    def test_cleanup_keeps_rollups_longer(self):
+        """Le nettoyage des paquets bruts conserve les agrégats selon leur propre rétention"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_make_packet(1, 'POSITION_APP', now - 72 * 3600))
+            persistence.save_packet(_make_packet(1, 'POSITION_APP', now - 300 * 3600))
+            persistence.cleanup_old_data(hours=48, node_stats_hours=168, rollup_hours=168)
+
+            self.assertEqual(persistence.load_packets(hours=400), [])
+            totals = self._totals(persistence.load_packet_rollups(hours=400))
+            self.assertEqual(totals, {('1', 'POSITION_APP'): 1})
+        finally:
+            persistence.close()
+
+
+    def test_partial_hour_after_retention(self):
+        """Paquets bruts de l'heure partielle purgés : l'agrégat de l'heure est repris"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_make_packet(1, 'POSITION_APP', now - 5 * 3600 + 60))
+            persistence.save_packet(_make_packet(2, 'POSITION_APP', now - 600))
+            persistence.cleanup_old_data(hours=2, node_stats_hours=168, rollup_hours=168)
+
+            totals = self._totals(persistence.load_packet_rollups(hours=5))
+            self.assertEqual(totals, {('1', 'POSITION_APP'): 1, ('2', 'POSITION_APP'): 1})
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la file d'écriture différée (write-behind) des paquets SQLite
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import time
+
+from packet_write_queue import PacketWriteQueue
+from traffic_persistence import TrafficPersistence
+
+
+def _make_packet(i, source='local'):
+    return {
+        'timestamp': time.time(),
+        'from_id': 0x10000000 + i,
+        'to_id': 0xFFFFFFFF,
+        'source': source,
+        'sender_name': f"Node{i}",
+        'packet_type': 'TEXT_MESSAGE_APP',
+        'message': f"msg {i}",
+        'rssi': -90,
+        'snr': 5.0,
+        'hops': 0,
+        'size': 42,
+        'is_broadcast': True,
+    }
+
+
+class TestPacketWriteQueue(unittest.TestCase):
+    """Tests unitaires de PacketWriteQueue"""
+
+    def test_flush_on_batch_size(self):
+        """Le thread écrivain vide la file dès que la taille de lot est atteinte"""
+        batches = []
+        queue = PacketWriteQueue(batches.append, batch_size=5, flush_interval_ms=10000)
+        queue.start()
+        try:
+            for i in range(5):
+                queue.put('packets', {'i': i})
+            deadline = time.time() + 2
+            while not batches and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(batches), 1)
+            self.assertEqual(len(batches[0]), 5)
+        finally:
+            queue.stop()
+
+    def test_flush_on_interval(self):
+        """Un lot incomplet est écrit après le délai maximum"""
+        batches = []
+        queue = PacketWriteQueue(batches.append, batch_size=100, flush_interval_ms=50)
+        queue.start()
+        try:
+            queue.put('packets', {'i': 1})
+            deadline = time.time() + 2
+            while not batches and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(sum(len(b) for b in batches), 1)
+        finally:
+            queue.stop()
+
+    def test_bounded_queue_drops_oldest(self):
+        """Une file pleine abandonne les entrées les plus anciennes et les compte"""
+        batches = []
+        queue = PacketWriteQueue(batches.append, max_size=3, batch_size=100)
+        for i in range(5):
+            queue.put('packets', {'i': i})
+        self.assertEqual(queue.depth(), 3)
+        queue.flush()
+        kept = [packet['i'] for _, packet in batches[0]]
+        self.assertEqual(kept, [2, 3, 4])
+        stats = queue.get_stats()
+        self.assertEqual(stats['dropped'], 2)
+        self.assertEqual(stats['written'], 3)
+        self.assertEqual(stats['max_depth'], 3)
+
+    def test_failed_flush_is_counted(self):
+        """Un échec du callback est compté sans lever d'exception"""
+        def failing(batch):
+            raise RuntimeError("disk full")
+        queue = PacketWriteQueue(failing)
+        queue.put('packets', {})
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(queue.get_stats()['failed'], 1)
+
+    def test_rejected_entries_are_counted(self):
+        """Les entrées rejetées par le callback sont comptées en échec, les autres écrites"""
+        queue = PacketWriteQueue(lambda batch: 1)
+        for i in range(3):
+            queue.put('packets', {'i': i})
+        self.assertEqual(queue.flush(), 2)
+        stats = queue.get_stats()
+        self.assertEqual((stats['written'], stats['failed']), (2, 1))
+
+    def test_stop_flushes_pending(self):
+        """stop() écrit les entrées restantes"""
+        batches = []
+        queue = PacketWriteQueue(batches.append, batch_size=1000, flush_interval_ms=60000)
+        queue.start()
+        queue.put('packets', {'i': 1})
+        queue.put('packets', {'i': 2})
+        queue.stop(flush=True)
+        self.assertEqual(sum(len(b) for b in batches), 2)
+
+
+class TestPersistenceWriteBehind(unittest.TestCase):
+    """Tests d'intégration avec TrafficPersistence"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.remove(self.db_path)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def _count(self, persistence, table):
+        cursor = persistence.conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+    def test_packets_written_in_batches(self):
+        """Les paquets Meshtastic et MeshCore sont écrits dans leurs tables respectives"""
+        persistence = TrafficPersistence(self.db_path, write_behind=True,
+                                         write_batch_size=1000, write_flush_ms=60000)
+        try:
+            for i in range(20):
+                persistence.save_packet(_make_packet(i))
+            for i in range(5):
+                persistence.save_meshcore_packet(_make_packet(i, source='meshcore'))
+
+            # Rien n'est encore écrit: tout est en file
+            self.assertEqual(self._count(persistence, 'packets'), 0)
+            self.assertEqual(persistence.get_write_queue_stats()['depth'], 25)
+
+            self.assertEqual(persistence.flush_pending_writes(), 25)
+            self.assertEqual(self._count(persistence, 'packets'), 20)
+            self.assertEqual(self._count(persistence, 'meshcore_packets'), 5)
+
+            cursor = persistence.conn.cursor()
+            cursor.execute("SELECT DISTINCT source FROM meshcore_packets")
+            self.assertEqual([row[0] for row in cursor.fetchall()], ['meshcore'])
+        finally:
+            persistence.close()
+
+    def test_bad_packet_does_not_drop_batch(self):
+        """Un paquet invalide est écarté seul : le reste du lot est écrit"""
+        persistence = TrafficPersistence(self.db_path, write_behind=True,
+                                         write_batch_size=1000, write_flush_ms=60000)
+        try:
+            for i in range(10):
+                packet = _make_packet(i)
+                if i == 4:
+                    packet['rssi'] = {'invalide': True}
+                persistence.save_packet(packet)
+
+            self.assertEqual(persistence.flush_pending_writes(), 9)
+            self.assertEqual(self._count(persistence, 'packets'), 9)
+            self.assertEqual(self._count(persistence, 'packet_rollups_hourly'), 9)
+            stats = persistence.get_write_queue_stats()
+            self.assertEqual((stats['written'], stats['failed']), (9, 1))
+        finally:
+            persistence.close()
+
+    def test_close_flushes_queue(self):
+        """close() écrit les paquets en attente avant de fermer la connexion"""
+        persistence = TrafficPersistence(self.db_path, write_behind=True,
+                                         write_batch_size=1000, write_flush_ms=60000)
+        for i in range(10):
+            persistence.save_packet(_make_packet(i))
+        persistence.close()
+
+        reopened = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(self._count(reopened, 'packets'), 10)
+        finally:
+            reopened.close()
+
+    def test_synchronous_mode_unchanged(self):
+        """Sans write-behind, save_packet écrit immédiatement"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet(_make_packet(1))
+            self.assertEqual(self._count(persistence, 'packets'), 1)
+            self.assertIsNone(persistence.get_write_queue_stats())
+            packets = persistence.load_packets(hours=1)
+            self.assertEqual(packets[0]['message'], 'msg 1')
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
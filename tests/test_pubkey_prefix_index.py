@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la recherche indexée par préfixe de clé publique
+(colonne pubkey_hex en SQLite, index trié en mémoire dans NodeManager)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import base64
+
+from traffic_persistence import TrafficPersistence
+from node_manager import NodeManager
+
+
+KEY_A = bytes.fromhex('143bcd7f1b1f' + '00' * 26)
+KEY_B = bytes.fromhex('143bce0000aa' + '11' * 26)
+
+
+class TestPubkeyPrefixIndex(unittest.TestCase):
+    """Recherche par intervalle sur pubkey_hex et index trié en mémoire"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_sqlite_prefix_range_lookup(self):
+        """Les deux tables sont interrogées par intervalle, meshtastic_nodes en premier"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_meshtastic_node({'node_id': 0x0de3331e, 'name': 'A', 'publicKey': KEY_A})
+            persistence.save_meshcore_contact({'node_id': 0x0de3331f, 'name': 'B', 'publicKey': KEY_B.hex()})
+
+            self.assertEqual(persistence.find_node_by_pubkey_prefix('143BCD7F'), (0x0de3331e, 'meshtastic'))
+            self.assertEqual(persistence.find_node_by_pubkey_prefix('143bce'), (0x0de3331f, 'meshcore'))
+            self.assertEqual(persistence.find_node_by_pubkey_prefix('143bcf'), (None, None))
+            self.assertEqual(persistence.find_node_by_pubkey_prefix('zz'), (None, None))
+            self.assertEqual(persistence.find_meshcore_contact_by_pubkey_prefix('143bcd'), None)
+            self.assertEqual(persistence.find_meshcore_contact_by_pubkey_prefix('143bce00'), 0x0de3331f)
+        finally:
+            persistence.close()
+
+    def test_pubkey_hex_migration(self):
+        """La colonne pubkey_hex est ajoutée et remplie sur une base existante"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE meshtastic_nodes (
+                node_id TEXT PRIMARY KEY, name TEXT, shortName TEXT, hwModel TEXT,
+                publicKey BLOB, lat REAL, lon REAL, alt INTEGER, last_updated REAL,
+                source TEXT DEFAULT 'radio'
+            )
+        ''')
+        conn.execute("INSERT INTO meshtastic_nodes (node_id, name, publicKey) VALUES (?, ?, ?)",
+                     (str(0x1234), 'Old', KEY_A))
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(persistence.find_node_by_pubkey_prefix('143bcd7f1b1f'), (0x1234, 'meshtastic'))
+        finally:
+            persistence.close()
+
+    def test_node_manager_index(self):
+        """L'index en mémoire suit les ajouts, remplacements et formats de clé"""
+        node_manager = NodeManager(interface=None)
+        node_manager.index_public_key(0x1, base64.b64encode(KEY_A).decode())
+        node_manager.index_public_key(0x2, KEY_B)
+
+        self.assertEqual(node_manager.find_node_by_pubkey_prefix('143bcd7f1b1f'), 0x1)
+        self.assertEqual(node_manager.find_node_by_pubkey_prefix('143BCE'), 0x2)
+
+        # Changement de clé : l'ancienne entrée disparaît de l'index
+        node_manager.index_public_key(0x1, KEY_B.hex())
+        self.assertIsNone(node_manager.find_node_by_pubkey_prefix('143bcd'))
+        self.assertIn(node_manager.find_node_by_pubkey_prefix('143bce'), (0x1, 0x2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la base de trafic en RAM avec sauvegarde périodique sur la carte SD
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import threading
+import time
+
+from traffic_persistence import TrafficPersistence
+from db_checkpoint import DatabaseCheckpointer
+
+
+def _packet(timestamp, i=0):
+    return {'timestamp': timestamp, 'from_id': 0x1000 + i % 10, 'to_id': 0xFFFFFFFF,
+            'source': 'local', 'packet_type': 'TEXT_MESSAGE_APP', 'message': 'x' * 50, 'size': 50}
+
+
+class TestRamCheckpoint(unittest.TestCase):
+    """Base vivante sur tmpfs, sauvegarde par l'API backup, restauration au démarrage"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.disk_path = os.path.join(self.tmpdir, 'traffic.db')
+        self.ram_dir = os.path.join(self.tmpdir, 'ram')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _count(self, path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_checkpoint_on_close_and_restore(self):
+        """La base RAM est sauvegardée à la fermeture puis restaurée au démarrage suivant"""
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir)
+        try:
+            self.assertEqual(persistence.db_path, os.path.join(self.ram_dir, 'traffic.db'))
+            self.assertEqual(persistence.get_io_stats()['mode'], 'ram')
+            now = time.time()
+            for i in range(50):
+                persistence.save_packet(_packet(now - i, i))
+            self.assertFalse(os.path.exists(self.disk_path))
+        finally:
+            persistence.close()
+        self.assertEqual(self._count(self.disk_path), 50)
+
+        # Redémarrage du système : tmpfs vidé
+        shutil.rmtree(self.ram_dir)
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir)
+        try:
+            self.assertEqual(persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0], 50)
+        finally:
+            persistence.close()
+
+    def test_newer_ram_copy_is_kept(self):
+        """Au redémarrage du bot seul, la base RAM (plus récente) n'est pas écrasée"""
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir)
+        persistence.save_packet(_packet(time.time()))
+        persistence.close()
+
+        ram_path = os.path.join(self.ram_dir, 'traffic.db')
+        conn = sqlite3.connect(ram_path)
+        conn.execute("DELETE FROM packets")
+        conn.commit()
+        conn.close()
+        os.utime(self.disk_path, (time.time() - 60, time.time() - 60))
+
+        checkpointer = DatabaseCheckpointer(ram_path, self.disk_path)
+        self.assertEqual(checkpointer.restore(), 'ram')
+        self.assertEqual(self._count(ram_path), 0)
+
+        os.utime(self.disk_path, None)
+        for suffix in ('', '-wal'):
+            if os.path.exists(ram_path + suffix):
+                os.utime(ram_path + suffix, (time.time() - 120, time.time() - 120))
+        self.assertEqual(checkpointer.restore(), 'disk')
+        self.assertEqual(self._count(ram_path), 1)
+
+    def test_checkpoint_during_ingest(self):
+        """Une sauvegarde par petites étapes aboutit pendant l'insertion de paquets"""
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir,
+                                         checkpoint_interval=3600, checkpoint_pages=1)
+        try:
+            now = time.time()
+            for i in range(500):
+                persistence.save_packet(_packet(now - 1000 + i, i))
+
+            stop = threading.Event()
+
+            def ingest():
+                i = 0
+                while not stop.is_set():
+                    persistence.save_packet(_packet(time.time(), i))
+                    i += 1
+
+            writer = threading.Thread(target=ingest)
+            writer.start()
+            try:
+                result = persistence.checkpointer.checkpoint(persistence.conn)
+            finally:
+                stop.set()
+                writer.join()
+
+            self.assertGreater(result['bytes'], 0)
+            conn = sqlite3.connect(f"file:{self.disk_path}?mode=ro", uri=True)
+            try:
+                self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], 'ok')
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'delete')
+                self.assertGreaterEqual(conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0], 500)
+            finally:
+                conn.close()
+            self.assertEqual(persistence.get_io_stats()['checkpoint']['checkpoints'], 1)
+        finally:
+            persistence.close()
+
+    def test_open_transaction_is_rolled_back(self):
+        """Une transaction restée ouverte ne bloque pas la sauvegarde : annulée, sauvegarde refusée"""
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir,
+                                         checkpoint_interval=3600, checkpoint_pages=1)
+        try:
+            now = time.time()
+            for i in range(50):
+                persistence.save_packet(_packet(now - i, i))
+            persistence.conn.execute("INSERT INTO packets (timestamp, from_id, packet_type, source) "
+                                    "VALUES (?, '1', 'TEXT_MESSAGE_APP', 'local')", (now,))
+            self.assertTrue(persistence.conn.in_transaction)
+
+            errors = []
+
+            def checkpoint():
+                try:
+                    persistence.checkpointer.checkpoint(persistence.conn)
+                except RuntimeError as e:
+                    errors.append(e)
+
+            thread = threading.Thread(target=checkpoint, daemon=True)
+            thread.start()
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(len(errors), 1)
+            self.assertFalse(persistence.conn.in_transaction)
+            self.assertEqual(persistence.get_io_stats()['checkpoint']['failed'], 1)
+        finally:
+            persistence.close()
+        # Sauvegarde finale à la fermeture, sans la ligne annulée
+        self.assertEqual(self._count(self.disk_path), 50)
+
+        # À la fermeture : transaction annulée puis sauvegarde finale faite quand même
+        persistence = TrafficPersistence(self.disk_path, ram_dir=self.ram_dir, checkpoint_interval=3600)
+        persistence.save_packet(_packet(time.time(), 99))
+        persistence.conn.execute("DELETE FROM packets")
+        persistence.close()
+        self.assertEqual(self._count(self.disk_path), 51)
+
+
+if __name__ == '__main__':
+    unittest.main()
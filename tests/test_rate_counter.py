@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du compteur de débit à fenêtre glissante (anneaux secondes / minutes / heures)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+
+from rate_counter import SlidingWindowCounter
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    """Fenêtres, ventilation source/type, recyclage des seaux"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.counter = SlidingWindowCounter(clock=self.clock)
+
+    def test_breakdown_by_type_and_source(self):
+        for _ in range(3):
+            self.counter.add('meshtastic', 'TEXT_MESSAGE_APP')
+        self.counter.add('meshtastic', 'POSITION_APP')
+        self.counter.add('meshcore', 'TEXT_MESSAGE_APP', count=2)
+
+        self.assertEqual(self.counter.breakdown(60), {'TEXT_MESSAGE_APP': 5, 'POSITION_APP': 1})
+        self.assertEqual(self.counter.breakdown(60, by='source'), {'meshtastic': 4, 'meshcore': 2})
+        self.assertEqual(self.counter.count(60, source='meshcore'), 2)
+        self.assertEqual(self.counter.count(60, packet_type='POSITION_APP'), 1)
+        self.assertEqual(self.counter.last_seen('meshcore'), self.clock.now)
+        self.assertIsNone(self.counter.last_seen('tcp'))
+        with self.assertRaises(ValueError):
+            self.counter.breakdown(60, by='sender')
+
+    def test_windows_slide_and_buckets_recycle(self):
+        self.counter.add('meshtastic', 'TEXT_MESSAGE_APP')
+        self.clock.now += 90
+        self.counter.add('meshtastic', 'TEXT_MESSAGE_APP')
+
+        # 60s : anneau des secondes, le premier paquet est sorti de la fenêtre
+        self.assertEqual(self.counter.count(60), 1)
+        # 5 minutes : anneau des minutes, les deux paquets
+        self.assertEqual(self.counter.count(300), 2)
+
+        # Un tour complet de l'anneau des secondes : les seaux recyclés ne comptent plus
+        self.clock.now += 60
+        self.assertEqual(self.counter.count(60), 0)
+        self.clock.now += 2 * 3600
+        self.assertEqual(self.counter.count(3600), 0)
+        self.assertEqual(self.counter.count(6 * 3600), 2)
+        self.clock.now += 25 * 3600
+        self.assertEqual(self.counter.count(24 * 3600), 0)
+        self.assertEqual(self.counter.total, 2)
+
+    def test_rate_per_minute(self):
+        # 10 minutes à 6 paquets/minute, un paquet toutes les 10 secondes
+        self.clock.now = 1_700_000_000.0 - 1_700_000_000.0 % 60
+        self.counter = SlidingWindowCounter(clock=self.clock)
+        for _ in range(60):
+            self.clock.now += 10
+            self.counter.add('meshtastic', 'TELEMETRY_APP')
+        self.assertAlmostEqual(self.counter.rate(600), 6.0, delta=0.5)
+        self.assertAlmostEqual(self.counter.rate(60), 6.0, delta=0.5)
+        self.assertAlmostEqual(self.counter.rates_by_type(600)['TELEMETRY_APP'], 6.0, delta=0.5)
+        self.assertEqual(self.counter.rate(600, packet_type='POSITION_APP'), 0.0)
+
+        # Au démarrage : diviseur d'au moins une minute, puis la durée écoulée (pas la fenêtre vide)
+        fresh = SlidingWindowCounter(clock=self.clock)
+        for _ in range(3):
+            fresh.add()
+        self.assertEqual(fresh.rate(900), 3.0)
+        self.clock.now += 120
+        for _ in range(9):
+            fresh.add()
+        self.assertAlmostEqual(fresh.rate(900), 6.0, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du nettoyage par lots et du vacuum incrémental (cleanup_old_data)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+def _packet(timestamp, i):
+    return {
+        'timestamp': timestamp,
+        'from_id': 0x1000 + (i % 20),
+        'to_id': 0xFFFFFFFF,
+        'source': 'local',
+        'packet_type': 'TEXT_MESSAGE_APP',
+        'message': 'x' * 200,
+        'size': 200,
+    }
+
+
+class TestRetentionCleanup(unittest.TestCase):
+    """Suppression par plages de rowid, politique par table, pages libérées"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def _count(self, persistence, table):
+        return persistence.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_batched_delete_and_incremental_vacuum(self):
+        """Les lignes expirées sont supprimées par lots et des pages sont libérées"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(persistence.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+            now = time.time()
+            old = [_packet(now - 72 * 3600 + i, i) for i in range(1500)]
+            recent = [_packet(now - 60 + i * 0.01, i) for i in range(100)]
+            for packet in old + recent:
+                persistence.save_packet(packet)
+
+            report = persistence.cleanup_old_data(hours=48, retention={'packets': 48})
+            self.assertEqual(report['deleted']['packets'], 1500)
+            self.assertEqual(self._count(persistence, 'packets'), 100)
+            self.assertGreater(report['pages_reclaimed'], 0)
+            self.assertGreaterEqual(report['duration'], 0)
+        finally:
+            persistence.close()
+
+    def test_retention_policy_overrides(self):
+        """Une table à None est conservée, une surcharge par table est appliquée"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            policy = persistence.retention_policy(hours=24, node_stats_hours=72, rollup_hours=96)
+            self.assertEqual(policy['packets'], 24)
+            self.assertEqual(policy['node_stats'], 72)
+            self.assertIsNone(policy['meshcore_packets'])
+
+            now = time.time()
+            persistence.save_meshcore_packet(_packet(now - 10 * 3600, 1))
+            persistence.save_meshcore_packet(_packet(now - 60, 2))
+
+            report = persistence.cleanup_old_data(hours=24)
+            self.assertNotIn('meshcore_packets', report['deleted'])
+            self.assertEqual(self._count(persistence, 'meshcore_packets'), 2)
+
+            report = persistence.cleanup_old_data(hours=24, retention={'meshcore_packets': 1})
+            self.assertEqual(report['deleted']['meshcore_packets'], 1)
+        finally:
+            persistence.close()
+
+    def _legacy_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE legacy (id INTEGER PRIMARY KEY)")
+        conn.commit()
+        conn.close()
+
+    def test_existing_database_conversion_pending(self):
+        """Base existante sans auto_vacuum : pas de VACUUM au démarrage, conversion par vacuum()"""
+        self._legacy_database()
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertTrue(persistence.auto_vacuum_pending)
+            self.assertEqual(persistence.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+            old = time.time() - 72 * 3600
+            for i in range(200):
+                persistence.save_packet(_packet(old + i, i))
+            report = persistence.cleanup_old_data(hours=24)
+            self.assertEqual(report['deleted']['packets'], 200)
+            self.assertEqual(report['pages_reclaimed'], 0)
+            self.assertGreater(report['free_pages'], 0)
+
+            persistence.vacuum()
+            self.assertFalse(persistence.auto_vacuum_pending)
+            self.assertEqual(persistence.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        finally:
+            persistence.close()
+
+    def test_existing_database_converted_on_request(self):
+        """convert_auto_vacuum=True (TRAFFIC_DB_VACUUM_CONVERT) : conversion au démarrage"""
+        self._legacy_database()
+        persistence = TrafficPersistence(self.db_path, convert_auto_vacuum=True)
+        try:
+            self.assertFalse(persistence.auto_vacuum_pending)
+            self.assertEqual(persistence.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        finally:
+            persistence.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des migrations de schéma versionnées (PRAGMA user_version)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+from unittest.mock import patch
+
+from traffic_persistence import TrafficPersistence
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """Application des seules migrations en attente, dans une transaction"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def _user_version(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_up_to_date_database_runs_no_migration(self):
+        """Une base à jour ne rejoue aucune étape au démarrage"""
+        TrafficPersistence(self.db_path).close()
+        self.assertEqual(self._user_version(), TrafficPersistence.SCHEMA_VERSION)
+
+        with patch.object(TrafficPersistence, '_add_missing_columns') as add_columns, \
+                patch.object(TrafficPersistence, '_migrate_base_schema') as base_schema:
+            TrafficPersistence(self.db_path).close()
+        add_columns.assert_not_called()
+        base_schema.assert_not_called()
+
+    def test_legacy_database_is_upgraded(self):
+        """Une base antérieure au versionnage reçoit les colonnes manquantes"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE packets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL NOT NULL,
+                from_id TEXT NOT NULL, to_id TEXT, source TEXT, sender_name TEXT,
+                packet_type TEXT NOT NULL, message TEXT, rssi INTEGER, snr REAL,
+                hops INTEGER, size INTEGER, is_broadcast INTEGER
+            )
+        ''')
+        conn.execute("INSERT INTO packets (timestamp, from_id, to_id, packet_type) "
+                     "VALUES (1.0, '!0000abcd', '4294967295', 'TEXT_MESSAGE_APP')")
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            columns = {row[1] for row in persistence.conn.execute("PRAGMA table_info(packets)")}
+            self.assertTrue({'hop_start', 'channel', 'public_key', 'from_num', 'to_num'} <= columns)
+            row = persistence.conn.execute("SELECT from_num FROM packets").fetchone()
+            self.assertEqual(row[0], 0xabcd)
+        finally:
+            persistence.close()
+        self.assertEqual(self._user_version(), TrafficPersistence.SCHEMA_VERSION)
+
+    def test_failed_migration_is_rolled_back(self):
+        """Une étape en erreur laisse la base dans sa version d'origine"""
+        with patch.object(TrafficPersistence, '_migrate_db_maintenance', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                TrafficPersistence(self.db_path)
+        self.assertEqual(self._user_version(), 0)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(tables, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du démarrage rapide de TrafficPersistence
+(vérification d'en-tête, ouverture en lecture seule, vérification complète différée)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+class TestStartupIntegrity(unittest.TestCase):
+    """Modes de vérification au démarrage et marqueur de dernière vérification"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_invalid_header_recreates_database(self):
+        """Un fichier qui n'est pas une base SQLite est détecté par la vérification d'en-tête"""
+        with open(self.db_path, 'wb') as f:
+            f.write(b'not a database' * 100)
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet({'timestamp': time.time(), 'from_id': 0x1, 'to_id': 0x2,
+                                     'source': 'local', 'packet_type': 'TEXT_MESSAGE_APP'})
+            count = persistence.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+            self.assertEqual(count, 1)
+        finally:
+            persistence.close()
+
+    def test_read_only_open_skips_migrations(self):
+        """L'ouverture en lecture seule ne crée ni ne modifie le schéma"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE packets (id INTEGER PRIMARY KEY, timestamp REAL)")
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path, read_only=True)
+        try:
+            tables = {row[0] for row in persistence.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'")}
+            self.assertEqual(tables, {'packets'})
+            with self.assertRaises(sqlite3.OperationalError):
+                persistence.conn.execute("INSERT INTO packets (timestamp) VALUES (1)")
+            self.assertFalse(persistence.schedule_integrity_check())
+        finally:
+            persistence.close()
+
+    def test_read_only_missing_database(self):
+        """La lecture seule n'ouvre pas (ni ne crée) une base absente"""
+        with self.assertRaises(FileNotFoundError):
+            TrafficPersistence(self.db_path, read_only=True)
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_deferred_integrity_check_is_rate_limited(self):
+        """La vérification complète s'exécute en arrière-plan et son marqueur est persisté"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertIsNone(persistence.get_last_integrity_check())
+            self.assertTrue(persistence.schedule_integrity_check(min_interval_hours=24))
+            persistence._integrity_thread.join(timeout=10)
+
+            last = persistence.get_last_integrity_check()
+            self.assertEqual(last['result'], 'ok')
+            self.assertFalse(persistence.schedule_integrity_check(min_interval_hours=24))
+        finally:
+            persistence.close()
+
+        reopened = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(reopened.get_last_integrity_check()['result'], 'ok')
+            self.assertTrue(reopened.schedule_integrity_check(min_interval_hours=0))
+            reopened._integrity_thread.join(timeout=10)
+        finally:
+            reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
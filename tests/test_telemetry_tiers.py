@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des séries de télémétrie sous-échantillonnées (tiers 5 minutes et horaire)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+HOUR = 3600
+
+
+def _telemetry(timestamp, from_id=0x1001, **telemetry):
+    return {'timestamp': timestamp, 'from_id': from_id, 'to_id': 0xFFFFFFFF, 'source': 'local',
+            'packet_type': 'TELEMETRY_APP', 'size': 30, 'telemetry': telemetry}
+
+
+class TestTelemetryTiers(unittest.TestCase):
+    """Tiers alimentés à l'insertion, choix du tier selon la fenêtre, rétention par tier"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+        # Début d'heure : les seaux 5 minutes et horaires sont déterministes
+        self.hour = int(time.time() // HOUR) * HOUR - 2 * HOUR
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_tiers_averaged_at_ingest(self):
+        persistence = TrafficPersistence(self.db_path, write_behind=True)
+        try:
+            # Nœud bavard : une mesure toutes les 30 s pendant une heure
+            for i in range(120):
+                persistence.save_packet(_telemetry(self.hour + i * 30, battery=80 + i % 2,
+                                                   channel_util=10.0 if i < 60 else 20.0))
+            persistence.flush_pending_writes()
+
+            five_min = persistence.conn.execute("SELECT COUNT(*) FROM telemetry_5min").fetchone()[0]
+            hourly = persistence.conn.execute(
+                "SELECT sample_count, channel_util_sum / channel_util_count FROM telemetry_hourly"
+            ).fetchall()
+            self.assertEqual(five_min, 12)
+            self.assertEqual([tuple(row) for row in hourly], [(120, 15.0)])
+
+            series = persistence.load_telemetry_series(hours=7 * 24)['4097']
+            self.assertEqual(len(series), 12)
+            self.assertEqual(series[0]['timestamp'], self.hour)
+            self.assertEqual(series[0]['samples'], 10)
+            self.assertEqual(series[0]['battery'], 80.5)
+            self.assertIsNone(series[0]['air_util'])
+            self.assertEqual(len(persistence.load_telemetry_series(hours=365 * 24)['4097']), 1)
+
+            # Fenêtre courte : paquets bruts
+            self.assertEqual(len(persistence.load_telemetry_series(hours=24)['4097']), 120)
+            averages = persistence.load_telemetry_averages(hours=7 * 24, from_ids=['4097'])
+            self.assertEqual(averages['4097']['channel_util'], 15.0)
+            self.assertEqual(persistence.load_telemetry_averages(hours=24, from_ids=['!unknown']), {})
+        finally:
+            persistence.close()
+
+    def test_existing_packets_backfilled(self):
+        """Une base en version 9 voit ses tiers reconstruits depuis les paquets"""
+        persistence = TrafficPersistence(self.db_path)
+        persistence.save_packet(_telemetry(self.hour, battery=50, voltage=3.7))
+        persistence.save_packet(_telemetry(self.hour + 60, battery=70, voltage=3.9))
+        persistence.save_packet({'timestamp': self.hour, 'from_id': 0x1001, 'packet_type': 'TEXT_MESSAGE_APP',
+                                 'message': 'hors télémétrie'})
+        persistence.close()
+
+        conn = sqlite3.connect(self.db_path)
+        for table, _, _ in TrafficPersistence.TELEMETRY_TIERS:
+            conn.execute(f"DROP TABLE {table}")
+        conn.execute("PRAGMA user_version = 9")
+        conn.commit()
+        conn.close()
+
+        # Lecture seule sur la base non migrée : repli sur les paquets bruts
+        reader = TrafficPersistence(self.db_path, read_only=True)
+        try:
+            self.assertEqual(len(reader.load_telemetry_series(hours=7 * 24)['4097']), 2)
+        finally:
+            reader.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            series = persistence.load_telemetry_series(hours=7 * 24)['4097']
+            self.assertEqual([(point['samples'], point['battery']) for point in series], [(2, 60.0)])
+            self.assertAlmostEqual(series[0]['voltage'], 3.8)
+        finally:
+            persistence.close()
+
+    def test_archived_packets_backfilled(self):
+        """Base en version 9 partitionnée : les tiers reprennent aussi les partitions d'archive"""
+        archive_dir = os.path.join(self.tmpdir, 'archives')
+        options = {'partition_period': 'day', 'hot_hours': 24, 'archive_dir': archive_dir}
+        persistence = TrafficPersistence(self.db_path, **options)
+        for day in range(4):
+            for i in range(3):
+                persistence.save_packet(_telemetry(self.hour - day * 24 * HOUR + i * 60, battery=60 + day))
+        self.assertEqual(sum(persistence.roll_partitions().values()), 9)
+        persistence.close()
+
+        conn = sqlite3.connect(self.db_path)
+        for table, _, _ in TrafficPersistence.TELEMETRY_TIERS:
+            conn.execute(f"DROP TABLE {table}")
+        conn.execute("PRAGMA user_version = 9")
+        conn.commit()
+        conn.close()
+
+        for _ in range(2):
+            # Deuxième ouverture : marqueur supprimé, pas de double comptage
+            persistence = TrafficPersistence(self.db_path, **options)
+            try:
+                rows = persistence.conn.execute(
+                    "SELECT sample_count, battery_sum / battery_count FROM telemetry_hourly ORDER BY bucket"
+                ).fetchall()
+                self.assertEqual([tuple(row) for row in rows], [(3, 63.0), (3, 62.0), (3, 61.0), (3, 60.0)])
+                self.assertIsNone(persistence.conn.execute(
+                    "SELECT 1 FROM db_maintenance WHERE key = 'telemetry_tiers_archive'").fetchone())
+            finally:
+                persistence.close()
+
+    def test_retention_per_tier(self):
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            persistence.save_packet(_telemetry(time.time() - 30 * 24 * HOUR, battery=90))
+            report = persistence.cleanup_old_data(hours=48)
+            self.assertEqual(report['deleted']['telemetry_5min'], 1)
+            self.assertEqual(report['deleted']['telemetry_hourly'], 0)
+            self.assertEqual(len(persistence.load_telemetry_series(hours=365 * 24)['4097']), 1)
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
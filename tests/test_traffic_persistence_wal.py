@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du mode WAL et des connexions de lecture par thread de TrafficPersistence
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import threading
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+def _make_packet(i):
+    return {
+        'timestamp': time.time(),
+        'from_id': 0x10000000 + i,
+        'to_id': 0xFFFFFFFF,
+        'source': 'local',
+        'sender_name': f"Node{i}",
+        'packet_type': 'TEXT_MESSAGE_APP',
+        'message': f"msg {i}",
+        'snr': 5.0,
+        'hops': 0,
+        'size': 42,
+        'is_broadcast': True,
+    }
+
+
+class TestPersistenceWAL(unittest.TestCase):
+    """Tests du journal WAL et du pool de lecture"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_wal_enabled_by_default(self):
+        """La base est ouverte en WAL avec synchronous=NORMAL"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            self.assertEqual(persistence.get_read_pool_stats()['journal_mode'], 'wal')
+            synchronous = persistence.conn.execute("PRAGMA synchronous").fetchone()[0]
+            self.assertEqual(synchronous, 1)  # NORMAL
+        finally:
+            persistence.close()
+
+    def test_read_connection_per_thread(self):
+        """Chaque thread obtient sa propre connexion en lecture seule"""
+        persistence = TrafficPersistence(self.db_path, read_pool_size=2)
+        try:
+            conns = []
+
+            def grab():
+                conns.append(persistence._read_conn())
+
+            for _ in range(2):
+                thread = threading.Thread(target=grab)
+                thread.start()
+                thread.join()
+
+            self.assertEqual(len(conns), 2)
+            self.assertIsNot(conns[0], conns[1])
+            self.assertIsNot(conns[0], persistence.conn)
+
+            # Les connexions de lecture refusent les écritures
+            with self.assertRaises(Exception):
+                conns[0].execute("DELETE FROM packets")
+        finally:
+            persistence.close()
+
+    def test_dead_threads_are_pruned(self):
+        """Le pool plein récupère les connexions des threads terminés"""
+        persistence = TrafficPersistence(self.db_path, read_pool_size=1)
+        try:
+            thread = threading.Thread(target=persistence._read_conn)
+            thread.start()
+            thread.join()
+            self.assertEqual(persistence.get_read_pool_stats()['read_connections'], 1)
+
+            # Le thread principal récupère la place libérée
+            self.assertIsNot(persistence._read_conn(), persistence.conn)
+            self.assertEqual(persistence.get_read_pool_stats()['read_connections'], 1)
+        finally:
+            persistence.close()
+
+    def test_pool_full_opens_call_connection(self):
+        """Pool plein : connexion de lecture pour l'appel, jamais la connexion écrivain"""
+        persistence = TrafficPersistence(self.db_path, read_pool_size=1)
+        release = threading.Event()
+        try:
+            holder = threading.Thread(target=lambda: (persistence._read_conn(), release.wait(5)))
+            holder.start()
+            while persistence.get_read_pool_stats()['read_connections'] < 1:
+                time.sleep(0.01)
+
+            conns = []
+            thread = threading.Thread(target=lambda: conns.append(persistence._read_conn()))
+            thread.start()
+            thread.join()
+            self.assertIsNot(conns[0], persistence.conn)
+            with self.assertRaises(Exception):
+                conns[0].execute("DELETE FROM packets")
+
+            stats = persistence.get_read_pool_stats()
+            self.assertEqual(stats['read_connections'], 1)
+            self.assertEqual(stats['read_overflows'], 1)
+        finally:
+            release.set()
+            holder.join()
+            persistence.close()
+
+    def test_pool_disabled_uses_writer(self):
+        """read_pool_size=0 ou base en mémoire: lecture sur la connexion d'écriture"""
+        persistence = TrafficPersistence(self.db_path, read_pool_size=0)
+        try:
+            self.assertIs(persistence._read_conn(), persistence.conn)
+        finally:
+            persistence.close()
+
+        memory = TrafficPersistence(':memory:')
+        try:
+            self.assertIs(memory._read_conn(), memory.conn)
+        finally:
+            memory.close()
+
+    def test_concurrent_reads_and_writes(self):
+        """Les lecteurs voient les paquets écrits par le thread écrivain"""
+        persistence = TrafficPersistence(self.db_path, read_pool_size=4)
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    persistence.load_packets(hours=1)
+                    persistence.get_stats_summary()
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        try:
+            for thread in readers:
+                thread.start()
+            for i in range(200):
+                persistence.save_packet(_make_packet(i))
+            stop.set()
+            for thread in readers:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(len(persistence.load_packets(hours=1, limit=1000)), 200)
+        finally:
+            stop.set()
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
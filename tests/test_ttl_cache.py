@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du cache de déduplication TTLCache (expiration par la tête)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+
+from ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """check_and_add, age et expiration des clés les plus anciennes"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(5.0, clock=self.clock)
+
+    def test_duplicate_within_window(self):
+        self.assertFalse(self.cache.check_and_add((42, 1, 2)))
+        self.clock.now += 4.9
+        self.assertTrue(self.cache.check_and_add((42, 1, 2)))
+        # Un doublon ne repousse pas l'expiration
+        self.clock.now += 0.1
+        self.assertFalse(self.cache.check_and_add((42, 1, 2)))
+
+    def test_expiry_from_head(self):
+        for i in range(10):
+            self.cache.add(i)
+            self.clock.now += 1
+        # Clés 0 à 4 ajoutées il y a 6 à 10 s, 5 à 9 il y a 1 à 5 s (5 expirée)
+        self.assertEqual(len(self.cache), 4)
+        self.assertNotIn(5, self.cache)
+        self.assertEqual(self.cache.age(9), 1.0)
+        self.assertIsNone(self.cache.age(0))
+
+    def test_add_refreshes_key(self):
+        self.cache.add('a')
+        self.cache.add('b')
+        self.clock.now += 3
+        self.cache.add('a')
+        self.clock.now += 3
+        # 'b' expirée derrière 'a' rafraîchie : l'ordre d'insertion suit le dernier ajout
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.cache.discard('a')
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des colonnes typées de télémétrie et de position des paquets
+(remplissage à l'insertion, migration depuis le JSON, JSON optionnel)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import tempfile
+import sqlite3
+import json
+import time
+
+from traffic_persistence import TrafficPersistence
+
+
+TELEMETRY = {'battery': 87, 'voltage': 4.05, 'channel_util': 12.5, 'air_util': 3.25}
+POSITION = {'latitude': 48.85, 'longitude': 2.35, 'altitude': 35}
+
+
+def _packet(packet_type, timestamp, **extra):
+    packet = {'timestamp': timestamp, 'from_id': 0x1234, 'to_id': 0x5678,
+              'source': 'local', 'packet_type': packet_type, 'snr': 5.0}
+    packet.update(extra)
+    return packet
+
+
+class TestTypedPacketColumns(unittest.TestCase):
+    """Télémétrie et position lues sans décodage JSON"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'traffic.db')
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.rmdir(self.tmpdir)
+
+    def test_columns_filled_at_insert(self):
+        """Les champs utiles sont extraits en colonnes et relus à l'identique"""
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            now = time.time()
+            persistence.save_packet(_packet('TELEMETRY_APP', now - 20, telemetry=TELEMETRY))
+            persistence.save_packet(_packet('POSITION_APP', now - 10, position=POSITION))
+
+            row = persistence.conn.execute('''
+                SELECT battery, voltage, channel_util, air_util FROM packets
+                WHERE packet_type = 'TELEMETRY_APP'
+            ''').fetchone()
+            self.assertEqual(tuple(row), (87, 4.05, 12.5, 3.25))
+
+            packets = {p['packet_type']: p for p in persistence.load_packets(hours=1)}
+            self.assertEqual(packets['TELEMETRY_APP']['telemetry'], TELEMETRY)
+            self.assertEqual(packets['POSITION_APP']['position'], POSITION)
+            self.assertNotIn('battery', packets['TELEMETRY_APP'])
+
+            links = persistence.load_radio_links_with_positions(hours=1)
+            position_link = [l for l in links if 'sender_lat' in l]
+            self.assertEqual(len(position_link), 1)
+            self.assertEqual(position_link[0]['sender_lat'], 48.85)
+        finally:
+            persistence.close()
+
+    def test_json_blobs_disabled(self):
+        """Sans JSON, les lectures s'appuient uniquement sur les colonnes typées"""
+        persistence = TrafficPersistence(self.db_path, json_blobs=False)
+        try:
+            persistence.save_packet(_packet('TELEMETRY_APP', time.time(), telemetry=TELEMETRY))
+            row = persistence.conn.execute("SELECT telemetry, voltage FROM packets").fetchone()
+            self.assertIsNone(row['telemetry'])
+            self.assertEqual(row['voltage'], 4.05)
+            self.assertEqual(persistence.load_packets(hours=1)[0]['telemetry'], TELEMETRY)
+
+            # Agrégats recalculés en SQL depuis les colonnes typées
+            persistence.rebuild_packet_rollups()
+            rollups = persistence.load_packet_rollups(hours=1)
+            self.assertEqual(rollups[0]['channel_util_count'], 1)
+            self.assertEqual(rollups[0]['channel_util_sum'], 12.5)
+        finally:
+            persistence.close()
+
+    def test_existing_json_rows_migrated(self):
+        """Une base en version 6 voit ses colonnes typées remplies depuis le JSON"""
+        TrafficPersistence(self.db_path).close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO packets (timestamp, from_id, to_id, packet_type, telemetry, position)
+            VALUES (?, '4660', '22136', 'TELEMETRY_APP', ?, ?)
+        ''', (time.time(), json.dumps(TELEMETRY), json.dumps(POSITION)))
+        for column in ('battery', 'voltage', 'channel_util', 'air_util', 'latitude', 'longitude', 'altitude'):
+            conn.execute(f"ALTER TABLE packets DROP COLUMN {column}")
+            conn.execute(f"ALTER TABLE meshcore_packets DROP COLUMN {column}")
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.close()
+
+        persistence = TrafficPersistence(self.db_path)
+        try:
+            row = persistence.conn.execute('''
+                SELECT battery, air_util, latitude, altitude FROM packets
+            ''').fetchone()
+            self.assertEqual(tuple(row), (87, 3.25, 48.85, 35))
+        finally:
+            persistence.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
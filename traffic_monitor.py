@@ -6,12 +6,17 @@ Collecte TOUS les types de paquets Meshtastic
 Version complète avec métriques par type de paquet
 """
 
+import threading
 import time
 from collections import deque, defaultdict
 from datetime import datetime, timedelta
 from config import *
 from utils import *
 from traffic_persistence import TrafficPersistence
+from packet_identity import PacketIdentityService, packet_key, transport_for_source, RADIO_TRANSPORTS
+from rate_counter import SlidingWindowCounter
+from packet_records import PacketRecord, MessageRecord
+from lora_airtime import airtime_table, packet_payload_bytes, estimate_payload_bytes, MAX_PAYLOAD_BYTES
 import logging
 
 # Import cryptography for decryption of encrypted DM packets
@@ -38,9 +43,9 @@ class TrafficMonitor:
     def __init__(self, node_manager):
         self.node_manager = node_manager
         # File des messages publics
-        self.public_messages = deque(maxlen=2000)
+        self.public_messages = deque(maxlen=2000)  # MessageRecord (cf. packet_records)
         # File de TOUS les paquets
-        self.all_packets = deque(maxlen=5000)  # Plus grand pour tous les types
+        self.all_packets = deque(maxlen=5000)  # Plus grand pour tous les types (PacketRecord)
         self.traffic_retention_hours = 24
 
         # === HISTOGRAMME : COLLECTE PAR TYPE DE PAQUET ===
@@ -87,6 +92,7 @@ class TrafficMonitor:
             'total_packets': 0,
             'by_type': defaultdict(int),  # Type -> count
             'total_bytes': 0,
+            'total_airtime_ms': 0.0,  # Temps d'antenne estimé (preset LORA_MODEM_PRESET)
             'first_seen': None,
             'last_seen': None,
             'hourly_activity': defaultdict(int),
@@ -114,6 +120,11 @@ class TrafficMonitor:
                 'packets_originated': 0
             }
         })
+        # Nœuds modifiés depuis la dernière sauvegarde (seuls ceux-ci sont réécrits en base)
+        self._dirty_node_stats = set()
+        # Statistiques partagées (par nœud, globales, réseau) : add_packet est appelé en
+        # parallèle par les workers 'stats' du pipeline d'ingestion
+        self._stats_lock = threading.RLock()
         
         # === STATISTIQUES GLOBALES PAR TYPE ===
         self.global_packet_stats = {
@@ -162,18 +173,51 @@ class TrafficMonitor:
             'packets_relayed': 0
         }
 
+        # === TEMPS D'ANTENNE LoRa ===
+        # Durée d'émission de chaque paquet reçu selon sa taille et le preset de modem
+        # (table précalculée par taille de payload : une indexation par paquet)
+        self.airtime_preset = globals().get('LORA_MODEM_PRESET', 'LONG_FAST')
+        try:
+            self._airtime_ms = airtime_table(self.airtime_preset)
+        except ValueError as e:
+            error_print(f"⚠️ LORA_MODEM_PRESET: {e} - LONG_FAST utilisé")
+            self.airtime_preset = 'LONG_FAST'
+            self._airtime_ms = airtime_table(self.airtime_preset)
+
         # === PERSISTANCE SQLITE ===
-        self.persistence = TrafficPersistence()
+        # Write-behind optionnel: les paquets sont écrits par lots par un thread dédié
+        # (un commit par lot au lieu d'un fsync par paquet sur la carte SD)
+        self.persistence = TrafficPersistence(
+            write_behind=globals().get('TRAFFIC_DB_WRITE_BEHIND', False),
+            write_batch_size=globals().get('TRAFFIC_DB_WRITE_BATCH_SIZE', 100),
+            write_flush_ms=globals().get('TRAFFIC_DB_WRITE_FLUSH_MS', 500),
+            write_queue_max=globals().get('TRAFFIC_DB_WRITE_QUEUE_MAX', 5000),
+            wal=globals().get('TRAFFIC_DB_WAL', True),
+            read_pool_size=globals().get('TRAFFIC_DB_READ_POOL_SIZE', 20),
+            startup_check=globals().get('TRAFFIC_DB_STARTUP_CHECK', 'header'),
+            json_blobs=globals().get('TRAFFIC_DB_JSON_BLOBS', True),
+            partition_period=globals().get('TRAFFIC_DB_PARTITION_PERIOD'),
+            hot_hours=globals().get('TRAFFIC_DB_HOT_HOURS', 48),
+            archive_dir=globals().get('TRAFFIC_DB_ARCHIVE_DIR'),
+            ram_dir=globals().get('TRAFFIC_DB_RAM_DIR'),
+            checkpoint_interval=globals().get('TRAFFIC_DB_CHECKPOINT_INTERVAL', 900),
+            checkpoint_pages=globals().get('TRAFFIC_DB_CHECKPOINT_PAGES', 256),
+            airtime_preset=self.airtime_preset,
+            convert_auto_vacuum=globals().get('TRAFFIC_DB_VACUUM_CONVERT', False)
+        )
         logger.info("Initialisation de la persistance SQLite")
 
         # Charger les données existantes au démarrage
         self._load_persisted_data()
 
         # === DÉDUPLICATION DES PAQUETS ===
-        # Cache pour éviter les doublons (même paquet reçu via serial et TCP)
-        # Format: {packet_id: timestamp} avec nettoyage automatique
-        self._recent_packets = {}
-        self._dedup_window = 5.0  # 5 secondes de fenêtre de déduplication
+        # Identité des paquets partagée par tous les transports (serial, TCP, MeshCore,
+        # et le collecteur MQTT via main_bot) : fenêtre par transport, O(1) amorti
+        self.packet_identity = PacketIdentityService(
+            windows=globals().get('PACKET_DEDUP_WINDOWS'))
+
+        # Débit des paquets retenus (après déduplication) par source et type
+        self.packet_rates = SlidingWindowCounter()
     
     def _get_channel_psk(self, channel_index=0, interface=None):
         """
@@ -640,29 +684,19 @@ class TrafficMonitor:
             # Créer une clé unique pour détecter les doublons
             packet_id = packet.get('id', None)  # ID Meshtastic unique
 
-            # Nettoyer le cache des anciens paquets (> 5 secondes)
-            current_time = timestamp
-            self._recent_packets = {
-                k: v for k, v in self._recent_packets.items()
-                if current_time - v < self._dedup_window
-            }
+            # Clé (from, id) commune à tous les transports ; sans ID : from/to/seconde
+            dedup_key = packet_key(packet_id, from_id, to_id, timestamp)
 
-            # Créer une clé de déduplication
-            if packet_id:
-                dedup_key = f"{packet_id}_{from_id}_{to_id}"
-            else:
-                # Fallback si pas d'ID : utiliser from/to/timestamp arrondi
-                dedup_key = f"{from_id}_{to_id}_{int(timestamp)}"
-
-            # Vérifier si c'est un doublon
-            if dedup_key in self._recent_packets:
+            # Vérifier si c'est un doublon radio (fenêtre du transport, 5 s par défaut) ;
+            # un paquet déjà vu par MQTT est compté mais reste du trafic radio réel
+            first_transport = self.packet_identity.observe(
+                dedup_key, transport_for_source(source), scope=RADIO_TRANSPORTS)
+            if first_transport:
                 # Paquet déjà vu récemment, probablement doublon serial/TCP
-                logger.debug(f"Paquet dupliqué ignoré: {dedup_key} (source={source})")
+                logger.debug(f"Paquet dupliqué ignoré: {dedup_key} (source={source}, "
+                             f"vu d'abord via {first_transport})")
                 return
 
-            # Enregistrer ce paquet comme vu
-            self._recent_packets[dedup_key] = timestamp
-
             # === EXTRACTION RSSI/SNR ===
             rssi = packet.get('rssi', packet.get('rxRssi', 0))
             snr = packet.get('snr', packet.get('rxSnr', 0.0))
@@ -878,6 +912,15 @@ class TrafficMonitor:
 
             # Calculer la taille approximative du paquet
             packet_size = len(str(packet))
+
+            # Taille réelle du payload chiffré (estimée depuis le type à défaut) et temps
+            # d'antenne selon le preset Meshtastic (MeshCore : modulation différente)
+            payload_bytes = packet_payload_bytes(packet)
+            if payload_bytes is None:
+                payload_bytes = estimate_payload_bytes(packet_type, message_text)
+            airtime_ms = None
+            if source != 'meshcore':
+                airtime_ms = self._airtime_ms[min(payload_bytes, MAX_PAYLOAD_BYTES)]
             
             # Calculer les hops
             hop_limit = packet.get('hopLimit', 0)
@@ -914,6 +957,8 @@ class TrafficMonitor:
                 'hop_limit': hop_limit,
                 'hop_start': hop_start,
                 'size': packet_size,
+                'payload_bytes': payload_bytes,
+                'airtime_ms': airtime_ms,
                 'is_broadcast': is_broadcast,
                 'is_encrypted': is_encrypted,
                 # NEW: Additional routing metadata
@@ -976,7 +1021,10 @@ class TrafficMonitor:
                                 # Mise à jour du node_manager (en mémoire)
                                 self.node_manager.update_node_position(from_id, lat, lon, alt)
 
+            # Enregistrement compact (__slots__) : accès par clé inchangé pour les rapports
+            packet_entry = PacketRecord(packet_entry)
             self.all_packets.append(packet_entry)
+            self.packet_rates.add(source, packet_type)
             
             # DIAGNOSTIC: Confirm packet was appended (DEBUG only)
             logger.debug(f"✅ Paquet ajouté à all_packets: {packet_type} de {sender_name} (total: {len(self.all_packets)})")
@@ -1020,10 +1068,11 @@ class TrafficMonitor:
             # NOTE: Les messages publics sont maintenant gérés par add_public_message()
             # appelé depuis main_bot.py pour éviter les doublons
             
-            # Mise à jour des statistiques
-            self._update_packet_statistics(from_id, sender_name, packet_entry, packet)
-            self._update_global_packet_statistics(packet_entry)
-            self._update_network_statistics(packet_entry)
+            # Mise à jour des statistiques (compteurs et moyennes partagés entre workers)
+            with self._stats_lock:
+                self._update_packet_statistics(from_id, sender_name, packet_entry, packet)
+                self._update_global_packet_statistics(packet_entry)
+                self._update_network_statistics(packet_entry)
             
             # === LOG UNIFIÉ POUR TOUS LES PAQUETS ===
             # Removed redundant "📊 Paquet enregistré" line to reduce log verbosity
@@ -1473,6 +1522,7 @@ class TrafficMonitor:
     def _update_packet_statistics(self, node_id, sender_name, packet_entry, packet):
         """Mettre à jour les statistiques détaillées par type de paquet"""
         stats = self.node_packet_stats[node_id]
+        self._dirty_node_stats.add(node_id)
         packet_type = packet_entry['packet_type']
         timestamp = packet_entry['timestamp']
         
@@ -1480,6 +1530,7 @@ class TrafficMonitor:
         stats['total_packets'] += 1
         stats['by_type'][packet_type] += 1
         stats['total_bytes'] += packet_entry['size']
+        stats['total_airtime_ms'] = stats.get('total_airtime_ms', 0) + (packet_entry.get('airtime_ms') or 0)
         
         # Timestamps
         if stats['first_seen'] is None:
@@ -1579,14 +1630,17 @@ class TrafficMonitor:
             current_avg = self.network_stats['avg_snr']
             self.network_stats['avg_snr'] = (current_avg * (total_packets - 1) + packet_entry['snr']) / total_packets
     
-    def get_top_talkers_report(self, hours=24, top_n=10, include_packet_types=True):
+    def get_top_talkers_report(self, hours=24, top_n=10, include_packet_types=True, sort_by='packets'):
         """
         Générer un rapport des top talkers avec breakdown par type de paquet
         Pour Telegram: inclut aussi les données de canal (channel_util et air_util)
+
+        sort_by: 'packets' (nombre de paquets) ou 'airtime' (temps d'antenne estimé,
+        calculé pour chaque paquet selon sa taille et LORA_MODEM_PRESET)
         """
         try:
-            # Charger les paquets directement depuis SQLite pour avoir les données les plus récentes
-            all_packets = self.persistence.load_packets(hours=hours, limit=10000)
+            # Agrégats horaires SQLite (exacts sur la fenêtre, sans limite de paquets)
+            rollups = self.persistence.load_packet_rollups(hours=hours)
 
             # Calculer les stats pour la période
             period_stats = defaultdict(lambda: {
@@ -1601,10 +1655,13 @@ class TrafficMonitor:
                 'other_channel': 0,
                 'other': 0,
                 'bytes': 0,
+                'airtime_ms': 0.0,
                 'last_seen': 0,
                 'name': '',
-                'channel_utils': [],  # Pour calculer moyenne canal%
-                'air_utils': []  # Pour calculer moyenne Air TX
+                'channel_util_sum': 0.0,  # Pour calculer moyenne canal%
+                'channel_util_count': 0,
+                'air_util_sum': 0.0,  # Pour calculer moyenne Air TX
+                'air_util_count': 0
             })
                    # ✅ AJOUT : Compter par source
             local_count = 0
@@ -1628,9 +1685,6 @@ class TrafficMonitor:
                     else:
                         local_count += 1
 
-            if not period_stats:
-                return f"📊 Aucune activité dans les {hours}h"
-
             # Trier par nombre de messages
             sorted_nodes = sorted(
                 period_stats.items(),
@@ -1651,59 +1705,68 @@ class TrafficMonitor:
             lines.append(f"  📡 TCP: {remote_count}")
             lines.append("")
 
-            # Parcourir tous les paquets
-            for packet in all_packets:
-                    from_id = packet['from_id']
+            # Parcourir les agrégats horaires (une ligne par heure/nœud/type/source)
+            type_distribution = defaultdict(int)
+            for rollup in rollups:
+                    from_id = rollup['from_id']
+                    count = rollup['packet_count']
                     stats = period_stats[from_id]
-                    stats['total_packets'] += 1
-                    stats['bytes'] += packet['size']
-                    stats['last_seen'] = packet['timestamp']
-                    stats['name'] = packet['sender_name']
+                    stats['total_packets'] += count
+                    stats['bytes'] += rollup['bytes_total']
+                    stats['airtime_ms'] += rollup['airtime_ms'] or 0
+                    if rollup['last_seen'] and rollup['last_seen'] >= stats['last_seen']:
+                        stats['last_seen'] = rollup['last_seen']
+                        stats['name'] = rollup['sender_name'] or stats['name']
                     
                     # Catégoriser par type
-                    packet_type = packet['packet_type']
+                    packet_type = rollup['packet_type']
+                    type_distribution[packet_type] += count
                     if packet_type == 'TEXT_MESSAGE_APP':
-                        stats['messages'] += 1
+                        stats['messages'] += count
                     elif packet_type == 'TELEMETRY_APP':
-                        stats['telemetry'] += 1
+                        stats['telemetry'] += count
                         # Collecter les données de canal pour Telegram (uniquement depuis TELEMETRY_APP)
-                        if include_packet_types and packet.get('telemetry'):
-                            telemetry = packet['telemetry']
-                            if telemetry.get('channel_util') is not None:
-                                stats['channel_utils'].append(telemetry['channel_util'])
-                            if telemetry.get('air_util') is not None:
-                                stats['air_utils'].append(telemetry['air_util'])
+                        if include_packet_types:
+                            stats['channel_util_sum'] += rollup['channel_util_sum']
+                            stats['channel_util_count'] += rollup['channel_util_count']
+                            stats['air_util_sum'] += rollup['air_util_sum']
+                            stats['air_util_count'] += rollup['air_util_count']
                     elif packet_type == 'POSITION_APP':
-                        stats['position'] += 1
+                        stats['position'] += count
                     elif packet_type == 'NODEINFO_APP':
-                        stats['nodeinfo'] += 1
+                        stats['nodeinfo'] += count
                     elif packet_type == 'ROUTING_APP':
-                        stats['routing'] += 1
+                        stats['routing'] += count
                     elif packet_type in ('ENCRYPTED', 'PKI_ENCRYPTED'):
-                        stats['encrypted'] += 1
+                        stats['encrypted'] += count
                     elif packet_type == 'ECDH_DM':
-                        stats['ecdh_dm'] += 1
+                        stats['ecdh_dm'] += count
                     elif packet_type == 'OTHER_CHANNEL':
-                        stats['other_channel'] += 1
+                        stats['other_channel'] += count
                     else:
-                        stats['other'] += 1
+                        stats['other'] += count
             
             if not period_stats:
                 return f"📊 Aucune activité dans les {hours}h"
             
-            # Trier par nombre total de paquets
+            # Trier par nombre total de paquets (ou par temps d'antenne)
+            sort_key = 'airtime_ms' if sort_by == 'airtime' else 'total_packets'
             sorted_nodes = sorted(
                 period_stats.items(),
-                key=lambda x: x[1]['total_packets'],
+                key=lambda x: x[1][sort_key],
                 reverse=True
             )[:top_n]
             
             # Construire le rapport
             lines = []
-            lines.append(f"🏆 TOP TALKERS ({hours}h)")
+            if sort_by == 'airtime':
+                lines.append(f"🏆 TOP TEMPS D'ANTENNE ({hours}h, {self.airtime_preset})")
+            else:
+                lines.append(f"🏆 TOP TALKERS ({hours}h)")
             lines.append(f"{'='*40}")
             
             total_packets = sum(s['total_packets'] for _, s in period_stats.items())
+            total_airtime = sum(s['airtime_ms'] for _, s in period_stats.items()) / 1000
             
             for rank, (node_id, stats) in enumerate(sorted_nodes, 1):
                 name = truncate_text(stats['name'], 35)
@@ -1728,6 +1791,12 @@ class TrafficMonitor:
                     lines.append(f" 📦 {packet_count} paquets ({percentage:.1f}%)  {stats['bytes']/1024:.1f}KB")
                 else:
                     lines.append(f" 📦 {packet_count} paquets ({percentage:.1f}%)  {stats['bytes']}B")
+
+                # Temps d'antenne consommé (part du temps d'antenne de tous les nœuds)
+                if (include_packet_types or sort_by == 'airtime') and stats['airtime_ms'] > 0:
+                    airtime = stats['airtime_ms'] / 1000
+                    share = airtime / total_airtime * 100 if total_airtime > 0 else 0
+                    lines.append(f" ⏱️ {self._format_airtime(airtime)} d'antenne ({share:.1f}%)")
                 
                 # Breakdown par type si demandé
                 if include_packet_types:
@@ -1756,13 +1825,13 @@ class TrafficMonitor:
                     
                     # Ajouter les données de canal (Channel% et Air TX) uniquement pour Telegram
                     # Vérifier que les listes ne sont pas vides avant de calculer les moyennes
-                    if include_packet_types and (stats['channel_utils'] or stats['air_utils']):
+                    if include_packet_types and (stats['channel_util_count'] or stats['air_util_count']):
                         channel_line_parts = []
-                        if stats['channel_utils']:
-                            avg_channel = sum(stats['channel_utils']) / len(stats['channel_utils'])
+                        if stats['channel_util_count']:
+                            avg_channel = stats['channel_util_sum'] / stats['channel_util_count']
                             channel_line_parts.append(f"Canal: {avg_channel:.1f}%")
-                        if stats['air_utils']:
-                            avg_air = sum(stats['air_utils']) / len(stats['air_utils'])
+                        if stats['air_util_count']:
+                            avg_air = stats['air_util_sum'] / stats['air_util_count']
                             if avg_air > 0.2:
                                 channel_line_parts.append(f"Air TX: {avg_air:.1f}%")
                         if channel_line_parts:
@@ -1777,12 +1846,12 @@ class TrafficMonitor:
             lines.append(f"Total paquets: {total_packets}")
             lines.append(f"Nœuds actifs: {len(period_stats)}")
             lines.append(f"Moy/nœud: {total_packets/len(period_stats):.1f}")
+            if total_airtime > 0:
+                # Occupation du canal estimée sur la fenêtre (paquets entendus par le bot)
+                occupancy = total_airtime / (hours * 3600) * 100
+                lines.append(f"Temps d'antenne: {self._format_airtime(total_airtime)} ({occupancy:.2f}% du temps)")
             
-            # Distribution par type de paquet
-            type_distribution = defaultdict(int)
-            for packet in all_packets:
-                type_distribution[packet['packet_type']] += 1
-            
+            # Distribution par type de paquet (calculée depuis les agrégats)
             if type_distribution:
                 lines.append(f"\n📦 Distribution des types:")
                 sorted_types = sorted(type_distribution.items(), key=lambda x: x[1], reverse=True)
@@ -1809,20 +1878,29 @@ class TrafficMonitor:
             error_print(traceback.format_exc())
             return f"❌ Erreur: {str(e)[:50]}"
     
+    @staticmethod
+    def _format_airtime(seconds):
+        """Durée d'antenne lisible : 12.3s, 4.5min, 1.2h"""
+        if seconds < 60:
+            return f"{seconds:.1f}s"
+        if seconds < 3600:
+            return f"{seconds / 60:.1f}min"
+        return f"{seconds / 3600:.1f}h"
+
     def get_packet_type_summary(self, hours=1):
         """
         Obtenir un résumé des types de paquets sur une période
         """
         try:
-            # Charger les paquets directement depuis SQLite pour avoir les données les plus récentes
-            all_packets = self.persistence.load_packets(hours=hours, limit=10000)
+            # Agrégats horaires SQLite (exacts sur la fenêtre)
+            rollups = self.persistence.load_packet_rollups(hours=hours)
 
             type_counts = defaultdict(int)
             total = 0
 
-            for packet in all_packets:
-                type_counts[packet['packet_type']] += 1
-                total += 1
+            for rollup in rollups:
+                type_counts[rollup['packet_type']] += rollup['packet_count']
+                total += rollup['packet_count']
             
             if not type_counts:
                 return f"Aucun paquet dans les {hours}h"
@@ -1845,16 +1923,16 @@ class TrafficMonitor:
         Stats rapides pour Meshtastic (version courte)
         """
         try:
-            # Charger les paquets directement depuis SQLite pour avoir les données les plus récentes
-            all_packets = self.persistence.load_packets(hours=3, limit=10000)
+            # Agrégats horaires SQLite (exacts sur la fenêtre)
+            rollups = self.persistence.load_packet_rollups(hours=3)
 
             # Compter tous les paquets récents
             recent_packets = defaultdict(int)
             packet_types = defaultdict(int)
 
-            for packet in all_packets:
-                recent_packets[packet['sender_name']] += 1
-                packet_types[packet['packet_type']] += 1
+            for rollup in rollups:
+                recent_packets[rollup['sender_name']] += rollup['packet_count']
+                packet_types[rollup['packet_type']] += rollup['packet_count']
             
             if not recent_packets:
                 return "📊 Silence radio (3h)"
@@ -1872,6 +1950,10 @@ class TrafficMonitor:
                 dominant = max(packet_types.items(), key=lambda x: x[1])
                 type_short = self.packet_type_names.get(dominant[0], dominant[0])[:10]
                 lines.append(f"Type:{type_short}")
+
+            # Débit récent (compteur glissant, sans requête)
+            if self.packet_rates.count(900):
+                lines.append(f"Débit:{self.packet_rates.rate(900):.1f}/min (15m)")
             
             return "\n".join(lines)
             
@@ -1900,24 +1982,26 @@ class TrafficMonitor:
     
     def reset_statistics(self):
         """Réinitialiser toutes les statistiques"""
-        self.node_packet_stats.clear()
-        self.global_packet_stats = {
-            'total_packets': 0,
-            'by_type': defaultdict(int),
-            'total_bytes': 0,
-            'unique_nodes': set(),
-            'busiest_hour': None,
-            'quietest_hour': None,
-            'last_reset': time.time()
-        }
-        self.network_stats = {
-            'total_hops': 0,
-            'max_hops_seen': 0,
-            'avg_rssi': 0.0,
-            'avg_snr': 0.0,
-            'packets_direct': 0,
-            'packets_relayed': 0
-        }
+        with self._stats_lock:
+            self.node_packet_stats.clear()
+            self._dirty_node_stats.clear()
+            self.global_packet_stats = {
+                'total_packets': 0,
+                'by_type': defaultdict(int),
+                'total_bytes': 0,
+                'unique_nodes': set(),
+                'busiest_hour': None,
+                'quietest_hour': None,
+                'last_reset': time.time()
+            }
+            self.network_stats = {
+                'total_hops': 0,
+                'max_hops_seen': 0,
+                'avg_rssi': 0.0,
+                'avg_snr': 0.0,
+                'packets_direct': 0,
+                'packets_relayed': 0
+            }
         debug_print("📊 Statistiques réinitialisées")
     
     def export_statistics(self):
@@ -2305,13 +2389,13 @@ class TrafficMonitor:
             str: Vue d'ensemble formatée avec compteurs par type
         """
         try:
-            # Charger les paquets directement depuis la base de données
-            packets = self.persistence.load_packets(hours=hours, limit=10000)
+            # Agrégats horaires SQLite (exacts sur la fenêtre)
+            rollups = self.persistence.load_packet_rollups(hours=hours)
 
             # Compter les paquets par type
             type_counts = defaultdict(int)
-            for packet in packets:
-                type_counts[packet['packet_type']] += 1
+            for rollup in rollups:
+                type_counts[rollup['packet_type']] += rollup['packet_count']
 
             # Mapping des noms courts
             short_names = {
@@ -2362,9 +2446,6 @@ class TrafficMonitor:
             str: Histogramme ASCII formaté
         """
         try:
-            # Charger les paquets directement depuis la base de données
-            all_packets = self.persistence.load_packets(hours=hours, limit=10000)
-
             # Mapping des filtres vers les types de paquets réels
             filter_mapping = {
                 'messages': 'TEXT_MESSAGE_APP',
@@ -2375,30 +2456,26 @@ class TrafficMonitor:
                 'routing': 'ROUTING_APP'
             }
 
-            # Filtrer les paquets par type
-            filtered_packets = []
-            for pkt in all_packets:
-                if packet_filter == 'all':
-                    filtered_packets.append(pkt)
-                elif packet_filter in filter_mapping:
-                    if pkt['packet_type'] == filter_mapping[packet_filter]:
-                        filtered_packets.append(pkt)
-                elif pkt['packet_type'] == packet_filter:
-                    filtered_packets.append(pkt)
-            
-            if not filtered_packets:
+            # Charger les agrégats horaires filtrés par type
+            if packet_filter == 'all':
+                packet_types = None
+            else:
+                packet_types = [filter_mapping.get(packet_filter, packet_filter)]
+            rollups = self.persistence.load_packet_rollups(hours=hours, packet_types=packet_types)
+            
+            if not rollups:
                 return f"📊 Aucun paquet '{packet_filter}' dans les {hours}h"
             
             # Compter les paquets par heure
             hourly_counts = defaultdict(int)
-            for pkt in filtered_packets:
-                dt = datetime.fromtimestamp(pkt['timestamp'])
+            for rollup in rollups:
+                dt = datetime.fromtimestamp(rollup['hour_bucket'])
                 hour = dt.hour
-                hourly_counts[hour] += 1
+                hourly_counts[hour] += rollup['packet_count']
             
             # Statistiques
-            total_packets = len(filtered_packets)
-            unique_nodes = len(set(pkt['from_id'] for pkt in filtered_packets))
+            total_packets = sum(rollup['packet_count'] for rollup in rollups)
+            unique_nodes = len(set(rollup['from_id'] for rollup in rollups))
             
             # Construire le graphique
             lines = []
@@ -2467,8 +2544,8 @@ class TrafficMonitor:
             str: Histogramme avec sparkline
         """
         try:
-            # Charger les paquets depuis SQLite
-            all_packets = self.persistence.load_packets(hours=hours, limit=10000)
+            # Agrégats horaires depuis SQLite
+            all_rollups = self.persistence.load_packet_rollups(hours=hours)
 
             # Mapping des types
             type_mapping = {
@@ -2481,7 +2558,7 @@ class TrafficMonitor:
             }
 
             # Filtrer par type si spécifié
-            filtered_packets = []
+            filtered_rollups = []
             filter_label = "TOUS"
 
             if packet_type:
@@ -2496,14 +2573,14 @@ class TrafficMonitor:
                         break
 
                 if matched_type:
-                    filtered_packets = [p for p in all_packets if p['packet_type'] == matched_type]
+                    filtered_rollups = [r for r in all_rollups if r['packet_type'] == matched_type]
                 else:
-                    filtered_packets = [p for p in all_packets if p['packet_type'] == packet_type]
+                    filtered_rollups = [r for r in all_rollups if r['packet_type'] == packet_type]
                     filter_label = packet_type.upper()
             else:
-                filtered_packets = all_packets
+                filtered_rollups = all_rollups
 
-            if not filtered_packets:
+            if not filtered_rollups:
                 return f"📊 Aucun paquet ({hours}h)"
 
             # Compter par heure (chronologique sur les dernières X heures)
@@ -2517,8 +2594,8 @@ class TrafficMonitor:
                 hour_start = target_time.replace(minute=0, second=0, microsecond=0)
                 hour_end = hour_start + timedelta(hours=1)
 
-                count = sum(1 for p in filtered_packets
-                           if hour_start.timestamp() <= p['timestamp'] < hour_end.timestamp())
+                count = sum(r['packet_count'] for r in filtered_rollups
+                           if hour_start.timestamp() <= r['hour_bucket'] < hour_end.timestamp())
                 hourly_counts.append(count)
                 hour_labels.append(hour_start.strftime('%H'))
 
@@ -2543,8 +2620,8 @@ class TrafficMonitor:
                     sparkline += sparkline_symbols[symbol_idx]
 
             # Stats
-            total = len(filtered_packets)
-            unique_nodes = len(set(p['from_id'] for p in filtered_packets))
+            total = sum(r['packet_count'] for r in filtered_rollups)
+            unique_nodes = len(set(r['from_id'] for r in filtered_rollups))
             avg = total / hours
             current_hour_count = hourly_counts[-1] if hourly_counts else 0
 
@@ -2638,16 +2715,16 @@ class TrafficMonitor:
             sender_name = self.node_manager.get_node_name(from_id)
 
             # Enregistrer le message avec source
-            message_entry = {
-                'timestamp': timestamp,
-                'from_id': from_id,
-                'sender_name': sender_name,
-                'message': message_text,
-                'rssi': packet.get('rssi', 0),
-                'snr': packet.get('snr', 0.0),
-                'message_length': len(message_text),
-                'source': source  # ← AJOUT
-            }
+            message_entry = MessageRecord(
+                timestamp=timestamp,
+                from_id=from_id,
+                sender_name=sender_name,
+                message=message_text,
+                rssi=packet.get('rssi', 0),
+                snr=packet.get('snr', 0.0),
+                message_length=len(message_text),
+                source=source  # ← AJOUT
+            )
 
             self.public_messages.append(message_entry)
 
@@ -2678,20 +2755,10 @@ class TrafficMonitor:
 
     def _is_duplicate(self, new_message):
         """Vérifier si le message est un doublon récent"""
-        if not self.public_messages:
-            return False
-        
-        # Vérifier les 10 derniers messages
-        recent = list(self.public_messages)[-10:]
-        
-        for msg in reversed(recent):
-            # Même expéditeur, même texte, < 5 secondes d'écart
-            if (msg['from_id'] == new_message['from_id'] and
-                msg['message'] == new_message['message'] and
-                abs(msg['timestamp'] - new_message['timestamp']) < 5):
-                return True
-        
-        return False        
+        # Même expéditeur, même texte, dans la fenêtre du transport (5 s par défaut)
+        key = ('text', new_message['from_id'], new_message['message'])
+        transport = transport_for_source(new_message.get('source', 'local'))
+        return self.packet_identity.is_duplicate(key, transport, scope=RADIO_TRANSPORTS)
 
     def _update_node_statistics(self, node_id, sender_name, message_text, timestamp):
         """Mettre à jour les statistiques d'un nœud"""
@@ -2820,30 +2887,16 @@ class TrafficMonitor:
             lines.append(f"\n📡 UTILISATION DU CANAL:")
             lines.append("-" * 50)
             
-            # Calculer l'utilisation moyenne par nœud depuis les paquets de télémétrie
-            node_channel_stats = {}
-            for packet in all_packets:
-                if packet['packet_type'] == 'TELEMETRY_APP':
-                    from_id = packet['from_id']
-                    # Extraire channelUtilization depuis le paquet
-                    if from_id in self.node_packet_stats:
-                        stats = self.node_packet_stats[from_id]
-                        if 'telemetry_stats' in stats and stats['telemetry_stats']['last_channel_util']:
-                            ch_util = stats['telemetry_stats']['last_channel_util']
-                            if from_id not in node_channel_stats:
-                                node_channel_stats[from_id] = []
-                            node_channel_stats[from_id].append(ch_util)
-            
-            # Moyennes par nœud
-            for node_id, utils in node_channel_stats.items():
-                if utils:
-                    avg_util = sum(utils) / len(utils)
-                    if avg_util > 15:  # Seuil d'alerte à 15%
-                        name = self.node_manager.get_node_name(node_id)
-                        icon = "🔴" if avg_util > 25 else "🟡"
-                        lines.append(f"{icon} {name[:20]}: {avg_util:.1f}% (moy)")
-                        if avg_util > 20:
-                            lines.append(f"   ⚠️  UTILISATION ÉLEVÉE - Risque de congestion")
+            # Moyennes par nœud depuis les séries de télémétrie (tier adapté à la fenêtre)
+            averages = self.persistence.load_telemetry_averages(hours=hours)
+            for node_id, average in averages.items():
+                avg_util = average['channel_util']
+                if avg_util is not None and avg_util > 15:  # Seuil d'alerte à 15%
+                    name = self.node_manager.get_node_name(node_id)
+                    icon = "🔴" if avg_util > 25 else "🟡"
+                    lines.append(f"{icon} {name[:20]}: {avg_util:.1f}% (moy)")
+                    if avg_util > 20:
+                        lines.append(f"   ⚠️  UTILISATION ÉLEVÉE - Risque de congestion")
             
             # === 3. ANALYSE DES RELAIS (routeurs efficaces) ===
             lines.append(f"\n🔀 ANALYSE DES RELAIS:")
@@ -3043,13 +3096,13 @@ class TrafficMonitor:
             # Charger les paquets (dernières 48h pour correspondre à la rétention, max 5000)
             packets = self.persistence.load_packets(hours=48, limit=5000)
             for packet in reversed(packets):  # Inverser pour avoir l'ordre chronologique
-                self.all_packets.append(packet)
+                self.all_packets.append(PacketRecord(packet))
             logger.info(f"✅ {len(packets)} paquets chargés depuis SQLite (all_packets size: {len(self.all_packets)})")
 
             # Charger les messages publics (dernières 48h pour correspondre à la rétention, max 2000)
             messages = self.persistence.load_public_messages(hours=48, limit=2000)
             for message in reversed(messages):
-                self.public_messages.append(message)
+                self.public_messages.append(MessageRecord(message))
             logger.info(f"✓ {len(messages)} messages publics chargés")
 
             # Charger les statistiques par nœud
@@ -3087,14 +3140,25 @@ class TrafficMonitor:
         À appeler périodiquement pour éviter la perte de données.
         """
         try:
-            # Sauvegarder les statistiques par nœud
-            self.persistence.save_node_stats(dict(self.node_packet_stats))
+            # Statistiques figées pendant l'écriture (pas de mise à jour concurrente par add_packet)
+            with self._stats_lock:
+                # Sauvegarder les statistiques des nœuds modifiés depuis le dernier cycle
+                dirty, self._dirty_node_stats = self._dirty_node_stats, set()
+                changed = {node_id: self.node_packet_stats[node_id]
+                           for node_id in dirty if node_id in self.node_packet_stats}
+                written = self.persistence.save_node_stats(changed)
+                if written is None:
+                    # Échec : ces nœuds seront réécrits au prochain cycle
+                    self._dirty_node_stats.update(dirty)
+                else:
+                    logger.debug(f"node_stats : {written} nœud(s) modifié(s) écrit(s) "
+                                 f"sur {len(self.node_packet_stats)}")
 
-            # Sauvegarder les statistiques globales
-            self.persistence.save_global_stats(self.global_packet_stats)
+                # Sauvegarder les statistiques globales
+                self.persistence.save_global_stats(self.global_packet_stats)
 
-            # Sauvegarder les statistiques réseau
-            self.persistence.save_network_stats(self.network_stats)
+                # Sauvegarder les statistiques réseau
+                self.persistence.save_network_stats(self.network_stats)
 
             logger.debug("Statistiques sauvegardées dans SQLite")
 
@@ -3123,6 +3187,7 @@ class TrafficMonitor:
             self.all_packets.clear()
             self.public_messages.clear()
             self.node_packet_stats.clear()
+            self._dirty_node_stats.clear()
 
             # Réinitialiser les statistiques globales
             self.global_packet_stats = {
@@ -3172,6 +3237,19 @@ class TrafficMonitor:
             lines.append(f"Nœuds uniques : {summary.get('total_nodes', 0)}")
             lines.append(f"Taille DB : {summary.get('database_size_mb', 0):.2f} MB")
 
+            # Métriques de la file write-behind (si activée)
+            queue_stats = self.persistence.get_write_queue_stats()
+            if queue_stats:
+                lines.append(f"\nFile d'écriture : {queue_stats['depth']} en attente (max {queue_stats['max_depth']})")
+                lines.append(f"Lots écrits : {queue_stats['flushes']} ({queue_stats['written']:,} paquets)")
+                lines.append(f"Latence lot : {queue_stats['avg_flush_ms']:.1f} ms moy, {queue_stats['max_flush_ms']:.1f} ms max")
+                if queue_stats['dropped'] or queue_stats['failed']:
+                    lines.append(f"⚠️ Abandonnés : {queue_stats['dropped']} | Échecs : {queue_stats['failed']}")
+
+            pool_stats = self.persistence.get_read_pool_stats()
+            lines.append(f"\nJournal : {pool_stats['journal_mode']} | Connexions lecture : {pool_stats['read_connections']}/{pool_stats['read_pool_size']}"
+                         f" (hors pool : {pool_stats['read_overflows']})")
+
             if summary.get('oldest_packet'):
                 lines.append(f"\nPaquet le plus ancien : {summary['oldest_packet']}")
             if summary.get('newest_packet'):
@@ -3221,6 +3299,9 @@ class TrafficMonitor:
             if ref_pos and ref_pos[0] != 0 and ref_pos[1] != 0:
                 ref_lat, ref_lon = ref_pos
                 
+                # Dernières positions connues en une requête (table node_positions)
+                db_positions = self.persistence.load_node_positions(hours=720)
+                
                 for node_id, neighbors in neighbors_data.items():
                     # Convertir node_id string (!xxxxxxxx) en int
                     try:
@@ -3233,8 +3314,8 @@ class TrafficMonitor:
                         filtered_by_distance[node_id] = neighbors
                         continue
                     
-                    # Obtenir les données du nœud (position GPS)
-                    node_data = self.node_manager.get_node_data(node_id_int)
+                    # Obtenir la position GPS : DB d'abord, puis node_manager (mémoire)
+                    node_data = db_positions.get(node_id_int) or self.node_manager.get_node_data(node_id_int)
                     
                     if node_data and 'latitude' in node_data and 'longitude' in node_data:
                         node_lat = node_data['latitude']
@@ -3401,25 +3482,10 @@ class TrafficMonitor:
             links_with_distance = []
             
             for link in links:
-                from_id_db = link['from_id']  # Original database ID (string format)
-                to_id_db = link['to_id']      # Original database ID (string format)
-                
-                # Convertir les IDs en entiers pour node_manager
-                from_id = from_id_db
-                to_id = to_id_db
-                
-                try:
-                    if isinstance(from_id, str):
-                        if from_id.startswith('!'):
-                            from_id = int(from_id[1:], 16)
-                        else:
-                            from_id = int(from_id)  # Decimal string from database
-                    if isinstance(to_id, str):
-                        if to_id.startswith('!'):
-                            to_id = int(to_id[1:], 16)
-                        else:
-                            to_id = int(to_id)  # Decimal string from database
-                except (ValueError, AttributeError):
+                # Identifiants numériques canoniques (colonnes from_num/to_num)
+                from_id = link.get('from_num')
+                to_id = link.get('to_num')
+                if from_id is None or to_id is None:
                     continue
                 
                 # Obtenir les positions des nœuds - d'abord depuis la DB, puis depuis node_manager
@@ -3431,22 +3497,21 @@ class TrafficMonitor:
                 to_alt = None
                 
                 # Essayer d'obtenir la position depuis la base de données (30 jours de rétention)
-                # Utiliser les IDs au format original de la DB
-                debug_print(f"🔍 Recherche GPS pour liaison: {from_id_db} → {to_id_db}")
-                from_pos_db = self.persistence.get_node_position_from_db(from_id_db, hours=720)
-                to_pos_db = self.persistence.get_node_position_from_db(to_id_db, hours=720)
+                # Positions jointes par load_radio_links_with_positions (table node_positions)
+                from_pos_db = link['from_position']
+                to_pos_db = link['to_position']
                 
                 if from_pos_db:
                     from_lat = from_pos_db.get('latitude')
                     from_lon = from_pos_db.get('longitude')
                     from_alt = from_pos_db.get('altitude')
-                    #debug_print(f"  ✅ FROM DB: {from_id_db} = ({from_lat}, {from_lon}, {from_alt}m)")
+                    #debug_print(f"  ✅ FROM DB: {from_id} = ({from_lat}, {from_lon}, {from_alt}m)")
                 
                 if to_pos_db:
                     to_lat = to_pos_db.get('latitude')
                     to_lon = to_pos_db.get('longitude')
                     to_alt = to_pos_db.get('altitude')
-                    #debug_print(f"  ✅ TO DB: {to_id_db} = ({to_lat}, {to_lon}, {to_alt}m)")
+                    #debug_print(f"  ✅ TO DB: {to_id} = ({to_lat}, {to_lon}, {to_alt}m)")
                 
                 # Si pas trouvé dans la DB, essayer depuis node_manager (mémoire)
                 if not (from_lat and from_lon):
@@ -3457,7 +3522,7 @@ class TrafficMonitor:
                         from_alt = from_data.get('altitude')
                         #debug_print(f"  ✅ FROM MEM: {from_id} = ({from_lat}, {from_lon}, {from_alt}m)")
                     #else:
-                        #debug_print(f"  ❌ FROM: Aucune position trouvée pour {from_id_db}")
+                        #debug_print(f"  ❌ FROM: Aucune position trouvée pour {from_id}")
                 
                 if not (to_lat and to_lon):
                     to_data = self.node_manager.get_node_data(to_id)
@@ -3467,7 +3532,7 @@ class TrafficMonitor:
                         to_alt = to_data.get('altitude')
                         #debug_print(f"  ✅ TO MEM: {to_id} = ({to_lat}, {to_lon}, {to_alt}m)")
                     #else:
-                        #debug_print(f"  ❌ TO: Aucune position trouvée pour {to_id_db}")
+                        #debug_print(f"  ❌ TO: Aucune position trouvée pour {to_id}")
                 
                 # Vérifier que les deux nœuds ont des positions GPS
                 if not all([from_lat, from_lon, to_lat, to_lon]):
@@ -3581,29 +3646,14 @@ class TrafficMonitor:
                 
                 # Ajouter le record 30j en compact
                 try:
-                    record_links = self.persistence.load_radio_links_with_positions(hours=30*24)
+                    record_links = self.persistence.load_radio_links_with_positions(hours=30*24, distinct_pairs=True)
                     record_distance = 0
                     
                     for link in record_links:
-                        from_id_db = link['from_id']  # Original DB format
-                        to_id_db = link['to_id']      # Original DB format
-                        
-                        # Convertir pour node_manager
-                        from_id = from_id_db
-                        to_id = to_id_db
-                        
-                        try:
-                            if isinstance(from_id, str):
-                                if from_id.startswith('!'):
-                                    from_id = int(from_id[1:], 16)
-                                else:
-                                    from_id = int(from_id)  # Decimal string from database
-                            if isinstance(to_id, str):
-                                if to_id.startswith('!'):
-                                    to_id = int(to_id[1:], 16)
-                                else:
-                                    to_id = int(to_id)  # Decimal string from database
-                        except (ValueError, AttributeError):
+                        # Identifiants numériques canoniques (colonnes from_num/to_num)
+                        from_id = link.get('from_num')
+                        to_id = link.get('to_num')
+                        if from_id is None or to_id is None:
                             continue
                         
                         # Obtenir les positions depuis la DB ou node_manager
@@ -3612,9 +3662,9 @@ class TrafficMonitor:
                         to_lat = None
                         to_lon = None
                         
-                        # Utiliser les IDs au format DB original
-                        from_pos_db = self.persistence.get_node_position_from_db(from_id_db, hours=720)
-                        to_pos_db = self.persistence.get_node_position_from_db(to_id_db, hours=720)
+                        # Positions jointes par load_radio_links_with_positions (table node_positions)
+                        from_pos_db = link['from_position']
+                        to_pos_db = link['to_position']
                         
                         if from_pos_db:
                             from_lat = from_pos_db.get('latitude')
@@ -3707,30 +3757,15 @@ class TrafficMonitor:
                 
                 # Record de distance sur 30 jours
                 try:
-                    record_links = self.persistence.load_radio_links_with_positions(hours=30*24)  # 30 jours
+                    record_links = self.persistence.load_radio_links_with_positions(hours=30*24, distinct_pairs=True)  # 30 jours
                     record_distance = 0
                     record_link = None
                     
                     for link in record_links:
-                        from_id_db = link['from_id']  # Original DB format
-                        to_id_db = link['to_id']      # Original DB format
-                        
-                        # Convertir les IDs pour node_manager
-                        from_id = from_id_db
-                        to_id = to_id_db
-                        
-                        try:
-                            if isinstance(from_id, str):
-                                if from_id.startswith('!'):
-                                    from_id = int(from_id[1:], 16)
-                                else:
-                                    from_id = int(from_id)  # Decimal string from database
-                            if isinstance(to_id, str):
-                                if to_id.startswith('!'):
-                                    to_id = int(to_id[1:], 16)
-                                else:
-                                    to_id = int(to_id)  # Decimal string from database
-                        except (ValueError, AttributeError):
+                        # Identifiants numériques canoniques (colonnes from_num/to_num)
+                        from_id = link.get('from_num')
+                        to_id = link.get('to_num')
+                        if from_id is None or to_id is None:
                             continue
                         
                         # Obtenir les positions depuis la DB ou node_manager
@@ -3739,9 +3774,9 @@ class TrafficMonitor:
                         to_lat = None
                         to_lon = None
                         
-                        # Utiliser les IDs au format DB original
-                        from_pos_db = self.persistence.get_node_position_from_db(from_id_db, hours=720)
-                        to_pos_db = self.persistence.get_node_position_from_db(to_id_db, hours=720)
+                        # Positions jointes par load_radio_links_with_positions (table node_positions)
+                        from_pos_db = link['from_position']
+                        to_pos_db = link['to_position']
                         
                         if from_pos_db:
                             from_lat = from_pos_db.get('latitude')
@@ -6,20 +6,158 @@ Permet de conserver les données de trafic entre les redémarrages du bot.
 import sqlite3
 import json
 import logging
+import threading
 import time
+import functools
+import contextlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from collections import defaultdict, deque
 import os
 from utils import debug_print, info_print, error_print
+from packet_write_queue import PacketWriteQueue
+from packet_partitions import PacketPartitions
+from db_checkpoint import DatabaseCheckpointer, process_write_bytes
+from lora_airtime import (airtime_table, preset_key, estimate_payload_bytes, MAX_PAYLOAD_BYTES,
+                          NOMINAL_PAYLOAD_BYTES, DEFAULT_PAYLOAD_BYTES, TEXT_DATA_OVERHEAD_BYTES)
 
 logger = logging.getLogger(__name__)
 
 
+def _with_write_lock(method):
+    """Sérialise une méthode d'écriture sur la connexion écrivain."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class TrafficPersistence:
     """Gère la persistance des données de trafic dans SQLite."""
 
-    def __init__(self, db_path: str = "traffic_history.db", error_callback: Optional[Callable[[Exception, str], None]] = None):
+    # Colonnes insérées pour chaque paquet (tables packets et meshcore_packets)
+    PACKET_COLUMNS = (
+        'timestamp', 'from_id', 'to_id', 'source', 'sender_name', 'packet_type',
+        'message', 'rssi', 'snr', 'hops', 'size', 'is_broadcast', 'is_encrypted',
+        'telemetry', 'position', 'hop_limit', 'hop_start', 'channel', 'via_mqtt',
+        'want_ack', 'want_response', 'priority', 'family', 'public_key',
+        'from_num', 'to_num', 'battery', 'voltage', 'channel_util', 'air_util',
+        'latitude', 'longitude', 'altitude', 'payload_bytes', 'airtime_ms'
+    )
+
+    # Champs de télémétrie et de position extraits en colonnes typées à l'insertion
+    # (le JSON telemetry/position reste optionnel, cf. json_blobs)
+    TELEMETRY_FIELDS = (('battery', 'INTEGER'), ('voltage', 'REAL'),
+                        ('channel_util', 'REAL'), ('air_util', 'REAL'))
+    POSITION_FIELDS = (('latitude', 'REAL'), ('longitude', 'REAL'), ('altitude', 'REAL'))
+
+    # Agrégats horaires des paquets Meshtastic (table packet_rollups_hourly)
+    ROLLUP_BUCKET_SECONDS = 3600
+    ROLLUP_COLUMNS = (
+        'hour_bucket', 'from_id', 'packet_type', 'source', 'packet_count', 'bytes_total',
+        'hops_min', 'hops_max', 'snr_sum', 'snr_count', 'hop_start_max', 'hop_start_count',
+        'channel_util_sum', 'channel_util_count', 'air_util_sum', 'air_util_count',
+        'airtime_ms', 'last_seen', 'sender_name'
+    )
+
+    # Séries de télémétrie sous-échantillonnées (façon RRD) : les paquets bruts servent les
+    # fenêtres courtes, les tiers de moyennes (mis à jour à l'insertion) les fenêtres longues
+    TELEMETRY_RAW_HOURS = 24
+    TELEMETRY_TIERS = (
+        # (table, largeur du seau en secondes, rétention par défaut en heures)
+        ('telemetry_5min', 300, 168),
+        ('telemetry_hourly', 3600, 8760),
+    )
+    TELEMETRY_TIER_COLUMNS = ('bucket', 'from_id', 'sample_count') + tuple(
+        f"{name}_{suffix}" for name, _ in TELEMETRY_FIELDS for suffix in ('sum', 'count')
+    ) + ('last_seen',)
+
+    # Migrations du schéma, appliquées dans l'ordre selon PRAGMA user_version :
+    # (version, description, méthode). Chaque étape est idempotente : une base antérieure
+    # au versionnage est en version 0 mais peut déjà contenir une partie du schéma.
+    # Pour faire évoluer le schéma, ajouter une étape ici (ne jamais modifier une étape existante).
+    SCHEMA_MIGRATIONS = (
+        (1, "schéma de base", '_migrate_base_schema'),
+        (2, "identifiants de nœuds numériques (from_num/to_num)", '_migrate_node_num_columns'),
+        (3, "agrégats horaires des paquets", '_migrate_packet_rollups'),
+        (4, "dernière position connue des nœuds", '_migrate_node_positions'),
+        (5, "clés publiques hexadécimales indexées", '_migrate_pubkey_hex'),
+        (6, "marqueurs de maintenance", '_migrate_db_maintenance'),
+        (7, "colonnes typées télémétrie et position", '_migrate_typed_packet_columns'),
+        (8, "index plein texte des messages (FTS5)", '_migrate_message_fts'),
+        (9, "dernière liaison de voisinage par paire", '_migrate_neighbor_edges_latest'),
+        (10, "séries de télémétrie sous-échantillonnées", '_migrate_telemetry_tiers'),
+        (11, "temps d'antenne des paquets", '_migrate_packet_airtime'),
+    )
+    SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+    # Rétention : colonne horodatage de chaque table nettoyée par cleanup_old_data
+    RETENTION_TIME_COLUMNS = {
+        'packets': 'timestamp',
+        'meshcore_packets': 'timestamp',
+        'public_messages': 'timestamp',
+        'neighbors': 'timestamp',
+        'neighbor_edges_latest': 'timestamp',
+        'node_stats': 'last_updated',
+        'packet_rollups_hourly': 'hour_bucket',
+        'telemetry_5min': 'bucket',
+        'telemetry_hourly': 'bucket',
+    }
+    RETENTION_BATCH_SIZE = 2000       # Lignes (plage de rowid) supprimées par transaction
+    INCREMENTAL_VACUUM_PAGES = 1024   # Pages libres rendues au système par nettoyage
+
+    # Partitions d'archive des paquets (mode partitionné, cf. PacketPartitions)
+    MAX_ATTACHED_PARTITIONS = 10      # Limite SQLite par défaut (SQLITE_MAX_ATTACHED)
+    PARTITION_INDEXES = (('idx_packets_timestamp', 'timestamp'),
+                         ('idx_packets_type_ts', 'packet_type, timestamp'),
+                         ('idx_packets_from_num_ts', 'from_num, timestamp'))
+
+    # Recherche plein texte (FTS5, contenu externe) : table indexée -> type de paquet indexé
+    # (None = toutes les lignes). Index tenu à jour par triggers (insertion, rétention, archivage)
+    FTS_TABLES = {
+        'public_messages': None,
+        'packets': 'TEXT_MESSAGE_APP',
+        'meshcore_packets': 'TEXT_MESSAGE_APP',
+    }
+    FTS_TOKENIZE = 'unicode61 remove_diacritics 2'   # Insensible à la casse et aux accents
+
+    # Agrégation SQL des paquets bruts ({packets}), même forme que ROLLUP_COLUMNS
+    # (utilisée pour le rattrapage initial et pour l'heure partielle en bord de fenêtre)
+    ROLLUP_AGGREGATE_SQL = '''
+        SELECT agg.*, names.sender_name FROM (
+            SELECT CAST(timestamp / 3600 AS INTEGER) * 3600 AS hour_bucket,
+                   from_id, packet_type, COALESCE(source, '') AS source,
+                   COUNT(*) AS packet_count, COALESCE(SUM(size), 0) AS bytes_total,
+                   MIN(hops) AS hops_min, MAX(hops) AS hops_max,
+                   COALESCE(SUM(snr), 0) AS snr_sum, COUNT(snr) AS snr_count,
+                   MAX(hop_start) AS hop_start_max, COUNT(hop_start) AS hop_start_count,
+                   COALESCE(SUM(channel_util), 0) AS channel_util_sum,
+                   COUNT(channel_util) AS channel_util_count,
+                   COALESCE(SUM(air_util), 0) AS air_util_sum,
+                   COUNT(air_util) AS air_util_count,
+                   COALESCE(SUM(airtime_ms), 0) AS airtime_ms,
+                   MAX(timestamp) AS last_seen
+            FROM {packets} {where}
+            GROUP BY 1, 2, 3, 4
+        ) agg
+        JOIN (
+            SELECT CAST(timestamp / 3600 AS INTEGER) * 3600 AS hour_bucket,
+                   from_id, packet_type, COALESCE(source, '') AS source,
+                   MAX(timestamp), sender_name
+            FROM {packets} {where}
+            GROUP BY 1, 2, 3, 4
+        ) names USING (hour_bucket, from_id, packet_type, source)
+    '''
+
+    def __init__(self, db_path: str = "traffic_history.db", error_callback: Optional[Callable[[Exception, str], None]] = None,
+                 write_behind: bool = False, write_batch_size: int = 100, write_flush_ms: int = 500,
+                 write_queue_max: int = 5000, wal: bool = True, read_pool_size: int = 20,
+                 read_only: bool = False, startup_check: str = 'header', json_blobs: bool = True,
+                 partition_period: Optional[str] = None, hot_hours: float = 48,
+                 archive_dir: Optional[str] = None, ram_dir: Optional[str] = None,
+                 checkpoint_interval: float = 900, checkpoint_pages: int = 256,
+                 airtime_preset=None, convert_auto_vacuum: bool = False):
         """
         Initialise la connexion à la base de données.
 
@@ -27,11 +165,110 @@ class TrafficPersistence:
             db_path: Chemin vers le fichier de base de données SQLite
             error_callback: Fonction à appeler en cas d'erreur d'écriture (optionnel)
                            Signature: error_callback(error: Exception, operation: str)
+            write_behind: Si True, les paquets sont mis en file et écrits par lots
+                          par un thread dédié (un seul commit par lot)
+            write_batch_size: Taille de lot déclenchant l'écriture (write-behind)
+            write_flush_ms: Délai maximum avant écriture d'un lot (write-behind)
+            write_queue_max: Taille maximale de la file (au-delà, abandon du plus ancien)
+            wal: Utiliser le journal WAL (lectures concurrentes non bloquées par l'écriture)
+            read_pool_size: Nombre max de connexions de lecture (une par thread, 0 = désactivé)
+            read_only: Ouverture en lecture seule (URI mode=ro), sans création ni migration
+                       du schéma (exporteurs de carte)
+            startup_check: Vérification au démarrage : 'header' (en-tête du fichier, instantané),
+                           'quick' (PRAGMA quick_check) ou 'full' (PRAGMA integrity_check).
+                           La vérification complète est sinon différée (schedule_integrity_check)
+            json_blobs: Conserver aussi la télémétrie et la position en JSON (colonnes
+                        telemetry/position) en plus des colonnes typées
+            partition_period: Partitions d'archive des paquets : 'day', 'month' ou None
+                              (désactivé ; les partitions déjà enregistrées dans la base
+                              restent lues, ex: exporteurs en lecture seule)
+            hot_hours: Ancienneté au-delà de laquelle les paquets sont archivés (mode partitionné)
+            archive_dir: Répertoire des partitions (défaut: traffic_archives/ à côté de la base)
+            ram_dir: Répertoire tmpfs de la base vivante (ex: /dev/shm/meshbot). db_path devient
+                     alors la sauvegarde sur la carte SD, restaurée au démarrage et mise à jour
+                     toutes les checkpoint_interval secondes (None = base directement sur db_path)
+            checkpoint_interval: Intervalle entre deux sauvegardes de la base RAM (secondes)
+            checkpoint_pages: Pages copiées par étape de sauvegarde
+            airtime_preset: Preset de modem LoRa (nom ou dict, cf. lora_airtime) pour le temps
+                            d'antenne des paquets. None = preset enregistré dans la base
+                            (LONG_FAST à défaut). Un changement de preset recalcule l'historique
+            convert_auto_vacuum: Convertir au démarrage une base existante en
+                                 auto_vacuum=INCREMENTAL (VACUUM complet, bloquant).
+                                 Sinon la conversion reste en attente (vacuum(), /db vacuum)
         """
         self.db_path = db_path
+        self.disk_path = db_path
         self.conn = None
         self.error_callback = error_callback
-        self._init_database()
+        self.wal = wal
+        self.read_only = read_only
+        self.startup_check = startup_check
+        self.json_blobs = json_blobs
+        self.hot_hours = hot_hours
+        self.partitions = None
+        self.partition_rolling = partition_period is not None and not read_only
+        self._integrity_thread = None
+        self.convert_auto_vacuum = convert_auto_vacuum
+        self.auto_vacuum_pending = False  # base existante pas encore en auto_vacuum=INCREMENTAL
+
+        # Une seule connexion écrivain (self.conn), protégée par un verrou.
+        # Les lectures passent par des connexions en lecture seule, une par thread.
+        self._write_lock = threading.RLock()
+        self.read_pool_size = read_pool_size
+        self._read_local = threading.local()
+        self._read_conns = {}  # thread ident -> connexion de lecture
+        self._read_pool_lock = threading.Lock()
+        self._read_overflows = 0  # connexions ouvertes pour un seul appel (pool plein)
+
+        # Base vivante en RAM (optionnel) : restaurée depuis la dernière sauvegarde sur la carte SD
+        self.checkpointer = None
+        if ram_dir and not read_only and db_path != ':memory:':
+            self.checkpointer = DatabaseCheckpointer(
+                ram_path=os.path.join(ram_dir, os.path.basename(db_path)),
+                disk_path=db_path,
+                interval_seconds=checkpoint_interval,
+                pages_per_step=checkpoint_pages,
+                error_callback=self._checkpoint_error,
+                write_lock=self._write_lock
+            )
+            self.checkpointer.restore()
+            self.db_path = self.checkpointer.ram_path
+
+        # Octets écrits sur le stockage depuis l'ouverture (get_io_stats)
+        self._io_start = (time.time(), process_write_bytes())
+
+        # Lignes node_stats écrites par cycle de sauvegarde (get_node_stats_write_stats)
+        self._node_stats_writes = {'cycles': 0, 'last_rows': 0, 'total_rows': 0, 'max_rows': 0}
+
+        # Temps d'antenne par taille de payload (ms), selon le preset de modem
+        self.airtime_preset = None
+        self._airtime_ms = None
+
+        if read_only:
+            self._open_read_only()
+        else:
+            self._init_database()
+            self._init_airtime(airtime_preset)
+        self._init_partitions(partition_period, archive_dir)
+        if not read_only:
+            self._backfill_telemetry_archives()
+
+        if self.checkpointer and self.conn is not None:
+            self.checkpointer.start(self.conn)
+            logger.info(f"✅ Base en RAM : {self.db_path} (sauvegarde vers {self.disk_path} "
+                        f"toutes les {checkpoint_interval:.0f}s)")
+
+        # File d'écriture différée (optionnelle)
+        self.write_queue = None
+        if write_behind and not read_only:
+            self.write_queue = PacketWriteQueue(
+                flush_callback=self._flush_packet_batch,
+                max_size=write_queue_max,
+                batch_size=write_batch_size,
+                flush_interval_ms=write_flush_ms
+            )
+            self.write_queue.start()
+            logger.info(f"✅ Write-behind activé (lot={write_batch_size}, {write_flush_ms}ms)")
 
     def _init_database(self):
         """Initialise la base de données et crée les tables si nécessaire."""
@@ -45,12 +282,13 @@ class TrafficPersistence:
 
             self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
+            self._configure_connection(self.conn)
 
-            # Vérifier l'intégrité de la base de données
+            # Vérifier l'intégrité de la base de données (vérification rapide au démarrage,
+            # la vérification complète est différée : schedule_integrity_check)
             cursor = self.conn.cursor()
             try:
-                cursor.execute("PRAGMA integrity_check")
-                integrity = cursor.fetchone()[0]
+                integrity = self._startup_integrity(cursor)
                 if integrity != 'ok':
                     logger.error(f"❌ Intégrité DB compromise : {integrity}")
                     # Tentative de réparation ou recréation
@@ -59,478 +297,1790 @@ class TrafficPersistence:
                     os.remove(self.db_path)
                     self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
                     self.conn.row_factory = sqlite3.Row
+                    self._configure_connection(self.conn)
                     cursor = self.conn.cursor()
                 else:
-                    logger.info("✅ Intégrité de la DB vérifiée")
+                    logger.info(f"✅ Intégrité de la DB vérifiée ({self.startup_check})")
             except Exception as e:
                 logger.warning(f"Impossible de vérifier l'intégrité : {e}")
 
             cursor = self.conn.cursor()
 
-            # Table pour tous les paquets
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS packets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
-                    from_id TEXT NOT NULL,
-                    to_id TEXT,
-                    source TEXT,
-                    sender_name TEXT,
-                    packet_type TEXT NOT NULL,
-                    message TEXT,
-                    rssi INTEGER,
-                    snr REAL,
-                    hops INTEGER,
-                    size INTEGER,
-                    is_broadcast INTEGER,
-                    is_encrypted INTEGER DEFAULT 0,
-                    telemetry TEXT,
-                    position TEXT,
-                    hop_limit INTEGER,
-                    hop_start INTEGER
-                )
-            ''')
+            # Vacuum incrémental : le nettoyage périodique rend quelques pages libres
+            # à chaque cycle au lieu de réécrire tout le fichier (VACUUM complet)
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("PRAGMA auto_vacuum")
+                if cursor.fetchone()[0] != 2:
+                    # En-tête déjà écrit (base existante ou passage en WAL) : le mode ne
+                    # s'applique qu'après un VACUUM. Instantané sur une base vide ; sur une
+                    # base existante, il réécrit tout le fichier : laissé à l'opérateur
+                    cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+                    if cursor.fetchone()[0] == 0 or self.convert_auto_vacuum:
+                        if self.convert_auto_vacuum:
+                            logger.info("Migration DB : passage en auto_vacuum=INCREMENTAL (VACUUM unique)")
+                        cursor.execute("VACUUM")
+                    else:
+                        self.auto_vacuum_pending = True
+                        logger.warning("⚠️ Base sans auto_vacuum=INCREMENTAL : vacuum incrémental désactivé "
+                                       "jusqu'à la conversion (/db vacuum ou TRAFFIC_DB_VACUUM_CONVERT = True)")
+
+            # Schéma versionné (PRAGMA user_version) : seules les migrations en attente
+            # sont appliquées, dans une seule transaction (base à jour = aucune requête DDL)
+            self._apply_migrations(cursor)
+            logger.info(f"✅ Base de données initialisée : {self.db_path}")
 
-            # Migration : ajouter is_encrypted si elle n'existe pas
-            try:
-                cursor.execute("SELECT is_encrypted FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                # La colonne n'existe pas, l'ajouter
-                logger.info("Migration DB : ajout de la colonne is_encrypted")
-                cursor.execute("ALTER TABLE packets ADD COLUMN is_encrypted INTEGER DEFAULT 0")
-            
-            # Migration : ajouter hop_limit si elle n'existe pas
-            try:
-                cursor.execute("SELECT hop_limit FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                # La colonne n'existe pas, l'ajouter
-                logger.info("Migration DB : ajout de la colonne hop_limit")
-                cursor.execute("ALTER TABLE packets ADD COLUMN hop_limit INTEGER")
-            
-            # Migration : ajouter hop_start si elle n'existe pas
-            try:
-                cursor.execute("SELECT hop_start FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                # La colonne n'existe pas, l'ajouter
-                logger.info("Migration DB : ajout de la colonne hop_start")
-                cursor.execute("ALTER TABLE packets ADD COLUMN hop_start INTEGER")
-            
-            # Migration : ajouter channel si elle n'existe pas
-            try:
-                cursor.execute("SELECT channel FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne channel")
-                cursor.execute("ALTER TABLE packets ADD COLUMN channel INTEGER DEFAULT 0")
-            
-            # Migration : ajouter via_mqtt si elle n'existe pas
-            try:
-                cursor.execute("SELECT via_mqtt FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne via_mqtt")
-                cursor.execute("ALTER TABLE packets ADD COLUMN via_mqtt INTEGER DEFAULT 0")
-            
-            # Migration : ajouter want_ack si elle n'existe pas
-            try:
-                cursor.execute("SELECT want_ack FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne want_ack")
-                cursor.execute("ALTER TABLE packets ADD COLUMN want_ack INTEGER DEFAULT 0")
-            
-            # Migration : ajouter want_response si elle n'existe pas
-            try:
-                cursor.execute("SELECT want_response FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne want_response")
-                cursor.execute("ALTER TABLE packets ADD COLUMN want_response INTEGER DEFAULT 0")
-            
-            # Migration : ajouter priority si elle n'existe pas
-            try:
-                cursor.execute("SELECT priority FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne priority")
-                cursor.execute("ALTER TABLE packets ADD COLUMN priority INTEGER DEFAULT 0")
-            
-            # Migration : ajouter family si elle n'existe pas
-            try:
-                cursor.execute("SELECT family FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne family")
-                cursor.execute("ALTER TABLE packets ADD COLUMN family TEXT")
-            
-            # Migration : ajouter public_key si elle n'existe pas
-            try:
-                cursor.execute("SELECT public_key FROM packets LIMIT 1")
-            except sqlite3.OperationalError:
-                logger.info("Migration DB : ajout de la colonne public_key")
-                cursor.execute("ALTER TABLE packets ADD COLUMN public_key TEXT")
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'initialisation de la base de données : {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            raise
 
-            # Index pour optimiser les requêtes sur les paquets
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_packets_timestamp
-                ON packets(timestamp)
+    def _apply_migrations(self, cursor):
+        """
+        Applique les migrations de SCHEMA_MIGRATIONS plus récentes que PRAGMA user_version.
+
+        Toutes les étapes en attente et la mise à jour de user_version sont faites dans
+        une seule transaction : en cas d'erreur, la base reste dans sa version d'origine.
+        """
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        pending = [step for step in self.SCHEMA_MIGRATIONS if step[0] > version]
+        if not pending:
+            if version > self.SCHEMA_VERSION:
+                logger.warning(f"⚠️ Schéma DB version {version} plus récent que le code (version {self.SCHEMA_VERSION})")
+            else:
+                logger.info(f"✅ Schéma DB à jour (version {version})")
+            return
+
+        start = time.perf_counter()
+        cursor.execute("BEGIN")
+        try:
+            for step_version, description, method in pending:
+                logger.info(f"Migration DB v{step_version} : {description}")
+                getattr(self, method)(cursor)
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        logger.info(f"✅ Schéma DB migré de la version {version} à {self.SCHEMA_VERSION} "
+                    f"en {time.perf_counter() - start:.2f}s")
+
+        # Vérifier que les tables sont bien créées
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cursor.fetchall()]
+        logger.info(f"Tables créées : {', '.join(tables)}")
+
+    def _add_missing_columns(self, cursor, table: str, columns: List[tuple]) -> List[str]:
+        """
+        Ajoute à une table les colonnes absentes (bases créées par une version antérieure).
+
+        Args:
+            cursor: Curseur de la transaction de migration
+            table: Nom de la table
+            columns: Liste de tuples (nom, définition SQL)
+
+        Returns:
+            Noms des colonnes ajoutées
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        added = []
+        for name, definition in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                added.append(name)
+        if added:
+            logger.info(f"Migration DB : ajout des colonnes {', '.join(added)} à {table}")
+        return added
+
+    def _table_exists(self, cursor, table: str) -> bool:
+        """Indique si une table existe déjà (avant sa création par une migration)."""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        return cursor.fetchone() is not None
+
+    def _migrate_base_schema(self, cursor):
+        """v1 : tables historiques et colonnes ajoutées avant le versionnage du schéma."""
+        # Table pour tous les paquets
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS packets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                from_id TEXT NOT NULL,
+                to_id TEXT,
+                source TEXT,
+                sender_name TEXT,
+                packet_type TEXT NOT NULL,
+                message TEXT,
+                rssi INTEGER,
+                snr REAL,
+                hops INTEGER,
+                size INTEGER,
+                is_broadcast INTEGER,
+                is_encrypted INTEGER DEFAULT 0,
+                telemetry TEXT,
+                position TEXT,
+                hop_limit INTEGER,
+                hop_start INTEGER
+            )
+        ''')
+        self._add_missing_columns(cursor, 'packets', [
+            ('is_encrypted', 'INTEGER DEFAULT 0'),
+            ('telemetry', 'TEXT'),
+            ('position', 'TEXT'),
+            ('hop_limit', 'INTEGER'),
+            ('hop_start', 'INTEGER'),
+            ('channel', 'INTEGER DEFAULT 0'),
+            ('via_mqtt', 'INTEGER DEFAULT 0'),
+            ('want_ack', 'INTEGER DEFAULT 0'),
+            ('want_response', 'INTEGER DEFAULT 0'),
+            ('priority', 'INTEGER DEFAULT 0'),
+            ('family', 'TEXT'),
+            ('public_key', 'TEXT'),
+        ])
+
+        # Index pour optimiser les requêtes sur les paquets
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_packets_timestamp
+            ON packets(timestamp)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_packets_from_id
+            ON packets(from_id)
+        ''')
+
+        # ========================================
+        # Table pour les paquets MeshCore UNIQUEMENT
+        # Séparée de la table packets (Meshtastic) pour éviter la confusion
+        # ========================================
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meshcore_packets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                from_id TEXT NOT NULL,
+                to_id TEXT,
+                source TEXT DEFAULT 'meshcore',
+                sender_name TEXT,
+                packet_type TEXT NOT NULL,
+                message TEXT,
+                rssi INTEGER,
+                snr REAL,
+                hops INTEGER,
+                size INTEGER,
+                is_broadcast INTEGER,
+                is_encrypted INTEGER DEFAULT 0,
+                telemetry TEXT,
+                position TEXT,
+                hop_limit INTEGER,
+                hop_start INTEGER,
+                channel INTEGER DEFAULT 0,
+                via_mqtt INTEGER DEFAULT 0,
+                want_ack INTEGER DEFAULT 0,
+                want_response INTEGER DEFAULT 0,
+                priority INTEGER DEFAULT 0,
+                family TEXT,
+                public_key TEXT
+            )
+        ''')
+
+        # Index pour optimiser les requêtes sur les paquets MeshCore
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_meshcore_packets_timestamp
+            ON meshcore_packets(timestamp)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_meshcore_packets_from_id
+            ON meshcore_packets(from_id)
+        ''')
+
+        # ========================================
+        # MIGRATION: Déplacer les paquets MeshCore existants vers la nouvelle table
+        # ========================================
+        try:
+            # Vérifier s'il y a des paquets meshcore dans la table packets
+            cursor.execute("SELECT COUNT(*) FROM packets WHERE source = 'meshcore'")
+            meshcore_count = cursor.fetchone()[0]
+            
+            if meshcore_count > 0:
+                logger.info(f"🔄 Migration: {meshcore_count} paquets MeshCore trouvés dans 'packets'")
+                
+                # Copier les paquets meshcore vers meshcore_packets
+                cursor.execute('''
+                    INSERT INTO meshcore_packets (
+                        timestamp, from_id, to_id, source, sender_name, packet_type,
+                        message, rssi, snr, hops, size, is_broadcast, is_encrypted,
+                        telemetry, position, hop_limit, hop_start, channel, via_mqtt,
+                        want_ack, want_response, priority, family, public_key
+                    )
+                    SELECT 
+                        timestamp, from_id, to_id, 'meshcore', sender_name, packet_type,
+                        message, rssi, snr, hops, size, is_broadcast, is_encrypted,
+                        telemetry, position, hop_limit, hop_start,
+                        COALESCE(channel, 0), COALESCE(via_mqtt, 0),
+                        COALESCE(want_ack, 0), COALESCE(want_response, 0),
+                        COALESCE(priority, 0), family, public_key
+                    FROM packets
+                    WHERE source = 'meshcore'
+                ''')
+                
+                migrated = cursor.rowcount
+                logger.info(f"✅ Migration: {migrated} paquets MeshCore copiés vers 'meshcore_packets'")
+                
+                # Supprimer les paquets meshcore de la table packets
+                cursor.execute("DELETE FROM packets WHERE source = 'meshcore'")
+                deleted = cursor.rowcount
+                logger.info(f"🗑️  Migration: {deleted} paquets MeshCore supprimés de 'packets'")
+                logger.info("✅ Migration terminée: tables Meshtastic et MeshCore maintenant séparées")
+            else:
+                logger.debug("Migration: Aucun paquet MeshCore à migrer")
+                
+        except Exception as e:
+            logger.warning(f"⚠️ Migration MeshCore échouée (peut être déjà faite): {e}")
+            # Ne pas bloquer le démarrage si la migration échoue
+            pass
+
+        # Table pour les messages publics
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS public_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                from_id TEXT NOT NULL,
+                sender_name TEXT,
+                message TEXT,
+                rssi INTEGER,
+                snr REAL,
+                message_length INTEGER,
+                source TEXT
+            )
+        ''')
+
+        # Index pour optimiser les requêtes sur les messages
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_messages_timestamp
+            ON public_messages(timestamp)
+        ''')
+
+        # Table pour les statistiques par nœud
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS node_stats (
+                node_id TEXT PRIMARY KEY,
+                total_packets INTEGER,
+                total_bytes INTEGER,
+                packet_types TEXT,
+                hourly_activity TEXT,
+                message_stats TEXT,
+                telemetry_stats TEXT,
+                position_stats TEXT,
+                routing_stats TEXT,
+                last_updated REAL,
+                last_battery_level INTEGER,
+                last_battery_voltage REAL,
+                last_telemetry_update REAL,
+                last_temperature REAL,
+                last_humidity REAL,
+                last_pressure REAL,
+                last_air_quality REAL
+            )
+        ''')
+        # Colonnes de télémétrie et d'environnement
+        self._add_missing_columns(cursor, 'node_stats', [
+            ('last_battery_level', 'INTEGER'),
+            ('last_battery_voltage', 'REAL'),
+            ('last_telemetry_update', 'REAL'),
+            ('last_temperature', 'REAL'),
+            ('last_humidity', 'REAL'),
+            ('last_pressure', 'REAL'),
+            ('last_air_quality', 'REAL'),
+        ])
+
+        # Table pour les statistiques globales
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS global_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_packets INTEGER,
+                total_bytes INTEGER,
+                packet_types TEXT,
+                unique_nodes TEXT,
+                last_reset REAL
+            )
+        ''')
+
+        # Table pour les statistiques réseau
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS network_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_hops INTEGER,
+                max_hops_seen INTEGER,
+                avg_rssi REAL,
+                avg_snr REAL,
+                packets_direct INTEGER,
+                packets_relayed INTEGER
+            )
+        ''')
+
+        # Table pour le cache météo (centralise tous les caches weather/rain/astro)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weather_cache (
+                location TEXT NOT NULL,
+                cache_type TEXT NOT NULL,
+                data TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (location, cache_type)
+            )
+        ''')
+
+        # Index pour nettoyage périodique du cache expiré
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_weather_cache_timestamp
+            ON weather_cache(timestamp)
+        ''')
+
+        # Table pour les informations de voisinage (neighbor info)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS neighbors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                node_id TEXT NOT NULL,
+                neighbor_id TEXT NOT NULL,
+                snr REAL,
+                last_rx_time INTEGER,
+                node_broadcast_interval INTEGER,
+                source TEXT DEFAULT 'radio'
+            )
+        ''')
+        self._add_missing_columns(cursor, 'neighbors', [('source', "TEXT DEFAULT 'radio'")])
+
+        # Index pour optimiser les requêtes sur les voisins
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_neighbors_timestamp
+            ON neighbors(timestamp)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_neighbors_node_id
+            ON neighbors(node_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_neighbors_composite
+            ON neighbors(node_id, neighbor_id, timestamp)
+        ''')
+
+        # Table pour les nœuds Meshtastic (appris via NODEINFO_APP packets radio)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meshtastic_nodes (
+                node_id TEXT PRIMARY KEY,
+                name TEXT,
+                shortName TEXT,
+                hwModel TEXT,
+                publicKey BLOB,
+                lat REAL,
+                lon REAL,
+                alt INTEGER,
+                last_updated REAL,
+                source TEXT DEFAULT 'radio'
+            )
+        ''')
+
+        # Index pour optimiser la recherche par publicKey
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_meshtastic_nodes_last_updated
+            ON meshtastic_nodes(last_updated)
+        ''')
+
+        # Table pour les contacts MeshCore (appris via meshcore-cli companion)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meshcore_contacts (
+                node_id TEXT PRIMARY KEY,
+                name TEXT,
+                shortName TEXT,
+                hwModel TEXT,
+                publicKey BLOB,
+                lat REAL,
+                lon REAL,
+                alt INTEGER,
+                last_updated REAL,
+                source TEXT DEFAULT 'meshcore'
+            )
+        ''')
+
+        # Index pour optimiser la recherche par publicKey
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_meshcore_contacts_last_updated
+            ON meshcore_contacts(last_updated)
+        ''')
+
+    def _migrate_node_num_columns(self, cursor):
+        """v2 : identifiants de nœuds numériques canoniques (from_num / to_num) et index composites."""
+        # from_id/to_id restent en TEXT (décimal ou "!hex" selon l'historique) pour compatibilité
+        self.conn.create_function('node_num', 1, self._node_num, deterministic=True)
+        for table in ('packets', 'meshcore_packets'):
+            start = time.perf_counter()
+            if self._add_missing_columns(cursor, table, [('from_num', 'INTEGER'), ('to_num', 'INTEGER')]):
+                cursor.execute(f"UPDATE {table} SET from_num = node_num(from_id), to_num = node_num(to_id)")
+                logger.info(f"Migration DB : {cursor.rowcount} lignes de {table} converties en {time.perf_counter() - start:.1f}s")
+
+        # Index composites : recherche par nœud et par type sur une fenêtre de temps
+        # (remplacent les index simples sur packet_type)
+        cursor.execute("DROP INDEX IF EXISTS idx_packets_type")
+        cursor.execute("DROP INDEX IF EXISTS idx_meshcore_packets_type")
+        for table in ('packets', 'meshcore_packets'):
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_from_num_ts
+                ON {table}(from_num, timestamp)
             ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_packets_from_id
-                ON packets(from_id)
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_type_ts
+                ON {table}(packet_type, timestamp)
             ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_packets_type
-                ON packets(packet_type)
+
+        # Index partiel des paquets adressés (liaisons radio directes pour /propag)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_packets_direct_ts
+            ON packets(timestamp, from_num, to_num)
+            WHERE to_num != 4294967295 AND to_num != 0
+        ''')
+
+    def _migrate_packet_rollups(self, cursor):
+        """v3 : agrégats horaires par (heure, émetteur, type, source) pour /stats, /top, /histo."""
+        # Mis à jour à chaque insertion de paquets, rattrapés depuis packets à la création
+        rollups_exist = self._table_exists(cursor, 'packet_rollups_hourly')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS packet_rollups_hourly (
+                hour_bucket INTEGER NOT NULL,
+                from_id TEXT NOT NULL,
+                packet_type TEXT NOT NULL,
+                source TEXT NOT NULL DEFAULT '',
+                packet_count INTEGER NOT NULL DEFAULT 0,
+                bytes_total INTEGER NOT NULL DEFAULT 0,
+                hops_min INTEGER,
+                hops_max INTEGER,
+                snr_sum REAL NOT NULL DEFAULT 0,
+                snr_count INTEGER NOT NULL DEFAULT 0,
+                hop_start_max INTEGER,
+                hop_start_count INTEGER NOT NULL DEFAULT 0,
+                channel_util_sum REAL NOT NULL DEFAULT 0,
+                channel_util_count INTEGER NOT NULL DEFAULT 0,
+                air_util_sum REAL NOT NULL DEFAULT 0,
+                air_util_count INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL,
+                sender_name TEXT,
+                PRIMARY KEY (hour_bucket, from_id, packet_type, source)
+            )
+        ''')
+        if not rollups_exist:
+            self._backfill_packet_rollups(cursor)
+
+    def _migrate_node_positions(self, cursor):
+        """v4 : dernière position connue de chaque nœud (mise à jour à l'insertion des paquets)."""
+        # Évite de rechercher et parser le JSON position dans packets pour chaque liaison (/propag)
+        positions_exist = self._table_exists(cursor, 'node_positions')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS node_positions (
+                node_id INTEGER PRIMARY KEY,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                altitude REAL,
+                timestamp REAL NOT NULL,
+                source TEXT
+            )
+        ''')
+        if not positions_exist:
+            self._backfill_node_positions(cursor)
+
+    def _migrate_pubkey_hex(self, cursor):
+        """v5 : clé publique normalisée en hexadécimal minuscule, indexée."""
+        # Recherche par préfixe (DM MeshCore) = parcours d'intervalle sur l'index
+        for table in ('meshtastic_nodes', 'meshcore_contacts'):
+            if self._add_missing_columns(cursor, table, [('pubkey_hex', 'TEXT')]):
+                cursor.execute(f'''
+                    UPDATE {table} SET pubkey_hex = lower(hex(publicKey))
+                    WHERE publicKey IS NOT NULL AND length(publicKey) > 0
+                ''')
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_pubkey_hex
+                ON {table}(pubkey_hex)
             ''')
 
-            # ========================================
-            # Table pour les paquets MeshCore UNIQUEMENT
-            # Séparée de la table packets (Meshtastic) pour éviter la confusion
-            # ========================================
+    def _migrate_db_maintenance(self, cursor):
+        """v6 : marqueurs de maintenance (dernière vérification d'intégrité complète...)."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS db_maintenance (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated REAL
+            )
+        ''')
+
+    def _migrate_typed_packet_columns(self, cursor):
+        """v7 : télémétrie et position en colonnes typées (plus de json.loads par ligne à la lecture)."""
+        # Peut déjà avoir été appliquée par les rattrapages v3/v4 sur une base antérieure
+        self._add_typed_packet_columns(cursor)
+
+    def _add_typed_packet_columns(self, cursor):
+        """Ajoute les colonnes typées à packets et meshcore_packets et les remplit depuis le JSON (sans commit)."""
+        for table in ('packets', 'meshcore_packets'):
+            start = time.perf_counter()
+            added = self._add_missing_columns(cursor, table, list(self.TELEMETRY_FIELDS + self.POSITION_FIELDS))
+            if not added:
+                continue
+            telemetry_sets = ', '.join(f"{name} = json_extract(telemetry, '$.{name}')"
+                                       for name, _ in self.TELEMETRY_FIELDS)
+            position_sets = ', '.join(f"{name} = json_extract(position, '$.{name}')"
+                                      for name, _ in self.POSITION_FIELDS)
+            cursor.execute(f"UPDATE {table} SET {telemetry_sets} WHERE telemetry IS NOT NULL AND telemetry != ''")
+            updated = cursor.rowcount
+            cursor.execute(f"UPDATE {table} SET {position_sets} WHERE position IS NOT NULL AND position != ''")
+            updated += cursor.rowcount
+            logger.info(f"Migration DB : {updated} lignes de {table} converties en colonnes typées "
+                        f"en {time.perf_counter() - start:.1f}s")
+
+    def _migrate_message_fts(self, cursor):
+        """v8 : index plein texte des messages publics et des paquets texte."""
+        if not self._fts5_available(cursor):
+            logger.warning("⚠️ SQLite sans FTS5 : recherche des messages par LIKE (lente)")
+            return
+        for table in self.FTS_TABLES:
+            self._create_message_fts(cursor, table)
+
+    def _migrate_neighbor_edges_latest(self, cursor):
+        """v9 : dernière mesure de chaque liaison (node_id, neighbor_id), mise à jour à l'insertion."""
+        # load_neighbors lit cette table (parcours d'index sur timestamp) au lieu de
+        # regrouper tout l'historique neighbors ; l'historique reste pour les tendances
+        edges_exist = self._table_exists(cursor, 'neighbor_edges_latest')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS neighbor_edges_latest (
+                node_id TEXT NOT NULL,
+                neighbor_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                snr REAL,
+                last_rx_time INTEGER,
+                node_broadcast_interval INTEGER,
+                source TEXT DEFAULT 'radio',
+                PRIMARY KEY (node_id, neighbor_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_neighbor_edges_latest_timestamp
+            ON neighbor_edges_latest(timestamp)
+        ''')
+        if not edges_exist:
+            start = time.perf_counter()
+            # Un seul agrégat MAX() : SQLite renvoie les colonnes de la ligne la plus récente
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS meshcore_packets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
+                INSERT OR REPLACE INTO neighbor_edges_latest (
+                    node_id, neighbor_id, timestamp, snr,
+                    last_rx_time, node_broadcast_interval, source
+                )
+                SELECT node_id, neighbor_id, MAX(timestamp), snr,
+                       last_rx_time, node_broadcast_interval, source
+                FROM neighbors
+                GROUP BY node_id, neighbor_id
+            ''')
+            logger.info(f"Liaisons de voisinage reconstruites : {cursor.rowcount} paires "
+                        f"en {time.perf_counter() - start:.2f}s")
+
+    def _migrate_telemetry_tiers(self, cursor):
+        """v10 : moyennes de télémétrie par nœud sur 5 minutes et sur 1 heure, mises à jour à l'insertion."""
+        # Graphes et moyennes sur 7 jours / 1 an lisent un nombre de points borné par nœud,
+        # quelle que soit la fréquence de télémétrie du nœud
+        for table, bucket_seconds, _ in self.TELEMETRY_TIERS:
+            tier_exists = self._table_exists(cursor, table)
+            field_columns = ',\n'.join(
+                f"{name}_sum REAL NOT NULL DEFAULT 0, {name}_count INTEGER NOT NULL DEFAULT 0"
+                for name, _ in self.TELEMETRY_FIELDS
+            )
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket INTEGER NOT NULL,
                     from_id TEXT NOT NULL,
-                    to_id TEXT,
-                    source TEXT DEFAULT 'meshcore',
-                    sender_name TEXT,
-                    packet_type TEXT NOT NULL,
-                    message TEXT,
-                    rssi INTEGER,
-                    snr REAL,
-                    hops INTEGER,
-                    size INTEGER,
-                    is_broadcast INTEGER,
-                    is_encrypted INTEGER DEFAULT 0,
-                    telemetry TEXT,
-                    position TEXT,
-                    hop_limit INTEGER,
-                    hop_start INTEGER,
-                    channel INTEGER DEFAULT 0,
-                    via_mqtt INTEGER DEFAULT 0,
-                    want_ack INTEGER DEFAULT 0,
-                    want_response INTEGER DEFAULT 0,
-                    priority INTEGER DEFAULT 0,
-                    family TEXT,
-                    public_key TEXT
+                    sample_count INTEGER NOT NULL DEFAULT 0,
+                    {field_columns},
+                    last_seen REAL,
+                    PRIMARY KEY (from_id, bucket)
                 )
             ''')
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket)")
+            if not tier_exists:
+                # Rattrapage depuis les paquets bruts encore présents (colonnes typées v7)
+                self._add_typed_packet_columns(cursor)
+                start = time.perf_counter()
+                aggregates = ', '.join(f"COALESCE(SUM({name}), 0), COUNT({name})"
+                                       for name, _ in self.TELEMETRY_FIELDS)
+                has_sample = ' OR '.join(f"{name} IS NOT NULL" for name, _ in self.TELEMETRY_FIELDS)
+                cursor.execute(f'''
+                    INSERT INTO {table} ({', '.join(self.TELEMETRY_TIER_COLUMNS)})
+                    SELECT CAST(timestamp / {bucket_seconds} AS INTEGER) * {bucket_seconds}, from_id,
+                           COUNT(*), {aggregates}, MAX(timestamp)
+                    FROM packets
+                    WHERE from_id IS NOT NULL AND ({has_sample})
+                    GROUP BY 1, 2
+                ''')
+                logger.info(f"Télémétrie {table} reconstruite : {cursor.rowcount} points "
+                            f"en {time.perf_counter() - start:.2f}s")
+                # Partitions d'archive : pas d'ATTACH dans la transaction de migration,
+                # complétées après leur ouverture (_backfill_telemetry_archives)
+                cursor.execute('''
+                    INSERT OR IGNORE INTO db_maintenance (key, value, updated)
+                    VALUES ('telemetry_tiers_archive', '[]', ?)
+                ''', (time.time(),))
+
+    def _migrate_packet_airtime(self, cursor):
+        """v11 : taille du payload et temps d'antenne LoRa par paquet, cumulés par heure et par nœud."""
+        # Les valeurs de l'historique dépendent du preset de modem : calculées après la
+        # migration par backfill_airtime (cf. _init_airtime)
+        self._add_airtime_columns(cursor)
+        self._add_missing_columns(cursor, 'node_stats', [('total_airtime_ms', 'REAL DEFAULT 0')])
+
+    def _add_airtime_columns(self, cursor):
+        """Ajoute les colonnes de temps d'antenne aux tables de paquets et aux agrégats horaires (sans commit)."""
+        for table in ('packets', 'meshcore_packets'):
+            self._add_missing_columns(cursor, table, [('payload_bytes', 'INTEGER'), ('airtime_ms', 'REAL')])
+        if self._table_exists(cursor, 'packet_rollups_hourly'):
+            self._add_missing_columns(cursor, 'packet_rollups_hourly',
+                                      [('airtime_ms', 'REAL NOT NULL DEFAULT 0')])
+
+    @staticmethod
+    def _fts5_available(cursor) -> bool:
+        """Vérifie que le module FTS5 est compilé dans SQLite."""
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+            return True
+        except sqlite3.OperationalError:
+            return False
 
-            # Index pour optimiser les requêtes sur les paquets MeshCore
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_meshcore_packets_timestamp
-                ON meshcore_packets(timestamp)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_meshcore_packets_from_id
-                ON meshcore_packets(from_id)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_meshcore_packets_type
-                ON meshcore_packets(packet_type)
-            ''')
+    def _create_message_fts(self, cursor, table: str, schema: str = 'main') -> bool:
+        """
+        Crée l'index {table}_fts, ses triggers de synchronisation et le remplit (sans commit).
 
-            # ========================================
-            # MIGRATION: Déplacer les paquets MeshCore existants vers la nouvelle table
-            # ========================================
+        Args:
+            cursor: Curseur de la transaction
+            table: Table indexée (clé de FTS_TABLES)
+            schema: Base contenant la table ('main' ou partition attachée)
+
+        Returns:
+            True si l'index vient d'être créé
+        """
+        fts = f"{table}_fts"
+        exists = cursor.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).fetchone()
+        if exists:
+            return False
+
+        packet_type = self.FTS_TABLES[table]
+        new_indexed = "new.message IS NOT NULL" + (f" AND new.packet_type = '{packet_type}'" if packet_type else '')
+        old_indexed = new_indexed.replace('new.', 'old.')
+        watched = 'message, packet_type' if packet_type else 'message'
+
+        start = time.perf_counter()
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE {schema}.{fts} USING fts5(
+                message, content='{table}', content_rowid='id', tokenize='{self.FTS_TOKENIZE}'
+            )
+        ''')
+        # Triggers : noms de tables non qualifiés = même base que le trigger
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {schema}.{fts}_insert AFTER INSERT ON {table}
+            WHEN {new_indexed}
+            BEGIN
+                INSERT INTO {fts} (rowid, message) VALUES (new.id, new.message);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {schema}.{fts}_delete AFTER DELETE ON {table}
+            WHEN {old_indexed}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, message) VALUES ('delete', old.id, old.message);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {schema}.{fts}_update AFTER UPDATE OF {watched} ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, message)
+                    SELECT 'delete', old.id, old.message WHERE {old_indexed};
+                INSERT INTO {fts} (rowid, message)
+                    SELECT new.id, new.message WHERE {new_indexed};
+            END
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {schema}.{fts} (rowid, message)
+            SELECT id, message FROM {schema}.{table} AS new WHERE {new_indexed}
+        ''')
+        logger.info(f"Index plein texte {schema}.{fts} : {cursor.rowcount} messages indexés "
+                    f"en {time.perf_counter() - start:.1f}s")
+        return True
+
+    SQLITE_HEADER = b'SQLite format 3\x00'
+
+    def _startup_integrity(self, cursor) -> str:
+        """
+        Vérification d'intégrité du démarrage selon startup_check.
+
+        Returns:
+            'ok' ou la description du problème détecté
+        """
+        if self.startup_check == 'full':
+            cursor.execute("PRAGMA integrity_check")
+            return cursor.fetchone()[0]
+        if self.startup_check == 'quick':
+            cursor.execute("PRAGMA quick_check")
+            return cursor.fetchone()[0]
+
+        # 'header' : en-tête du fichier + lecture de la page 1 (schéma)
+        if self.db_path != ':memory:' and os.path.exists(self.db_path):
+            with open(self.db_path, 'rb') as f:
+                header = f.read(len(self.SQLITE_HEADER))
+            if header and header != self.SQLITE_HEADER:
+                return f"en-tête SQLite invalide ({header[:16]!r})"
+        cursor.execute("PRAGMA schema_version")
+        cursor.fetchone()
+        return 'ok'
+
+    def _open_read_only(self):
+        """Ouvre la base en lecture seule (URI mode=ro), sans vérification complète ni migration."""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Base de données introuvable : {self.db_path}")
+        self.conn = self._open_read_connection()
+        integrity = self._startup_integrity(self.conn.cursor())
+        if integrity != 'ok':
+            self.conn.close()
+            raise sqlite3.DatabaseError(f"Intégrité DB compromise : {integrity}")
+        logger.info(f"✅ Base de données ouverte en lecture seule : {self.db_path}")
+
+    def get_last_integrity_check(self) -> Optional[Dict[str, Any]]:
+        """
+        Retourne le résultat de la dernière vérification d'intégrité complète.
+
+        Returns:
+            Dict {'result': str, 'timestamp': float} ou None si jamais vérifiée
+        """
+        try:
+            cursor = self._read_conn().cursor()
+            cursor.execute("SELECT value, updated FROM db_maintenance WHERE key = 'integrity_check'")
+            row = cursor.fetchone()
+            if row:
+                return {'result': row['value'], 'timestamp': row['updated']}
+        except sqlite3.Error as e:
+            logger.debug(f"Marqueur de vérification d'intégrité indisponible : {e}")
+        return None
+
+    def schedule_integrity_check(self, min_interval_hours: float = 24) -> bool:
+        """
+        Lance PRAGMA integrity_check dans un thread d'arrière-plan si la dernière
+        vérification complète date de plus de min_interval_hours.
+
+        La vérification utilise sa propre connexion en lecture seule ; le résultat
+        est enregistré dans db_maintenance (persisté entre les redémarrages).
+
+        Args:
+            min_interval_hours: Intervalle minimum entre deux vérifications complètes
+
+        Returns:
+            True si une vérification a été lancée
+        """
+        if self.read_only or self.db_path == ':memory:':
+            return False
+        if self._integrity_thread is not None and self._integrity_thread.is_alive():
+            return False
+        last = self.get_last_integrity_check()
+        if last and time.time() - last['timestamp'] < min_interval_hours * 3600:
+            return False
+
+        self._integrity_thread = threading.Thread(
+            target=self._run_integrity_check,
+            name="TrafficDBIntegrityCheck",
+            daemon=True
+        )
+        self._integrity_thread.start()
+        return True
+
+    def _run_integrity_check(self):
+        """Vérification d'intégrité complète (thread d'arrière-plan)."""
+        start = time.perf_counter()
+        try:
+            conn = self._open_read_connection()
             try:
-                # Vérifier s'il y a des paquets meshcore dans la table packets
-                cursor.execute("SELECT COUNT(*) FROM packets WHERE source = 'meshcore'")
-                meshcore_count = cursor.fetchone()[0]
-                
-                if meshcore_count > 0:
-                    logger.info(f"🔄 Migration: {meshcore_count} paquets MeshCore trouvés dans 'packets'")
-                    
-                    # Copier les paquets meshcore vers meshcore_packets
-                    cursor.execute('''
-                        INSERT INTO meshcore_packets (
-                            timestamp, from_id, to_id, source, sender_name, packet_type,
-                            message, rssi, snr, hops, size, is_broadcast, is_encrypted,
-                            telemetry, position, hop_limit, hop_start, channel, via_mqtt,
-                            want_ack, want_response, priority, family, public_key
-                        )
-                        SELECT 
-                            timestamp, from_id, to_id, 'meshcore', sender_name, packet_type,
-                            message, rssi, snr, hops, size, is_broadcast, is_encrypted,
-                            telemetry, position, hop_limit, hop_start,
-                            COALESCE(channel, 0), COALESCE(via_mqtt, 0),
-                            COALESCE(want_ack, 0), COALESCE(want_response, 0),
-                            COALESCE(priority, 0), family, public_key
-                        FROM packets
-                        WHERE source = 'meshcore'
-                    ''')
-                    
-                    migrated = cursor.rowcount
-                    logger.info(f"✅ Migration: {migrated} paquets MeshCore copiés vers 'meshcore_packets'")
-                    
-                    # Supprimer les paquets meshcore de la table packets
-                    cursor.execute("DELETE FROM packets WHERE source = 'meshcore'")
-                    deleted = cursor.rowcount
-                    logger.info(f"🗑️  Migration: {deleted} paquets MeshCore supprimés de 'packets'")
-                    
-                    self.conn.commit()
-                    logger.info("✅ Migration terminée: tables Meshtastic et MeshCore maintenant séparées")
+                rows = conn.execute("PRAGMA integrity_check").fetchall()
+            finally:
+                conn.close()
+            result = '; '.join(str(row[0]) for row in rows[:5])
+            duration = time.perf_counter() - start
+
+            with self._write_lock:
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO db_maintenance (key, value, updated)
+                    VALUES ('integrity_check', ?, ?)
+                ''', (result, time.time()))
+                self.conn.commit()
+
+            if result == 'ok':
+                logger.info(f"✅ Vérification d'intégrité complète : ok ({duration:.1f}s)")
+            else:
+                logger.error(f"❌ Intégrité DB compromise : {result}")
+                if self.error_callback:
+                    self.error_callback(sqlite3.DatabaseError(result), "integrity_check")
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification d'intégrité : {e}")
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """
+        Applique les PRAGMA de la connexion écrivain.
+
+        En mode WAL, les lecteurs ne bloquent pas l'écrivain (et inversement) et
+        synchronous=NORMAL évite un fsync par commit (le WAL reste cohérent).
+        """
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            if self.wal and self.db_path != ':memory:':
+                mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+                if str(mode).lower() == 'wal':
+                    conn.execute("PRAGMA synchronous = NORMAL")
                 else:
-                    logger.debug("Migration: Aucun paquet MeshCore à migrer")
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Migration MeshCore échouée (peut être déjà faite): {e}")
-                # Ne pas bloquer le démarrage si la migration échoue
-                pass
+                    logger.warning(f"⚠️ Mode WAL non disponible (journal_mode={mode})")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Configuration de la connexion SQLite incomplète : {e}")
+
+    def _open_read_connection(self) -> sqlite3.Connection:
+        """Ouvre une connexion en lecture seule sur la base."""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def _read_conn(self) -> sqlite3.Connection:
+        """
+        Retourne la connexion de lecture du thread courant.
+
+        Chaque thread (workers d'ingestion et de commandes, handlers Telegram via
+        asyncio.to_thread, thread périodique, serveur CLI...) obtient sa propre
+        connexion en lecture seule, gardée dans la limite de read_pool_size.
+        Au-delà, une connexion est ouverte pour l'appel et fermée dès que
+        l'appelant la relâche : la connexion écrivain n'est jamais prêtée hors de
+        _write_lock quand le pool est actif. Sans WAL ou base en mémoire, la
+        connexion écrivain est utilisée.
+
+        Raises:
+            sqlite3.Error: si aucune connexion de lecture ne peut être ouverte
+        """
+        conn = getattr(self._read_local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        if self.read_pool_size <= 0 or not self.wal or self.db_path == ':memory:' or self.conn is None:
+            return self.conn
+
+        with self._read_pool_lock:
+            if len(self._read_conns) >= self.read_pool_size:
+                self._prune_read_connections()
+            pooled = len(self._read_conns) < self.read_pool_size
+            if not pooled:
+                self._read_overflows += 1
+            try:
+                conn = self._open_read_connection()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Connexion de lecture indisponible : {e}")
+                raise
+            if not pooled:
+                return conn
+            self._read_conns[threading.get_ident()] = conn
+
+        self._read_local.conn = conn
+        return conn
+
+    def _prune_read_connections(self):
+        """Ferme les connexions de lecture des threads terminés (appelé sous verrou)."""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in list(self._read_conns):
+            if ident not in alive:
+                try:
+                    self._read_conns.pop(ident).close()
+                except sqlite3.Error:
+                    pass
+
+    def _close_read_connections(self):
+        """Ferme toutes les connexions de lecture."""
+        with self._read_pool_lock:
+            for conn in self._read_conns.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._read_conns.clear()
+        self._read_local = threading.local()
 
-            # Table pour les messages publics
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS public_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
-                    from_id TEXT NOT NULL,
-                    sender_name TEXT,
-                    message TEXT,
-                    rssi INTEGER,
-                    snr REAL,
-                    message_length INTEGER,
-                    source TEXT
-                )
-            ''')
+    def get_read_pool_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état du pool de connexions de lecture.
 
-            # Index pour optimiser les requêtes sur les messages
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_messages_timestamp
-                ON public_messages(timestamp)
-            ''')
+        Returns:
+            dict: journal_mode, connexions ouvertes, taille max, connexions hors pool
+        """
+        journal_mode = None
+        try:
+            journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        except Exception:
+            pass
+        return {
+            'journal_mode': journal_mode,
+            'read_connections': len(self._read_conns),
+            'read_pool_size': self.read_pool_size,
+            'read_overflows': self._read_overflows
+        }
+
+    def _checkpoint_error(self, error: Exception, operation: str):
+        """Transmet un échec de sauvegarde de la base RAM à error_callback (DBErrorMonitor)."""
+        if self.error_callback:
+            self.error_callback(error, operation)
+
+    def get_io_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les écritures sur le stockage depuis l'ouverture de la base.
 
-            # Table pour les statistiques par nœud
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS node_stats (
-                    node_id TEXT PRIMARY KEY,
-                    total_packets INTEGER,
-                    total_bytes INTEGER,
-                    packet_types TEXT,
-                    hourly_activity TEXT,
-                    message_stats TEXT,
-                    telemetry_stats TEXT,
-                    position_stats TEXT,
-                    routing_stats TEXT,
-                    last_updated REAL,
-                    last_battery_level INTEGER,
-                    last_battery_voltage REAL,
-                    last_telemetry_update REAL,
-                    last_temperature REAL,
-                    last_humidity REAL,
-                    last_pressure REAL,
-                    last_air_quality REAL
-                )
-            ''')
+        Les octets viennent de /proc/self/io (tout le processus, écritures tmpfs
+        exclues) : la même mesure sert à comparer le mode RAM et le mode carte SD.
+
+        Returns:
+            dict: mode ('ram' ou 'disk'), bytes_written, bytes_per_hour, elapsed_hours
+                  (+ 'checkpoint' : statistiques de sauvegarde en mode RAM)
+        """
+        started, start_bytes = self._io_start
+        elapsed_hours = max(time.time() - started, 1.0) / 3600
+        current = process_write_bytes()
+        written = current - start_bytes if current is not None and start_bytes is not None else None
+        stats = {
+            'mode': 'ram' if self.checkpointer else 'disk',
+            'bytes_written': written,
+            'bytes_per_hour': written / elapsed_hours if written is not None else None,
+            'elapsed_hours': elapsed_hours,
+        }
+        if self.checkpointer:
+            stats['checkpoint'] = self.checkpointer.get_stats()
+        return stats
+
+    @staticmethod
+    def _node_num(node_id) -> Optional[int]:
+        """
+        Convertit un identifiant de nœud en entier canonique.
+
+        Args:
+            node_id: int, chaîne décimale, "!hex" ou "0xhex"
+
+        Returns:
+            int ou None si l'identifiant n'est pas interprétable
+        """
+        if node_id is None or isinstance(node_id, bool):
+            return None
+        if isinstance(node_id, int):
+            return node_id
+        try:
+            text = str(node_id).strip()
+            if text.startswith('!'):
+                return int(text[1:], 16)
+            if text.lower().startswith('0x'):
+                return int(text, 16)
+            return int(text)
+        except (ValueError, TypeError):
+            return None
+
+    def _packet_row(self, packet: Dict[str, Any], source: Optional[str] = None) -> tuple:
+        """
+        Convertit un paquet en tuple de valeurs dans l'ordre de PACKET_COLUMNS.
+
+        Args:
+            packet: Dictionnaire contenant les informations du paquet
+            source: Source forcée (ex: 'meshcore'), sinon packet['source']
+
+        Returns:
+            tuple: Valeurs prêtes pour l'INSERT
+        """
+        # Convertir les structures complexes en JSON (optionnel : les champs utiles
+        # sont aussi extraits en colonnes typées)
+        telemetry_json = json.dumps(packet.get('telemetry')) if packet.get('telemetry') and self.json_blobs else None
+        position_json = json.dumps(packet.get('position')) if packet.get('position') and self.json_blobs else None
+        telemetry = packet.get('telemetry') if isinstance(packet.get('telemetry'), dict) else {}
+        position = packet.get('position') if isinstance(packet.get('position'), dict) else {}
+        if source == 'meshcore':
+            # Modulation MeshCore propre : pas de temps d'antenne selon le preset Meshtastic
+            payload_bytes, airtime_ms = packet.get('payload_bytes'), packet.get('airtime_ms')
+        else:
+            payload_bytes, airtime_ms = self._packet_airtime(packet)
+
+        return (
+            packet.get('timestamp'),
+            packet.get('from_id'),
+            packet.get('to_id'),
+            source if source is not None else packet.get('source'),
+            packet.get('sender_name'),
+            packet.get('packet_type'),
+            packet.get('message'),
+            packet.get('rssi'),
+            packet.get('snr'),
+            packet.get('hops'),
+            packet.get('size'),
+            1 if packet.get('is_broadcast') else 0,
+            1 if packet.get('is_encrypted') else 0,
+            telemetry_json,
+            position_json,
+            packet.get('hop_limit'),
+            packet.get('hop_start'),
+            packet.get('channel', 0),
+            1 if packet.get('via_mqtt') else 0,
+            1 if packet.get('want_ack') else 0,
+            1 if packet.get('want_response') else 0,
+            packet.get('priority', 0),
+            packet.get('family'),
+            packet.get('public_key'),
+            self._node_num(packet.get('from_id')),
+            self._node_num(packet.get('to_id')),
+            *(telemetry.get(name) for name, _ in self.TELEMETRY_FIELDS),
+            *(position.get(name) for name, _ in self.POSITION_FIELDS),
+            payload_bytes,
+            airtime_ms
+        )
+
+    def _packet_airtime(self, packet: Dict[str, Any]) -> Tuple[int, Optional[float]]:
+        """
+        Taille du payload et temps d'antenne (ms) d'un paquet Meshtastic.
+
+        Valeurs fournies par TrafficMonitor (taille réelle du paquet reçu), sinon
+        estimées depuis le type et le texte, avec la table du preset courant.
+        """
+        payload_bytes = packet.get('payload_bytes')
+        if payload_bytes is None:
+            payload_bytes = estimate_payload_bytes(packet.get('packet_type'), packet.get('message'))
+        airtime_ms = packet.get('airtime_ms')
+        if airtime_ms is None and self._airtime_ms:
+            airtime_ms = self._airtime_ms[min(max(int(payload_bytes), 0), MAX_PAYLOAD_BYTES)]
+        return payload_bytes, airtime_ms
+
+    def _insert_packets(self, cursor, table: str, packets: List[Dict[str, Any]]):
+        """
+        Insère une liste de paquets dans une table (sans commit).
 
-            # Table pour les statistiques globales
+        Args:
+            cursor: Curseur SQLite de la connexion d'écriture
+            table: 'packets' (Meshtastic) ou 'meshcore_packets'
+            packets: Liste de dictionnaires de paquets
+        """
+        source = 'meshcore' if table == 'meshcore_packets' else None
+        placeholders = ', '.join('?' * len(self.PACKET_COLUMNS))
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(self.PACKET_COLUMNS)}) VALUES ({placeholders})",
+            [self._packet_row(packet, source) for packet in packets]
+        )
+        if table == 'packets':
+            self._update_packet_rollups(cursor, packets)
+            self._update_node_positions(cursor, packets)
+            self._update_telemetry_tiers(cursor, packets)
+
+    def _update_node_positions(self, cursor, packets: List[Dict[str, Any]]):
+        """
+        Met à jour la dernière position connue des émetteurs (sans commit).
+
+        Args:
+            cursor: Curseur SQLite de la connexion d'écriture
+            packets: Paquets venant d'être insérés dans la table packets
+        """
+        rows = []
+        for packet in packets:
+            position = packet.get('position')
+            if not isinstance(position, dict):
+                continue
+            lat = position.get('latitude')
+            lon = position.get('longitude')
+            node_num = self._node_num(packet.get('from_id'))
+            if node_num is None or not lat or not lon:
+                continue
+            rows.append((node_num, lat, lon, position.get('altitude'),
+                         packet.get('timestamp') or time.time(), packet.get('source')))
+        if not rows:
+            return
+        cursor.executemany('''
+            INSERT INTO node_positions (node_id, latitude, longitude, altitude, timestamp, source)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(node_id) DO UPDATE SET
+                latitude = excluded.latitude,
+                longitude = excluded.longitude,
+                altitude = excluded.altitude,
+                timestamp = excluded.timestamp,
+                source = excluded.source
+            WHERE excluded.timestamp >= node_positions.timestamp
+        ''', rows)
+
+    def _backfill_node_positions(self, cursor):
+        """Remplit node_positions avec la dernière position valide de chaque nœud dans packets (sans commit)."""
+        # Lit les colonnes typées (v7) : les ajouter d'abord si la base est antérieure
+        self._add_typed_packet_columns(cursor)
+        start = time.perf_counter()
+        # Un seul agrégat MAX() : SQLite renvoie les colonnes de la ligne la plus récente
+        cursor.execute('''
+            INSERT OR REPLACE INTO node_positions (node_id, latitude, longitude, altitude, timestamp, source)
+            SELECT from_num, latitude, longitude, altitude, MAX(timestamp), source
+            FROM packets
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                AND latitude != 0 AND longitude != 0 AND from_num IS NOT NULL
+            GROUP BY from_num
+        ''')
+        logger.info(f"Positions des nœuds reconstruites : {cursor.rowcount} nœuds en {time.perf_counter() - start:.2f}s")
+
+    def load_node_positions(self, hours: int = 720) -> Dict[int, Dict[str, Any]]:
+        """
+        Charge la dernière position connue de tous les nœuds.
+
+        Args:
+            hours: Ancienneté maximale de la position (défaut: 720h = 30 jours)
+
+        Returns:
+            Dict {node_id (int): {'latitude', 'longitude', 'altitude', 'timestamp', 'source'}}
+        """
+        try:
+            cursor = self._read_conn().cursor()
+            cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS global_stats (
-                    id INTEGER PRIMARY KEY CHECK (id = 1),
-                    total_packets INTEGER,
-                    total_bytes INTEGER,
-                    packet_types TEXT,
-                    unique_nodes TEXT,
-                    last_reset REAL
+                SELECT node_id, latitude, longitude, altitude, timestamp, source
+                FROM node_positions
+                WHERE timestamp >= ?
+            ''', (cutoff,))
+            return {
+                row['node_id']: {
+                    'latitude': row['latitude'],
+                    'longitude': row['longitude'],
+                    'altitude': row['altitude'],
+                    'timestamp': row['timestamp'],
+                    'source': row['source']
+                }
+                for row in cursor.fetchall()
+            }
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des positions des nœuds : {e}")
+            return {}
+
+    def _rollup_rows(self, packets: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Agrège une liste de paquets en lignes de packet_rollups_hourly.
+
+        Args:
+            packets: Liste de dictionnaires de paquets
+
+        Returns:
+            list: Tuples dans l'ordre de ROLLUP_COLUMNS
+        """
+        rollups = {}
+        for packet in packets:
+            timestamp = packet.get('timestamp') or time.time()
+            from_id = packet.get('from_id')
+            packet_type = packet.get('packet_type')
+            if from_id is None or packet_type is None:
+                continue
+            bucket = int(timestamp // self.ROLLUP_BUCKET_SECONDS) * self.ROLLUP_BUCKET_SECONDS
+            key = (bucket, str(from_id), packet_type, packet.get('source') or '')
+
+            row = rollups.get(key)
+            if row is None:
+                row = rollups[key] = {
+                    'packet_count': 0, 'bytes_total': 0, 'hops_min': None, 'hops_max': None,
+                    'snr_sum': 0.0, 'snr_count': 0, 'hop_start_max': None, 'hop_start_count': 0,
+                    'channel_util_sum': 0.0, 'channel_util_count': 0,
+                    'air_util_sum': 0.0, 'air_util_count': 0, 'airtime_ms': 0.0,
+                    'last_seen': timestamp, 'sender_name': packet.get('sender_name')
+                }
+
+            row['packet_count'] += 1
+            row['bytes_total'] += packet.get('size') or 0
+            row['airtime_ms'] += self._packet_airtime(packet)[1] or 0.0
+            hops = packet.get('hops')
+            if hops is not None:
+                row['hops_min'] = hops if row['hops_min'] is None else min(row['hops_min'], hops)
+                row['hops_max'] = hops if row['hops_max'] is None else max(row['hops_max'], hops)
+            if packet.get('snr') is not None:
+                row['snr_sum'] += packet['snr']
+                row['snr_count'] += 1
+            hop_start = packet.get('hop_start')
+            if hop_start is not None:
+                row['hop_start_max'] = hop_start if row['hop_start_max'] is None else max(row['hop_start_max'], hop_start)
+                row['hop_start_count'] += 1
+            telemetry = packet.get('telemetry')
+            if isinstance(telemetry, dict):
+                if telemetry.get('channel_util') is not None:
+                    row['channel_util_sum'] += telemetry['channel_util']
+                    row['channel_util_count'] += 1
+                if telemetry.get('air_util') is not None:
+                    row['air_util_sum'] += telemetry['air_util']
+                    row['air_util_count'] += 1
+            if timestamp >= row['last_seen']:
+                row['last_seen'] = timestamp
+                row['sender_name'] = packet.get('sender_name') or row['sender_name']
+
+        return [key + tuple(row[col] for col in self.ROLLUP_COLUMNS[4:]) for key, row in rollups.items()]
+
+    def _update_packet_rollups(self, cursor, packets: List[Dict[str, Any]]):
+        """
+        Met à jour les agrégats horaires avec une liste de paquets (sans commit).
+
+        Args:
+            cursor: Curseur SQLite de la connexion d'écriture
+            packets: Paquets venant d'être insérés dans la table packets
+        """
+        rows = self._rollup_rows(packets)
+        if not rows:
+            return
+        placeholders = ', '.join('?' * len(self.ROLLUP_COLUMNS))
+        cursor.executemany(f'''
+            INSERT INTO packet_rollups_hourly ({', '.join(self.ROLLUP_COLUMNS)})
+            VALUES ({placeholders})
+            ON CONFLICT(hour_bucket, from_id, packet_type, source) DO UPDATE SET
+                packet_count = packet_count + excluded.packet_count,
+                bytes_total = bytes_total + excluded.bytes_total,
+                hops_min = MIN(COALESCE(hops_min, excluded.hops_min), COALESCE(excluded.hops_min, hops_min)),
+                hops_max = MAX(COALESCE(hops_max, excluded.hops_max), COALESCE(excluded.hops_max, hops_max)),
+                snr_sum = snr_sum + excluded.snr_sum,
+                snr_count = snr_count + excluded.snr_count,
+                hop_start_max = MAX(COALESCE(hop_start_max, excluded.hop_start_max), COALESCE(excluded.hop_start_max, hop_start_max)),
+                hop_start_count = hop_start_count + excluded.hop_start_count,
+                channel_util_sum = channel_util_sum + excluded.channel_util_sum,
+                channel_util_count = channel_util_count + excluded.channel_util_count,
+                air_util_sum = air_util_sum + excluded.air_util_sum,
+                air_util_count = air_util_count + excluded.air_util_count,
+                airtime_ms = airtime_ms + excluded.airtime_ms,
+                sender_name = CASE WHEN excluded.last_seen >= last_seen
+                                   THEN COALESCE(excluded.sender_name, sender_name)
+                                   ELSE sender_name END,
+                last_seen = MAX(last_seen, excluded.last_seen)
+        ''', rows)
+
+    def _backfill_packet_rollups(self, cursor):
+        """Reconstruit les agrégats horaires depuis la table packets (sans commit)."""
+        # Lit les colonnes typées (v7) et le temps d'antenne (v11) : les ajouter d'abord si la base est antérieure
+        self._add_typed_packet_columns(cursor)
+        self._add_airtime_columns(cursor)
+        start = time.perf_counter()
+        cursor.execute('DELETE FROM packet_rollups_hourly')
+        cursor.execute(
+            f"INSERT INTO packet_rollups_hourly ({', '.join(self.ROLLUP_COLUMNS)}) "
+            + self.ROLLUP_AGGREGATE_SQL.format(packets='packets', where='')
+        )
+        logger.info(f"Agrégats horaires reconstruits : {cursor.rowcount} lignes en {time.perf_counter() - start:.2f}s")
+
+    @_with_write_lock
+    def rebuild_packet_rollups(self):
+        """Reconstruit entièrement les agrégats horaires depuis la table packets."""
+        try:
+            cursor = self.conn.cursor()
+            self._backfill_packet_rollups(cursor)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Erreur lors de la reconstruction des agrégats horaires : {e}")
+            raise
+
+    def _init_airtime(self, preset):
+        """
+        Charge la table de temps d'antenne du preset de modem.
+
+        Le preset utilisé est enregistré dans db_maintenance : à la première ouverture
+        (ou si la configuration change), l'historique est (re)calculé par backfill_airtime.
+        """
+        try:
+            row = self.conn.execute("SELECT value FROM db_maintenance WHERE key = 'airtime_preset'").fetchone()
+            recorded = row[0] if row else None
+            self.airtime_preset = preset_key(preset or recorded or 'LONG_FAST')
+            self._airtime_ms = airtime_table(self.airtime_preset)
+            if recorded != self.airtime_preset:
+                if recorded:
+                    logger.info(f"Preset de modem modifié ({recorded} → {self.airtime_preset}) : "
+                                f"recalcul du temps d'antenne de l'historique")
+                try:
+                    self.backfill_airtime(recompute=recorded is not None)
+                except Exception as e:
+                    # Preset enregistré malgré l'échec : pas de nouvel essai (long) à chaque
+                    # démarrage ; les nouveaux paquets ont leur temps d'antenne à l'insertion
+                    self._record_airtime_failure(e)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation du temps d'antenne : {e}")
+
+    def _record_airtime_failure(self, error: Exception):
+        """Enregistre le preset et l'échec du calcul de l'historique dans db_maintenance."""
+        now = time.time()
+        with self._write_lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO db_maintenance (key, value, updated)
+                VALUES (?, ?, ?)
+            ''', [('airtime_preset', self.airtime_preset, now),
+                  ('airtime_backfill_error', f"SQLite {sqlite3.sqlite_version} : {error}", now)])
+            self.conn.commit()
+        logger.warning(f"⚠️ Temps d'antenne de l'historique non calculé ({self.airtime_preset}), "
+                       f"pas de nouvel essai au démarrage : {error}")
+
+    @_with_write_lock
+    def backfill_airtime(self, recompute: bool = False) -> Dict[str, int]:
+        """
+        Calcule le temps d'antenne de l'historique avec le preset courant.
+
+        Calcul ensembliste : la durée de chaque taille de payload (0 à 239 octets) est
+        chargée dans une table temporaire, puis la table packets est mise à jour par une
+        seule requête (recherche par clé primaire), sans boucle Python par ligne, sans
+        UPDATE ... FROM (SQLite ≥ 3.33, absent de certaines distributions). La taille
+        des paquets enregistrés avant la v11 est estimée depuis le type et le texte.
+        Les agrégats horaires sont recalculés depuis les paquets bruts ; ceux dont des
+        paquets ont été purgés reçoivent une estimation (paquets × durée nominale du type).
+
+        Args:
+            recompute: Recalculer aussi les paquets qui ont déjà un temps d'antenne
+                       (changement de preset)
+
+        Returns:
+            Nombre de lignes mises à jour par table
+        """
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("DROP TABLE IF EXISTS temp.airtime_lut")
+            cursor.execute("CREATE TEMP TABLE airtime_lut (payload_bytes INTEGER PRIMARY KEY, airtime_ms REAL NOT NULL)")
+            cursor.executemany("INSERT INTO temp.airtime_lut VALUES (?, ?)", enumerate(self._airtime_ms))
+
+            nominal_bytes = ' '.join(f"WHEN '{ptype}' THEN {size}" for ptype, size in NOMINAL_PAYLOAD_BYTES.items())
+            nominal_ms = ' '.join(
+                f"WHEN '{ptype}' THEN {self._airtime_ms[size]!r}" for ptype, size in NOMINAL_PAYLOAD_BYTES.items()
+            )
+            updated = {}
+
+            cursor.execute(f'''
+                UPDATE packets SET payload_bytes = CASE
+                    WHEN packet_type = 'TEXT_MESSAGE_APP' AND length(message) > 0
+                        THEN length(CAST(message AS BLOB)) + {TEXT_DATA_OVERHEAD_BYTES}
+                    ELSE CASE packet_type {nominal_bytes} ELSE {DEFAULT_PAYLOAD_BYTES} END
+                END
+                WHERE payload_bytes IS NULL
+            ''')
+            cursor.execute(f'''
+                UPDATE packets SET airtime_ms = (
+                    SELECT lut.airtime_ms FROM temp.airtime_lut lut
+                    WHERE lut.payload_bytes = MIN(MAX(packets.payload_bytes, 0), {MAX_PAYLOAD_BYTES})
                 )
+                {'' if recompute else 'WHERE airtime_ms IS NULL'}
             ''')
+            updated['packets'] = cursor.rowcount
 
-            # Table pour les statistiques réseau
+            # Agrégats : valeur exacte là où tous les paquets de l'agrégat sont encore
+            # présents dans la table packets, estimation nominale ailleurs. Sous-requête
+            # corrélée sur une table temporaire indexée (UPDATE ... FROM demande SQLite 3.33)
+            bucket = self.ROLLUP_BUCKET_SECONDS
+            cursor.execute("DROP TABLE IF EXISTS temp.airtime_agg")
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS network_stats (
-                    id INTEGER PRIMARY KEY CHECK (id = 1),
-                    total_hops INTEGER,
-                    max_hops_seen INTEGER,
-                    avg_rssi REAL,
-                    avg_snr REAL,
-                    packets_direct INTEGER,
-                    packets_relayed INTEGER
+                CREATE TEMP TABLE airtime_agg (
+                    hour_bucket INTEGER, from_id INTEGER, packet_type TEXT, source TEXT,
+                    packet_count INTEGER, airtime_ms REAL,
+                    PRIMARY KEY (hour_bucket, from_id, packet_type, source)
                 )
             ''')
-
-            # Table pour le cache météo (centralise tous les caches weather/rain/astro)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS weather_cache (
-                    location TEXT NOT NULL,
-                    cache_type TEXT NOT NULL,
-                    data TEXT NOT NULL,
-                    timestamp REAL NOT NULL,
-                    PRIMARY KEY (location, cache_type)
+            cursor.execute(f'''
+                INSERT INTO temp.airtime_agg
+                SELECT CAST(timestamp / {bucket} AS INTEGER) * {bucket},
+                       from_id, packet_type, COALESCE(source, ''),
+                       COUNT(*), COALESCE(SUM(airtime_ms), 0)
+                FROM packets
+                GROUP BY 1, 2, 3, 4
+            ''')
+            cursor.execute(f'''
+                UPDATE packet_rollups_hourly SET airtime_ms = COALESCE(
+                    (SELECT agg.airtime_ms FROM temp.airtime_agg agg
+                     WHERE agg.hour_bucket = packet_rollups_hourly.hour_bucket
+                       AND agg.from_id = packet_rollups_hourly.from_id
+                       AND agg.packet_type = packet_rollups_hourly.packet_type
+                       AND agg.source = packet_rollups_hourly.source
+                       AND agg.packet_count = packet_rollups_hourly.packet_count),
+                    packet_count * CASE packet_type {nominal_ms} ELSE {self._airtime_ms[DEFAULT_PAYLOAD_BYTES]!r} END
                 )
             ''')
+            updated['packet_rollups_hourly'] = cursor.rowcount
 
-            # Index pour nettoyage périodique du cache expiré
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_weather_cache_timestamp
-                ON weather_cache(timestamp)
-            ''')
+                INSERT OR REPLACE INTO db_maintenance (key, value, updated)
+                VALUES ('airtime_preset', ?, ?)
+            ''', (self.airtime_preset, time.time()))
+            cursor.execute("DELETE FROM db_maintenance WHERE key = 'airtime_backfill_error'")
+            cursor.execute("DROP TABLE temp.airtime_lut")
+            cursor.execute("DROP TABLE temp.airtime_agg")
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Erreur lors du calcul du temps d'antenne de l'historique : {e}")
+            raise
 
-            # Table pour les informations de voisinage (neighbor info)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS neighbors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
-                    node_id TEXT NOT NULL,
-                    neighbor_id TEXT NOT NULL,
-                    snr REAL,
-                    last_rx_time INTEGER,
-                    node_broadcast_interval INTEGER,
-                    source TEXT DEFAULT 'radio'
+        logger.info(f"Temps d'antenne ({self.airtime_preset}) : {updated['packets']} paquets, "
+                    f"{updated['packet_rollups_hourly']} agrégats horaires en {time.perf_counter() - start:.2f}s")
+        return updated
+
+    def load_packet_rollups(self, hours: int = 24, packet_types: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Charge les agrégats horaires couvrant les dernières `hours` heures.
+
+        Les heures complètes viennent de packet_rollups_hourly. L'heure partielle au
+        début de la fenêtre est agrégée depuis les paquets bruts, partitions d'archive
+        comprises : les totaux correspondent alors exactement à la fenêtre. Pour un
+        émetteur dont les paquets bruts de cette heure ont été purgés (rétention),
+        l'agrégat de l'heure entière est repris : jusqu'à une heure de trop plutôt
+        qu'une heure perdue.
+
+        Args:
+            hours: Nombre d'heures à couvrir
+            packet_types: Restreindre à ces types de paquets (None = tous)
+
+        Returns:
+            Liste de dictionnaires (clés ROLLUP_COLUMNS)
+        """
+        try:
+            cursor = self._read_conn().cursor()
+            cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
+            bucket = self.ROLLUP_BUCKET_SECONDS
+            first_full_bucket = -(-int(cutoff) // bucket) * bucket
+
+            type_filter = ''
+            type_params = ()
+            if packet_types:
+                type_filter = f" AND packet_type IN ({', '.join('?' * len(packet_types))})"
+                type_params = tuple(packet_types)
+
+            cursor.execute(
+                f"SELECT {', '.join(self.ROLLUP_COLUMNS)} FROM packet_rollups_hourly "
+                f"WHERE hour_bucket >= ?{type_filter}",
+                (first_full_bucket,) + type_params
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+
+            if first_full_bucket > cutoff:
+                bucket_start = first_full_bucket - bucket
+                where = f"WHERE timestamp >= ? AND timestamp < ?{type_filter}"
+                params = (cutoff, first_full_bucket) + type_params
+                partial = [dict(row) for row in self.query_packets(
+                    self.ROLLUP_AGGREGATE_SQL.format(packets='{packets}', where=where),
+                    params + params, since=cutoff, until=first_full_bucket)]
+
+                # Paquets bruts de l'heure entière, comparés à son agrégat : s'il en manque,
+                # ils ont été purgés et l'heure partielle serait incomplète
+                raw_counts = defaultdict(int)
+                for row in self.query_packets(
+                        "SELECT from_id, packet_type, COALESCE(source, '') AS source, COUNT(*) "
+                        f"FROM {{packets}} WHERE timestamp >= ? AND timestamp < ?{type_filter} GROUP BY 1, 2, 3",
+                        (bucket_start, first_full_bucket) + type_params, since=bucket_start, until=first_full_bucket):
+                    raw_counts[(row[0], row[1], row[2])] += row[3]
+                cursor.execute(
+                    f"SELECT {', '.join(self.ROLLUP_COLUMNS)} FROM packet_rollups_hourly "
+                    f"WHERE hour_bucket = ?{type_filter}",
+                    (bucket_start,) + type_params
                 )
-            ''')
-            
-            # Migration : ajouter source si elle n'existe pas
-            try:
-                cursor.execute("SELECT source FROM neighbors LIMIT 1")
-            except sqlite3.OperationalError:
-                # La colonne n'existe pas, l'ajouter
-                logger.info("Migration DB : ajout de la colonne source aux neighbors")
-                cursor.execute("ALTER TABLE neighbors ADD COLUMN source TEXT DEFAULT 'radio'")
+                purged = set()
+                for row in cursor.fetchall():
+                    key = (row['from_id'], row['packet_type'], row['source'])
+                    if raw_counts.get(key, 0) < row['packet_count']:
+                        purged.add(key)
+                        rows.append(dict(row))
+                rows.extend(row for row in partial
+                            if (row['from_id'], row['packet_type'], row['source']) not in purged)
 
-            # Index pour optimiser les requêtes sur les voisins
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_neighbors_timestamp
-                ON neighbors(timestamp)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_neighbors_node_id
-                ON neighbors(node_id)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_neighbors_composite
-                ON neighbors(node_id, neighbor_id, timestamp)
-            ''')
+            return rows
 
-            # Migration : ajouter les colonnes de télémétrie à node_stats si elles n'existent pas
-            try:
-                cursor.execute("SELECT last_battery_level FROM node_stats LIMIT 1")
-            except sqlite3.OperationalError:
-                # Les colonnes n'existent pas, les ajouter
-                logger.info("Migration DB : ajout des colonnes de télémétrie à node_stats")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_battery_level INTEGER")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_battery_voltage REAL")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_telemetry_update REAL")
-            
-            # Migration : ajouter les colonnes d'environnement à node_stats si elles n'existent pas
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des agrégats horaires : {e}")
+            return []
+
+    def _update_telemetry_tiers(self, cursor, packets: List[Dict[str, Any]]):
+        """
+        Ajoute la télémétrie d'une liste de paquets aux tiers de moyennes (sans commit).
+
+        Args:
+            cursor: Curseur SQLite de la connexion d'écriture
+            packets: Paquets venant d'être insérés dans la table packets
+        """
+        fields = [name for name, _ in self.TELEMETRY_FIELDS]
+        samples = []
+        for packet in packets:
+            telemetry = packet.get('telemetry')
+            from_id = packet.get('from_id')
+            if not isinstance(telemetry, dict) or from_id is None:
+                continue
+            values = [telemetry.get(name) for name in fields]
+            if any(value is not None for value in values):
+                samples.append((packet.get('timestamp') or time.time(), str(from_id), values))
+        if not samples:
+            return
+
+        increments = ', '.join(f"{column} = {column} + excluded.{column}"
+                               for column in self.TELEMETRY_TIER_COLUMNS[2:-1])
+        for table, bucket_seconds, _ in self.TELEMETRY_TIERS:
+            points = {}
+            for timestamp, from_id, values in samples:
+                key = (int(timestamp // bucket_seconds) * bucket_seconds, from_id)
+                point = points.get(key)
+                if point is None:
+                    point = points[key] = [0] + [0.0, 0] * len(fields) + [timestamp]
+                point[0] += 1
+                for i, value in enumerate(values):
+                    if value is not None:
+                        point[1 + 2 * i] += value
+                        point[2 + 2 * i] += 1
+                point[-1] = max(point[-1], timestamp)
+            placeholders = ', '.join('?' * len(self.TELEMETRY_TIER_COLUMNS))
+            cursor.executemany(f'''
+                INSERT INTO {table} ({', '.join(self.TELEMETRY_TIER_COLUMNS)})
+                VALUES ({placeholders})
+                ON CONFLICT(from_id, bucket) DO UPDATE SET
+                    {increments},
+                    last_seen = MAX(last_seen, excluded.last_seen)
+            ''', [key + tuple(point) for key, point in points.items()])
+
+    def _telemetry_tier(self, hours: float, conn) -> Optional[Tuple[str, int]]:
+        """
+        Tier lu pour une fenêtre de `hours` heures.
+
+        Returns:
+            (table, largeur du seau en secondes), ou None pour les paquets bruts
+            (fenêtre courte, ou base en lecture seule pas encore migrée)
+        """
+        if hours <= self.TELEMETRY_RAW_HOURS:
+            return None
+        tier = next((t for t in self.TELEMETRY_TIERS if hours <= t[2]), self.TELEMETRY_TIERS[-1])
+        if not self._table_exists(conn.cursor(), tier[0]):
+            return None
+        return tier[0], tier[1]
+
+    @staticmethod
+    def _node_filter(from_ids: Optional[List[str]]) -> Tuple[str, tuple]:
+        if not from_ids:
+            return '', ()
+        return (f" AND from_id IN ({', '.join('?' * len(from_ids))})",
+                tuple(str(from_id) for from_id in from_ids))
+
+    def load_telemetry_series(self, hours: float = 168, from_ids: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """
+        Séries de télémétrie (batterie, tension, channel_util, air_util) par nœud.
+
+        Les fenêtres jusqu'à TELEMETRY_RAW_HOURS lisent les paquets bruts, les suivantes
+        le premier tier de TELEMETRY_TIERS qui couvre la fenêtre (moyenne par seau) :
+        le nombre de points par nœud est borné, quel que soit le débit de télémétrie.
+
+        Args:
+            hours: Fenêtre en heures
+            from_ids: Restreindre à ces nœuds (None = tous)
+
+        Returns:
+            Dict {from_id: [{'timestamp', 'samples', 'battery', 'voltage', 'channel_util', 'air_util'}]}
+            triés par horodatage (début du seau pour un tier ; None si aucune mesure dans le seau)
+        """
+        try:
+            conn = self._read_conn()
+            cutoff = time.time() - hours * 3600
+            fields = [name for name, _ in self.TELEMETRY_FIELDS]
+            node_filter, node_params = self._node_filter(from_ids)
+
+            tier = self._telemetry_tier(hours, conn)
+            if tier is None:
+                has_sample = ' OR '.join(f"{name} IS NOT NULL" for name in fields)
+                rows = self.query_packets(
+                    f"SELECT from_id, timestamp, 1, {', '.join(fields)} FROM {{packets}} "
+                    f"WHERE timestamp >= ? AND ({has_sample}){node_filter}",
+                    (cutoff,) + node_params, since=cutoff)
+                rows.sort(key=lambda row: row[1])  # Partitions d'archive concaténées
+            else:
+                table, bucket_seconds = tier
+                # Une ligne par (nœud, seau) : moyennes calculées par SQLite, dans l'ordre de la clé
+                averages = ', '.join(f"{name}_sum / NULLIF({name}_count, 0)" for name in fields)
+                rows = conn.execute(
+                    f"SELECT from_id, bucket, sample_count, {averages} FROM {table} "
+                    f"WHERE bucket >= ?{node_filter} ORDER BY from_id, bucket",
+                    (int(cutoff // bucket_seconds) * bucket_seconds,) + node_params).fetchall()
+
+            keys = ['timestamp', 'samples'] + fields
+            series = defaultdict(list)
+            for row in rows:
+                series[str(row[0])].append(dict(zip(keys, row[1:])))
+            return dict(series)
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des séries de télémétrie : {e}")
+            return {}
+
+    def load_telemetry_averages(self, hours: float = 24, from_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Moyennes de télémétrie par nœud sur la fenêtre (même choix de tier que load_telemetry_series).
+
+        Returns:
+            Dict {from_id: {'samples', 'battery', 'voltage', 'channel_util', 'air_util'}}
+        """
+        try:
+            conn = self._read_conn()
+            cutoff = time.time() - hours * 3600
+            fields = [name for name, _ in self.TELEMETRY_FIELDS]
+            node_filter, node_params = self._node_filter(from_ids)
+
+            tier = self._telemetry_tier(hours, conn)
+            if tier is None:
+                sums = ', '.join(f"COALESCE(SUM({name}), 0), COUNT({name})" for name in fields)
+                has_sample = ' OR '.join(f"{name} IS NOT NULL" for name in fields)
+                rows = self.query_packets(
+                    f"SELECT from_id, COUNT(*), {sums} FROM {{packets}} "
+                    f"WHERE timestamp >= ? AND ({has_sample}){node_filter} GROUP BY from_id",
+                    (cutoff,) + node_params, since=cutoff)
+            else:
+                table, bucket_seconds = tier
+                sums = ', '.join(f"SUM({name}_sum), SUM({name}_count)" for name in fields)
+                rows = conn.execute(
+                    f"SELECT from_id, SUM(sample_count), {sums} FROM {table} "
+                    f"WHERE bucket >= ?{node_filter} GROUP BY from_id",
+                    (int(cutoff // bucket_seconds) * bucket_seconds,) + node_params).fetchall()
+
+            # Les partitions d'archive renvoient chacune leurs sommes : fusion par nœud
+            totals = {}
+            for row in rows:
+                from_id, values = str(row[0]), list(row[1:])
+                if from_id in totals:
+                    values = [a + b for a, b in zip(totals[from_id], values)]
+                totals[from_id] = values
+
+            averages = {}
+            for from_id, values in totals.items():
+                average = {'samples': values[0]}
+                for i, name in enumerate(fields):
+                    total, count = values[1 + 2 * i], values[2 + 2 * i]
+                    average[name] = total / count if count else None
+                averages[from_id] = average
+            return averages
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des moyennes de télémétrie : {e}")
+            return {}
+
+    def _flush_packet_batch(self, batch: List[tuple]) -> int:
+        """
+        Écrit un lot de la file write-behind en une seule transaction.
+
+        Si le lot échoue (paquet invalide), il est réécrit paquet par paquet dans
+        la même transaction, chacun sous un SAVEPOINT : seuls les paquets fautifs
+        sont écartés.
+
+        Args:
+            batch: Liste de tuples (table, packet)
+
+        Returns:
+            int: Nombre de paquets rejetés
+        """
+        by_table = defaultdict(list)
+        for table, packet in batch:
+            by_table[table].append(packet)
+
+        rejected = []
+        try:
+            with self._write_lock:
+                cursor = self.conn.cursor()
+                try:
+                    for table, packets in by_table.items():
+                        self._insert_packets(cursor, table, packets)
+                except Exception as e:
+                    self.conn.rollback()
+                    logger.warning(f"⚠️ Lot de {len(batch)} paquets refusé ({e}), écriture paquet par paquet")
+                    rejected = self._insert_packets_isolated(cursor, batch)
+                self.conn.commit()
+        except Exception as e:
             try:
-                cursor.execute("SELECT last_temperature FROM node_stats LIMIT 1")
-            except sqlite3.OperationalError:
-                # Les colonnes n'existent pas, les ajouter
-                logger.info("Migration DB : ajout des colonnes d'environnement à node_stats")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_temperature REAL")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_humidity REAL")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_pressure REAL")
-                cursor.execute("ALTER TABLE node_stats ADD COLUMN last_air_quality REAL")
-
-            # Table pour les nœuds Meshtastic (appris via NODEINFO_APP packets radio)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS meshtastic_nodes (
-                    node_id TEXT PRIMARY KEY,
-                    name TEXT,
-                    shortName TEXT,
-                    hwModel TEXT,
-                    publicKey BLOB,
-                    lat REAL,
-                    lon REAL,
-                    alt INTEGER,
-                    last_updated REAL,
-                    source TEXT DEFAULT 'radio'
-                )
-            ''')
+                self.conn.rollback()
+            except Exception:
+                pass
+            logger.error(f"❌ Erreur lors de l'écriture d'un lot de {len(batch)} paquets : {e}")
+            if self.error_callback:
+                try:
+                    self.error_callback(e, 'flush_packet_batch')
+                except Exception as cb_error:
+                    logger.error(f"Erreur dans error_callback: {cb_error}")
+            raise
 
-            # Index pour optimiser la recherche par publicKey
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_meshtastic_nodes_last_updated
-                ON meshtastic_nodes(last_updated)
-            ''')
+        if rejected:
+            logger.error(f"❌ {len(rejected)}/{len(batch)} paquets rejetés : {rejected[0]}")
+            if self.error_callback:
+                try:
+                    self.error_callback(rejected[0], 'flush_packet_batch')
+                except Exception as cb_error:
+                    logger.error(f"Erreur dans error_callback: {cb_error}")
+        return len(rejected)
 
-            # Table pour les contacts MeshCore (appris via meshcore-cli companion)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS meshcore_contacts (
-                    node_id TEXT PRIMARY KEY,
-                    name TEXT,
-                    shortName TEXT,
-                    hwModel TEXT,
-                    publicKey BLOB,
-                    lat REAL,
-                    lon REAL,
-                    alt INTEGER,
-                    last_updated REAL,
-                    source TEXT DEFAULT 'meshcore'
-                )
-            ''')
+    def _insert_packets_isolated(self, cursor, batch: List[tuple]) -> List[Exception]:
+        """
+        Insère les paquets un par un, chacun sous un SAVEPOINT (sans commit).
+
+        Une erreur de la base (OperationalError : disque plein, base verrouillée...)
+        n'est pas propre au paquet : elle interrompt tout le lot.
+
+        Returns:
+            Liste des erreurs des paquets rejetés
+        """
+        rejected = []
+        for table, packet in batch:
+            cursor.execute("SAVEPOINT packet_row")
+            try:
+                self._insert_packets(cursor, table, [packet])
+            except sqlite3.OperationalError:
+                raise
+            except Exception as e:
+                cursor.execute("ROLLBACK TO packet_row")
+                rejected.append(e)
+            cursor.execute("RELEASE packet_row")
+        return rejected
 
-            # Index pour optimiser la recherche par publicKey
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_meshcore_contacts_last_updated
-                ON meshcore_contacts(last_updated)
-            ''')
+    def flush_pending_writes(self) -> int:
+        """
+        Force l'écriture des paquets en attente dans la file write-behind.
 
-            self.conn.commit()
-            logger.info(f"✅ Base de données initialisée : {self.db_path}")
+        Returns:
+            int: Nombre de paquets écrits (0 si write-behind désactivé)
+        """
+        if self.write_queue is None:
+            return 0
+        return self.write_queue.flush()
 
-            # Vérifier que les tables sont bien créées
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            logger.info(f"Tables créées : {', '.join(tables)}")
+    def get_write_queue_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Retourne les métriques de la file write-behind.
 
-        except Exception as e:
-            logger.error(f"❌ Erreur lors de l'initialisation de la base de données : {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            raise
+        Returns:
+            dict ou None: profondeur, latence de vidage, lignes abandonnées...
+                          None si write-behind désactivé
+        """
+        if self.write_queue is None:
+            return None
+        return self.write_queue.get_stats()
 
     def save_packet(self, packet: Dict[str, Any]):
         """
         Sauvegarde un paquet dans la base de données.
 
+        En mode write-behind, le paquet est seulement mis en file: il sera
+        écrit par lot par le thread écrivain.
+
         Args:
             packet: Dictionnaire contenant les informations du paquet
         """
         try:
-            # Vérifier que la connexion est active
-            if self.conn is None:
-                logger.error("Connexion SQLite non initialisée, tentative de reconnexion")
-                self._init_database()
+            if self.write_queue is not None:
+                self.write_queue.put('packets', packet)
+            else:
+                # Vérifier que la connexion est active
                 if self.conn is None:
-                    logger.error("Impossible d'initialiser la connexion SQLite")
-                    return
-
-            cursor = self.conn.cursor()
-
-            # Convertir les structures complexes en JSON
-            telemetry = json.dumps(packet.get('telemetry')) if packet.get('telemetry') else None
-            position = json.dumps(packet.get('position')) if packet.get('position') else None
-
-            cursor.execute('''
-                INSERT INTO packets (
-                    timestamp, from_id, to_id, source, sender_name, packet_type,
-                    message, rssi, snr, hops, size, is_broadcast, is_encrypted, telemetry, position,
-                    hop_limit, hop_start, channel, via_mqtt, want_ack, want_response, priority, family, public_key
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                packet.get('timestamp'),
-                packet.get('from_id'),
-                packet.get('to_id'),
-                packet.get('source'),
-                packet.get('sender_name'),
-                packet.get('packet_type'),
-                packet.get('message'),
-                packet.get('rssi'),
-                packet.get('snr'),
-                packet.get('hops'),
-                packet.get('size'),
-                1 if packet.get('is_broadcast') else 0,
-                1 if packet.get('is_encrypted') else 0,
-                telemetry,
-                position,
-                packet.get('hop_limit'),
-                packet.get('hop_start'),
-                packet.get('channel', 0),
-                1 if packet.get('via_mqtt') else 0,
-                1 if packet.get('want_ack') else 0,
-                1 if packet.get('want_response') else 0,
-                packet.get('priority', 0),
-                packet.get('family'),
-                packet.get('public_key')
-            ))
-
-            self.conn.commit()
+                    logger.error("Connexion SQLite non initialisée, tentative de reconnexion")
+                    self._init_database()
+                    if self.conn is None:
+                        logger.error("Impossible d'initialiser la connexion SQLite")
+                        return
+
+                with self._write_lock:
+                    # Paquet, agrégats, positions et paliers de télémétrie : une seule
+                    # transaction, annulée en cas d'échec (sinon le prochain commit l'écrirait)
+                    try:
+                        cursor = self.conn.cursor()
+                        self._insert_packets(cursor, 'packets', [packet])
+                        self.conn.commit()
+                    except Exception:
+                        self.conn.rollback()
+                        raise
 
             # Log périodique pour suivre l'activité (tous les 50 paquets)
             if not hasattr(self, '_packet_count'):
@@ -569,54 +2119,27 @@ class TrafficPersistence:
             sender_name = packet.get('sender_name', 'Unknown')
             debug_print(f"💾 [MESHCORE] Saving: {packet_type} from {sender_name}")
             
-            # Vérifier que la connexion est active
-            if self.conn is None:
-                error_print("❌ [SAVE-MESHCORE] Connexion SQLite non initialisée, tentative de reconnexion")
-                self._init_database()
+            if self.write_queue is not None:
+                self.write_queue.put('meshcore_packets', packet)
+            else:
+                # Vérifier que la connexion est active
                 if self.conn is None:
-                    error_print("❌ [SAVE-MESHCORE] Impossible d'initialiser la connexion SQLite")
-                    return
-
-            cursor = self.conn.cursor()
-
-            # Convertir les structures complexes en JSON
-            telemetry = json.dumps(packet.get('telemetry')) if packet.get('telemetry') else None
-            position = json.dumps(packet.get('position')) if packet.get('position') else None
-
-            cursor.execute('''
-                INSERT INTO meshcore_packets (
-                    timestamp, from_id, to_id, source, sender_name, packet_type,
-                    message, rssi, snr, hops, size, is_broadcast, is_encrypted, telemetry, position,
-                    hop_limit, hop_start, channel, via_mqtt, want_ack, want_response, priority, family, public_key
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                packet.get('timestamp'),
-                packet.get('from_id'),
-                packet.get('to_id'),
-                'meshcore',  # Force source to 'meshcore'
-                packet.get('sender_name'),
-                packet.get('packet_type'),
-                packet.get('message'),
-                packet.get('rssi'),
-                packet.get('snr'),
-                packet.get('hops'),
-                packet.get('size'),
-                1 if packet.get('is_broadcast') else 0,
-                1 if packet.get('is_encrypted') else 0,
-                telemetry,
-                position,
-                packet.get('hop_limit'),
-                packet.get('hop_start'),
-                packet.get('channel', 0),
-                1 if packet.get('via_mqtt') else 0,
-                1 if packet.get('want_ack') else 0,
-                1 if packet.get('want_response') else 0,
-                packet.get('priority', 0),
-                packet.get('family'),
-                packet.get('public_key')
-            ))
-
-            self.conn.commit()
+                    error_print("❌ [SAVE-MESHCORE] Connexion SQLite non initialisée, tentative de reconnexion")
+                    self._init_database()
+                    if self.conn is None:
+                        error_print("❌ [SAVE-MESHCORE] Impossible d'initialiser la connexion SQLite")
+                        return
+
+                with self._write_lock:
+                    # Même transaction que save_packet, annulée en cas d'échec
+                    try:
+                        cursor = self.conn.cursor()
+                        # Source forcée à 'meshcore' par _insert_packets
+                        self._insert_packets(cursor, 'meshcore_packets', [packet])
+                        self.conn.commit()
+                    except Exception:
+                        self.conn.rollback()
+                        raise
             
             # Log périodique (tous les 10 paquets)
             if not hasattr(self, '_meshcore_packet_count'):
@@ -637,6 +2160,7 @@ class TrafficPersistence:
                 except Exception as cb_error:
                     logger.error(f"Erreur dans error_callback: {cb_error}")
 
+    @_with_write_lock
     def save_public_message(self, message_data: Dict[str, Any]):
         """
         Sauvegarde un message public dans la base de données.
@@ -682,16 +2206,23 @@ class TrafficPersistence:
                 except Exception as cb_error:
                     logger.error(f"Erreur dans error_callback: {cb_error}")
 
-    def save_node_stats(self, node_stats: Dict[str, Dict]):
+    @_with_write_lock
+    def save_node_stats(self, node_stats: Dict[str, Dict]) -> Optional[int]:
         """
-        Sauvegarde les statistiques par nœud.
+        Sauvegarde les statistiques par nœud (un seul executemany, un commit).
+
+        TrafficMonitor ne transmet que les nœuds modifiés depuis le cycle précédent :
+        les nœuds inchangés ne sont ni resérialisés ni réécrits.
 
         Args:
             node_stats: Dictionnaire des statistiques par nœud
+
+        Returns:
+            Nombre de lignes écrites, ou None en cas d'échec
         """
         try:
-            cursor = self.conn.cursor()
             timestamp = datetime.now().timestamp()
+            rows = []
 
             for node_id, stats in node_stats.items():
                 # Extract telemetry stats for last battery data
@@ -710,15 +2241,7 @@ class TrafficPersistence:
                                 last_pressure is not None or last_air_quality is not None)
                 last_telemetry_update = timestamp if has_telemetry else None
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO node_stats (
-                        node_id, total_packets, total_bytes, packet_types,
-                        hourly_activity, message_stats, telemetry_stats,
-                        position_stats, routing_stats, last_updated,
-                        last_battery_level, last_battery_voltage, last_telemetry_update,
-                        last_temperature, last_humidity, last_pressure, last_air_quality
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     node_id,
                     stats.get('total_packets', 0),
                     stats.get('total_bytes', 0),
@@ -735,14 +2258,50 @@ class TrafficPersistence:
                     last_temperature,
                     last_humidity,
                     last_pressure,
-                    last_air_quality
+                    last_air_quality,
+                    stats.get('total_airtime_ms', 0)
                 ))
 
-            self.conn.commit()
+            if rows:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO node_stats (
+                        node_id, total_packets, total_bytes, packet_types,
+                        hourly_activity, message_stats, telemetry_stats,
+                        position_stats, routing_stats, last_updated,
+                        last_battery_level, last_battery_voltage, last_telemetry_update,
+                        last_temperature, last_humidity, last_pressure, last_air_quality,
+                        total_airtime_ms
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                self.conn.commit()
+
+            writes = self._node_stats_writes
+            writes['cycles'] += 1
+            writes['last_rows'] = len(rows)
+            writes['total_rows'] += len(rows)
+            writes['max_rows'] = max(writes['max_rows'], len(rows))
+            return len(rows)
 
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des statistiques par nœud : {e}")
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+            return None
+
+    def get_node_stats_write_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les lignes node_stats écrites par cycle de sauvegarde.
 
+        Returns:
+            dict: cycles, last_rows, total_rows, max_rows, avg_rows
+        """
+        writes = dict(self._node_stats_writes)
+        writes['avg_rows'] = writes['total_rows'] / writes['cycles'] if writes['cycles'] else 0.0
+        return writes
+
+    @_with_write_lock
     def save_global_stats(self, global_stats: Dict):
         """
         Sauvegarde les statistiques globales.
@@ -774,6 +2333,7 @@ class TrafficPersistence:
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des statistiques globales : {e}")
 
+    @_with_write_lock
     def save_network_stats(self, network_stats: Dict):
         """
         Sauvegarde les statistiques réseau.
@@ -815,25 +2375,30 @@ class TrafficPersistence:
             Liste des paquets
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
 
-            cursor.execute('''
-                SELECT * FROM packets
+            rows = self.query_packets('''
+                SELECT * FROM {packets}
                 WHERE timestamp >= ?
                 ORDER BY timestamp DESC
                 LIMIT ?
-            ''', (cutoff, limit))
+            ''', (cutoff, limit), since=cutoff)
+            # Fusion des groupes de partitions (déjà triés : tri linéaire)
+            rows = sorted(rows, key=lambda row: row['timestamp'], reverse=True)[:limit]
 
             packets = []
-            for row in cursor.fetchall():
+            for row in rows:
                 packet = dict(row)
 
-                # Reconvertir les JSON en objets
-                if packet.get('telemetry'):
-                    packet['telemetry'] = json.loads(packet['telemetry'])
-                if packet.get('position'):
-                    packet['position'] = json.loads(packet['position'])
+                # Reconstruire télémétrie et position depuis les colonnes typées
+                # (JSON seulement pour les lignes sans valeur typée)
+                for key, fields in (('telemetry', self.TELEMETRY_FIELDS), ('position', self.POSITION_FIELDS)):
+                    values = {name: packet.pop(name, None) for name, _ in fields}
+                    if any(value is not None for value in values.values()):
+                        packet[key] = values
+                    elif packet.get(key):
+                        packet[key] = json.loads(packet[key])
 
                 packet['is_broadcast'] = bool(packet.get('is_broadcast'))
 
@@ -857,7 +2422,7 @@ class TrafficPersistence:
             Liste des messages
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
 
             cursor.execute('''
@@ -874,6 +2439,86 @@ class TrafficPersistence:
             logger.error(f"Erreur lors du chargement des messages publics : {e}")
             return []
 
+    def search_messages(self, query: str, hours: Optional[float] = None, limit: int = 50,
+                        tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte dans les messages publics et les paquets texte.
+
+        Chaque mot est cherché comme préfixe, sans tenir compte de la casse ni des
+        accents ("antenn" trouve "Antennes"). Les partitions d'archive qui recoupent
+        la fenêtre sont interrogées aussi. Sans index FTS5 (SQLite sans FTS5, base
+        non migrée ouverte en lecture seule), la recherche se replie sur LIKE.
+
+        Args:
+            query: Mots recherchés (tous doivent être présents)
+            hours: Fenêtre de recherche en heures (None = tout l'historique)
+            limit: Nombre maximum de résultats
+            tables: Tables interrogées (défaut: toutes celles de FTS_TABLES)
+
+        Returns:
+            Liste de dicts (colonnes de la ligne + 'source_table'), les plus récents d'abord
+        """
+        tables = list(tables or self.FTS_TABLES)
+        unknown = [table for table in tables if table not in self.FTS_TABLES]
+        if unknown:
+            raise ValueError(f"Table non indexée : {', '.join(unknown)}")
+        terms = query.split()
+        if not terms:
+            return []
+        since = time.time() - hours * 3600 if hours else 0
+
+        results = []
+        try:
+            conn = self._read_conn()
+            for table in tables:
+                results.extend(self._search_table(conn, 'main', table, terms, since, limit))
+
+            partitions = self.partitions.covering(since, None) if self.partitions and 'packets' in tables else []
+            with self._partition_lock(conn):
+                step = self.MAX_ATTACHED_PARTITIONS
+                for index in range(0, len(partitions), step):
+                    with self._attached_partitions(conn, partitions[index:index + step]) as attached:
+                        for schema in attached:
+                            results.extend(self._search_table(conn, schema, 'packets', terms, since, limit))
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche de messages : {e}")
+            return []
+
+        results.sort(key=lambda row: row['timestamp'], reverse=True)
+        return results[:limit]
+
+    def _search_table(self, conn: sqlite3.Connection, schema: str, table: str,
+                      terms: List[str], since: float, limit: int) -> List[Dict[str, Any]]:
+        """Recherche dans une table (index {table}_fts s'il existe, sinon LIKE)."""
+        fts = f"{table}_fts"
+        has_fts = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).fetchone()
+        if has_fts:
+            # Mots entre guillemets : la ponctuation saisie n'est pas lue comme syntaxe FTS5
+            match = ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+            # Parcours de l'index par rowid décroissant (ordre d'insertion) : arrêt dès la limite
+            # atteinte, sans trier toutes les correspondances d'un mot fréquent
+            sql = f'''
+                SELECT t.* FROM {schema}.{fts} f JOIN {schema}.{table} t ON t.id = f.rowid
+                WHERE f.{fts} MATCH ? AND t.timestamp >= ?
+                ORDER BY f.rowid DESC LIMIT ?
+            '''
+            params = [match, since, limit]
+        else:
+            conditions = ['t.message LIKE ?'] * len(terms)
+            params = [f'%{term}%' for term in terms]
+            if self.FTS_TABLES[table]:
+                conditions.append('t.packet_type = ?')
+                params.append(self.FTS_TABLES[table])
+            sql = f'''
+                SELECT t.* FROM {schema}.{table} t
+                WHERE {' AND '.join(conditions)} AND t.timestamp >= ?
+                ORDER BY t.timestamp DESC LIMIT ?
+            '''
+            params += [since, limit]
+        return [dict(row, source_table=table) for row in conn.execute(sql, params).fetchall()]
+
     def load_node_stats(self) -> Dict[str, Dict]:
         """
         Charge les statistiques par nœud.
@@ -882,7 +2527,7 @@ class TrafficPersistence:
             Dictionnaire des statistiques par nœud
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute('SELECT * FROM node_stats')
 
             node_stats = {}
@@ -918,7 +2563,8 @@ class TrafficPersistence:
                     'message_stats': json.loads(row['message_stats']) if row['message_stats'] else {},
                     'telemetry_stats': telemetry_stats,
                     'position_stats': json.loads(row['position_stats']) if row['position_stats'] else {},
-                    'routing_stats': json.loads(row['routing_stats']) if row['routing_stats'] else {}
+                    'routing_stats': json.loads(row['routing_stats']) if row['routing_stats'] else {},
+                    'total_airtime_ms': row['total_airtime_ms'] or 0
                 }
 
             return node_stats
@@ -935,7 +2581,7 @@ class TrafficPersistence:
             Dictionnaire des statistiques globales ou None
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute('SELECT * FROM global_stats WHERE id = 1')
             row = cursor.fetchone()
 
@@ -964,7 +2610,7 @@ class TrafficPersistence:
             Dictionnaire des statistiques réseau ou None
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute('SELECT * FROM network_stats WHERE id = 1')
             row = cursor.fetchone()
 
@@ -984,6 +2630,7 @@ class TrafficPersistence:
             logger.error(f"Erreur lors du chargement des statistiques réseau : {e}")
             return None
 
+    @_with_write_lock
     def save_neighbor_info(self, node_id: str, neighbors: List[Dict], source: str = 'radio'):
         """
         Sauvegarde les informations de voisinage pour un nœud.
@@ -1000,28 +2647,24 @@ class TrafficPersistence:
             cursor = self.conn.cursor()
             timestamp = time.time()
 
+            # Normaliser les IDs
+            if isinstance(node_id, int):
+                node_id_str = f"!{node_id:08x}"
+            else:
+                node_id_str = node_id if node_id.startswith('!') else f"!{node_id}"
+
+            rows = []
             for neighbor in neighbors:
                 neighbor_id = neighbor.get('node_id')
                 if not neighbor_id:
                     continue
 
-                # Normaliser les IDs
-                if isinstance(node_id, int):
-                    node_id_str = f"!{node_id:08x}"
-                else:
-                    node_id_str = node_id if node_id.startswith('!') else f"!{node_id}"
-
                 if isinstance(neighbor_id, int):
                     neighbor_id_str = f"!{neighbor_id:08x}"
                 else:
                     neighbor_id_str = neighbor_id if neighbor_id.startswith('!') else f"!{neighbor_id}"
 
-                cursor.execute('''
-                    INSERT INTO neighbors (
-                        timestamp, node_id, neighbor_id, snr,
-                        last_rx_time, node_broadcast_interval, source
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     timestamp,
                     node_id_str,
                     neighbor_id_str,
@@ -1031,6 +2674,27 @@ class TrafficPersistence:
                     source
                 ))
 
+            # Historique (tendances) + dernière mesure de chaque liaison (load_neighbors)
+            cursor.executemany('''
+                INSERT INTO neighbors (
+                    timestamp, node_id, neighbor_id, snr,
+                    last_rx_time, node_broadcast_interval, source
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            cursor.executemany('''
+                INSERT INTO neighbor_edges_latest (
+                    timestamp, node_id, neighbor_id, snr,
+                    last_rx_time, node_broadcast_interval, source
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(node_id, neighbor_id) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    snr = excluded.snr,
+                    last_rx_time = excluded.last_rx_time,
+                    node_broadcast_interval = excluded.node_broadcast_interval,
+                    source = excluded.source
+                WHERE excluded.timestamp >= neighbor_edges_latest.timestamp
+            ''', rows)
+
             self.conn.commit()
             logger.debug(f"💾 Sauvegarde {len(neighbors)} voisins pour {node_id_str} (source: {source})")
 
@@ -1048,22 +2712,15 @@ class TrafficPersistence:
             Dictionnaire {node_id: [liste de voisins]}
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
 
-            # Récupérer les dernières entrées de voisinage par node/neighbor
+            # Dernière entrée de voisinage par node/neighbor (tenue à jour par save_neighbor_info)
             cursor.execute('''
-                SELECT n1.*
-                FROM neighbors n1
-                INNER JOIN (
-                    SELECT node_id, neighbor_id, MAX(timestamp) as max_timestamp
-                    FROM neighbors
-                    WHERE timestamp >= ?
-                    GROUP BY node_id, neighbor_id
-                ) n2 ON n1.node_id = n2.node_id
-                    AND n1.neighbor_id = n2.neighbor_id
-                    AND n1.timestamp = n2.max_timestamp
-                ORDER BY n1.node_id, n1.timestamp DESC
+                SELECT *
+                FROM neighbor_edges_latest
+                WHERE timestamp >= ?
+                ORDER BY node_id, timestamp DESC
             ''', (cutoff,))
 
             neighbors_by_node = defaultdict(list)
@@ -1075,7 +2732,7 @@ class TrafficPersistence:
                     'last_rx_time': row['last_rx_time'],
                     'node_broadcast_interval': row['node_broadcast_interval'],
                     'timestamp': row['timestamp'],
-                    'source': row['source'] if 'source' in row.keys() else 'radio'  # Default for old data
+                    'source': row['source'] or 'radio'  # Default for old data
                 }
                 neighbors_by_node[node_id].append(neighbor_data)
 
@@ -1085,66 +2742,525 @@ class TrafficPersistence:
             logger.error(f"Erreur lors du chargement des voisins : {e}")
             return {}
 
-    def cleanup_old_data(self, hours: int = 48, node_stats_hours: int = None):
+    def cleanup_old_data(self, hours: int = 48, node_stats_hours: int = None, rollup_hours: int = None,
+                         retention: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Any]:
         """
-        Supprime les données plus anciennes que le nombre d'heures spécifié.
+        Supprime les données plus anciennes que la rétention de chaque table.
+
+        Les suppressions se font par lots (plages de rowid), chacun dans une transaction
+        courte : le verrou d'écriture est relâché entre deux lots pour que l'insertion
+        des paquets continue. Quelques pages libres sont ensuite rendues au système
+        (PRAGMA incremental_vacuum) au lieu d'un VACUUM complet.
+
+        En mode partitionné, les paquets plus anciens que la fenêtre chaude sont d'abord
+        archivés (roll_partitions), puis les partitions entièrement expirées sont
+        supprimées (un fichier par période, sans DELETE ni VACUUM).
 
         Args:
             hours: Nombre d'heures à conserver pour packets/messages/neighbors
             node_stats_hours: Nombre d'heures à conserver pour node_stats (défaut: 168 = 7 jours)
+            rollup_hours: Nombre d'heures à conserver pour les agrégats horaires (défaut: 168 = 7 jours)
+            retention: Rétention par table {table: heures}, None = table conservée
+                       (prioritaire sur les arguments ci-dessus et sur TRAFFIC_DB_RETENTION_HOURS)
+
+        Returns:
+            Dict avec 'deleted' ({table: lignes}), 'pages_reclaimed', 'free_pages' et 'duration'
+            (+ 'partitions_moved' {clé: paquets} et 'partitions_dropped' [clés] en mode partitionné)
         """
+        start = time.perf_counter()
+        report = {'deleted': {}, 'pages_reclaimed': 0, 'free_pages': 0, 'duration': 0.0}
         try:
-            cursor = self.conn.cursor()
-            cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
+            policy = self.retention_policy(hours, node_stats_hours, rollup_hours)
+            if retention:
+                policy.update(retention)
 
-            cursor.execute('DELETE FROM packets WHERE timestamp < ?', (cutoff,))
-            packets_deleted = cursor.rowcount
-            
-            cursor.execute('DELETE FROM public_messages WHERE timestamp < ?', (cutoff,))
-            messages_deleted = cursor.rowcount
-            
-            cursor.execute('DELETE FROM neighbors WHERE timestamp < ?', (cutoff,))
-            neighbors_deleted = cursor.rowcount
+            try:
+                import config
+                batch_size = getattr(config, 'TRAFFIC_DB_RETENTION_BATCH', self.RETENTION_BATCH_SIZE)
+                vacuum_pages = getattr(config, 'TRAFFIC_DB_VACUUM_PAGES', self.INCREMENTAL_VACUUM_PAGES)
+            except:
+                batch_size = self.RETENTION_BATCH_SIZE
+                vacuum_pages = self.INCREMENTAL_VACUUM_PAGES
+
+            if self.partition_rolling:
+                report['partitions_moved'] = self.roll_partitions(batch_size=batch_size)
+                report['partitions_dropped'] = []
+                if policy.get('packets') is not None:
+                    cutoff = (datetime.now() - timedelta(hours=policy['packets'])).timestamp()
+                    report['partitions_dropped'] = self.partitions.drop_expired(cutoff)
+
+            for table, table_hours in policy.items():
+                if table_hours is None or table not in self.RETENTION_TIME_COLUMNS:
+                    continue
+                cutoff = (datetime.now() - timedelta(hours=table_hours)).timestamp()
+                if table == 'packet_rollups_hourly':
+                    cutoff = int(cutoff // self.ROLLUP_BUCKET_SECONDS) * self.ROLLUP_BUCKET_SECONDS
+                report['deleted'][table] = self._delete_expired_rows(table, cutoff, batch_size)
+
+            report['pages_reclaimed'], report['free_pages'] = self._incremental_vacuum(vacuum_pages)
+            report['duration'] = time.perf_counter() - start
+
+            deleted = ', '.join(f"{table}={count}" for table, count in report['deleted'].items())
+            retained = ', '.join(f"{table}>{table_hours}h" for table, table_hours in policy.items()
+                                 if table_hours is not None)
+            logger.info(f"Nettoyage : {deleted} supprimés ({retained}), {report['pages_reclaimed']} pages "
+                        f"libérées ({report['free_pages']} restantes) en {report['duration']:.2f}s")
+            if self.partition_rolling:
+                logger.info(f"Partitions : {sum(report['partitions_moved'].values())} paquets archivés, "
+                            f"{len(report['partitions_dropped'])} partitions expirées supprimées")
 
-            # Clean up stale node_stats entries (default: 7 days retention)
+        except Exception as e:
+            logger.error(f"Erreur lors du nettoyage des anciennes données : {e}")
+        return report
+
+    def retention_policy(self, hours: int = 48, node_stats_hours: int = None,
+                         rollup_hours: int = None) -> Dict[str, Optional[float]]:
+        """
+        Rétention par table utilisée par cleanup_old_data.
+
+        Args:
+            hours: Heures conservées pour packets/messages/neighbors
+            node_stats_hours: Heures conservées pour node_stats (défaut: NODE_STATS_RETENTION_HOURS ou 168)
+            rollup_hours: Heures conservées pour les agrégats (défaut: PACKET_ROLLUP_RETENTION_HOURS ou 168)
+
+        Returns:
+            Dict {table: heures}, None = table jamais nettoyée
+            (surcharges possibles via TRAFFIC_DB_RETENTION_HOURS dans config.py)
+        """
+        overrides = {}
+        try:
+            import config
             if node_stats_hours is None:
-                # Try to get from config, fallback to 168 hours (7 days)
-                try:
-                    import config
-                    node_stats_hours = getattr(config, 'NODE_STATS_RETENTION_HOURS', 168)
-                except:
-                    node_stats_hours = 168
-            
-            node_stats_cutoff = (datetime.now() - timedelta(hours=node_stats_hours)).timestamp()
-            cursor.execute('DELETE FROM node_stats WHERE last_updated < ?', (node_stats_cutoff,))
-            node_stats_deleted = cursor.rowcount
+                node_stats_hours = getattr(config, 'NODE_STATS_RETENTION_HOURS', 168)
+            if rollup_hours is None:
+                rollup_hours = getattr(config, 'PACKET_ROLLUP_RETENTION_HOURS', 168)
+            overrides = getattr(config, 'TRAFFIC_DB_RETENTION_HOURS', None) or {}
+        except:
+            pass
+
+        policy = {
+            'packets': hours,
+            'meshcore_packets': None,
+            'public_messages': hours,
+            'neighbors': hours,
+            # Clean up stale node_stats entries (default: 7 days retention)
+            'node_stats': node_stats_hours if node_stats_hours is not None else 168,
+            # Les agrégats horaires sont conservés plus longtemps que les paquets bruts
+            # (fenêtres /stats exactes sur 7 jours)
+            'packet_rollups_hourly': rollup_hours if rollup_hours is not None else 168,
+        }
+        # Tiers de télémétrie : rétention propre à chaque résolution
+        policy.update({table: tier_hours for table, _, tier_hours in self.TELEMETRY_TIERS})
+        policy.update(overrides)
+        # Dernières liaisons : même rétention que l'historique neighbors, sauf configuration explicite
+        if 'neighbor_edges_latest' not in overrides:
+            policy['neighbor_edges_latest'] = policy['neighbors']
+        return policy
+
+    def _delete_expired_rows(self, table: str, cutoff: float, batch_size: int) -> int:
+        """
+        Supprime les lignes expirées d'une table par plages de rowid.
+
+        Args:
+            table: Table à nettoyer (clé de RETENTION_TIME_COLUMNS)
+            cutoff: Horodatage limite (lignes strictement plus anciennes supprimées)
+            batch_size: Largeur d'une plage de rowid (une transaction par plage)
+
+        Returns:
+            Nombre de lignes supprimées
+        """
+        column = self.RETENTION_TIME_COLUMNS[table]
+        with self._write_lock:
+            row = self.conn.execute(
+                f"SELECT MIN(rowid), MAX(rowid) FROM {table} WHERE {column} < ?", (cutoff,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return 0
+
+        low, high = row
+        deleted = 0
+        while low <= high:
+            with self._write_lock:
+                cursor = self.conn.execute(
+                    f"DELETE FROM {table} WHERE rowid BETWEEN ? AND ? AND {column} < ?",
+                    (low, low + batch_size - 1, cutoff)
+                )
+                deleted += cursor.rowcount
+                self.conn.commit()
+            low += batch_size
+        return deleted
+
+    def _incremental_vacuum(self, max_pages: int):
+        """
+        Rend au plus max_pages pages libres au système de fichiers.
+
+        Sans effet tant que la base n'est pas convertie en auto_vacuum=INCREMENTAL
+        (PRAGMA incremental_vacuum ne fait rien et le fichier garde ses pages libres).
+
+        Returns:
+            tuple (pages libérées, pages libres restantes)
+        """
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            free_before = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_before > 0 and max_pages > 0 and not self.auto_vacuum_pending:
+                # fetchall() : le PRAGMA libère une page par étape
+                cursor.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+                self.conn.commit()
+            free_after = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        return free_before - free_after, free_after
+
+    def vacuum(self):
+        """
+        VACUUM complet de la base (commande /db vacuum).
 
+        Réécrit tout le fichier : convertit aussi une base existante en
+        auto_vacuum=INCREMENTAL, ce qui réactive le vacuum incrémental du nettoyage.
+        """
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
             self.conn.commit()
+            self.auto_vacuum_pending = cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+
+    def _init_partitions(self, period: Optional[str], archive_dir: Optional[str]):
+        """
+        Active les partitions d'archive des paquets.
+
+        La configuration explicite est enregistrée dans db_maintenance ; sans configuration,
+        celle enregistrée est reprise pour que les requêtes (exporteurs en lecture seule
+        compris) couvrent les partitions existantes.
+        """
+        if self.db_path == ':memory:' or self.conn is None:
+            return
+        saved = None
+        try:
+            row = self.conn.execute("SELECT value FROM db_maintenance WHERE key = 'partitions'").fetchone()
+            saved = json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            logger.debug(f"Configuration des partitions indisponible : {e}")
 
-            logger.info(f"Nettoyage : {packets_deleted} paquets, {messages_deleted} messages, {neighbors_deleted} voisins, {node_stats_deleted} node_stats supprimés (packets/messages/neighbors > {hours}h, node_stats > {node_stats_hours}h)")
+        if period is None:
+            if not saved:
+                return
+            period, archive_dir = saved['period'], saved['archive_dir']
+        else:
+            archive_dir = os.path.abspath(archive_dir or os.path.join(
+                os.path.dirname(os.path.abspath(self.disk_path)), 'traffic_archives'))
+            settings = {'period': period, 'archive_dir': archive_dir}
+            if saved != settings and not self.read_only:
+                with self._write_lock:
+                    self.conn.execute('''
+                        INSERT OR REPLACE INTO db_maintenance (key, value, updated)
+                        VALUES ('partitions', ?, ?)
+                    ''', (json.dumps(settings), time.time()))
+                    self.conn.commit()
+        self.partitions = PacketPartitions(archive_dir, period)
+        logger.info(f"✅ Partitions d'archive des paquets ({period}) : {archive_dir}")
 
-            # Optimiser la base de données après le nettoyage
-            cursor.execute('VACUUM')
+    def _backfill_telemetry_archives(self):
+        """
+        Complète les tiers de télémétrie créés par la migration v10 avec les paquets
+        des partitions d'archive (la migration ne lit que main.packets).
 
+        Les partitions traitées sont enregistrées dans le marqueur 'telemetry_tiers_archive'
+        (db_maintenance), dans la même transaction que leurs points : une reprise après
+        interruption ne compte pas deux fois une partition. Le marqueur est supprimé à la fin.
+        """
+        try:
+            row = self.conn.execute(
+                "SELECT value FROM db_maintenance WHERE key = 'telemetry_tiers_archive'").fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Marqueur des tiers de télémétrie indisponible : {e}")
+            return
+        if not row:
+            return
+
+        done = set(json.loads(row[0] or '[]'))
+        partitions = [p for p in (self.partitions.list() if self.partitions else []) if p['key'] not in done]
+        fields = [name for name, _ in self.TELEMETRY_FIELDS]
+        aggregates = ', '.join(f"COALESCE(SUM({name}), 0), COUNT({name})" for name in fields)
+        has_sample = ' OR '.join(f"{name} IS NOT NULL" for name in fields)
+        increments = ', '.join(f"{column} = {column} + excluded.{column}"
+                               for column in self.TELEMETRY_TIER_COLUMNS[2:-1])
+        start = time.perf_counter()
+        points = 0
+        try:
+            with self._write_lock:
+                step = self.MAX_ATTACHED_PARTITIONS
+                for index in range(0, len(partitions), step):
+                    group = partitions[index:index + step]
+                    with self._attached_partitions(self.conn, group) as attached:
+                        # Partitions antérieures aux colonnes typées : NULL, sans point
+                        source = ' UNION ALL '.join(
+                            self._partition_select(self.conn, schema, ['timestamp', 'from_id'] + fields)
+                            for schema in attached)
+                        try:
+                            for table, bucket_seconds, _ in self.TELEMETRY_TIERS:
+                                # Seau à cheval sur la base principale et l'archive : sommes ajoutées
+                                cursor = self.conn.execute(f'''
+                                    INSERT INTO {table} ({', '.join(self.TELEMETRY_TIER_COLUMNS)})
+                                    SELECT CAST(timestamp / {bucket_seconds} AS INTEGER) * {bucket_seconds},
+                                           from_id, COUNT(*), {aggregates}, MAX(timestamp)
+                                    FROM ({source})
+                                    WHERE from_id IS NOT NULL AND ({has_sample})
+                                    GROUP BY 1, 2
+                                    ON CONFLICT(from_id, bucket) DO UPDATE SET
+                                        {increments},
+                                        last_seen = MAX(last_seen, excluded.last_seen)
+                                ''')
+                                points += cursor.rowcount
+                            done.update(partition['key'] for partition in group)
+                            self.conn.execute(
+                                "UPDATE db_maintenance SET value = ?, updated = ? "
+                                "WHERE key = 'telemetry_tiers_archive'",
+                                (json.dumps(sorted(done)), time.time()))
+                            self.conn.commit()
+                        except Exception:
+                            # Pas de DETACH pendant une transaction ouverte
+                            self.conn.rollback()
+                            raise
+                self.conn.execute("DELETE FROM db_maintenance WHERE key = 'telemetry_tiers_archive'")
+                self.conn.commit()
         except Exception as e:
-            logger.error(f"Erreur lors du nettoyage des anciennes données : {e}")
+            self.conn.rollback()
+            logger.error(f"Erreur lors du rattrapage de la télémétrie des partitions d'archive : {e}")
+            return
+        if partitions:
+            logger.info(f"Télémétrie des archives : {points} points depuis {len(partitions)} partitions "
+                        f"en {time.perf_counter() - start:.2f}s")
+
+    def query_packets(self, sql: str, params: tuple = (), since: float = 0,
+                      until: Optional[float] = None) -> List[sqlite3.Row]:
+        """
+        Exécute une requête de lecture sur les paquets, partitions d'archive comprises.
+
+        La requête désigne la table par {packets}. Si aucune partition ne couvre
+        [since, until[, elle porte sur la table packets seule. Sinon {packets} devient
+        l'union des paquets récents et des partitions concernées, attachées le temps
+        de la requête. Au-delà de MAX_ATTACHED_PARTITIONS fichiers, la requête est
+        exécutée par groupes de partitions et les lignes sont concaténées : tri,
+        limite et agrégats sont alors à fusionner par l'appelant.
+
+        Args:
+            sql: Requête SELECT contenant {packets}
+            params: Paramètres de la requête
+            since: Horodatage de début de la fenêtre interrogée
+            until: Horodatage de fin (None = maintenant)
+
+        Returns:
+            Liste de lignes (sqlite3.Row)
+        """
+        conn = self._read_conn()
+        partitions = self.partitions.covering(since, until) if self.partitions else []
+        if not partitions:
+            return conn.execute(sql.format(packets='packets'), params).fetchall()
+
+        rows = []
+        with self._partition_lock(conn):
+            columns = [row[1] for row in conn.execute("PRAGMA main.table_info(packets)")]
+            step = self.MAX_ATTACHED_PARTITIONS
+            for index in range(0, len(partitions), step):
+                selects = [f"SELECT {', '.join(columns)} FROM main.packets"] if index == 0 else []
+                with self._attached_partitions(conn, partitions[index:index + step]) as attached:
+                    selects.extend(self._partition_select(conn, schema, columns) for schema in attached)
+                    source = f"({' UNION ALL '.join(selects)})"
+                    rows.extend(conn.execute(sql.format(packets=source), params).fetchall())
+        return rows
+
+    def _partition_lock(self, conn: sqlite3.Connection):
+        """Verrou d'écriture si conn est la connexion écrivain (repli sans pool de lecture)."""
+        # Pas d'ATTACH pendant la transaction d'un autre thread sur la connexion écrivain
+        if conn is self.conn and not self.read_only:
+            return self._write_lock
+        return contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def _attached_partitions(self, conn: sqlite3.Connection, partitions: List[Dict[str, Any]]):
+        """
+        Attache des partitions (au plus MAX_ATTACHED_PARTITIONS) sous partition_0, partition_1...
+
+        Yields:
+            Liste des noms de schéma attachés, détachés en sortie
+        """
+        writer = conn is self.conn and not self.read_only
+        attached = []
+        try:
+            for partition in partitions:
+                schema = f"partition_{len(attached)}"
+                target = partition['path'] if writer else f"file:{partition['path']}?mode=ro"
+                conn.execute(f"ATTACH DATABASE ? AS {schema}", (target,))
+                attached.append(schema)
+            yield attached
+        finally:
+            for schema in attached:
+                conn.execute(f"DETACH DATABASE {schema}")
+
+    @staticmethod
+    def _partition_select(conn: sqlite3.Connection, schema: str, columns: List[str]) -> str:
+        """SELECT d'une partition aligné sur les colonnes de main.packets (NULL si colonne absente)."""
+        present = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(packets)")}
+        selected = ', '.join(column if column in present else f"NULL AS {column}" for column in columns)
+        return f"SELECT {selected} FROM {schema}.packets"
+
+    def roll_partitions(self, hot_hours: Optional[float] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Déplace les paquets plus anciens que la fenêtre chaude dans leurs partitions d'archive.
+
+        Chaque lot (copie puis suppression) est une transaction courte : le verrou
+        d'écriture est relâché entre deux lots, comme pour le nettoyage.
+
+        Args:
+            hot_hours: Heures conservées dans la base principale (défaut: self.hot_hours)
+            batch_size: Paquets déplacés par transaction (défaut: RETENTION_BATCH_SIZE)
+
+        Returns:
+            Dict {clé de partition: paquets déplacés}
+        """
+        if not self.partition_rolling:
+            return {}
+        hot_hours = self.hot_hours if hot_hours is None else hot_hours
+        batch_size = batch_size or self.RETENTION_BATCH_SIZE
+        cutoff = time.time() - hot_hours * 3600
+        moved = {}
+        while True:
+            with self._write_lock:
+                oldest = self.conn.execute(
+                    "SELECT MIN(timestamp) FROM main.packets WHERE timestamp < ?", (cutoff,)
+                ).fetchone()[0]
+            if oldest is None:
+                break
+            key = self.partitions.key_for(oldest)
+            start, end = self.partitions.bounds(key)
+            count = self._move_to_partition(key, start, min(end, cutoff), batch_size)
+            moved[key] = moved.get(key, 0) + count
+            if count == 0:
+                break
+        return moved
+
+    def _move_to_partition(self, key: str, start: float, end: float, batch_size: int) -> int:
+        """
+        Déplace les paquets de [start, end[ dans la partition key (créée si nécessaire).
+
+        Les identifiants sont conservés (INSERT OR IGNORE) : un déplacement interrompu
+        peut être repris sans doublon.
+
+        Returns:
+            Nombre de paquets déplacés
+        """
+        os.makedirs(self.partitions.archive_dir, exist_ok=True)
+        started = time.perf_counter()
+        moved = 0
+        with self._write_lock:
+            self.conn.execute("ATTACH DATABASE ? AS archive", (self.partitions.path_for(key),))
+            try:
+                columns = self._ensure_partition_schema()
+                self.conn.commit()
+            except Exception:
+                self.conn.execute("DETACH DATABASE archive")
+                raise
+        try:
+            column_list = ', '.join(columns)
+            while True:
+                with self._write_lock:
+                    self.conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.packets ({column_list})
+                        SELECT {column_list} FROM main.packets
+                        WHERE timestamp >= ? AND timestamp < ?
+                        ORDER BY id LIMIT ?
+                    ''', (start, end, batch_size))
+                    cursor = self.conn.execute('''
+                        DELETE FROM main.packets WHERE id IN (
+                            SELECT id FROM main.packets
+                            WHERE timestamp >= ? AND timestamp < ?
+                            ORDER BY id LIMIT ?
+                        )
+                    ''', (start, end, batch_size))
+                    count = cursor.rowcount
+                    self.conn.commit()
+                moved += count
+                if count < batch_size:
+                    break
+        except Exception:
+            with self._write_lock:
+                self.conn.rollback()
+            raise
+        finally:
+            with self._write_lock:
+                self.conn.execute("DETACH DATABASE archive")
+        logger.info(f"Partition {key} : {moved} paquets archivés en {time.perf_counter() - started:.2f}s")
+        return moved
+
+    def _ensure_partition_schema(self) -> List[str]:
+        """
+        Crée (ou complète) la table packets de la partition attachée sous le nom archive.
+
+        Returns:
+            Colonnes de main.packets, dans l'ordre
+        """
+        columns = self.conn.execute("PRAGMA main.table_info(packets)").fetchall()
+        definitions = ', '.join(
+            f"{column['name']} {column['type']}" + (' PRIMARY KEY' if column['pk'] else '')
+            for column in columns
+        )
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS archive.packets ({definitions})")
+        present = {row[1] for row in self.conn.execute("PRAGMA archive.table_info(packets)")}
+        for column in columns:
+            if column['name'] not in present:
+                self.conn.execute(f"ALTER TABLE archive.packets ADD COLUMN {column['name']} {column['type']}")
+        for name, indexed in self.PARTITION_INDEXES:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS archive.{name} ON packets({indexed})")
+        # Index plein texte de la partition (si la base principale en a un) : les messages archivés restent cherchables
+        if self.conn.execute("SELECT 1 FROM main.sqlite_master WHERE name = 'packets_fts'").fetchone():
+            self._create_message_fts(self.conn.cursor(), 'packets', schema='archive')
+        return [column['name'] for column in columns]
+
+    def get_partition_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Retourne l'état des partitions d'archive.
 
+        Returns:
+            Dict {'period', 'archive_dir', 'count', 'size_mb', 'oldest', 'newest'} ou None si désactivé
+        """
+        if not self.partitions:
+            return None
+        partitions = self.partitions.list()
+        return {
+            'period': self.partitions.period,
+            'archive_dir': self.partitions.archive_dir,
+            'count': len(partitions),
+            'size_mb': round(sum(p['size'] for p in partitions) / (1024 * 1024), 2),
+            'oldest': partitions[0]['key'] if partitions else None,
+            'newest': partitions[-1]['key'] if partitions else None,
+        }
+
+    @_with_write_lock
     def clear_all_data(self):
         """Efface toutes les données de trafic de la base de données."""
         try:
             cursor = self.conn.cursor()
 
             cursor.execute('DELETE FROM packets')
+            cursor.execute('DELETE FROM packet_rollups_hourly')
+            cursor.execute('DELETE FROM node_positions')
             cursor.execute('DELETE FROM public_messages')
             cursor.execute('DELETE FROM node_stats')
             cursor.execute('DELETE FROM global_stats')
             cursor.execute('DELETE FROM network_stats')
             cursor.execute('DELETE FROM neighbors')
+            cursor.execute('DELETE FROM neighbor_edges_latest')
+            for table, _, _ in self.TELEMETRY_TIERS:
+                cursor.execute(f'DELETE FROM {table}')
 
             self.conn.commit()
 
+            # Partitions d'archive : suppression des fichiers
+            if self.partitions:
+                self.partitions.drop_expired(float('inf'))
+
             # Optimiser la base de données
-            cursor.execute('VACUUM')
+            self.vacuum()
 
             logger.info("Toutes les données de trafic ont été effacées")
 
@@ -1160,10 +3276,15 @@ class TrafficPersistence:
             Dictionnaire avec les statistiques de la base
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
 
-            cursor.execute('SELECT COUNT(*) as count FROM packets')
-            total_packets = cursor.fetchone()['count']
+            # Paquets récents et partitions d'archive
+            rows = self.query_packets(
+                'SELECT COUNT(*) AS count, MIN(timestamp) AS oldest, MAX(timestamp) AS newest FROM {packets}'
+            )
+            total_packets = sum(row['count'] for row in rows)
+            oldest = min((row['oldest'] for row in rows if row['oldest'] is not None), default=None)
+            newest = max((row['newest'] for row in rows if row['newest'] is not None), default=None)
 
             cursor.execute('SELECT COUNT(*) as count FROM public_messages')
             total_messages = cursor.fetchone()['count']
@@ -1174,16 +3295,11 @@ class TrafficPersistence:
             cursor.execute('SELECT COUNT(*) as count FROM neighbors')
             total_neighbors = cursor.fetchone()['count']
 
-            cursor.execute('SELECT MIN(timestamp) as oldest, MAX(timestamp) as newest FROM packets')
-            row = cursor.fetchone()
-            oldest = row['oldest']
-            newest = row['newest']
-
             # Taille du fichier de base de données
             db_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
             db_size_mb = db_size / (1024 * 1024)
 
-            return {
+            summary = {
                 'total_packets': total_packets,
                 'total_messages': total_messages,
                 'total_nodes': total_nodes,
@@ -1192,6 +3308,9 @@ class TrafficPersistence:
                 'newest_packet': datetime.fromtimestamp(newest).isoformat() if newest else None,
                 'database_size_mb': round(db_size_mb, 2)
             }
+            if self.partitions:
+                summary['partitions'] = self.get_partition_stats()
+            return summary
 
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des statistiques : {e}")
@@ -1210,7 +3329,7 @@ class TrafficPersistence:
             Les données en cache si valides, None sinon
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute('''
                 SELECT data, timestamp FROM weather_cache
                 WHERE location = ? AND cache_type = ?
@@ -1248,7 +3367,7 @@ class TrafficPersistence:
             tuple: (data, age_hours) ou (None, 0) si pas de cache ou trop vieux
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute('''
                 SELECT data, timestamp FROM weather_cache
                 WHERE location = ? AND cache_type = ?
@@ -1274,6 +3393,7 @@ class TrafficPersistence:
             logger.error(f"Erreur lors de la récupération du cache météo avec âge : {e}")
             return (None, 0)
 
+    @_with_write_lock
     def set_weather_cache(self, location: str, cache_type: str, data: str):
         """
         Stocke les données météo en cache.
@@ -1296,6 +3416,7 @@ class TrafficPersistence:
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde du cache météo : {e}")
 
+    @_with_write_lock
     def cleanup_weather_cache(self, max_age_hours: int = 24):
         """
         Nettoie les entrées de cache météo expirées.
@@ -1386,116 +3507,121 @@ class TrafficPersistence:
             Dict avec 'latitude', 'longitude' et 'altitude' ou None si pas trouvé
         """
         try:
-            cursor = self.conn.cursor()
+            node_num = self._node_num(node_id)
+            if node_num is None:
+                debug_print(f"❌ ID de nœud invalide pour la recherche de position: {node_id}")
+                return None
+
+            cursor = self._read_conn().cursor()
             cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
-            
-            # Convertir node_id en différents formats pour maximiser les chances de match
-            search_ids = []
-            
-            # Si c'est un entier ou une chaîne numérique
-            try:
-                if isinstance(node_id, str) and node_id.startswith('!'):
-                    # Format !hex
-                    node_id_int = int(node_id[1:], 16)
-                    search_ids = [node_id, str(node_id_int), node_id_int]
-                elif isinstance(node_id, (int, str)):
-                    node_id_int = int(node_id) if isinstance(node_id, str) else node_id
-                    node_id_hex = f"!{node_id_int:08x}"
-                    search_ids = [str(node_id_int), node_id_int, node_id_hex]
-            except (ValueError, AttributeError):
-                search_ids = [node_id]
-            
-            debug_print(f"get_node_position_from_db: node_id={node_id}, search_ids={search_ids}, hours={hours}")
-            
-            # Essayer de trouver une position avec n'importe quel format d'ID
-            for search_id in search_ids:
-                cursor.execute('''
-                    SELECT position
-                    FROM packets
-                    WHERE from_id = ?
-                        AND timestamp >= ?
-                        AND position IS NOT NULL
-                        AND position != ''
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                ''', (search_id, cutoff))
-                
-                row = cursor.fetchone()
-                if row and row['position']:
-                    try:
-                        position = json.loads(row['position'])
-                        lat = position.get('latitude')
-                        lon = position.get('longitude')
-                        alt = position.get('altitude')
-                        if lat and lon and lat != 0 and lon != 0:
-                            debug_print(f"✅ Position trouvée pour {node_id} (via {search_id}): lat={lat}, lon={lon}, alt={alt}")
-                            return {'latitude': lat, 'longitude': lon, 'altitude': alt}
-                        else:
-                            debug_print(f"⚠️ Position invalide pour {node_id}: lat={lat}, lon={lon}")
-                    except (json.JSONDecodeError, KeyError, TypeError) as e:
-                        debug_print(f"❌ Erreur parsing position pour {node_id}: {e}")
-                        continue
-            
-            debug_print(f"❌ Aucune position trouvée pour {node_id} (cherché: {search_ids})")
+
+            # Lecture directe de la dernière position connue (table node_positions)
+            cursor.execute('''
+                SELECT latitude, longitude, altitude
+                FROM node_positions
+                WHERE node_id = ? AND timestamp >= ?
+            ''', (node_num, cutoff))
+
+            row = cursor.fetchone()
+            if row:
+                debug_print(f"✅ Position trouvée pour {node_id}: lat={row['latitude']}, lon={row['longitude']}, alt={row['altitude']}")
+                return {'latitude': row['latitude'], 'longitude': row['longitude'], 'altitude': row['altitude']}
+
+            debug_print(f"❌ Aucune position trouvée pour {node_id}")
             return None
             
         except Exception as e:
             error_print(f"Erreur lors de la récupération de la position du nœud {node_id} : {e}")
             return None
 
-    def load_radio_links_with_positions(self, hours: int = 24) -> List[Dict]:
+    def load_radio_links_with_positions(self, hours: int = 24, position_hours: int = 720,
+                                        distinct_pairs: bool = False) -> List[Dict]:
         """
         Charge les liaisons radio avec les positions GPS pour calculer les distances.
         
         Args:
             hours: Nombre d'heures à charger
+            position_hours: Ancienneté maximale des positions jointes (défaut: 720h = 30 jours)
+            distinct_pairs: Une seule ligne (la plus récente) par couple émetteur/destinataire
             
         Returns:
-            Liste de dicts avec from_id, to_id, snr, rssi, timestamp, from_lat, from_lon, to_lat, to_lon
+            Liste de dicts avec from_id, to_id, from_num, to_num, snr, rssi, timestamp,
+            sender_lat, sender_lon, from_position et to_position (dernière position connue ou None)
         """
         try:
-            cursor = self.conn.cursor()
             cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
+            position_cutoff = (datetime.now() - timedelta(hours=position_hours)).timestamp()
             
-            # Requête pour récupérer les paquets avec positions GPS quand disponibles
-            # On utilise les données de position stockées dans le JSON position
-            cursor.execute('''
+            # Liaisons directes (sous-requête, partitions d'archive comprises), puis jointure
+            # de la dernière position connue des deux extrémités (table node_positions)
+            rows = self.query_packets('''
                 SELECT 
-                    from_id, 
-                    to_id, 
-                    snr, 
-                    rssi,
-                    timestamp,
-                    position as position_json
-                FROM packets
-                WHERE timestamp >= ?
-                    AND from_id IS NOT NULL 
-                    AND to_id IS NOT NULL
-                    AND to_id != 4294967295
-                    AND to_id != 0
-                    AND from_id != to_id
-                    AND (snr IS NOT NULL OR rssi IS NOT NULL)
-                ORDER BY timestamp DESC
-            ''', (cutoff,))
+                    p.from_id, 
+                    p.to_id, 
+                    p.from_num,
+                    p.to_num,
+                    p.snr, 
+                    p.rssi,
+                    p.timestamp,
+                    p.sender_lat,
+                    p.sender_lon,
+                    fp.latitude AS from_lat, fp.longitude AS from_lon, fp.altitude AS from_alt,
+                    tp.latitude AS to_lat, tp.longitude AS to_lon, tp.altitude AS to_alt
+                FROM (
+                    SELECT from_id, to_id, from_num, to_num, snr, rssi,
+                           {timestamp} AS timestamp, latitude AS sender_lat, longitude AS sender_lon
+                    FROM {packets}
+                    WHERE timestamp >= ?
+                        AND from_num IS NOT NULL 
+                        AND to_num IS NOT NULL
+                        AND to_num != 4294967295
+                        AND to_num != 0
+                        AND from_num != to_num
+                        AND (snr IS NOT NULL OR rssi IS NOT NULL)
+                    {group_by}
+                ) p
+                LEFT JOIN node_positions fp ON fp.node_id = p.from_num AND fp.timestamp >= ?
+                LEFT JOIN node_positions tp ON tp.node_id = p.to_num AND tp.timestamp >= ?
+                ORDER BY p.timestamp DESC
+            '''.format(
+                # Un seul agrégat MAX() : SQLite renvoie les autres colonnes de la ligne la plus récente
+                timestamp='MAX(timestamp)' if distinct_pairs else 'timestamp',
+                group_by='GROUP BY from_num, to_num' if distinct_pairs else '',
+                packets='{packets}'
+            ), (cutoff, position_cutoff, position_cutoff), since=cutoff)
+
+            # Fusion des groupes de partitions : liaison la plus récente par couple, tri global
+            if distinct_pairs:
+                latest = {}
+                for row in rows:
+                    pair = (row['from_num'], row['to_num'])
+                    if pair not in latest or row['timestamp'] > latest[pair]['timestamp']:
+                        latest[pair] = row
+                rows = list(latest.values())
+            rows.sort(key=lambda row: row['timestamp'], reverse=True)
             
             links = []
-            for row in cursor.fetchall():
+            for row in rows:
                 link = {
                     'from_id': row['from_id'],
                     'to_id': row['to_id'],
+                    'from_num': row['from_num'],
+                    'to_num': row['to_num'],
                     'snr': row['snr'],
                     'rssi': row['rssi'],
-                    'timestamp': row['timestamp']
+                    'timestamp': row['timestamp'],
+                    'from_position': None,
+                    'to_position': None
                 }
-                
-                # Parser le JSON de position si présent (position de l'émetteur)
-                if row['position_json']:
-                    try:
-                        position = json.loads(row['position_json'])
-                        link['sender_lat'] = position.get('latitude')
-                        link['sender_lon'] = position.get('longitude')
-                    except (json.JSONDecodeError, KeyError):
-                        pass
+                if row['from_lat'] is not None:
+                    link['from_position'] = {'latitude': row['from_lat'], 'longitude': row['from_lon'], 'altitude': row['from_alt']}
+                if row['to_lat'] is not None:
+                    link['to_position'] = {'latitude': row['to_lat'], 'longitude': row['to_lon'], 'altitude': row['to_alt']}
+
+                # Position portée par le paquet lui-même (colonnes typées)
+                if row['sender_lat'] is not None:
+                    link['sender_lat'] = row['sender_lat']
+                    link['sender_lon'] = row['sender_lon']
                 
                 links.append(link)
             
@@ -1507,6 +3633,7 @@ class TrafficPersistence:
             logger.error(traceback.format_exc())
             return []
 
+    @_with_write_lock
     def save_meshtastic_node(self, node_data: Dict[str, Any], source='meshtastic'):
         """
         Sauvegarde ou met à jour un nœud Meshtastic (appris via radio)
@@ -1550,14 +3677,15 @@ class TrafficPersistence:
             # Insert or replace
             cursor.execute('''
                 INSERT OR REPLACE INTO meshtastic_nodes
-                (node_id, name, shortName, hwModel, publicKey, lat, lon, alt, last_updated, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (node_id, name, shortName, hwModel, publicKey, pubkey_hex, lat, lon, alt, last_updated, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 node_id_str,
                 node_data.get('name'),
                 node_data.get('shortName'),
                 node_data.get('hwModel'),
                 public_key,
+                public_key.hex() if public_key else None,
                 node_data.get('lat'),
                 node_data.get('lon'),
                 node_data.get('alt'),
@@ -1578,6 +3706,7 @@ class TrafficPersistence:
             if self.error_callback:
                 self.error_callback(e, "save_meshtastic_node")
     
+    @_with_write_lock
     def save_meshcore_contact(self, contact_data: Dict[str, Any]):
         """
         Sauvegarde ou met à jour un contact MeshCore (appris via meshcore-cli)
@@ -1645,14 +3774,15 @@ class TrafficPersistence:
             # Insert or replace
             cursor.execute('''
                 INSERT OR REPLACE INTO meshcore_contacts
-                (node_id, name, shortName, hwModel, publicKey, lat, lon, alt, last_updated, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (node_id, name, shortName, hwModel, publicKey, pubkey_hex, lat, lon, alt, last_updated, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 node_id_str,
                 new_name,
                 new_short,
                 contact_data.get('hwModel'),
                 public_key,
+                public_key.hex() if public_key else None,
                 contact_data.get('lat'),
                 contact_data.get('lon'),
                 contact_data.get('alt'),
@@ -1669,6 +3799,32 @@ class TrafficPersistence:
             if self.error_callback:
                 self.error_callback(e, "save_meshcore_contact")
     
+    @staticmethod
+    def _pubkey_prefix_range(pubkey_prefix: str):
+        """
+        Bornes [début, fin) des clés hexadécimales commençant par un préfixe.
+
+        Args:
+            pubkey_prefix: Préfixe hexadécimal normalisé (minuscules, sans espaces)
+
+        Returns:
+            tuple (low, high), ou None si le préfixe n'est pas hexadécimal
+        """
+        if not pubkey_prefix or any(c not in '0123456789abcdef' for c in pubkey_prefix):
+            return None
+        # 'g' suit 'f' : toute clé hex commençant par le préfixe est < préfixe + 'g'
+        return pubkey_prefix, pubkey_prefix + 'g'
+
+    def _find_pubkey_in_table(self, cursor, table: str, pubkey_range) -> Optional[int]:
+        """Recherche par intervalle sur l'index pubkey_hex d'une table de nœuds."""
+        cursor.execute(f'''
+            SELECT node_id FROM {table}
+            WHERE pubkey_hex >= ? AND pubkey_hex < ?
+            LIMIT 1
+        ''', pubkey_range)
+        row = cursor.fetchone()
+        return int(row['node_id']) if row else None
+
     def find_node_by_pubkey_prefix(self, pubkey_prefix: str):
         """
         Recherche un nœud par préfixe de clé publique dans les deux tables
@@ -1684,29 +3840,25 @@ class TrafficPersistence:
         
         # Normalize the prefix (lowercase, no spaces)
         pubkey_prefix = str(pubkey_prefix).lower().strip()
+        pubkey_range = self._pubkey_prefix_range(pubkey_prefix)
+        if pubkey_range is None:
+            debug_print(f"⚠️ Invalid pubkey prefix {pubkey_prefix}")
+            return None, None
         
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             
             # Rechercher dans meshtastic_nodes
-            cursor.execute("SELECT node_id, publicKey FROM meshtastic_nodes WHERE publicKey IS NOT NULL")
-            for row in cursor.fetchall():
-                if row['publicKey']:
-                    public_key_hex = row['publicKey'].hex().lower()
-                    if public_key_hex.startswith(pubkey_prefix):
-                        node_id = int(row['node_id'])
-                        debug_print(f"🔍 Found Meshtastic node 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
-                        return node_id, 'meshtastic'
+            node_id = self._find_pubkey_in_table(cursor, 'meshtastic_nodes', pubkey_range)
+            if node_id is not None:
+                debug_print(f"🔍 Found Meshtastic node 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
+                return node_id, 'meshtastic'
             
             # Rechercher dans meshcore_contacts
-            cursor.execute("SELECT node_id, publicKey FROM meshcore_contacts WHERE publicKey IS NOT NULL")
-            for row in cursor.fetchall():
-                if row['publicKey']:
-                    public_key_hex = row['publicKey'].hex().lower()
-                    if public_key_hex.startswith(pubkey_prefix):
-                        node_id = int(row['node_id'])
-                        debug_print(f"🔍 Found MeshCore contact 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
-                        return node_id, 'meshcore'
+            node_id = self._find_pubkey_in_table(cursor, 'meshcore_contacts', pubkey_range)
+            if node_id is not None:
+                debug_print(f"🔍 Found MeshCore contact 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
+                return node_id, 'meshcore'
             
             debug_print(f"⚠️ No node found with pubkey prefix {pubkey_prefix} in either table")
             return None, None
@@ -1735,19 +3887,19 @@ class TrafficPersistence:
         
         # Normalize the prefix (lowercase, no spaces)
         pubkey_prefix = str(pubkey_prefix).lower().strip()
+        pubkey_range = self._pubkey_prefix_range(pubkey_prefix)
+        if pubkey_range is None:
+            debug_print(f"⚠️ [MESHCORE-ONLY] Invalid pubkey prefix {pubkey_prefix}")
+            return None
         
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             
             # Rechercher SEULEMENT dans meshcore_contacts
-            cursor.execute("SELECT node_id, publicKey FROM meshcore_contacts WHERE publicKey IS NOT NULL")
-            for row in cursor.fetchall():
-                if row['publicKey']:
-                    public_key_hex = row['publicKey'].hex().lower()
-                    if public_key_hex.startswith(pubkey_prefix):
-                        node_id = int(row['node_id'])
-                        debug_print(f"🔍 [MESHCORE-ONLY] Found contact 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
-                        return node_id
+            node_id = self._find_pubkey_in_table(cursor, 'meshcore_contacts', pubkey_range)
+            if node_id is not None:
+                debug_print(f"🔍 [MESHCORE-ONLY] Found contact 0x{node_id:08x} with pubkey prefix {pubkey_prefix}")
+                return node_id
             
             debug_print(f"⚠️ [MESHCORE-ONLY] No MeshCore contact found with pubkey prefix {pubkey_prefix}")
             return None
@@ -1778,7 +3930,7 @@ class TrafficPersistence:
                 }
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             cursor.execute("""
                 SELECT node_id, name, shortName, hwModel, publicKey, lat, lon, alt, last_updated
                 FROM meshtastic_nodes
@@ -1818,7 +3970,7 @@ class TrafficPersistence:
             Dict ou None: Données du nœud ou None si non trouvé
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self._read_conn().cursor()
             
             # Rechercher d'abord dans meshtastic_nodes
             cursor.execute("""
@@ -1867,7 +4019,22 @@ class TrafficPersistence:
             return None
 
     def close(self):
-        """Ferme la connexion à la base de données."""
+        """Ferme la connexion à la base de données (après écriture des paquets en attente)."""
+        if getattr(self, 'write_queue', None) is not None:
+            try:
+                self.write_queue.stop(flush=True)
+            except Exception as e:
+                logger.error(f"Erreur lors du vidage de la file write-behind : {e}")
+            self.write_queue = None
+        if getattr(self, 'checkpointer', None) is not None:
+            # Dernière sauvegarde de la base RAM avant fermeture
+            try:
+                self.checkpointer.stop(self.conn)
+            except Exception as e:
+                logger.error(f"Erreur lors de la sauvegarde finale de la base RAM : {e}")
+            self.checkpointer = None
+        if getattr(self, '_read_conns', None):
+            self._close_read_connections()
         if self.conn:
             self.conn.close()
             logger.info("Connexion à la base de données fermée")
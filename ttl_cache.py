@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de déduplication à durée de vie (TTL) en O(1) amorti.
+
+Les clés sont rangées par ordre d'insertion (OrderedDict) avec leur horodatage :
+toutes ont la même durée de vie, les plus anciennes sont donc en tête et
+l'expiration s'arrête à la première clé encore valide. Chaque ajout ou
+vérification ne coûte que les entrées réellement expirées, au lieu de
+reconstruire tout le dictionnaire à chaque paquet.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Ensemble de clés récentes, chaque clé expirant `ttl` secondes après son dernier ajout.
+
+    Utilisé pour la déduplication des broadcasts émis par le bot (MeshBot._recent_broadcasts) ;
+    les paquets reçus passent par packet_identity.PacketIdentityService (même principe,
+    une fenêtre par transport). Thread-safe : appelable depuis plusieurs threads.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Durée de vie d'une clé en secondes
+            clock: Horloge (monotone par défaut : insensible aux changements d'heure système)
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        """Retire les clés expirées en tête (les plus anciennes)."""
+        entries = self._entries
+        while entries:
+            key, stamp = next(iter(entries.items()))
+            if now - stamp < self.ttl:
+                break
+            entries.popitem(last=False)
+
+    def add(self, key: Hashable):
+        """Ajoute la clé, ou repousse son expiration si elle est déjà présente."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+
+    def check_and_add(self, key: Hashable) -> bool:
+        """
+        Vérifie et enregistre une clé en une seule opération.
+
+        Returns:
+            True si la clé était déjà présente (doublon, expiration inchangée), False sinon
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if key in self._entries:
+                return True
+            self._entries[key] = now
+            return False
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Âge de la clé en secondes, None si absente ou expirée."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            stamp = self._entries.get(key)
+            return None if stamp is None else now - stamp
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.age(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._entries)